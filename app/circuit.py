@@ -0,0 +1,143 @@
+"""
+IDNA EdTech v10.9.0 — Circuit Breakers
+
+One breaker per upstream provider, shared by every request in the process.
+When the provider degrades, turns stop waiting on it and go out text-only:
+
+    closed     requests flow; `failures` consecutive errors, or `slow_calls`
+               consecutive calls slower than slow_ms, open the circuit
+    open       allow() is False — callers fast-fail — for reset_after seconds
+    half-open  one probe request is let through; success closes the circuit,
+               failure (or another slow call) opens it again, and a response
+               that is not the provider's fault frees the probe for the next call
+
+get_breaker(name) returns the shared instance; counters are under
+"circuit.<name>." (opened, rejected) on /health/detail.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app import metrics
+from app.config import TTS_BREAKER_FAILURES, TTS_BREAKER_SLOW_MS, TTS_BREAKER_RESET_S
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure / sustained-latency breaker with a single half-open probe."""
+
+    def __init__(
+        self,
+        name: str,
+        failures: int = 5,
+        slow_ms: int = 5000,
+        slow_calls: int = 3,
+        reset_after: float = 30.0,
+    ):
+        self.name = name
+        self.failure_threshold = failures
+        self.slow_ms = slow_ms
+        self.slow_threshold = slow_calls
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._probe_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """May a request go upstream now? False means fast-fail."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.reset_after:
+                self._state = HALF_OPEN
+                self._probe_at = None
+            if self._state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back (its caller
+                # was cancelled) is given up on after reset_after
+                if self._probe_at is None or now - self._probe_at >= self.reset_after:
+                    self._probe_at = now
+                    return True
+            elif self._state == CLOSED:
+                return True
+        metrics.incr(f"circuit.{self.name}.rejected")
+        return False
+
+    def record_success(self, latency_ms: float = 0) -> None:
+        with self._lock:
+            self._failures = 0
+            if self.slow_ms and latency_ms >= self.slow_ms:
+                self._slow += 1
+                if self._state == HALF_OPEN or self._slow >= self.slow_threshold:
+                    self._open(f"{self._slow} slow calls, last {int(latency_ms)}ms")
+                return
+            self._slow = 0
+            if self._state != CLOSED:
+                logger.info(f"Circuit [{self.name}] closed")
+            self._state = CLOSED
+            self._probe_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open(f"{self._failures} consecutive failures")
+
+    def record_neutral(self) -> None:
+        """A completed call that says nothing about the provider's health (a 4xx
+        for our own request): frees the half-open probe slot, state unchanged."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_at = None
+
+    def _open(self, reason: str) -> None:
+        if self._state != OPEN:
+            metrics.incr(f"circuit.{self.name}.opened")
+            logger.warning(f"Circuit [{self.name}] open for {self.reset_after:.0f}s: {reason}")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_at = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = self._slow = 0
+            self._probe_at = None
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+# Thresholds per provider; anything not listed gets the CircuitBreaker defaults
+_SETTINGS = {
+    "sarvam_tts": dict(failures=TTS_BREAKER_FAILURES, slow_ms=TTS_BREAKER_SLOW_MS,
+                       reset_after=TTS_BREAKER_RESET_S),
+}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The process-wide breaker for a provider."""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **_SETTINGS.get(name, {}))
+        return _breakers[name]
+
+
+def states() -> Dict[str, str]:
+    """Current state of every breaker, for /health/detail."""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers}
@@ -20,6 +20,12 @@ if _env_path.exists():
 # ─── Paths ───────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent
 AUDIO_CACHE_DIR = Path(os.getenv("AUDIO_CACHE_DIR", "/tmp/idna_audio_cache"))
+# v10.9.0: TTS cache bounds — hot clips in memory, LRU-evicted files on disk
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DISK_MB = int(os.getenv("TTS_CACHE_DISK_MB", "512"))
+# v10.9.0: TTS cache snapshot loaded into the disk tier at startup, so a fresh
+# container starts warm (export one with: python -m app.voice.tts_snapshot export)
+TTS_SNAPSHOT_PATH = os.getenv("TTS_SNAPSHOT_PATH", "")
 AUDIO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 # ─── API Keys ────────────────────────────────────────────────────────────────
@@ -31,9 +37,9 @@ SARVAM_API_KEY = os.getenv("SARVAM_API_KEY", "")
 STT_PROVIDER = os.getenv("STT_PROVIDER", "sarvam_saarika")
 # Options: sarvam_saarika (default, handles Hindi-English code-mixing) | groq_whisper | sarvam_saaras
 TTS_PROVIDER = os.getenv("TTS_PROVIDER", "sarvam_bulbul")
-# Options: sarvam_bulbul (only option for now)
+# Options: sarvam_bulbul | mock (local testing/benchmarks)
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai_gpt4o")
-# Options: openai_gpt4o | sarvam_m | self_hosted
+# Options: openai_gpt4o | sarvam_m | self_hosted | mock (local testing/benchmarks)
 
 # ─── Database ────────────────────────────────────────────────────────────────
 DATABASE_URL = os.getenv(
@@ -63,21 +69,93 @@ TTS_MODEL = os.getenv("TTS_MODEL", "bulbul:v3")
 TTS_SAMPLE_RATE = int(os.getenv("TTS_SAMPLE_RATE", "22050"))
 SARVAM_TTS_URL = "https://api.sarvam.ai/text-to-speech"
 SARVAM_TTS_STREAM_URL = "wss://api.sarvam.ai/text-to-speech/stream"
+# v10.9.0: Warm WebSocket connections kept open for streaming TTS (0 = connect per
+# utterance), and how long an unused one is kept before it is closed
+TTS_WS_POOL_SIZE = int(os.getenv("TTS_WS_POOL_SIZE", "2"))
+TTS_WS_IDLE_TIMEOUT = float(os.getenv("TTS_WS_IDLE_TIMEOUT", "60"))
+# v10.9.0: Total Sarvam time one turn may spend, retries included — past it the
+# turn goes out text-only (0 = no budget, 10s per attempt as before)
+TTS_TURN_BUDGET_MS = int(os.getenv("TTS_TURN_BUDGET_MS", "8000"))
+# v10.9.0: Sarvam TTS circuit breaker — opens after this many consecutive failures
+# or 3 consecutive calls slower than TTS_BREAKER_SLOW_MS; probes again after RESET_S
+TTS_BREAKER_FAILURES = int(os.getenv("TTS_BREAKER_FAILURES", "5"))
+TTS_BREAKER_SLOW_MS = int(os.getenv("TTS_BREAKER_SLOW_MS", "5000"))
+TTS_BREAKER_RESET_S = float(os.getenv("TTS_BREAKER_RESET_S", "30"))
+# v10.9.0: How /session/message-stream produces audio
+# full = wait for whole LLM reply, one TTS call (default)
+# sentence = TTS each sentence as it arrives, audio_chunk events in order
+# stream = provider streaming TTS, chunks forwarded as they arrive (progressive playback)
+STREAM_TTS_MODE = os.getenv("STREAM_TTS_MODE", "full")
+STREAM_TTS_MODES = ("full", "sentence", "stream")
+# v10.9.0: How HTTP responses carry audio
+# base64 = inline *_audio_b64 (default) | url = signed /api/audio/{cache_key} link
+AUDIO_DELIVERY = os.getenv("AUDIO_DELIVERY", "base64")
+AUDIO_URL_TTL_SECONDS = int(os.getenv("AUDIO_URL_TTL_SECONDS", "900"))
+# v10.9.0: Precached "Hmm, dekhte hain..." clip as audio chunk 0 of /message-stream
+# when the predicted time to first audio exceeds this many ms (0 = off)
+THINKING_FILLER_MS = int(os.getenv("THINKING_FILLER_MS", "1500"))
+# v10.9.0: Content-bank precache job — Sarvam requests per second (token bucket),
+# burst size, and how many synthesis calls may be in flight at once
+TTS_PRECACHE_RATE = float(os.getenv("TTS_PRECACHE_RATE", "1.0"))
+TTS_PRECACHE_BURST = int(os.getenv("TTS_PRECACHE_BURST", "2"))
+TTS_PRECACHE_CONCURRENCY = int(os.getenv("TTS_PRECACHE_CONCURRENCY", "4"))
+# v10.9.0: Cache TTS per sentence — multi-sentence text is looked up sentence by
+# sentence, only the missing ones are synthesized and the MP3 frames are joined
+TTS_SENTENCE_CACHE = os.getenv("TTS_SENTENCE_CACHE", "true").lower() == "true"
 
 # ─── STT Settings ────────────────────────────────────────────────────────────
 GROQ_WHISPER_MODEL = "whisper-large-v3-turbo"
 GROQ_STT_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
 SARVAM_STT_URL = "https://api.sarvam.ai/speech-to-text"
+SARVAM_STT_STREAM_URL = "wss://api.sarvam.ai/speech-to-text/ws"
 STT_CONFIDENCE_THRESHOLD = float(os.getenv("STT_CONFIDENCE_THRESHOLD", "0.4"))
 # Auto-detect language for Hinglish (code-mixed Hindi-English) speakers
 # Valid Sarvam values: unknown, hi-IN, bn-IN, kn-IN, ml-IN, mr-IN, od-IN, pa-IN, ta-IN, te-IN, en-IN, gu-IN
 STT_DEFAULT_LANGUAGE = "unknown"
+# v10.9.0: Long-lived STT clients — HTTP/2 when the h2 package is installed
+STT_HTTP2 = os.getenv("STT_HTTP2", "true").lower() == "true"
+STT_MAX_CONNECTIONS = int(os.getenv("STT_MAX_CONNECTIONS", "20"))
+STT_KEEPALIVE_S = float(os.getenv("STT_KEEPALIVE_S", "60"))
+# v10.9.0: Audio conditioning before upload (needs ffmpeg): energy VAD trims
+# silence and turns clips without speech into "[silence]" with no STT call
+STT_CONDITION_AUDIO = os.getenv("STT_CONDITION_AUDIO", "true").lower() == "true"
+STT_VAD_THRESHOLD_DB = float(os.getenv("STT_VAD_THRESHOLD_DB", "-45"))
+STT_MIN_SPEECH_MS = int(os.getenv("STT_MIN_SPEECH_MS", "200"))
+STT_VAD_PAD_MS = int(os.getenv("STT_VAD_PAD_MS", "200"))
+STT_RESAMPLE_16K = os.getenv("STT_RESAMPLE_16K", "true").lower() == "true"
+# v10.9.0: Streaming STT on /session/ws (sarvam | mock | off); at end of speech
+# wait this long for the final transcript before using the last partial.
+# Server side only — web/student.html does not stream PCM yet, so off by default
+STT_STREAM_PROVIDER = os.getenv("STT_STREAM_PROVIDER", "off")
+STT_STREAM_FINAL_MS = int(os.getenv("STT_STREAM_FINAL_MS", "300"))
+# v10.9.0: Hedged STT race — the secondary provider starts after STT_RACE_AFTER_MS
+# (0 = in parallel) and the first non-garbled transcript wins
+STT_RACE = os.getenv("STT_RACE", "false").lower() == "true"
+STT_RACE_SECONDARY = os.getenv("STT_RACE_SECONDARY", "groq_whisper")
+STT_RACE_AFTER_MS = int(os.getenv("STT_RACE_AFTER_MS", "800"))
+# v10.9.0: Transcripts of byte-identical uploads (client retries) reused for this
+# long (0 = off), and how many are kept
+STT_RESULT_CACHE_TTL_S = float(os.getenv("STT_RESULT_CACHE_TTL_S", "300"))
+STT_RESULT_CACHE_SIZE = int(os.getenv("STT_RESULT_CACHE_SIZE", "256"))
+# v10.9.0: Retried turns with the same Idempotency-Key replay the first response;
+# a retry waits at most IDEMPOTENCY_WAIT_S for an in-flight first attempt
+IDEMPOTENCY_TTL_S = float(os.getenv("IDEMPOTENCY_TTL_S", "300"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "500"))
+IDEMPOTENCY_WAIT_S = float(os.getenv("IDEMPOTENCY_WAIT_S", "30"))
+# v10.9.0: Stored streams keep audio clips by URL; one still larger than this
+# (inline stream-mode audio) is not kept and its retry runs the turn again
+IDEMPOTENCY_MAX_ENTRY_KB = int(os.getenv("IDEMPOTENCY_MAX_ENTRY_KB", "256"))
 
 # ─── LLM Settings ────────────────────────────────────────────────────────────
 # Didi tutor LLM - gpt-4.1-mini for better instruction following
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4.1-mini")
 LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "250"))
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.3"))
+# v10.9.0: Hedged requests (opt-in). If the first token has not arrived after
+# LLM_HEDGE_AFTER_MS (set to the observed p95), fire a second identical
+# request; the first to respond wins and the other is cancelled.
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_AFTER_MS = int(os.getenv("LLM_HEDGE_AFTER_MS", "1500"))
 
 # ─── Session Settings ────────────────────────────────────────────────────────
 SESSION_TIMEOUT_MINUTES = int(os.getenv("SESSION_TIMEOUT_MINUTES", "30"))
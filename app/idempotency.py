@@ -0,0 +1,131 @@
+"""
+IDNA EdTech v10.9.0 — Idempotent Turn Requests
+
+A client that loses the connection mid-turn retries the same request with the
+same Idempotency-Key header. Without this, the retry would re-run STT, the
+LLM and TTS and write the turn to the session twice. With it:
+
+    finished     the stored response is replayed
+    in progress  the retry waits for the first request (at most wait_s), then
+                 replays it; an owner that never finishes is taken over
+    failed       (error or client gone before the end) nothing is stored; the
+                 retry runs the turn itself
+
+Keys are scoped per student and endpoint and kept for IDEMPOTENCY_TTL_S. Each
+key also records a fingerprint of the request; a reused key with a different
+request raises IdempotencyKeyReused instead of replaying another turn.
+Counters: idempotency.replayed, idempotency.waited, idempotency.stale,
+idempotency.reused.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Union
+
+from app import metrics
+from app.config import IDEMPOTENCY_TTL_S, IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_WAIT_S
+
+
+class IdempotencyKeyReused(ValueError):
+    """The key was already used for a request with a different fingerprint."""
+
+
+def fingerprint(*parts: Union[str, bytes, None]) -> str:
+    """Digest of the request parts a key is bound to (session, text, audio...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part or "").encode()
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """Completed responses by key (count-bounded LRU, ttl_s each) plus in-flight markers."""
+
+    def __init__(self, ttl_s: float, max_entries: int, wait_s: float = IDEMPOTENCY_WAIT_S):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.wait_s = wait_s
+        self._done: OrderedDict = OrderedDict()   # key → (expires at, fingerprint, response)
+        self._running: dict = {}                   # key → (future set when the owner finishes, fingerprint)
+
+    def _stored(self, key: Hashable) -> Optional[tuple]:
+        entry = self._done.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._done[key]
+            return None
+        return entry
+
+    @staticmethod
+    def _check(stored_fp: Optional[str], request_fp: Optional[str]) -> None:
+        if stored_fp is not None and request_fp is not None and stored_fp != request_fp:
+            metrics.incr("idempotency.reused")
+            raise IdempotencyKeyReused("Idempotency-Key reused with a different request")
+
+    async def claim(self, key: Hashable, fingerprint: Optional[str] = None) -> Optional[Any]:
+        """
+        The stored response for key (waiting for an in-flight owner first), or
+        None — the caller now owns key and must complete() or release() it.
+        An owner still running after wait_s is treated as gone and taken over.
+        """
+        while True:
+            entry = self._stored(key)
+            if entry is not None:
+                self._check(entry[1], fingerprint)
+                metrics.incr("idempotency.replayed")
+                return entry[2]
+            running = self._running.get(key)
+            if running is None:
+                break
+            self._check(running[1], fingerprint)
+            metrics.incr("idempotency.waited")
+            done, _ = await asyncio.wait([running[0]], timeout=self.wait_s)
+            if not done and self._running.get(key) is running:
+                metrics.incr("idempotency.stale")
+                self.release(key)
+        self._running[key] = (asyncio.get_running_loop().create_future(), fingerprint)
+        return None
+
+    def complete(self, key: Hashable, response: Any) -> None:
+        running = self._running.get(key)
+        self._done.pop(key, None)
+        self._done[key] = (time.monotonic() + self.ttl_s, running[1] if running else None, response)
+        while len(self._done) > self.max_entries:
+            self._done.popitem(last=False)
+        self.release(key)
+
+    def release(self, key: Hashable) -> None:
+        running = self._running.pop(key, None)
+        if running is not None and not running[0].done():
+            running[0].set_result(None)
+
+    async def run(self, key: Hashable, produce: Callable[[], Awaitable[Any]],
+                  fingerprint: Optional[str] = None) -> Any:
+        """produce() once per key; retries get its response."""
+        response = await self.claim(key, fingerprint)
+        if response is not None:
+            return response
+        try:
+            response = await produce()
+        except BaseException:
+            self.release(key)
+            raise
+        self.complete(key, response)
+        return response
+
+    def clear(self) -> None:
+        self._done.clear()
+        for key in list(self._running):
+            self.release(key)
+
+
+_store = IdempotencyStore(IDEMPOTENCY_TTL_S, IDEMPOTENCY_MAX_ENTRIES)
+
+
+def get_store() -> IdempotencyStore:
+    return _store
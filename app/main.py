@@ -11,6 +11,7 @@ v8.0: Complete session management rewrite with:
 - Reteach cap at 3 with CB material injection
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -19,9 +20,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
+from app import circuit, metrics
 from app.config import CORS_ORIGINS, LOG_LEVEL, BASE_DIR
 from app.database import init_db, SessionLocal
 from app.models import Question, Student
+from app.voice.tts_cache import get_tts_cache
 
 logger = logging.getLogger("idna")
 
@@ -81,46 +84,66 @@ async def lifespan(app: FastAPI):
     finally:
         db.close()
 
+    # v10.9.0: Fill the disk tier from a cache snapshot before the precache job
+    # decides what is missing — a cold container starts warm
+    from app.config import TTS_SNAPSHOT_PATH
+    if TTS_SNAPSHOT_PATH:
+        try:
+            from app.voice.tts_snapshot import import_snapshot
+
+            await asyncio.to_thread(import_snapshot, TTS_SNAPSHOT_PATH)
+        except Exception as e:
+            logger.error(f"TTS snapshot import failed: {e}")
+
     # v7.5.2: Start TTS precache in background (PostgreSQL-backed)
     try:
         from content_bank.loader import get_content_bank
-        from app.voice.tts_precache import precache_content_bank, get_cache_stats_db
-        from app.voice.tts import get_tts
+        from app.voice.tts_precache import (
+            precache_content_bank, precache_texts, collect_fixed_texts, languages_in_use,
+            get_cache_stats_db, purge_legacy_keys,
+        )
+        from app.voice.tts import get_tts, MockTTS
 
         cb = get_content_bank()
 
         # Check cache stats from database
         precache_db = SessionLocal()
         try:
+            purge_legacy_keys(precache_db)
             cache_stats = get_cache_stats_db(precache_db)
             logger.info(f"TTS cache stats (DB): {cache_stats}")
 
-            # v7.5.2: Only precache if DB cache is small
-            if cache_stats["files"] < 50:
-                tts = get_tts()
-
-                async def tts_wrapper(text: str, lang: str) -> bytes:
-                    """Wrapper to match precache expected signature."""
-                    result = await tts.synthesize_async(text, lang)
-                    return result.audio_bytes
-
-                async def run_precache():
-                    # Get fresh DB session for async context
-                    from app.database import SessionLocal
-                    async_db = SessionLocal()
-                    try:
-                        stats = await precache_content_bank(cb, tts_wrapper, async_db, ["hi-IN"])
-                        logger.info(f"TTS precache complete: {stats}")
-                    except Exception as e:
-                        logger.error(f"TTS precache failed: {e}")
-                    finally:
-                        async_db.close()
-
-                import asyncio
-                asyncio.create_task(run_precache())
-                logger.info("TTS precache started in background (2s rate limit)")
+            # v10.9.0: Always run — one bulk key query makes a warm cache a no-op,
+            # and an interrupted job resumes where it stopped
+            tts = get_tts()
+
+            async def tts_wrapper(text: str, lang: str) -> bytes:
+                """Wrapper to match precache expected signature."""
+                result = await tts.synthesize_async(text, lang)
+                return result.audio_bytes
+
+            async def run_precache():
+                # Get fresh DB session for async context
+                from app.database import SessionLocal
+                async_db = SessionLocal()
+                try:
+                    # v10.9.0: Fixed utterances first — every session hits some of them
+                    fixed = collect_fixed_texts(async_db, languages_in_use(async_db))
+                    stats = await precache_texts(fixed, tts_wrapper, async_db)
+                    logger.info(f"TTS precache (fixed utterances) complete: {stats}")
+                    stats = await precache_content_bank(cb, tts_wrapper, async_db, ["hi-IN"])
+                    logger.info(f"TTS precache complete: {stats}")
+                except Exception as e:
+                    logger.error(f"TTS precache failed: {e}")
+                finally:
+                    async_db.close()
+
+            # v10.9.0: The cache is shared with real providers — never fill it with mock audio
+            if isinstance(tts, MockTTS):
+                logger.info("TTS precache skipped: mock TTS provider")
             else:
-                logger.info(f"TTS precache skipped: {cache_stats['files']} entries already cached")
+                _start_background(app, run_precache(), "tts_precache")
+                logger.info("TTS precache started in background")
         finally:
             precache_db.close()
     except ImportError as e:
@@ -128,11 +151,58 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"TTS precache init failed: {e}")
 
+    # v10.9.0: Thinking filler clips, held in memory for /message-stream
+    try:
+        from app.voice.fillers import warm_fillers
+        from app.voice.tts import get_tts
+
+        _start_background(app, warm_fillers(get_tts()), "warm_fillers")
+    except Exception as e:
+        logger.error(f"Thinking filler warm-up failed to start: {e}")
+
+    # v10.9.0: Warm streaming-TTS connections so the first turn skips the handshake
+    from app.config import STREAM_TTS_MODE
+    from app.voice.tts import get_tts
+    stream_tts = get_tts()
+    if STREAM_TTS_MODE == "stream" and hasattr(stream_tts, "warm_stream"):
+        _start_background(app, stream_tts.warm_stream(), "warm_stream")
+
     logger.info("IDNA Didi v10.7.2 ready")
     yield
+    await _stop_background(app)
+    if hasattr(stream_tts, "close_stream"):
+        await stream_tts.close_stream()
+    from app.voice.stt import close_stt
+    await close_stt()
     logger.info("Shutting down")
 
 
+def _start_background(app: FastAPI, coro, name: str) -> asyncio.Task:
+    """v10.9.0: Start a startup job, keeping a reference so it is neither
+    garbage-collected mid-run nor silent when it fails."""
+    tasks = getattr(app.state, "background_tasks", None)
+    if tasks is None:
+        tasks = app.state.background_tasks = set()
+    task = asyncio.create_task(coro, name=name)
+    tasks.add(task)
+
+    def _done(task: asyncio.Task) -> None:
+        tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background task {name} failed: {task.exception()!r}")
+
+    task.add_done_callback(_done)
+    return task
+
+
+async def _stop_background(app: FastAPI) -> None:
+    """v10.9.0: Cancel startup jobs still running at shutdown."""
+    tasks = list(getattr(app.state, "background_tasks", ()))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 def _run_migrations():
     """v8.1.0: Add missing columns to production DB (no Alembic).
 
@@ -339,10 +409,11 @@ app.add_middleware(
 )
 
 # Mount routers
-from app.routers import auth, student, review
+from app.routers import auth, student, review, audio
 app.include_router(auth.router)
 app.include_router(student.router)
 app.include_router(review.router)
+app.include_router(audio.router)
 
 # TODO: Mount parent router when ready
 # from app.routers import parent
@@ -385,7 +456,34 @@ async def health_detail():
         levels = {str(lvl): cnt for lvl, cnt in level_rows}
     finally:
         db.close()
-    return {"status": "ok", "version": "10.7.2", "questions": q_count, "levels": levels}
+    return {
+        "status": "ok", "version": "10.7.2", "questions": q_count, "levels": levels,
+        # v10.9.0: Turns cut short by a disconnect, and the upstream calls they saved
+        "cancelled": metrics.snapshot("cancel."),
+        # v10.9.0: LLM hedging per call site — calls, hedges fired, hedges won
+        "hedge": metrics.snapshot("hedge."),
+        # v10.9.0: Two-tier TTS cache — hits per tier, misses, evictions, current size
+        "tts_cache": {**metrics.snapshot("tts_cache."), **get_tts_cache().stats()},
+        # v10.9.0: Streaming TTS WebSocket pool — connects, reuses, health/idle closes
+        "tts_ws": metrics.snapshot("tts_ws."),
+        "stt": metrics.snapshot("stt."),
+        # v10.9.0: Retried turns answered from the idempotency store
+        "idempotency": metrics.snapshot("idempotency."),
+        # v10.9.0: Provider circuit breakers — state, times opened, requests fast-failed
+        "circuits": {"state": circuit.states(), **metrics.snapshot("circuit.")},
+        # v10.9.0: Turns with TTS audio, and how many were spoken entirely from precached clips
+        "tts_coverage": _tts_coverage(),
+    }
+
+
+def _tts_coverage() -> dict:
+    turns = metrics.get("tts_turns.total")
+    precached = metrics.get("tts_turns.precached")
+    return {
+        "turns": turns,
+        "fully_precached": precached,
+        "fraction": round(precached / turns, 3) if turns else None,
+    }
 
 
 # Keep-alive endpoint for UptimeRobot (prevents Railway sleep)
@@ -0,0 +1,54 @@
+"""
+IDNA EdTech v10.9.0 — In-process Counters
+Cheap process-local counters for the latency and cost work, exposed on
+/health/detail. Names are dotted ("cancel.turns"); snapshot(prefix) returns
+one group with the prefix stripped. Values reset on restart.
+
+observe(name, ms) keeps a latency histogram as counters: name.count,
+name.total_ms and one name.le_<bound> bucket per sample.
+"""
+
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters: dict[str, int] = defaultdict(int)
+
+# Histogram bucket upper bounds in ms; slower samples land in le_inf
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000)
+
+
+def incr(name: str, n: int = 1) -> None:
+    """Add n to a counter (TTS/STT work also runs in threadpool workers)."""
+    with _lock:
+        _counters[name] += n
+
+
+def observe(name: str, ms: float) -> None:
+    """Record one latency sample in name's histogram."""
+    bucket = next((f"le_{bound}" for bound in LATENCY_BUCKETS_MS if ms <= bound), "le_inf")
+    with _lock:
+        _counters[f"{name}.count"] += 1
+        _counters[f"{name}.total_ms"] += int(ms)
+        _counters[f"{name}.{bucket}"] += 1
+
+
+def get(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot(prefix: str = "") -> dict[str, int]:
+    """Counters under prefix, e.g. snapshot("cancel.") → {"turns": 3, ...}."""
+    with _lock:
+        return {
+            name[len(prefix):]: value
+            for name, value in sorted(_counters.items())
+            if name.startswith(prefix)
+        }
+
+
+def reset() -> None:
+    """Clear all counters (tests)."""
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,112 @@
+"""
+IDNA EdTech v10.9.0 — Audio by Reference
+Serves TTS audio from AUDIO_CACHE_DIR so JSON/SSE payloads carry a short URL
+instead of a base64 MP3 blob.
+
+URLs are signed (HMAC over cache key + expiry) because <audio src> cannot send
+the Bearer token. Expiry is rounded to a TTL window so the same phrase keeps
+the same URL for a while — the browser cache then serves repeats.
+"""
+
+import hashlib
+import hmac
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+
+from app.config import AUDIO_CACHE_DIR, AUDIO_URL_TTL_SECONDS, JWT_SECRET
+from app.voice.tts import get_tts
+from app.voice.tts_cache import get_tts_cache
+
+router = APIRouter(prefix="/api/audio", tags=["audio"])
+
+_KEY_RE = re.compile(r"^[0-9a-f]{16,64}$")
+
+# How long a GET for a clip that is still being synthesized may wait for it
+RENDER_WAIT_SECONDS = 10.0
+
+
+def _sign(cache_key: str, exp: int) -> str:
+    msg = f"{cache_key}:{exp}".encode()
+    return hmac.new(JWT_SECRET.encode(), msg, hashlib.sha256).hexdigest()[:32]
+
+
+def audio_url(cache_key: str, now: Optional[float] = None) -> str:
+    """Signed URL for a cached audio file. Valid for one to two TTL windows."""
+    now = time.time() if now is None else now
+    exp = (int(now) // AUDIO_URL_TTL_SECONDS + 2) * AUDIO_URL_TTL_SECONDS
+    return f"/api/audio/{cache_key}?exp={exp}&sig={_sign(cache_key, exp)}"
+
+
+def publish_audio(audio_bytes: bytes, cache_path: Optional[str] = None) -> Optional[str]:
+    """
+    Return a URL for audio_bytes. Reuses the TTS cache file when the provider
+    wrote one; otherwise stores the bytes under their content hash.
+    """
+    if not audio_bytes:
+        return None
+    cache = get_tts_cache()
+    if cache_path:
+        path = Path(cache_path)
+        if path.parent == AUDIO_CACHE_DIR and _KEY_RE.match(path.stem) and cache.touch(path.stem):
+            return audio_url(path.stem)
+
+    # v10.9.0: through the bounded cache, so published clips count toward the disk cap
+    cache_key = hashlib.sha256(audio_bytes).hexdigest()[:16]
+    if not cache.touch(cache_key):
+        cache.put(cache_key, audio_bytes, persist=False)
+    return audio_url(cache_key)
+
+
+async def publish_audio_async(audio_bytes: bytes, cache_path: Optional[str] = None) -> Optional[str]:
+    """publish_audio() without blocking the event loop on the cache's disk writes."""
+    if not audio_bytes:
+        return None
+    return await run_in_threadpool(publish_audio, audio_bytes, cache_path)
+
+
+async def _wait_for_render(cache_key: str) -> bool:
+    """
+    v10.9.0: start_session hands out a greeting URL while the login pre-render
+    is still synthesizing it. Wait for that synthesis (never starts one) on the
+    event loop — a waiting request must not hold a threadpool worker.
+    """
+    wait = getattr(get_tts(), "wait_rendered_async", None)
+    return bool(wait) and await wait(cache_key, RENDER_WAIT_SECONDS) and get_tts_cache().touch(cache_key)
+
+
+@router.get("/{cache_key}")
+async def get_audio(cache_key: str, exp: int, sig: str, request: Request):
+    """Serve one cached MP3. Supports ETag revalidation and Range requests."""
+    if not _KEY_RE.match(cache_key):
+        raise HTTPException(404, "Audio not found")
+    if not hmac.compare_digest(sig, _sign(cache_key, exp)):
+        raise HTTPException(403, "Invalid audio signature")
+    if exp < time.time():
+        raise HTTPException(410, "Audio link expired")
+
+    cache = get_tts_cache()
+    path = cache.path(cache_key)
+    if not cache.touch(cache_key) and not await _wait_for_render(cache_key):
+        raise HTTPException(404, "Audio not found")
+
+    # Content under a key never changes, so the key itself is the ETag
+    headers = {
+        "ETag": f'"{cache_key}"',
+        "Cache-Control": f"private, max-age={max(0, exp - int(time.time()))}",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    # The disk tier may evict the file after touch(); stat it here so that is
+    # a 404 rather than FileResponse failing on the missing path
+    try:
+        stat_result = await run_in_threadpool(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(404, "Audio not found")
+    return FileResponse(path, media_type="audio/mpeg", headers=headers, stat_result=stat_result)
@@ -8,13 +8,14 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional
 
 import jwt
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session as DBSession
 
 from app.config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRY_HOURS, MAX_LOGIN_ATTEMPTS, LOGIN_LOCKOUT_MINUTES
 from app.database import get_db
 from app.models import Student, Parent, LoginAttempt
+from app.voice.tts import pregenerate_greeting
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -98,7 +99,12 @@ def _log_attempt(db: DBSession, pin: str, success: bool, ip: str) -> None:
 # ─── Endpoints ───────────────────────────────────────────────────────────────
 
 @router.post("/student", response_model=StudentLoginResponse)
-def login_student(req: LoginRequest, request: Request, db: DBSession = Depends(get_db)):
+def login_student(
+    req: LoginRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: DBSession = Depends(get_db),
+):
     ip = request.client.host if request.client else "unknown"
     _check_rate_limit(db, req.pin, ip)
 
@@ -110,6 +116,10 @@ def login_student(req: LoginRequest, request: Request, db: DBSession = Depends(g
     _log_attempt(db, req.pin, True, ip)
     token = create_token(student.id, "student")
 
+    # v10.9.0: Render the session greeting while the app loads — /session/start
+    # then finds it in the TTS cache instead of waiting on Sarvam
+    background_tasks.add_task(pregenerate_greeting, student.name, student.preferred_language)
+
     return StudentLoginResponse(
         student_id=student.id,
         name=student.name,
@@ -13,11 +13,14 @@ import time
 import base64
 import json
 import asyncio
+import functools
+from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask, BackgroundTasks
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session as DBSession
@@ -25,15 +28,21 @@ from sqlalchemy.orm.attributes import flag_modified
 
 from app.config import (
     SESSION_TIMEOUT_MINUTES, STT_CONFIDENCE_THRESHOLD, MAX_ENFORCE_RETRIES,
-    ENABLE_HOMEWORK_OCR,
+    ENABLE_HOMEWORK_OCR, STREAM_TTS_MODE, STREAM_TTS_MODES, AUDIO_DELIVERY,
+    IDEMPOTENCY_MAX_ENTRY_KB,
 )
+from app import metrics
 from app.database import get_db, SessionLocal
+from app.idempotency import IdempotencyKeyReused, fingerprint, get_store as get_idempotency_store
 from app.models import Student, Session, SessionTurn, Question
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, verify_token
+from app.routers.audio import audio_url, publish_audio, publish_audio_async
 
-from app.voice.stt import get_stt, is_low_confidence
-from app.voice.tts import get_tts
+from app.voice.stt import STTResult, get_stt, get_streaming_stt, is_low_confidence
+from app.voice.tts import get_tts, begin_turn
 from app.voice.clean_for_tts import clean_for_tts, digits_to_english_words
+from app.voice.streaming import pipeline_tts
+from app.voice import fillers
 
 # v10.7.0: Compiled regexes for "You asked" stripping (used in both endpoints)
 import re as _re_mod
@@ -56,8 +65,8 @@ from app.tutor.instruction_builder import build_prompt, build_inline_eval_prompt
 # instruction_builder_v9 removed — both endpoints now use build_prompt() from instruction_builder.py
 from app.tutor.preprocessing import preprocess_student_message, detect_input_language, check_language_auto_switch
 from content_bank.loader import get_content_bank
-from app.tutor.enforcer import enforce, light_enforce, get_safe_fallback
-from app.tutor.llm import get_llm
+from app.tutor.enforcer import enforce, light_enforce, get_safe_fallback, StreamingEnforcer
+from app.tutor.llm import get_llm, hedged
 from app.tutor import memory
 
 logger = logging.getLogger(__name__)
@@ -159,15 +168,57 @@ def get_openai_client() -> AsyncOpenAI:
     return _openai_client
 
 
+def _start_classify(student_text: str, session: Session) -> "asyncio.Task[tuple[dict, int]]":
+    """
+    v10.9.0: Start the input classifier as soon as the transcript is known.
+
+    classify() only needs the text, the current state and the subject, so it
+    runs while the turn loads question data and preprocesses. The task
+    resolves to (classify_result, classifier_ms). Callers cancel it when
+    preprocessing bypasses the LLM and pass it to _discard_classify() in a
+    finally, so no exit path leaves it running or unobserved.
+    """
+    state, subject = session.state, session.subject or "math"
+
+    async def _run() -> tuple[dict, int]:
+        t0 = time.perf_counter()
+        result = await classify(
+            student_text,
+            current_state=state,
+            subject=subject,
+            client=get_openai_client(),
+        )
+        return result, int((time.perf_counter() - t0) * 1000)
+
+    return asyncio.create_task(_run())
+
+
+def _discard_classify(task: asyncio.Task) -> None:
+    """
+    Called once the turn no longer needs the classifier (consumed, bypassed or
+    failed before it got there): cancel it if still running, and retrieve a
+    failure nobody awaited so it is not logged as never retrieved.
+    """
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+
 async def llm_call_for_eval(messages: list, max_tokens: int = 150) -> str:
     """v7.5.0: Async LLM call wrapper for answer evaluation."""
     client = get_openai_client()
-    response = await client.chat.completions.create(
-        model="gpt-4.1-mini",  # v10.2.0 Fix 1d: Better model for answer evaluation
-        messages=messages,
-        max_tokens=max_tokens,
-        temperature=0.1,  # Low temp for consistent evaluation
-    )
+
+    async def _call():
+        return await client.chat.completions.create(
+            model="gpt-4.1-mini",  # v10.2.0 Fix 1d: Better model for answer evaluation
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.1,  # Low temp for consistent evaluation
+        )
+
+    # v10.9.0: Hedged when LLM_HEDGE is on (slow-tail protection)
+    response = await hedged(_call, "eval")
     return response.choices[0].message.content
 
 
@@ -176,12 +227,15 @@ async def llm_call_for_eval(messages: list, max_tokens: int = 150) -> str:
 class SessionStartResponse(BaseModel):
     session_id: str
     greeting_text: str
-    greeting_audio_b64: str
+    greeting_audio_b64: str = ""
+    greeting_audio_url: Optional[str] = None  # v10.9.0: set instead of b64 when AUDIO_DELIVERY=url
+    greeting_audio_pending: bool = False  # v10.9.0: URL's audio is still rendering (the GET waits)
     state: str
 
 class MessageResponse(BaseModel):
     didi_text: str
-    didi_audio_b64: str
+    didi_audio_b64: str = ""
+    didi_audio_url: Optional[str] = None
     state: str
     student_transcript: Optional[str] = None  # What Whisper heard
     question_id: Optional[str] = None
@@ -197,13 +251,67 @@ class MessageResponse(BaseModel):
 
 class SessionEndResponse(BaseModel):
     summary_text: str
-    summary_audio_b64: str
+    summary_audio_b64: str = ""
+    summary_audio_url: Optional[str] = None
     questions_attempted: int
     questions_correct: int
 
 
 # ─── Session Start ───────────────────────────────────────────────────────────
 
+# Normalize BCP-47 codes to label format
+_LANG_NORMALIZE = {
+    "hi-IN": "hinglish", "en-IN": "english",
+    "hindi": "hindi", "english": "english", "hinglish": "hinglish",
+    "telugu": "telugu", "te-IN": "telugu",  # v10.1: Telugu support with BCP-47
+}
+
+
+def greeting_language(preferred_language: Optional[str]) -> str:
+    """Language label for the session greeting of a student with this preferred_language."""
+    return _LANG_NORMALIZE.get(preferred_language or "hi-IN", "hinglish")
+
+
+def greeting_for(name: str, lang: str, chapter_done: bool = False) -> str:
+    """
+    Session greeting text. v10.9.0: Shared with the TTS precache build
+    (app.voice.fixed_utterances), so keep it deterministic per name.
+    """
+    if not chapter_done:
+        # V10: Use strings.py for centralized language strings
+        from app.tutor.strings import get_text
+        return get_text("warmup_greeting", lang, name=name)
+    # V10: Session end greeting from centralized strings
+    # Note: session_end template has {correct} and {total} params, but we don't have them here
+    # Fall back to a simple completion message
+    if lang == "english":
+        return f"Hello {name}! You've completed all questions in this chapter. Great work! New questions coming tomorrow."
+    return f"Namaste {name}! Aapne is chapter ke saare sawaal kar liye hain. Bahut accha! Kal naye sawaal milenge."
+
+
+# v10.9.0: Fixed nudges for input that never reaches the LLM. Module-level so
+# the TTS precache build can enumerate them.
+QUICK_NUDGES = {
+    "stt_error": "Voice samajh nahi aayi. Text type karo ya phir try karo.",
+    "garbled": "Ek baar phir boliye?",
+    "garbled_english": "Could you say that again?",
+    "low_confidence": "Sorry, samajh nahi aaya. Ek baar phir boliye?",
+    "empty": "Kuch sunai nahi diya. Ek baar phir boliye?",
+}
+
+
+def _tracks_tts_turn(route):
+    """v10.9.0: Count a request/response route's TTS coverage (see tts.begin_turn)."""
+    @functools.wraps(route)
+    async def wrapper(*args, **kwargs):
+        tts_turn = begin_turn()
+        try:
+            return await route(*args, **kwargs)
+        finally:
+            tts_turn.finish()
+    return wrapper
+
+
 @router.post("/session/start", response_model=SessionStartResponse)
 def start_session(
     user: dict = Depends(get_current_user),
@@ -272,17 +380,7 @@ def start_session(
 
     # Generate greeting ONLY — teaching happens in TEACHING state after ACK
     # Bug D fix: GREETING must be max 2 sentences, no teaching content
-    # V10: Use strings.py for centralized language strings
-    from app.tutor.strings import get_text
-
-    # Normalize BCP-47 codes to label format
-    lang_raw = student.preferred_language or "hi-IN"
-    LANG_NORMALIZE = {
-        "hi-IN": "hinglish", "en-IN": "english",
-        "hindi": "hindi", "english": "english", "hinglish": "hinglish",
-        "telugu": "telugu", "te-IN": "telugu",  # v10.1: Telugu support with BCP-47
-    }
-    lang = LANG_NORMALIZE.get(lang_raw, "hinglish")
+    lang = greeting_language(student.preferred_language)
 
     if first_question:
         # Get skill teaching content for topic announcement only
@@ -297,25 +395,32 @@ def start_session(
 
         # v10.5.2: Warm greeting ONLY — no topic, no question. Wait for student response.
         # Chapter intro comes in next turn (GREETING→TEACHING via chapter_intro flag)
-        greeting_text = get_text("warmup_greeting", lang, name=student.name)
+        greeting_text = greeting_for(student.name, lang)
 
         # Stay in GREETING — FSM will transition to TEACHING on ACK
         session.state = "GREETING"
         # P0 FIX: Initialize language_pref from student preference (normalized)
         session.language_pref = lang if lang in ("english", "hindi", "hinglish", "telugu") else "hinglish"
     else:
-        # V10: Session end greeting from centralized strings
-        # Note: session_end template has {correct} and {total} params, but we don't have them here
-        # Fall back to a simple completion message
-        if lang == "english":
-            greeting_text = f"Hello {student.name}! You've completed all questions in this chapter. Great work! New questions coming tomorrow."
-        else:
-            greeting_text = f"Namaste {student.name}! Aapne is chapter ke saare sawaal kar liye hain. Bahut accha! Kal naye sawaal milenge."
+        greeting_text = greeting_for(student.name, lang, chapter_done=True)
         session.state = "SESSION_END"  # No questions available
         session.language_pref = lang if lang in ("english", "hindi", "hinglish", "telugu") else "hinglish"
 
     tts = get_tts()
-    tts_result = tts.synthesize(greeting_text, student.preferred_language)
+    tts_turn = begin_turn()
+    # v10.9.0: The login pre-render (auth.login_student) is still running — send
+    # the text now with the URL its audio will be served from; /api/audio waits for it
+    rendering = getattr(tts, "rendering", None)
+    pending_key = rendering(greeting_text, student.preferred_language) \
+        if rendering and AUDIO_DELIVERY == "url" else None
+    if pending_key:
+        metrics.incr("greeting.audio_pending")
+        greeting_b64, greeting_url, tts_latency_ms = "", audio_url(pending_key), 0
+    else:
+        tts_result = tts.synthesize(greeting_text, student.preferred_language)
+        greeting_b64, greeting_url = _audio_ref(tts_result.audio_bytes, tts_result.cache_path)
+        tts_latency_ms = tts_result.latency_ms
+    tts_turn.finish()
     db.commit()
 
     # Log greeting turn
@@ -328,7 +433,7 @@ def start_session(
         state_after=session.state,
         didi_response=greeting_text,
         question_id=session.current_question_id,
-        tts_latency_ms=tts_result.latency_ms,
+        tts_latency_ms=tts_latency_ms,
     )
     db.add(turn)
     db.commit()
@@ -336,7 +441,9 @@ def start_session(
     return SessionStartResponse(
         session_id=session.id,
         greeting_text=greeting_text,
-        greeting_audio_b64=base64.b64encode(tts_result.audio_bytes).decode(),
+        greeting_audio_b64=greeting_b64,
+        greeting_audio_url=greeting_url,
+        greeting_audio_pending=bool(pending_key),
         state=session.state,
     )
 
@@ -344,17 +451,60 @@ def start_session(
 # ─── Main Message Handler ───────────────────────────────────────────────────
 
 @router.post("/session/message", response_model=MessageResponse)
+@_tracks_tts_turn
 async def process_message(
+    response: Response,
     session_id: str = Form(...),
     audio: Optional[UploadFile] = File(None),
     text: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None),
     user: dict = Depends(get_current_user),
     db: DBSession = Depends(get_db),
 ):
     """
     THE MAIN LOOP.
     Accept audio or text → process through full pipeline → return audio response.
+    v10.9.0: A retry with the same Idempotency-Key header gets the first
+    response back (header Idempotent-Replayed: true) instead of a second turn.
+    The key is bound to session, text and audio; reusing it for another request is a 422.
     """
+    if not idempotency_key:
+        return await _process_message(session_id, audio, text, user, db)
+
+    key = ("message", user.get("sub"), idempotency_key)
+    audio_bytes = None
+    if audio:
+        audio_bytes = await audio.read()
+        await audio.seek(0)
+    store = get_idempotency_store()
+    replay = await _claim_turn(key, fingerprint(session_id, text, audio_bytes))
+    if replay is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return replay
+    try:
+        result = await _process_message(session_id, audio, text, user, db)
+    except BaseException:
+        store.release(key)
+        raise
+    store.complete(key, result)
+    return result
+
+
+async def _claim_turn(key, request_fingerprint: str):
+    """IdempotencyStore.claim() with a reused key reported as a client error."""
+    try:
+        return await get_idempotency_store().claim(key, request_fingerprint)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(422, str(e))
+
+
+async def _process_message(
+    session_id: str,
+    audio: Optional[UploadFile],
+    text: Optional[str],
+    user: dict,
+    db: DBSession,
+):
     t_start = time.perf_counter()
 
     if user.get("role") != "student":
@@ -376,41 +526,41 @@ async def process_message(
     # ── Step 1: STT (if audio) ────────────────────────────────────────────
     stt_latency = 0
     if audio:
-        audio_bytes = audio.file.read()
+        audio_bytes = await audio.read()
         logger.info(f"STT: received {len(audio_bytes)} bytes of audio")
 
         try:
             stt = get_stt()
             # Auto-detect language - students speak Hinglish (English math terms)
             # Forcing Hindi converts English words to garbage Devanagari
-            stt_result = stt.transcribe(audio_bytes)  # No language = auto-detect
+            stt_result = await stt.transcribe_async(audio_bytes)  # No language = auto-detect
             stt_latency = stt_result.latency_ms
             student_text = stt_result.text
             # Log raw transcript for debugging
             logger.info(f"STT transcript: '{student_text}' (conf={stt_result.confidence:.2f}, lang={stt_result.language_detected}, {stt_latency}ms)")
         except Exception as e:
             logger.error(f"STT failed: {e}")
-            return _quick_response(
+            return await _quick_response(
                 db, session,
-                "Voice samajh nahi aayi. Text type karo ya phir try karo.",
+                QUICK_NUDGES["stt_error"],
                 student_text="[stt error]",
                 stt_latency=0,
             )
 
         # Garbled transcription → ask to repeat (skip classifier)
         if stt_result.garbled:
-            return _quick_response(
+            return await _quick_response(
                 db, session,
-                "Ek baar phir boliye?",
+                QUICK_NUDGES["garbled"],
                 student_text="[garbled]",
                 stt_latency=stt_latency,
             )
 
         # Low confidence → ask to repeat
         if is_low_confidence(stt_result):
-            return _quick_response(
+            return await _quick_response(
                 db, session,
-                "Sorry, samajh nahi aaya. Ek baar phir boliye?",
+                QUICK_NUDGES["low_confidence"],
                 student_text="[low confidence]",
                 stt_latency=stt_latency,
             )
@@ -420,9 +570,9 @@ async def process_message(
         raise HTTPException(400, "Audio or text required")
 
     if not student_text:
-        return _quick_response(
+        return await _quick_response(
             db, session,
-            "Kuch sunai nahi diya. Ek baar phir boliye?",
+            QUICK_NUDGES["empty"],
             student_text="[empty]",
             stt_latency=stt_latency,
         )
@@ -430,204 +580,209 @@ async def process_message(
     # DEBUG: RAW INPUT logging (P0 debug)
     logger.info(f"RAW INPUT (non-stream): [{student_text}]")
 
-    # ── Step 1.5: Preprocessing (v8.1.0 P0 fixes) ─────────────────────────
-    # Order: meta-question (bypass LLM) → language switch → confusion → LLM
-    chapter_name = CHAPTER_NAMES.get(session.chapter or "", session.chapter or "")
-    current_skill = ""
-    if session.current_question_id:
-        q_data = _load_question(db, session.current_question_id)
-        current_skill = q_data.get("target_skill", "") if q_data else ""
-
-    preprocess_result = preprocess_student_message(
-        text=student_text,
-        chapter=session.chapter or "",
-        chapter_name=chapter_name,
-        subject=session.subject or "math",
-        current_skill=current_skill,
-        language_pref=session.language_pref or "hinglish",
-    )
+    # v10.9.0: Classifier runs alongside the question load and preprocessing
+    classify_task = _start_classify(student_text, session)
+    try:
+        # ── Step 1.5: Preprocessing (v8.1.0 P0 fixes) ─────────────────────────
+        # Order: meta-question (bypass LLM) → language switch → confusion → LLM
+        def _preprocess():
+            chapter_name = CHAPTER_NAMES.get(session.chapter or "", session.chapter or "")
+            current_skill = ""
+            if session.current_question_id:
+                q_data = _load_question(db, session.current_question_id)
+                current_skill = q_data.get("target_skill", "") if q_data else ""
+
+            return preprocess_student_message(
+                text=student_text,
+                chapter=session.chapter or "",
+                chapter_name=chapter_name,
+                subject=session.subject or "math",
+                current_skill=current_skill,
+                language_pref=session.language_pref or "hinglish",
+            )
 
-    # DEBUG: META-ROUTE logging (P0 debug)
-    logger.info(f"META-ROUTE (non-stream): detected={preprocess_result.meta_question_type}, bypass_llm={preprocess_result.bypass_llm}, template=[{preprocess_result.template_response[:50] if preprocess_result.template_response else 'None'}]")
+        preprocess_result = await run_in_threadpool(_preprocess)
 
-    # Meta-question: bypass LLM entirely
-    if preprocess_result.bypass_llm:
-        logger.info(f"v8.1.0: Bypassing LLM for meta-question: {preprocess_result.meta_question_type}")
-        return _quick_response(
-            db, session,
-            preprocess_result.template_response,
-            student_text=student_text,
-            stt_latency=stt_latency,
-        )
+        # DEBUG: META-ROUTE logging (P0 debug)
+        logger.info(f"META-ROUTE (non-stream): detected={preprocess_result.meta_question_type}, bypass_llm={preprocess_result.bypass_llm}, template=[{preprocess_result.template_response[:50] if preprocess_result.template_response else 'None'}]")
 
-    # Language switch: update session preference AND commit immediately
-    # P0 Bug A fix: Language must persist across requests
-    if preprocess_result.language_switched:
-        session.language_pref = preprocess_result.new_language
-        db.commit()  # P0 fix: Commit immediately so next request sees the change
-        logger.info(f"P0 FIX: Language switched to '{session.language_pref}' and COMMITTED to DB")
-
-    # Confusion: increment counter
-    if preprocess_result.confusion_detected:
-        session.confusion_count = (session.confusion_count or 0) + 1
-        logger.info(f"v8.1.0: Confusion detected, count now {session.confusion_count}")
-
-    # P0 FIX: Emotional distress detection — flag for LLM to acknowledge emotion first
-    _student_emotional = False
-    if preprocess_result.emotional_distress:
-        _student_emotional = True
-        logger.info(f"P0 FIX: Emotional distress detected, flagging for LLM")
-
-    # === LANGUAGE AUTO-DETECTION (P0 fix) ===
-    # Detects student's input language and auto-switches if they consistently speak English.
-    # Works ALONGSIDE the explicit switch detector (preprocessing) and language pre-scan.
-    _detected_lang = detect_input_language(student_text)
-    _consecutive_english = getattr(session, 'consecutive_english_count', 0) or 0
-
-    # Special case: first student message in GREETING sets language immediately
-    if session.state == 'GREETING' and _detected_lang == 'english' and session.language_pref != 'english':
-        session.language_pref = 'english'
-        session.consecutive_english_count = 1
-        db.commit()
-        logger.info(f"LANGUAGE AUTO-DETECT: first message in GREETING is English, switched immediately")
-    else:
-        _should_switch, _new_lang, _updated_count = check_language_auto_switch(
-            detected_language=_detected_lang,
-            current_session_language=session.language_pref or 'hinglish',
-            consecutive_english_count=_consecutive_english,
-        )
-        session.consecutive_english_count = _updated_count
-        if _should_switch:
-            session.language_pref = _new_lang
-            db.commit()
-            logger.info(f"LANGUAGE AUTO-DETECT: switched to {_new_lang} (consecutive={_updated_count})")
-        elif _updated_count != _consecutive_english:
-            db.commit()  # Persist counter change
-    # === END LANGUAGE AUTO-DETECTION ===
-
-    # === LANGUAGE PRE-SCAN (runs on every message) ===
-    # Detects language switch requests BEFORE classification.
-    # Uses intent patterns, not bare keywords, to avoid false positives.
-    # Example false positive: "Why are you speaking in Hindi?" contains "Hindi"
-    # but the student wants ENGLISH, not Hindi.
-    _text_lower = student_text.lower()
-
-    # English triggers: student wants English
-    _english_triggers = [
-        "in english", "speak english", "teach english", "english mein",
-        "english please", "english me", "talk english", "explain english",
-        "respond english", "switch to english", "change to english",
-        "can you speak english", "can you teach english",
-        "इंग्लिश में", "अंग्रेजी में", "इंग्लिश में बोलो",
-        "अंग्रेजी में बोलो", "अंग्रेजी में बात करो",
-    ]
-    # Also catch: "Why are you speaking in Hindi?" = wants English (complaining about Hindi)
-    _complaining_about_hindi = [
-        "why hindi", "why in hindi", "why are you speaking hindi",
-        "why are you speaking in hindi", "stop speaking hindi",
-        "don't speak hindi", "dont speak hindi", "not in hindi",
-        "no hindi", "stop hindi", "I said english",
-        "हिंदी में क्यों", "हिंदी क्यों",
-    ]
-    # Hindi triggers: student explicitly WANTS Hindi (intent to switch TO Hindi)
-    _hindi_intent_triggers = [
-        "speak hindi", "speak in hindi", "talk in hindi",
-        "in hindi please", "hindi mein bolo", "hindi me bolo",
-        "switch to hindi", "change to hindi", "teach in hindi",
-        "hindi mein samjhao", "hindi mein baat karo",
-        "हिंदी में बोलो", "हिंदी में समझाओ", "हिंदी में बात करो",
-    ]
+        # Meta-question: bypass LLM entirely
+        if preprocess_result.bypass_llm:
+            classify_task.cancel()
+            logger.info(f"v8.1.0: Bypassing LLM for meta-question: {preprocess_result.meta_question_type}")
+            return await _quick_response(
+                db, session,
+                preprocess_result.template_response,
+                student_text=student_text,
+                stt_latency=stt_latency,
+            )
 
-    _switched = False
-    # Check English triggers first
-    for trigger in _english_triggers:
-        if trigger in _text_lower:
-            session.language_pref = "english"
+        # Language switch: update session preference AND commit immediately
+        # P0 Bug A fix: Language must persist across requests
+        if preprocess_result.language_switched:
+            session.language_pref = preprocess_result.new_language
+            db.commit()  # P0 fix: Commit immediately so next request sees the change
+            logger.info(f"P0 FIX: Language switched to '{session.language_pref}' and COMMITTED to DB")
+
+        # Confusion: increment counter
+        if preprocess_result.confusion_detected:
+            session.confusion_count = (session.confusion_count or 0) + 1
+            logger.info(f"v8.1.0: Confusion detected, count now {session.confusion_count}")
+
+        # P0 FIX: Emotional distress detection — flag for LLM to acknowledge emotion first
+        _student_emotional = False
+        if preprocess_result.emotional_distress:
+            _student_emotional = True
+            logger.info(f"P0 FIX: Emotional distress detected, flagging for LLM")
+
+        # === LANGUAGE AUTO-DETECTION (P0 fix) ===
+        # Detects student's input language and auto-switches if they consistently speak English.
+        # Works ALONGSIDE the explicit switch detector (preprocessing) and language pre-scan.
+        _detected_lang = detect_input_language(student_text)
+        _consecutive_english = getattr(session, 'consecutive_english_count', 0) or 0
+
+        # Special case: first student message in GREETING sets language immediately
+        if session.state == 'GREETING' and _detected_lang == 'english' and session.language_pref != 'english':
+            session.language_pref = 'english'
+            session.consecutive_english_count = 1
             db.commit()
-            logger.info(f"LANGUAGE PRE-SCAN: switched to english (trigger: {trigger})")
-            _switched = True
-            break
-
-    # Check complaints about Hindi (= wants English)
-    if not _switched:
-        for trigger in _complaining_about_hindi:
-            if trigger in _text_lower:
-                session.language_pref = "english"
+            logger.info(f"LANGUAGE AUTO-DETECT: first message in GREETING is English, switched immediately")
+        else:
+            _should_switch, _new_lang, _updated_count = check_language_auto_switch(
+                detected_language=_detected_lang,
+                current_session_language=session.language_pref or 'hinglish',
+                consecutive_english_count=_consecutive_english,
+            )
+            session.consecutive_english_count = _updated_count
+            if _should_switch:
+                session.language_pref = _new_lang
                 db.commit()
-                logger.info(f"LANGUAGE PRE-SCAN: switched to english (complaint: {trigger})")
-                _switched = True
-                break
+                logger.info(f"LANGUAGE AUTO-DETECT: switched to {_new_lang} (consecutive={_updated_count})")
+            elif _updated_count != _consecutive_english:
+                db.commit()  # Persist counter change
+        # === END LANGUAGE AUTO-DETECTION ===
+
+        # === LANGUAGE PRE-SCAN (runs on every message) ===
+        # Detects language switch requests BEFORE classification.
+        # Uses intent patterns, not bare keywords, to avoid false positives.
+        # Example false positive: "Why are you speaking in Hindi?" contains "Hindi"
+        # but the student wants ENGLISH, not Hindi.
+        _text_lower = student_text.lower()
+
+        # English triggers: student wants English
+        _english_triggers = [
+            "in english", "speak english", "teach english", "english mein",
+            "english please", "english me", "talk english", "explain english",
+            "respond english", "switch to english", "change to english",
+            "can you speak english", "can you teach english",
+            "इंग्लिश में", "अंग्रेजी में", "इंग्लिश में बोलो",
+            "अंग्रेजी में बोलो", "अंग्रेजी में बात करो",
+        ]
+        # Also catch: "Why are you speaking in Hindi?" = wants English (complaining about Hindi)
+        _complaining_about_hindi = [
+            "why hindi", "why in hindi", "why are you speaking hindi",
+            "why are you speaking in hindi", "stop speaking hindi",
+            "don't speak hindi", "dont speak hindi", "not in hindi",
+            "no hindi", "stop hindi", "I said english",
+            "हिंदी में क्यों", "हिंदी क्यों",
+        ]
+        # Hindi triggers: student explicitly WANTS Hindi (intent to switch TO Hindi)
+        _hindi_intent_triggers = [
+            "speak hindi", "speak in hindi", "talk in hindi",
+            "in hindi please", "hindi mein bolo", "hindi me bolo",
+            "switch to hindi", "change to hindi", "teach in hindi",
+            "hindi mein samjhao", "hindi mein baat karo",
+            "हिंदी में बोलो", "हिंदी में समझाओ", "हिंदी में बात करो",
+        ]
 
-    # Check Hindi intent triggers
-    if not _switched:
-        for trigger in _hindi_intent_triggers:
+        _switched = False
+        # Check English triggers first
+        for trigger in _english_triggers:
             if trigger in _text_lower:
-                session.language_pref = "hindi"
+                session.language_pref = "english"
                 db.commit()
-                logger.info(f"LANGUAGE PRE-SCAN: switched to hindi (trigger: {trigger})")
+                logger.info(f"LANGUAGE PRE-SCAN: switched to english (trigger: {trigger})")
                 _switched = True
                 break
 
-    # v10.6.0: Telugu triggers
-    if not _switched:
-        _telugu_triggers = [
-            "in telugu", "speak telugu", "telugu mein", "telugu me",
-            "telugu lo", "telugu please", "teach telugu", "talk telugu",
-            "switch to telugu", "change to telugu", "telugu mein bolo",
-            "telugu mein samjhao", "telugu mein baat karo",
-            "తెలుగు", "తెలుగులో", "తెలుగులో చెప్పు", "తెలుగులో మాట్లాడు",
+        # Check complaints about Hindi (= wants English)
+        if not _switched:
+            for trigger in _complaining_about_hindi:
+                if trigger in _text_lower:
+                    session.language_pref = "english"
+                    db.commit()
+                    logger.info(f"LANGUAGE PRE-SCAN: switched to english (complaint: {trigger})")
+                    _switched = True
+                    break
+
+        # Check Hindi intent triggers
+        if not _switched:
+            for trigger in _hindi_intent_triggers:
+                if trigger in _text_lower:
+                    session.language_pref = "hindi"
+                    db.commit()
+                    logger.info(f"LANGUAGE PRE-SCAN: switched to hindi (trigger: {trigger})")
+                    _switched = True
+                    break
+
+        # v10.6.0: Telugu triggers
+        if not _switched:
+            _telugu_triggers = [
+                "in telugu", "speak telugu", "telugu mein", "telugu me",
+                "telugu lo", "telugu please", "teach telugu", "talk telugu",
+                "switch to telugu", "change to telugu", "telugu mein bolo",
+                "telugu mein samjhao", "telugu mein baat karo",
+                "తెలుగు", "తెలుగులో", "తెలుగులో చెప్పు", "తెలుగులో మాట్లాడు",
+            ]
+            for trigger in _telugu_triggers:
+                if trigger in _text_lower:
+                    session.language_pref = "telugu"
+                    db.commit()
+                    logger.info(f"LANGUAGE PRE-SCAN: switched to telugu (trigger: {trigger})")
+                    _switched = True
+                    break
+        # === END LANGUAGE PRE-SCAN ===
+
+        # === CORRECTION DETECTION (runs on every message) ===
+        # Detects when student corrects Didi's math error.
+        # v10.6.1: State-aware — "nahi"/"galat" are legitimate answers in WAITING_ANSWER states
+        _correction_triggers = [
+            "that's wrong", "thats wrong", "that is wrong",
+            "you're wrong", "youre wrong", "you are wrong",
+            "wrong answer",
+            "that's not right", "not correct",
+            "check again", "check karo", "check kijiye",
+            "चेक कीजिए", "चेक करो",
         ]
-        for trigger in _telugu_triggers:
+        # Only add "galat"/"nahi" triggers when NOT in answer-expecting states
+        _in_answer_state = session.state in ("WAITING_ANSWER", "HINT", "HINT_1", "HINT_2", "FULL_SOLUTION")
+        if not _in_answer_state:
+            _correction_triggers.extend(["galat", "गलत", "गलत है", "nahi", "not right", "that's not"])
+        _is_correction = False
+        for trigger in _correction_triggers:
             if trigger in _text_lower:
-                session.language_pref = "telugu"
-                db.commit()
-                logger.info(f"LANGUAGE PRE-SCAN: switched to telugu (trigger: {trigger})")
-                _switched = True
+                _is_correction = True
                 break
-    # === END LANGUAGE PRE-SCAN ===
-
-    # === CORRECTION DETECTION (runs on every message) ===
-    # Detects when student corrects Didi's math error.
-    # v10.6.1: State-aware — "nahi"/"galat" are legitimate answers in WAITING_ANSWER states
-    _correction_triggers = [
-        "that's wrong", "thats wrong", "that is wrong",
-        "you're wrong", "youre wrong", "you are wrong",
-        "wrong answer",
-        "that's not right", "not correct",
-        "check again", "check karo", "check kijiye",
-        "चेक कीजिए", "चेक करो",
-    ]
-    # Only add "galat"/"nahi" triggers when NOT in answer-expecting states
-    _in_answer_state = session.state in ("WAITING_ANSWER", "HINT", "HINT_1", "HINT_2", "FULL_SOLUTION")
-    if not _in_answer_state:
-        _correction_triggers.extend(["galat", "गलत", "गलत है", "nahi", "not right", "that's not"])
-    _is_correction = False
-    for trigger in _correction_triggers:
-        if trigger in _text_lower:
-            _is_correction = True
-            break
-    # Pattern: "X nahi Y hota hai" = correction (only outside answer states)
-    import re as _re
-    if not _is_correction and not _in_answer_state:
-        if _re.search(r'\d+\s*(nahi|नहीं|nhi|wrong|galat)', _text_lower):
-            _is_correction = True
-        elif _re.search(r'(nahi|नहीं|nhi|wrong|galat)\s*.*\d+', _text_lower):
-            _is_correction = True
-
-    if _is_correction:
-        logger.info(f"CORRECTION DETECTED: student correcting Didi's math")
-    # === END CORRECTION DETECTION ===
-
-    # ── Step 2: Classify input ────────────────────────────────────────────
-    # MVP: No topic discovery (math only). Subject detection removed.
-
-    # v7.3.0: Use async LLM classifier (module-level singleton)
-    classify_result = await classify(
-        student_text,
-        current_state=session.state,
-        subject=session.subject or "math",
-        client=get_openai_client(),
-    )
+        # Pattern: "X nahi Y hota hai" = correction (only outside answer states)
+        import re as _re
+        if not _is_correction and not _in_answer_state:
+            if _re.search(r'\d+\s*(nahi|नहीं|nhi|wrong|galat)', _text_lower):
+                _is_correction = True
+            elif _re.search(r'(nahi|नहीं|nhi|wrong|galat)\s*.*\d+', _text_lower):
+                _is_correction = True
+
+        if _is_correction:
+            logger.info(f"CORRECTION DETECTED: student correcting Didi's math")
+        # === END CORRECTION DETECTION ===
+
+        # ── Step 2: Classify input ────────────────────────────────────────────
+        # MVP: No topic discovery (math only). Subject detection removed.
+
+        # v7.3.0: Use async LLM classifier (module-level singleton)
+        # v10.9.0: Started right after STT; usually finished by now
+        classify_result, _ = await classify_task
+    finally:
+        _discard_classify(classify_task)
     category = classify_result["category"]
     logger.info(f"CLASSIFIER: text='{student_text[:50]}' → category={category}, extras={classify_result.get('extras', {})}")
     # Handle LANGUAGE_SWITCH preference from classifier
@@ -651,7 +806,7 @@ async def process_message(
         from app.tutor.strings import get_text
         pref = session.language_pref or "hinglish"
         nudge = get_text("idle_prompt", pref)
-        return _quick_response(
+        return await _quick_response(
             db, session, nudge,
             student_text="[silence]",
             stt_latency=stt_latency,
@@ -999,7 +1154,7 @@ async def process_message(
 
     # ── Step 7: LLM generate ─────────────────────────────────────────────
     llm = get_llm()
-    llm_result = llm.generate(messages)
+    llm_result = await llm.generate_async(messages)
     didi_text = llm_result.text
 
     # ── Step 8: Enforce ──────────────────────────────────────────────────
@@ -1057,12 +1212,12 @@ async def process_message(
     # ── Step 10: TTS ─────────────────────────────────────────────────────
     tts = get_tts()
     try:
-        tts_result = tts.synthesize(cleaned_text, get_tts_language(session))
-        audio_b64 = base64.b64encode(tts_result.audio_bytes).decode()
+        tts_result = await tts.synthesize_async(cleaned_text, get_tts_language(session))
+        audio_b64, audio_url = await _audio_ref_async(tts_result.audio_bytes, tts_result.cache_path)
         tts_latency = tts_result.latency_ms
     except Exception as e:
         logger.error(f"TTS failed: {e}")
-        audio_b64 = ""  # Text fallback
+        audio_b64, audio_url = "", None  # Text fallback
         tts_latency = 0
 
     # ── Step 11: Save turns and update session ─────────────────────────────
@@ -1116,6 +1271,7 @@ async def process_message(
     return MessageResponse(
         didi_text=display_text,
         didi_audio_b64=audio_b64,
+        didi_audio_url=audio_url,
         state=new_state,
         student_transcript=student_text,
         question_id=session.current_question_id,
@@ -1141,39 +1297,369 @@ async def process_message(
 async def process_message_stream(
     request: Request,
     user: dict = Depends(get_current_user),
-    db: DBSession = Depends(get_db),
 ):
     """
     v7.1 Streaming endpoint: LLM streams → sentence-level TTS → SSE to frontend.
     Reduces perceived latency from ~10s to ~3s by starting audio playback earlier.
+    v10.9.0: tts_mode="sentence" pipelines TTS per sentence; tts_mode="stream"
+    forwards provider stream chunks (see STREAM_TTS_MODE). A precached thinking
+    filler may go out as audio chunk 0 before the turn is even prepared, so the
+    turn owns its DB session (closed when the stream ends) instead of get_db.
     """
     if user.get("role") != "student":
         raise HTTPException(403, "Student access only")
 
     # Parse request body
     body = await request.json()
+    # v10.9.0: A retried turn with the same Idempotency-Key replays the first stream
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        key = ("message-stream", user.get("sub"), idempotency_key)
+        replay = await _claim_turn(key, fingerprint(json.dumps(body, sort_keys=True)))
+        if replay is not None:
+            return StreamingResponse(_replay_lines(replay), media_type="text/event-stream",
+                                     headers={"Idempotent-Replayed": "true"})
+        try:
+            response = await _stream_turn_response(request, body)
+        except BaseException:
+            get_idempotency_store().release(key)
+            raise
+        return _recording(response, key)
+    return await _stream_turn_response(request, body)
+
+
+async def _replay_lines(lines: list) -> AsyncIterator[str]:
+    for line in lines:
+        yield line
+
+
+def _recording(response: StreamingResponse, key) -> StreamingResponse:
+    """
+    Relay the SSE lines; a stream that reached its done event is stored for
+    retries, anything else releases key. The body's finally does not run if
+    the client leaves before the body is iterated, so the response's
+    background task settles the key too — whichever comes first wins.
+    Clips are stored by URL (see _by_reference); a recording still over
+    IDEMPOTENCY_MAX_ENTRY_KB is dropped and its retry runs the turn again.
+    """
+    store = get_idempotency_store()
+    recorded = []
+    size = 0
+    settled = False
+
+    def settle():
+        nonlocal settled
+        if settled:
+            return
+        settled = True
+        if recorded and json.loads(recorded[-1][len("data: "):]).get("type") == "done":
+            store.complete(key, recorded)
+        else:
+            store.release(key)
+
+    async def lines(body: AsyncIterator[str]) -> AsyncIterator[str]:
+        nonlocal size
+        try:
+            async for line in body:
+                if size < 0:  # over the cap: relay only
+                    yield line
+                    continue
+                recorded.append(line)
+                yield line
+                # Compacted after the client has the line, so no clip waits on the disk write
+                recorded[-1] = await _by_reference(line)
+                size += len(recorded[-1])
+                if size > IDEMPOTENCY_MAX_ENTRY_KB * 1024:
+                    metrics.incr("idempotency.too_large")
+                    recorded.clear()
+                    size = -1
+        finally:
+            settle()
+
+    response.body_iterator = lines(response.body_iterator)
+    background = BackgroundTasks([response.background] if response.background else [])
+    background.add_task(settle)
+    response.background = background
+    return response
+
+
+async def _by_reference(line: str) -> str:
+    """An SSE line to store for replay: an inline (base64) clip becomes a URL to it."""
+    if '"audio_chunk"' not in line:
+        return line
+    event = json.loads(line[len("data: "):])
+    if event.get("stream") or not event.get("audio"):
+        return line  # provider stream fragments are not standalone files
+    event["url"] = await publish_audio_async(base64.b64decode(event.pop("audio")))
+    return f"data: {json.dumps(event)}\n\n"
+
+
+async def _stream_turn_response(request: Request, body: dict) -> StreamingResponse:
     session_id = body.get("session_id")
     audio_b64 = body.get("audio")
     text_input = body.get("text")
+    # v10.9.0: Per-request override of STREAM_TTS_MODE (full | sentence | stream)
+    _tts_mode = body.get("tts_mode") or STREAM_TTS_MODE
+    if _tts_mode not in STREAM_TTS_MODES:
+        _tts_mode = "full"
 
-    session = await run_in_threadpool(
-        lambda: db.query(Session).filter(Session.id == session_id).first()
-    )
+    audio_bytes = base64.b64decode(audio_b64) if audio_b64 else None
+
+    db = SessionLocal()
+    try:
+        session = await run_in_threadpool(
+            lambda: db.query(Session).filter(Session.id == session_id).first()
+        )
+    except Exception:
+        db.close()
+        raise
     if not session:
+        db.close()
         raise HTTPException(404, "Session not found")
 
-    student = await run_in_threadpool(
-        lambda: db.query(Student).filter(Student.id == session.student_id).first()
+    has_audio = audio_bytes is not None
+    prepare = _prepare_stream_turn(db, session, audio_bytes, text_input, _tts_mode, persist_db=db)
+    events = _with_filler(
+        prepare,
+        fillers.filler_event(get_tts_language(session), _tts_mode, has_audio),
+        _tts_mode, has_audio,
     )
+    events, close = _closing_db(events, db, prepare)
+    # The body's finally never runs if the client leaves before it is iterated;
+    # the background task then closes the turn's DB session instead
+    return StreamingResponse(_sse_events(events, request), media_type="text/event-stream",
+                             background=BackgroundTask(close))
+
+
+def _audio_ref(audio_bytes: bytes, cache_path: Optional[str] = None) -> tuple[str, Optional[str]]:
+    """v10.9.0: (base64, url) for a response — only one is filled, per AUDIO_DELIVERY."""
+    if not audio_bytes:
+        return "", None
+    if AUDIO_DELIVERY == "url":
+        return "", publish_audio(audio_bytes, cache_path)
+    return base64.b64encode(audio_bytes).decode(), None
+
+
+async def _audio_ref_async(audio_bytes: bytes, cache_path: Optional[str] = None) -> tuple[str, Optional[str]]:
+    """_audio_ref() for async routes — publishing a URL writes to the disk cache."""
+    if audio_bytes and AUDIO_DELIVERY == "url":
+        return "", await publish_audio_async(audio_bytes, cache_path)
+    return _audio_ref(audio_bytes, cache_path)
+
+
+async def _sse_event(event: dict) -> str:
+    """Format one turn event as an SSE line. Raw audio goes out as a URL or base64."""
+    if event.get("stream"):
+        # Partial provider stream fragments are not standalone files — always inline
+        event = {**event, "audio": base64.b64encode(event["audio"]).decode()}
+    elif event.get("type") == "audio_chunk":
+        event = dict(event)
+        audio_b64, audio_url = await _audio_ref_async(event.pop("audio", b""), event.pop("cache_path", None))
+        if audio_url:
+            event["url"] = audio_url
+        else:
+            event["audio"] = audio_b64
+    return f"data: {json.dumps(event)}\n\n"
+
+
+async def _sse_events(events: AsyncIterator[dict], request: Optional[Request] = None) -> AsyncIterator[str]:
+    turn = _drive_turn(events, request.is_disconnected if request else None)
+    try:
+        async for event in turn:
+            yield await _sse_event(event)
+    finally:
+        await turn.aclose()
+
+
+async def _with_filler(
+    prepare: Awaitable[AsyncIterator[dict]],
+    filler: Optional[dict],
+    tts_mode: str,
+    has_audio: bool,
+) -> AsyncIterator[dict]:
+    """
+    v10.9.0: Send the thinking filler (if any) first, then prepare the turn
+    and relay its events with audio chunk indexes shifted past the filler.
+    Times the first real audio chunk to keep the filler prediction current,
+    and counts the turn's TTS coverage.
+    """
+    t_start = time.perf_counter()
+    tts_turn = begin_turn()
+    events = None
+    try:
+        if filler:
+            yield filler
+        events = await prepare
+        first_audio = True
+        async for event in events:
+            if event['type'] == 'audio_chunk':
+                if first_audio:
+                    first_audio = False
+                    fillers.observe_first_audio(tts_mode, has_audio, int((time.perf_counter() - t_start) * 1000))
+                if filler:
+                    event = {**event, 'index': event['index'] + 1}
+            yield event
+    finally:
+        if events is None:
+            prepare.close()  # consumer left during the filler
+        else:
+            await events.aclose()
+        tts_turn.finish()
+
+
+def _closing_db(
+    events: AsyncIterator[dict], db: DBSession, prepare: Optional[Awaitable] = None,
+) -> tuple[AsyncIterator[dict], Callable[[], Awaitable[None]]]:
+    """
+    v10.9.0: Relay a turn's events, closing the DB session it owns at the end.
+    Also returns close(), the same cleanup for a relay that never started (it
+    runs once, whichever comes first). prepare, the turn coroutine, is closed
+    too in case nothing ever awaited it.
+    """
+    closed = False
+
+    async def close() -> None:
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        try:
+            await events.aclose()
+            if prepare is not None:
+                prepare.close()
+        finally:
+            await run_in_threadpool(db.close)
+
+    async def relay() -> AsyncIterator[dict]:
+        try:
+            async for event in events:
+                yield event
+        finally:
+            await close()
+
+    return relay(), close
+
+
+# v10.9.0: How often a streaming turn checks whether its client is still there
+_DISCONNECT_POLL_S = 0.25
+_TURN_END = object()
+_CLIENT_GONE = object()
+
+
+async def _drive_turn(
+    events: AsyncIterator[dict],
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[dict]:
+    """
+    v10.9.0: Run a turn's event iterator in its own task and relay its events.
+
+    When the consumer stops early — the client disconnected (polled through
+    is_disconnected), a send failed, or the response task was cancelled — the
+    turn task is cancelled explicitly. The LLM stream is closed and in-flight
+    TTS requests are aborted right away instead of being billed and discarded.
+    The turn's own task is not inside the response's cancel scope, so its
+    cleanup (stream close, state persistence) runs to completion — and is
+    awaited here, because the WebSocket turn persists through a DB session
+    its caller closes as soon as this generator is closed.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _pump():
+        try:
+            async for event in events:
+                queue.put_nowait(event)
+        finally:
+            queue.put_nowait(_TURN_END)
+
+    async def _watch():
+        while not await is_disconnected():
+            await asyncio.sleep(_DISCONNECT_POLL_S)
+        queue.put_nowait(_CLIENT_GONE)
+
+    pump = asyncio.create_task(_pump())
+    watcher = asyncio.create_task(_watch()) if is_disconnected else None
+    try:
+        while True:
+            item = await queue.get()
+            if item is _TURN_END:
+                await pump  # surface turn errors
+                return
+            if item is _CLIENT_GONE:
+                logger.info("CLIENT_DISCONNECTED: stopping turn")
+                return
+            yield item
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        if not pump.done():
+            pump.cancel()
+            metrics.incr("cancel.turns")
+            logger.info("TURN_CANCELLED: upstream LLM/TTS work aborted")
+            await asyncio.shield(asyncio.gather(pump, return_exceptions=True))
+
+
+@contextmanager
+def _counts_cancel(counter: str):
+    """v10.9.0: Count upstream calls abandoned because the turn was cancelled."""
+    try:
+        yield
+    except asyncio.CancelledError:
+        metrics.incr(counter)
+        raise
+
+
+async def _counted(stream: AsyncIterator, counter: str) -> AsyncIterator:
+    """v10.9.0: _counts_cancel for a provider stream; always closes it."""
+    try:
+        with _counts_cancel(counter):
+            async for item in stream:
+                yield item
+    finally:
+        await stream.aclose()
+
+
+async def _prepare_stream_turn(
+    db: DBSession,
+    session: Session,
+    audio_bytes: Optional[bytes],
+    text_input: Optional[str],
+    _tts_mode: str,
+    persist_db: Optional[DBSession] = None,
+    question_cache: Optional[dict] = None,
+    transcript: Optional[STTResult] = None,
+) -> AsyncIterator[dict]:
+    """
+    v10.9.0: One streaming turn, shared by /message-stream (SSE) and /session/ws.
+
+    Everything that touches `db` runs here, before the caller starts iterating.
+    Returns an async iterator of event dicts ({'type': 'text' | 'audio_chunk' |
+    'transcript' | 'verdict' | 'debug' | 'done', ...}); audio_chunk events carry
+    raw bytes in 'audio'.
+
+    persist_db: session for the end-of-turn writes. Both callers pass the
+    session they own for the whole turn — the SSE path its per-turn session
+    (closed by _closing_db), the WebSocket path its connection-lifetime one.
+    None opens a fresh session for the writes and closes it afterwards.
+    question_cache: question_id → question dict, kept by the WebSocket connection.
+    transcript: STT already done by a streamed utterance (/session/ws).
+    """
     state_before = session.state
 
+    def _load_q(question_id: Optional[str]) -> Optional[dict]:
+        if question_cache is None:
+            return _load_question(db, question_id)
+        if question_id not in question_cache:
+            question_cache[question_id] = _load_question(db, question_id)
+        return question_cache[question_id]
+
     # ── STT ──
     stt_latency = 0
     stt_garbled = False
-    if audio_b64:
-        audio_bytes = base64.b64decode(audio_b64)
+    stt_result = transcript
+    if stt_result is None and audio_bytes:
         stt = get_stt()
-        stt_result = stt.transcribe(audio_bytes)
+        stt_result = await stt.transcribe_async(audio_bytes)
+    if stt_result is not None:
         student_text = stt_result.text
         stt_latency = stt_result.latency_ms
         stt_garbled = stt_result.garbled
@@ -1183,10 +1669,11 @@ async def process_message_stream(
     # Handle garbled transcription
     if stt_garbled:
         pref = session.language_pref or "hinglish"
-        nudge = "Could you say that again?" if pref == "english" else "Ek baar phir boliye?"
+        nudge = QUICK_NUDGES["garbled_english"] if pref == "english" else QUICK_NUDGES["garbled"]
         tts = get_tts()
-        tts_result = tts.synthesize(nudge, get_tts_language(session))
-        audio_chunk = base64.b64encode(tts_result.audio_bytes).decode()
+        tts_result = await tts.synthesize_async(nudge, get_tts_language(session))
+        audio_chunk = tts_result.audio_bytes
+        audio_cache_path = tts_result.cache_path
 
         # Fix 4: Update conversation_history for early returns
         if session.conversation_history is None:
@@ -1197,236 +1684,244 @@ async def process_message_stream(
         await run_in_threadpool(lambda: db.commit())
 
         async def garbled_stream():
-            yield f"data: {json.dumps({'type': 'audio_chunk', 'index': 0, 'audio': audio_chunk, 'is_last': True})}\n\n"
-            yield f"data: {json.dumps({'type': 'text', 'content': nudge})}\n\n"
-            yield f"data: {json.dumps({'type': 'transcript', 'content': '[garbled]'})}\n\n"
-            yield f"data: {json.dumps({'type': 'done', 'state': session.state})}\n\n"
+            yield {'type': 'audio_chunk', 'index': 0, 'audio': audio_chunk, 'cache_path': audio_cache_path, 'is_last': True}
+            yield {'type': 'text', 'content': nudge}
+            yield {'type': 'transcript', 'content': '[garbled]'}
+            yield {'type': 'done', 'state': session.state}
 
-        return StreamingResponse(garbled_stream(), media_type="text/event-stream")
+        return garbled_stream()
 
     # DEBUG: RAW INPUT logging (P0 debug)
     logger.info(f"RAW INPUT (stream): [{student_text}]")
 
-    # ── Preprocessing (v8.1.0 P0 fixes) ──
-    chapter_name = CHAPTER_NAMES.get(session.chapter or "", session.chapter or "")
-    current_skill = ""
-    if session.current_question_id:
-        q_data = _load_question(db, session.current_question_id)
-        current_skill = q_data.get("target_skill", "") if q_data else ""
-
-    preprocess_result = preprocess_student_message(
-        text=student_text,
-        chapter=session.chapter or "",
-        chapter_name=chapter_name,
-        subject=session.subject or "math",
-        current_skill=current_skill,
-        language_pref=session.language_pref or "hinglish",
-    )
-
-    # DEBUG: META-ROUTE logging (P0 debug)
-    logger.info(f"META-ROUTE (stream): detected={preprocess_result.meta_question_type}, bypass_llm={preprocess_result.bypass_llm}, template=[{preprocess_result.template_response[:50] if preprocess_result.template_response else 'None'}]")
+    # v10.9.0: Classifier runs alongside the question load and preprocessing
+    classify_task = _start_classify(student_text, session)
+    try:
+        # ── Preprocessing (v8.1.0 P0 fixes) ──
+        def _preprocess():
+            chapter_name = CHAPTER_NAMES.get(session.chapter or "", session.chapter or "")
+            current_skill = ""
+            if session.current_question_id:
+                q_data = _load_q(session.current_question_id)
+                current_skill = q_data.get("target_skill", "") if q_data else ""
+
+            return preprocess_student_message(
+                text=student_text,
+                chapter=session.chapter or "",
+                chapter_name=chapter_name,
+                subject=session.subject or "math",
+                current_skill=current_skill,
+                language_pref=session.language_pref or "hinglish",
+            )
 
-    # Meta-question: bypass LLM entirely
-    if preprocess_result.bypass_llm:
-        logger.info(f"v8.1.0 (stream): Bypassing LLM for meta-question: {preprocess_result.meta_question_type}")
-        # DEBUG: Log response to frontend (P0 debug)
-        logger.info(f"RESPONSE TO FRONTEND (stream-meta): text=[{preprocess_result.template_response[:100] if preprocess_result.template_response else 'EMPTY'}], len={len(preprocess_result.template_response) if preprocess_result.template_response else 0}")
+        preprocess_result = await run_in_threadpool(_preprocess)
 
-        tts = get_tts()
-        # v10.5.2: Meta-question TTS — 200 char limit (was 150, too short for explanations)
-        meta_tts_text = prepare_for_tts(preprocess_result.template_response, session)
-        if len(meta_tts_text) > 200:
-            trunc = meta_tts_text[:200]
-            last_end = max(trunc.rfind('. '), trunc.rfind('। '), trunc.rfind('? '), trunc.rfind('! '))
-            if last_end > 50:
-                meta_tts_text = trunc[:last_end + 1]
-        tts_result = tts.synthesize(meta_tts_text, get_tts_language(session))
-        audio_chunk = base64.b64encode(tts_result.audio_bytes).decode()
+        # DEBUG: META-ROUTE logging (P0 debug)
+        logger.info(f"META-ROUTE (stream): detected={preprocess_result.meta_question_type}, bypass_llm={preprocess_result.bypass_llm}, template=[{preprocess_result.template_response[:50] if preprocess_result.template_response else 'None'}]")
 
-        if session.conversation_history is None:
-            session.conversation_history = []
-        session.conversation_history.append({"role": "user", "content": student_text})
-        session.conversation_history.append({"role": "assistant", "content": preprocess_result.template_response})
-        flag_modified(session, "conversation_history")
-        await run_in_threadpool(lambda: db.commit())
+        # Meta-question: bypass LLM entirely
+        if preprocess_result.bypass_llm:
+            classify_task.cancel()
+            logger.info(f"v8.1.0 (stream): Bypassing LLM for meta-question: {preprocess_result.meta_question_type}")
+            # DEBUG: Log response to frontend (P0 debug)
+            logger.info(f"RESPONSE TO FRONTEND (stream-meta): text=[{preprocess_result.template_response[:100] if preprocess_result.template_response else 'EMPTY'}], len={len(preprocess_result.template_response) if preprocess_result.template_response else 0}")
 
-        current_state = session.state  # Capture before generator to avoid DetachedInstanceError
-
-        async def meta_stream():
-            # v10.5.2: Text BEFORE audio (same as main response path)
-            yield f"data: {json.dumps({'type': 'text', 'content': preprocess_result.template_response})}\n\n"
-            yield f"data: {json.dumps({'type': 'audio_chunk', 'index': 0, 'audio': audio_chunk, 'is_last': True})}\n\n"
-            yield f"data: {json.dumps({'type': 'transcript', 'content': student_text})}\n\n"
-            yield f"data: {json.dumps({'type': 'done', 'state': current_state})}\n\n"
-
-        return StreamingResponse(meta_stream(), media_type="text/event-stream")
-
-    # Language switch: update session preference AND commit immediately
-    # P0 Bug A fix: Language must persist across requests
-    if preprocess_result.language_switched:
-        session.language_pref = preprocess_result.new_language
-        await run_in_threadpool(lambda: db.commit())  # P0 fix: Commit immediately
-        logger.info(f"P0 FIX (stream): Language switched to '{session.language_pref}' and COMMITTED to DB")
-
-    # Confusion: increment counter
-    if preprocess_result.confusion_detected:
-        session.confusion_count = (session.confusion_count or 0) + 1
-        logger.info(f"v8.1.0 (stream): Confusion detected, count now {session.confusion_count}")
-
-    # P0 FIX: Emotional distress detection — flag for LLM to acknowledge emotion first
-    _student_emotional = False
-    if preprocess_result.emotional_distress:
-        _student_emotional = True
-        logger.info(f"P0 FIX (stream): Emotional distress detected, flagging for LLM")
-
-    # === LANGUAGE AUTO-DETECTION (P0 fix) ===
-    _detected_lang = detect_input_language(student_text)
-    _consecutive_english = getattr(session, 'consecutive_english_count', 0) or 0
-
-    # Special case: first student message in GREETING sets language immediately
-    if session.state == 'GREETING' and _detected_lang == 'english' and session.language_pref != 'english':
-        session.language_pref = 'english'
-        session.consecutive_english_count = 1
-        await run_in_threadpool(lambda: db.commit())
-        logger.info(f"LANGUAGE AUTO-DETECT (stream): first message in GREETING is English, switched immediately")
-    else:
-        _should_switch, _new_lang, _updated_count = check_language_auto_switch(
-            detected_language=_detected_lang,
-            current_session_language=session.language_pref or 'hinglish',
-            consecutive_english_count=_consecutive_english,
-        )
-        session.consecutive_english_count = _updated_count
-        if _should_switch:
-            session.language_pref = _new_lang
+            tts = get_tts()
+            # v10.5.2: Meta-question TTS — 200 char limit (was 150, too short for explanations)
+            meta_tts_text = prepare_for_tts(preprocess_result.template_response, session)
+            if len(meta_tts_text) > 200:
+                trunc = meta_tts_text[:200]
+                last_end = max(trunc.rfind('. '), trunc.rfind('। '), trunc.rfind('? '), trunc.rfind('! '))
+                if last_end > 50:
+                    meta_tts_text = trunc[:last_end + 1]
+            tts_result = await tts.synthesize_async(meta_tts_text, get_tts_language(session))
+            audio_chunk = tts_result.audio_bytes
+            audio_cache_path = tts_result.cache_path
+
+            if session.conversation_history is None:
+                session.conversation_history = []
+            session.conversation_history.append({"role": "user", "content": student_text})
+            session.conversation_history.append({"role": "assistant", "content": preprocess_result.template_response})
+            flag_modified(session, "conversation_history")
             await run_in_threadpool(lambda: db.commit())
-            logger.info(f"LANGUAGE AUTO-DETECT (stream): switched to {_new_lang} (consecutive={_updated_count})")
-        elif _updated_count != _consecutive_english:
-            await run_in_threadpool(lambda: db.commit())  # Persist counter change
-    # === END LANGUAGE AUTO-DETECTION ===
-
-    # === LANGUAGE PRE-SCAN (runs on every message) ===
-    # Detects language switch requests BEFORE classification.
-    # Uses intent patterns, not bare keywords, to avoid false positives.
-    # Example false positive: "Why are you speaking in Hindi?" contains "Hindi"
-    # but the student wants ENGLISH, not Hindi.
-    _text_lower = student_text.lower()
-
-    # English triggers: student wants English
-    _english_triggers = [
-        "in english", "speak english", "teach english", "english mein",
-        "english please", "english me", "talk english", "explain english",
-        "respond english", "switch to english", "change to english",
-        "can you speak english", "can you teach english",
-        "इंग्लिश में", "अंग्रेजी में", "इंग्लिश में बोलो",
-        "अंग्रेजी में बोलो", "अंग्रेजी में बात करो",
-    ]
-    # Also catch: "Why are you speaking in Hindi?" = wants English (complaining about Hindi)
-    _complaining_about_hindi = [
-        "why hindi", "why in hindi", "why are you speaking hindi",
-        "why are you speaking in hindi", "stop speaking hindi",
-        "don't speak hindi", "dont speak hindi", "not in hindi",
-        "no hindi", "stop hindi", "I said english",
-        "हिंदी में क्यों", "हिंदी क्यों",
-    ]
-    # Hindi triggers: student explicitly WANTS Hindi (intent to switch TO Hindi)
-    _hindi_intent_triggers = [
-        "speak hindi", "speak in hindi", "talk in hindi",
-        "in hindi please", "hindi mein bolo", "hindi me bolo",
-        "switch to hindi", "change to hindi", "teach in hindi",
-        "hindi mein samjhao", "hindi mein baat karo",
-        "हिंदी में बोलो", "हिंदी में समझाओ", "हिंदी में बात करो",
-    ]
 
-    _switched = False
-    # Check English triggers first
-    for trigger in _english_triggers:
-        if trigger in _text_lower:
-            session.language_pref = "english"
+            current_state = session.state  # Capture before generator to avoid DetachedInstanceError
+
+            async def meta_stream():
+                # v10.5.2: Text BEFORE audio (same as main response path)
+                yield {'type': 'text', 'content': preprocess_result.template_response}
+                yield {'type': 'audio_chunk', 'index': 0, 'audio': audio_chunk, 'cache_path': audio_cache_path, 'is_last': True}
+                yield {'type': 'transcript', 'content': student_text}
+                yield {'type': 'done', 'state': current_state}
+
+            return meta_stream()
+
+        # Language switch: update session preference AND commit immediately
+        # P0 Bug A fix: Language must persist across requests
+        if preprocess_result.language_switched:
+            session.language_pref = preprocess_result.new_language
+            await run_in_threadpool(lambda: db.commit())  # P0 fix: Commit immediately
+            logger.info(f"P0 FIX (stream): Language switched to '{session.language_pref}' and COMMITTED to DB")
+
+        # Confusion: increment counter
+        if preprocess_result.confusion_detected:
+            session.confusion_count = (session.confusion_count or 0) + 1
+            logger.info(f"v8.1.0 (stream): Confusion detected, count now {session.confusion_count}")
+
+        # P0 FIX: Emotional distress detection — flag for LLM to acknowledge emotion first
+        _student_emotional = False
+        if preprocess_result.emotional_distress:
+            _student_emotional = True
+            logger.info(f"P0 FIX (stream): Emotional distress detected, flagging for LLM")
+
+        # === LANGUAGE AUTO-DETECTION (P0 fix) ===
+        _detected_lang = detect_input_language(student_text)
+        _consecutive_english = getattr(session, 'consecutive_english_count', 0) or 0
+
+        # Special case: first student message in GREETING sets language immediately
+        if session.state == 'GREETING' and _detected_lang == 'english' and session.language_pref != 'english':
+            session.language_pref = 'english'
+            session.consecutive_english_count = 1
             await run_in_threadpool(lambda: db.commit())
-            logger.info(f"LANGUAGE PRE-SCAN (stream): switched to english (trigger: {trigger})")
-            _switched = True
-            break
-
-    # Check complaints about Hindi (= wants English)
-    if not _switched:
-        for trigger in _complaining_about_hindi:
-            if trigger in _text_lower:
-                session.language_pref = "english"
+            logger.info(f"LANGUAGE AUTO-DETECT (stream): first message in GREETING is English, switched immediately")
+        else:
+            _should_switch, _new_lang, _updated_count = check_language_auto_switch(
+                detected_language=_detected_lang,
+                current_session_language=session.language_pref or 'hinglish',
+                consecutive_english_count=_consecutive_english,
+            )
+            session.consecutive_english_count = _updated_count
+            if _should_switch:
+                session.language_pref = _new_lang
                 await run_in_threadpool(lambda: db.commit())
-                logger.info(f"LANGUAGE PRE-SCAN (stream): switched to english (complaint: {trigger})")
-                _switched = True
-                break
+                logger.info(f"LANGUAGE AUTO-DETECT (stream): switched to {_new_lang} (consecutive={_updated_count})")
+            elif _updated_count != _consecutive_english:
+                await run_in_threadpool(lambda: db.commit())  # Persist counter change
+        # === END LANGUAGE AUTO-DETECTION ===
+
+        # === LANGUAGE PRE-SCAN (runs on every message) ===
+        # Detects language switch requests BEFORE classification.
+        # Uses intent patterns, not bare keywords, to avoid false positives.
+        # Example false positive: "Why are you speaking in Hindi?" contains "Hindi"
+        # but the student wants ENGLISH, not Hindi.
+        _text_lower = student_text.lower()
+
+        # English triggers: student wants English
+        _english_triggers = [
+            "in english", "speak english", "teach english", "english mein",
+            "english please", "english me", "talk english", "explain english",
+            "respond english", "switch to english", "change to english",
+            "can you speak english", "can you teach english",
+            "इंग्लिश में", "अंग्रेजी में", "इंग्लिश में बोलो",
+            "अंग्रेजी में बोलो", "अंग्रेजी में बात करो",
+        ]
+        # Also catch: "Why are you speaking in Hindi?" = wants English (complaining about Hindi)
+        _complaining_about_hindi = [
+            "why hindi", "why in hindi", "why are you speaking hindi",
+            "why are you speaking in hindi", "stop speaking hindi",
+            "don't speak hindi", "dont speak hindi", "not in hindi",
+            "no hindi", "stop hindi", "I said english",
+            "हिंदी में क्यों", "हिंदी क्यों",
+        ]
+        # Hindi triggers: student explicitly WANTS Hindi (intent to switch TO Hindi)
+        _hindi_intent_triggers = [
+            "speak hindi", "speak in hindi", "talk in hindi",
+            "in hindi please", "hindi mein bolo", "hindi me bolo",
+            "switch to hindi", "change to hindi", "teach in hindi",
+            "hindi mein samjhao", "hindi mein baat karo",
+            "हिंदी में बोलो", "हिंदी में समझाओ", "हिंदी में बात करो",
+        ]
 
-    # Check Hindi intent triggers
-    if not _switched:
-        for trigger in _hindi_intent_triggers:
+        _switched = False
+        # Check English triggers first
+        for trigger in _english_triggers:
             if trigger in _text_lower:
-                session.language_pref = "hindi"
+                session.language_pref = "english"
                 await run_in_threadpool(lambda: db.commit())
-                logger.info(f"LANGUAGE PRE-SCAN (stream): switched to hindi (trigger: {trigger})")
+                logger.info(f"LANGUAGE PRE-SCAN (stream): switched to english (trigger: {trigger})")
                 _switched = True
                 break
 
-    # v10.6.0: Telugu triggers
-    if not _switched:
-        _telugu_triggers = [
-            "in telugu", "speak telugu", "telugu mein", "telugu me",
-            "telugu lo", "telugu please", "teach telugu", "talk telugu",
-            "switch to telugu", "change to telugu", "telugu mein bolo",
-            "telugu mein samjhao", "telugu mein baat karo",
-            "తెలుగు", "తెలుగులో", "తెలుగులో చెప్పు", "తెలుగులో మాట్లాడు",
+        # Check complaints about Hindi (= wants English)
+        if not _switched:
+            for trigger in _complaining_about_hindi:
+                if trigger in _text_lower:
+                    session.language_pref = "english"
+                    await run_in_threadpool(lambda: db.commit())
+                    logger.info(f"LANGUAGE PRE-SCAN (stream): switched to english (complaint: {trigger})")
+                    _switched = True
+                    break
+
+        # Check Hindi intent triggers
+        if not _switched:
+            for trigger in _hindi_intent_triggers:
+                if trigger in _text_lower:
+                    session.language_pref = "hindi"
+                    await run_in_threadpool(lambda: db.commit())
+                    logger.info(f"LANGUAGE PRE-SCAN (stream): switched to hindi (trigger: {trigger})")
+                    _switched = True
+                    break
+
+        # v10.6.0: Telugu triggers
+        if not _switched:
+            _telugu_triggers = [
+                "in telugu", "speak telugu", "telugu mein", "telugu me",
+                "telugu lo", "telugu please", "teach telugu", "talk telugu",
+                "switch to telugu", "change to telugu", "telugu mein bolo",
+                "telugu mein samjhao", "telugu mein baat karo",
+                "తెలుగు", "తెలుగులో", "తెలుగులో చెప్పు", "తెలుగులో మాట్లాడు",
+            ]
+            for trigger in _telugu_triggers:
+                if trigger in _text_lower:
+                    session.language_pref = "telugu"
+                    await run_in_threadpool(lambda: db.commit())
+                    logger.info(f"LANGUAGE PRE-SCAN (stream): switched to telugu (trigger: {trigger})")
+                    _switched = True
+                    break
+        # === END LANGUAGE PRE-SCAN ===
+
+        # === CORRECTION DETECTION (runs on every message) ===
+        # Detects when student corrects Didi's math error.
+        # v10.6.1: State-aware — "nahi"/"galat" are legitimate answers in WAITING_ANSWER states
+        _correction_triggers = [
+            "that's wrong", "thats wrong", "that is wrong",
+            "you're wrong", "youre wrong", "you are wrong",
+            "wrong answer",
+            "that's not right", "not correct",
+            "check again", "check karo", "check kijiye",
+            "चेक कीजिए", "चेक करो",
         ]
-        for trigger in _telugu_triggers:
+        # Only add "galat"/"nahi" triggers when NOT in answer-expecting states
+        _in_answer_state = session.state in ("WAITING_ANSWER", "HINT", "HINT_1", "HINT_2", "FULL_SOLUTION")
+        if not _in_answer_state:
+            _correction_triggers.extend(["galat", "गलत", "गलत है", "nahi", "not right", "that's not"])
+        _is_correction = False
+        for trigger in _correction_triggers:
             if trigger in _text_lower:
-                session.language_pref = "telugu"
-                await run_in_threadpool(lambda: db.commit())
-                logger.info(f"LANGUAGE PRE-SCAN (stream): switched to telugu (trigger: {trigger})")
-                _switched = True
+                _is_correction = True
                 break
-    # === END LANGUAGE PRE-SCAN ===
-
-    # === CORRECTION DETECTION (runs on every message) ===
-    # Detects when student corrects Didi's math error.
-    # v10.6.1: State-aware — "nahi"/"galat" are legitimate answers in WAITING_ANSWER states
-    _correction_triggers = [
-        "that's wrong", "thats wrong", "that is wrong",
-        "you're wrong", "youre wrong", "you are wrong",
-        "wrong answer",
-        "that's not right", "not correct",
-        "check again", "check karo", "check kijiye",
-        "चेक कीजिए", "चेक करो",
-    ]
-    # Only add "galat"/"nahi" triggers when NOT in answer-expecting states
-    _in_answer_state = session.state in ("WAITING_ANSWER", "HINT", "HINT_1", "HINT_2", "FULL_SOLUTION")
-    if not _in_answer_state:
-        _correction_triggers.extend(["galat", "गलत", "गलत है", "nahi", "not right", "that's not"])
-    _is_correction = False
-    for trigger in _correction_triggers:
-        if trigger in _text_lower:
-            _is_correction = True
-            break
-    # Pattern: "X nahi Y hota hai" = correction (only outside answer states)
-    import re as _re
-    if not _is_correction and not _in_answer_state:
-        if _re.search(r'\d+\s*(nahi|नहीं|nhi|wrong|galat)', _text_lower):
-            _is_correction = True
-        elif _re.search(r'(nahi|नहीं|nhi|wrong|galat)\s*.*\d+', _text_lower):
-            _is_correction = True
-
-    if _is_correction:
-        logger.info(f"CORRECTION DETECTED (stream): student correcting Didi's math")
-    # === END CORRECTION DETECTION ===
-
-    # ── Classify ──
-    # v7.3.0: Use async LLM classifier (module-level singleton)
-    t_classify = time.perf_counter()
-    classify_result = await classify(
-        student_text,
-        current_state=session.state,
-        subject=session.subject or "math",
-        client=get_openai_client(),
-    )
+        # Pattern: "X nahi Y hota hai" = correction (only outside answer states)
+        import re as _re
+        if not _is_correction and not _in_answer_state:
+            if _re.search(r'\d+\s*(nahi|नहीं|nhi|wrong|galat)', _text_lower):
+                _is_correction = True
+            elif _re.search(r'(nahi|नहीं|nhi|wrong|galat)\s*.*\d+', _text_lower):
+                _is_correction = True
+
+        if _is_correction:
+            logger.info(f"CORRECTION DETECTED (stream): student correcting Didi's math")
+        # === END CORRECTION DETECTION ===
+
+        # ── Classify ──
+        # v7.3.0: Use async LLM classifier (module-level singleton)
+        # v10.9.0: Started right after STT; classifier_ms is the time this turn
+        # still had to wait for it, not its full duration
+        t_classify = time.perf_counter()
+        classify_result, classify_run_ms = await classify_task
+    finally:
+        _discard_classify(classify_task)
     classifier_ms = int((time.perf_counter() - t_classify) * 1000)
+    logger.info(f"CLASSIFY_OVERLAP: ran {classify_run_ms}ms, waited {classifier_ms}ms")
     category = classify_result["category"]
     logger.info(f"CLASSIFIER: text='{student_text[:50]}' → category={category}, extras={classify_result.get('extras', {})}")
     # Handle LANGUAGE_SWITCH preference from classifier (Break 4 fix)
@@ -1449,8 +1944,9 @@ async def process_message_stream(
         from app.tutor.strings import get_text
         nudge = get_text("idle_prompt", pref)
         tts = get_tts()
-        tts_result = tts.synthesize(nudge, get_tts_language(session))
-        audio_chunk = base64.b64encode(tts_result.audio_bytes).decode()
+        tts_result = await tts.synthesize_async(nudge, get_tts_language(session))
+        audio_chunk = tts_result.audio_bytes
+        audio_cache_path = tts_result.cache_path
 
         # Fix 4: Update conversation_history for early returns
         if session.conversation_history is None:
@@ -1461,17 +1957,17 @@ async def process_message_stream(
         await run_in_threadpool(lambda: db.commit())
 
         async def silence_stream():
-            yield f"data: {json.dumps({'type': 'audio_chunk', 'index': 0, 'audio': audio_chunk, 'is_last': True})}\n\n"
-            yield f"data: {json.dumps({'type': 'text', 'content': nudge})}\n\n"
-            yield f"data: {json.dumps({'type': 'transcript', 'content': '[silence]'})}\n\n"
-            yield f"data: {json.dumps({'type': 'done', 'state': session.state})}\n\n"
+            yield {'type': 'audio_chunk', 'index': 0, 'audio': audio_chunk, 'cache_path': audio_cache_path, 'is_last': True}
+            yield {'type': 'text', 'content': nudge}
+            yield {'type': 'transcript', 'content': '[silence]'}
+            yield {'type': 'done', 'state': session.state}
 
-        return StreamingResponse(silence_stream(), media_type="text/event-stream")
+        return silence_stream()
 
     # ── State transition (v8.0 FSM) ──
     question_data = None
     if session.current_question_id:
-        question_data = _load_question(db, session.current_question_id)
+        question_data = _load_q(session.current_question_id)
 
     # v8.0: Build context for old state machine (backward compat)
     ctx = {
@@ -1581,7 +2077,7 @@ async def process_message_stream(
             _pick_new_s = action.extra.get("wants_easier") or action.action_type == "pick_next_question"
             if session.current_question_id and not _pick_new_s:
                 # Re-read current question
-                question_data = _load_question(db, session.current_question_id)
+                question_data = _load_q(session.current_question_id)
             else:
                 # Pick new question
                 asked_ids = [
@@ -1610,7 +2106,7 @@ async def process_message_stream(
         elif action.action_type in ("give_hint", "show_solution", "teach_concept", "answer_meta_question"):
             # Load question for hints, solutions, teaching, and meta-questions
             if session.current_question_id:
-                question_data = _load_question(db, session.current_question_id)
+                question_data = _load_q(session.current_question_id)
 
     # v10.3.1: Persist all session field updates (counters, question_id, hint_level)
     # BEFORE the generator starts. The generator uses fresh_db which would overwrite.
@@ -1700,7 +2196,7 @@ async def process_message_stream(
     # === END Pre-load ===
 
     async def stream_response():
-        """SSE: collect LLM response with parallel TTS, stream to frontend."""
+        """Collect LLM response with parallel TTS, stream events to the caller."""
         nonlocal new_state, verdict, verdict_str  # v7.5.2 + v10.5.1
         full_text = ""  # TTS-cleaned text (for turn logging)
         display_text_raw = ""  # v10.1 FIX Issue 3: Original LLM text (for display with digits)
@@ -1709,6 +2205,7 @@ async def process_message_stream(
         # Fix 2: Wrap in try/finally to persist state on cancellation
         llm_ms = 0
         tts_ms = 0
+        ttfa_ms = 0  # v10.9.0: LLM start → first audio chunk
         try:
             t_llm = time.perf_counter()
             tts_lang = _tts_language  # Pre-loaded — avoids DetachedInstanceError
@@ -1725,23 +2222,16 @@ async def process_message_stream(
             else:
                 MAX_TTS_CHARS = 200
 
-            async for sentence in llm.generate_streaming(messages):
-                display_text_raw += " " + sentence
-
-            llm_ms = int((time.perf_counter() - t_llm) * 1000)
-
-            display_text_raw = display_text_raw.strip()
-            logger.info(f"RAW_LLM_OUTPUT: [{display_text_raw[:200] if display_text_raw else 'EMPTY'}]")
-
-            # v10.5.1: Parse verdict from inline eval LLM output
-            if _use_inline_eval:
+            def _apply_inline_verdict(text: str) -> str:
+                """v10.5.1: Parse [CORRECT]/[INCORRECT] tag from inline eval LLM output."""
+                nonlocal new_state, verdict, verdict_str
                 _parsed_correct = None
-                if display_text_raw.startswith("[CORRECT]"):
+                if text.startswith("[CORRECT]"):
                     _parsed_correct = True
-                    display_text_raw = display_text_raw[len("[CORRECT]"):].strip()
-                elif display_text_raw.startswith("[INCORRECT]"):
+                    text = text[len("[CORRECT]"):].strip()
+                elif text.startswith("[INCORRECT]"):
                     _parsed_correct = False
-                    display_text_raw = display_text_raw[len("[INCORRECT]"):].strip()
+                    text = text[len("[INCORRECT]"):].strip()
                 else:
                     # LLM didn't follow prefix instruction — fallback to regex checker
                     fallback_verdict = check_math_answer(
@@ -1767,71 +2257,236 @@ async def process_message_stream(
                 )
                 logger.info(f"INLINE_EVAL_PARSED: verdict={verdict_str}, new_state={new_state}, "
                            f"hint_level={_inline_eval_hint_level}")
+                return text
 
-            # v10.7.0: Strip "You asked" / "Aapne poocha" from display text
-            display_text_raw = _re_you_asked.sub('', display_text_raw)
-            display_text_raw = _re_aapne_poocha.sub('', display_text_raw)
-            display_text_raw = _re_aapne_poocha_dev.sub('', display_text_raw)
+            def _strip_you_asked(text: str) -> str:
+                """v10.7.0: Strip "You asked" / "Aapne poocha" from display text."""
+                text = _re_you_asked.sub('', text)
+                text = _re_aapne_poocha.sub('', text)
+                return _re_aapne_poocha_dev.sub('', text)
+
+            def _tts_text(text: str) -> str:
+                # Use pre-loaded language pref to avoid DetachedInstanceError on session object
+                cleaned = clean_for_tts(text)
+                if _session_language_for_tts == 'english':
+                    cleaned = digits_to_english_words(cleaned)
+                return cleaned
 
-            # Enforce on display text (keeps digits for frontend)
             _is_teaching_s = (state_before == "TEACHING" or action.action_type in ("teach_concept", "answer_meta_question") or action.extra.get("post_comfort"))
-            enforce_result = enforce(
-                display_text_raw, new_state,
-                verdict=verdict_str,
-                student_answer=student_text,
-                language=tts_lang,
-                previous_response=prev_response,
-                is_teaching=_is_teaching_s,
-            )
-            display_text_final = enforce_result.text
-            display_text = format_for_display(display_text_final)
-            logger.info(f"AFTER_FORMAT_DISPLAY: [{display_text[:200] if display_text else 'EMPTY'}]")
-
-            # v10.3.1: Send text to frontend FIRST (don't wait for audio)
-            yield f"data: {json.dumps({'type': 'text', 'content': display_text})}\n\n"
-
-            # Prepare final TTS text from enforced output
-            # Use pre-loaded language pref to avoid DetachedInstanceError on session object
-            final_tts_text = clean_for_tts(display_text_final)
-            if _session_language_for_tts == 'english':
-                final_tts_text = digits_to_english_words(final_tts_text)
-            # v10.8.0: Single state-dependent TTS truncation (removed redundant 500-char block)
-            if len(final_tts_text) > MAX_TTS_CHARS:
-                trunc = final_tts_text[:MAX_TTS_CHARS]
-                last_end = max(
-                    trunc.rfind('. '), trunc.rfind('। '),
-                    trunc.rfind('? '), trunc.rfind('! '),
+
+            if _tts_mode == "sentence":
+                # v10.9.0: Pipelined mode — each sentence is cleaned and sent to TTS
+                # as soon as the LLM finishes it; audio_chunk events go out in order.
+                display_parts = []
+                tts_parts = []
+                t_llm_done = None
+
+                async def _prepared_sentences():
+                    nonlocal t_llm_done
+                    # v10.9.0: Enforced per sentence; the LLM stream is cut as soon
+                    # as the word/sentence budget is spent.
+                    stream_enforcer = None
+                    tts_chars = 0
+
+                    def _accept(sentence: str):
+                        nonlocal tts_chars
+                        tts_sentence = _tts_text(sentence)
+                        if tts_parts and tts_chars + len(tts_sentence) > MAX_TTS_CHARS:
+                            logger.info(f"TTS_BUDGET: {tts_chars} chars spoken, stopping LLM stream")
+                            return None
+                        tts_chars += len(tts_sentence)
+                        display_parts.append(sentence)
+                        tts_parts.append(tts_sentence)
+                        return tts_sentence
+
+                    llm_stream = _counted(llm.generate_streaming(messages), "cancel.llm_streams")
+                    over_budget = False
+                    try:
+                        async for sentence in llm_stream:
+                            if stream_enforcer is None:
+                                if _use_inline_eval:
+                                    sentence = _apply_inline_verdict(sentence)
+                                # Created after the inline verdict so praise rules see it
+                                stream_enforcer = StreamingEnforcer(
+                                    new_state,
+                                    verdict=verdict_str,
+                                    student_answer=student_text,
+                                    language=tts_lang,
+                                    previous_response=prev_response,
+                                    is_teaching=_is_teaching_s,
+                                )
+                            for ready in stream_enforcer.feed(_strip_you_asked(sentence).strip()):
+                                tts_sentence = _accept(ready)
+                                if tts_sentence is None:
+                                    over_budget = True
+                                    break
+                                yield tts_sentence
+                            if over_budget:
+                                break
+                            if stream_enforcer.exhausted:
+                                logger.info(f"ENFORCE_BUDGET: {stream_enforcer.words} words, "
+                                            f"{stream_enforcer.sentences} sentences, stopping LLM stream")
+                                break
+                    finally:
+                        await llm_stream.aclose()
+                        t_llm_done = time.perf_counter()
+
+                    if stream_enforcer is None:
+                        return
+                    held, enforce_result = stream_enforcer.finish()
+                    if enforce_result.violations:
+                        logger.info(f"STREAM_ENFORCE: {enforce_result.violations}")
+                    if over_budget:
+                        return
+                    for ready in held:
+                        tts_sentence = _accept(ready)
+                        if tts_sentence is None:
+                            break
+                        yield tts_sentence
+
+                sentence_cache_paths = {}
+                sentences_done = False
+
+                async def _all_sentences():
+                    nonlocal sentences_done
+                    try:
+                        async for sentence in _prepared_sentences():
+                            yield sentence
+                    finally:
+                        sentences_done = True
+
+                async def _synth(text: str) -> bytes:
+                    with _counts_cancel("cancel.tts_requests"):
+                        result = await tts_inst.synthesize_async(text, tts_lang)
+                    sentence_cache_paths[text] = result.cache_path
+                    return result.audio_bytes
+
+                def _text_event() -> dict:
+                    return {'type': 'text', 'content': format_for_display(" ".join(display_parts))}
+
+                chunk_index = 0
+                text_sent = last_sent = False
+                async for sentence_index, tts_sentence, audio in pipeline_tts(_all_sentences(), _synth):
+                    if not audio:
+                        logger.error(f"TTS_EMPTY_AUDIO: sentence {sentence_index} ({len(tts_sentence)} chars)")
+                        continue
+                    if sentences_done and not text_sent:
+                        # The full reply is known once the LLM is done — don't hold it behind the audio tail
+                        text_sent = True
+                        yield _text_event()
+                    if chunk_index == 0:
+                        ttfa_ms = int((time.perf_counter() - t_llm) * 1000)
+                        logger.info(f"TTS_FIRST_AUDIO: {ttfa_ms}ms after LLM start")
+                    last_sent = sentences_done and sentence_index == len(tts_parts) - 1
+                    yield {'type': 'audio_chunk', 'index': chunk_index, 'audio': audio, 'cache_path': sentence_cache_paths.get(tts_sentence), 'is_last': last_sent}
+                    chunk_index += 1
+                if chunk_index and not last_sent:
+                    # The last clip went out before the LLM stream ended (or a later
+                    # sentence had no audio): close the sequence with an empty chunk
+                    yield {'type': 'audio_chunk', 'index': chunk_index, 'audio': b'', 'is_last': True}
+
+                t_end = time.perf_counter()
+                llm_ms = int(((t_llm_done or t_end) - t_llm) * 1000)
+                tts_ms = int((t_end - (t_llm_done or t_end)) * 1000)  # TTS tail after LLM finished
+                display_text_final = " ".join(display_parts)
+                display_text = format_for_display(display_text_final)
+                full_text = " ".join(tts_parts)  # For turn logging
+                logger.info(f"TTS_PIPELINED: {len(tts_parts)} sentences, {chunk_index} chunks, "
+                            f"llm={llm_ms}ms tail={tts_ms}ms first_audio={ttfa_ms}ms")
+                if not text_sent:
+                    yield _text_event()
+            else:
+                async for sentence in _counted(llm.generate_streaming(messages), "cancel.llm_streams"):
+                    display_text_raw += " " + sentence
+
+                llm_ms = int((time.perf_counter() - t_llm) * 1000)
+
+                display_text_raw = display_text_raw.strip()
+                logger.info(f"RAW_LLM_OUTPUT: [{display_text_raw[:200] if display_text_raw else 'EMPTY'}]")
+
+                # v10.5.1: Parse verdict from inline eval LLM output
+                if _use_inline_eval:
+                    display_text_raw = _apply_inline_verdict(display_text_raw)
+
+                display_text_raw = _strip_you_asked(display_text_raw)
+
+                # Enforce on display text (keeps digits for frontend)
+                enforce_result = enforce(
+                    display_text_raw, new_state,
+                    verdict=verdict_str,
+                    student_answer=student_text,
+                    language=tts_lang,
+                    previous_response=prev_response,
+                    is_teaching=_is_teaching_s,
                 )
-                if last_end > 50:
-                    final_tts_text = trunc[:last_end + 1]
-                logger.info(f"TTS_TRUNCATED: {len(display_text_final)} → {len(final_tts_text)} chars")
+                display_text_final = enforce_result.text
+                display_text = format_for_display(display_text_final)
+                logger.info(f"AFTER_FORMAT_DISPLAY: [{display_text[:200] if display_text else 'EMPTY'}]")
+
+                # v10.3.1: Send text to frontend FIRST (don't wait for audio)
+                yield {'type': 'text', 'content': display_text}
+
+                # Prepare final TTS text from enforced output
+                final_tts_text = _tts_text(display_text_final)
+                # v10.8.0: Single state-dependent TTS truncation (removed redundant 500-char block)
+                if len(final_tts_text) > MAX_TTS_CHARS:
+                    trunc = final_tts_text[:MAX_TTS_CHARS]
+                    last_end = max(
+                        trunc.rfind('. '), trunc.rfind('। '),
+                        trunc.rfind('? '), trunc.rfind('! '),
+                    )
+                    if last_end > 50:
+                        final_tts_text = trunc[:last_end + 1]
+                    logger.info(f"TTS_TRUNCATED: {len(display_text_final)} → {len(final_tts_text)} chars")
 
-            full_text = final_tts_text  # For turn logging
-            logger.info(f"TTS_TEXT: [{full_text[:200] if full_text else 'EMPTY'}]")
+                full_text = final_tts_text  # For turn logging
+                logger.info(f"TTS_TEXT: [{full_text[:200] if full_text else 'EMPTY'}]")
 
-            # v10.5.2: Always TTS the full enforced response (not first sentence only)
-            if final_tts_text and final_tts_text.strip():
-                try:
+                # v10.5.2: Always TTS the full enforced response (not first sentence only)
+                if final_tts_text and final_tts_text.strip() and _tts_mode == "stream":
+                    # v10.9.0: Forward provider stream chunks as they arrive —
+                    # first audio no longer waits for the whole utterance.
                     t_tts = time.perf_counter()
-                    tts_result = await tts_inst.synthesize_async(final_tts_text, tts_lang)
+                    chunk_index = 0
+                    try:
+                        async for chunk in _counted(tts_inst.synthesize_streaming(final_tts_text, tts_lang), "cancel.tts_requests"):
+                            if not chunk:
+                                continue
+                            if chunk_index == 0:
+                                ttfa_ms = int((time.perf_counter() - t_llm) * 1000)
+                            yield {'type': 'audio_chunk', 'index': chunk_index, 'audio': chunk, 'stream': True, 'is_last': False}
+                            chunk_index += 1
+                    except Exception as e:
+                        logger.error(f"TTS_ERROR: {e}, text_len={len(final_tts_text)}, lang={tts_lang}")
+                    if chunk_index:
+                        # The provider stream has no last-chunk marker: close the sequence with an empty chunk
+                        yield {'type': 'audio_chunk', 'index': chunk_index, 'audio': b'', 'stream': True, 'is_last': True}
                     tts_ms = int((time.perf_counter() - t_tts) * 1000)
-                    logger.info(f"TTS_FULL: {tts_ms}ms, {len(final_tts_text)} chars, lang={tts_lang}")
-                    if tts_result.audio_bytes:
-                        audio_chunk = base64.b64encode(tts_result.audio_bytes).decode()
-                        yield f"data: {json.dumps({'type': 'audio_chunk', 'index': 0, 'audio': audio_chunk, 'is_last': True})}\n\n"
-                    else:
-                        logger.error(f"TTS_EMPTY_AUDIO: synthesize returned no audio_bytes for {len(final_tts_text)} chars")
-                except Exception as e:
-                    logger.error(f"TTS_ERROR: {e}, text_len={len(final_tts_text)}, lang={tts_lang}")
-            else:
-                logger.error(f"TTS_SKIPPED: final_tts_text is empty, display_text_final=[{display_text_final[:100] if display_text_final else 'EMPTY'}]")
+                    logger.info(f"TTS_STREAM: {tts_ms}ms, {chunk_index} chunks, {len(final_tts_text)} chars, "
+                                f"first_audio={ttfa_ms}ms, lang={tts_lang}")
+                elif final_tts_text and final_tts_text.strip():
+                    try:
+                        t_tts = time.perf_counter()
+                        with _counts_cancel("cancel.tts_requests"):
+                            tts_result = await tts_inst.synthesize_async(final_tts_text, tts_lang)
+                        tts_ms = int((time.perf_counter() - t_tts) * 1000)
+                        logger.info(f"TTS_FULL: {tts_ms}ms, {len(final_tts_text)} chars, lang={tts_lang}")
+                        if tts_result.audio_bytes:
+                            ttfa_ms = int((time.perf_counter() - t_llm) * 1000)
+                            yield {'type': 'audio_chunk', 'index': 0, 'audio': tts_result.audio_bytes, 'cache_path': tts_result.cache_path, 'is_last': True}
+                        else:
+                            logger.error(f"TTS_EMPTY_AUDIO: synthesize returned no audio_bytes for {len(final_tts_text)} chars")
+                    except Exception as e:
+                        logger.error(f"TTS_ERROR: {e}, text_len={len(final_tts_text)}, lang={tts_lang}")
+                else:
+                    logger.error(f"TTS_SKIPPED: final_tts_text is empty, display_text_final=[{display_text_final[:100] if display_text_final else 'EMPTY'}]")
 
             # Send metadata
-            yield f"data: {json.dumps({'type': 'transcript', 'content': student_text})}\n\n"
-            yield f"data: {json.dumps({'type': 'verdict', 'value': verdict_str, 'diagnostic': verdict.diagnostic if verdict else None})}\n\n"
+            yield {'type': 'transcript', 'content': student_text}
+            yield {'type': 'verdict', 'value': verdict_str, 'diagnostic': verdict.diagnostic if verdict else None}
             total_ms = classifier_ms + eval_ms + llm_ms + tts_ms
-            yield f"data: {json.dumps({'type': 'debug', 'classifier': category, 'verdict': verdict_str, 'state_before': state_before, 'state_after': new_state, 'question_id': _session_current_question_id, 'level': session.current_level, 'classifier_ms': classifier_ms, 'eval_ms': eval_ms, 'llm_ms': llm_ms, 'tts_ms': tts_ms, 'total_ms': total_ms})}\n\n"
-            yield f"data: {json.dumps({'type': 'done', 'state': new_state})}\n\n"
+            yield {'type': 'debug', 'classifier': category, 'verdict': verdict_str, 'state_before': state_before, 'state_after': new_state, 'question_id': _session_current_question_id, 'level': session.current_level, 'classifier_ms': classifier_ms, 'eval_ms': eval_ms, 'llm_ms': llm_ms, 'tts_ms': tts_ms, 'ttfa_ms': ttfa_ms, 'tts_mode': _tts_mode, 'total_ms': total_ms}
+            yield {'type': 'done', 'state': new_state}
 
         except asyncio.CancelledError:
             # Fix 2: Handle cancellation gracefully - persist partial state
@@ -1850,7 +2505,7 @@ async def process_message_stream(
                 new_state = "WAITING_ANSWER"
 
             # Get fresh DB session for final writes
-            fresh_db = SessionLocal()
+            fresh_db = persist_db or SessionLocal()
             try:
                 fresh_session = fresh_db.query(Session).filter(Session.id == _session_id).first()
                 if fresh_session:
@@ -1942,12 +2597,239 @@ async def process_message_stream(
                 logger.error(f"Error saving session in generator finally: {e}")
                 fresh_db.rollback()
             finally:
-                fresh_db.close()
+                if persist_db is None:
+                    fresh_db.close()
 
             if cancelled:
                 raise asyncio.CancelledError()
 
-    return StreamingResponse(stream_response(), media_type="text/event-stream")
+    return stream_response()
+
+
+# ─── WebSocket Session (v10.9.0) ─────────────────────────────────────────────
+
+@router.websocket("/session/ws")
+async def session_websocket(websocket: WebSocket, token: str = "", session_id: str = ""):
+    """
+    v10.9.0: Full-duplex tutoring session over one connection.
+    Connect with ?token=<jwt>&session_id=<id>. The JWT is verified and the
+    Session/Student rows loaded once; they stay in memory (with question rows)
+    for the life of the connection.
+
+    Client → server:
+      binary frame  — one utterance of recorded audio (wav/webm), raw bytes
+      text frame    — JSON {"text": "...", "tts_mode": "full" | "sentence" | "stream"}
+      {"type": "interrupt"} — stop the reply being streamed (answered with
+      {"type": "interrupted"})
+    Streamed utterance (STT while the student speaks):
+      {"type": "audio_start", "language"?: "hi-IN"}, then binary frames of
+      16 kHz mono s16le PCM, then {"type": "audio_end"} at end of speech.
+      The server answers with {"type": "partial", "content"} events as the
+      transcript grows; the turn runs on the final text (or the last partial,
+      if the final is late) as soon as audio_end arrives. Needs
+      STT_STREAM_PROVIDER; the bundled web client does not stream yet.
+    Server → client: JSON text frames with the same events as /message-stream.
+    Each audio_chunk header ({"type": "audio_chunk", "index", "is_last",
+    "bytes"}) is followed by one binary frame carrying the raw audio.
+
+    The reply streams from its own task while the socket keeps reading, so
+    the student can barge in: a new utterance (blob, text or audio_start) or
+    an interrupt cancels the turn still streaming.
+    """
+    try:
+        user = verify_token(token)
+    except HTTPException:
+        await websocket.close(code=4401)
+        return
+    if user.get("role") != "student":
+        await websocket.close(code=4403)
+        return
+
+    db = SessionLocal()
+    try:
+        session = await run_in_threadpool(
+            lambda: db.query(Session).filter(Session.id == session_id).first()
+        )
+        if not session or session.student_id != user.get("sub"):
+            await websocket.close(code=4404)
+            return
+        # Loaded into the identity map so session.student never re-queries
+        student = await run_in_threadpool(
+            lambda: db.query(Student).filter(Student.id == session.student_id).first()
+        )
+
+        await websocket.accept()
+        if session.ended_at:
+            await websocket.send_json({"type": "error", "detail": "Session already ended"})
+            await websocket.close(code=4400)
+            return
+        await websocket.send_json({"type": "ready", "session_id": session.id, "state": session.state})
+        logger.info(f"WS_CONNECT: session={session.id} student={student.id if student else None}")
+
+        out = _WSSender(websocket)
+        tts_mode = STREAM_TTS_MODE
+        question_cache: dict = {}
+        stream = None           # streamed utterance in progress
+        forward_partials = None
+        turn = None             # task streaming the current reply
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+
+                audio_bytes = message.get("bytes")
+                if audio_bytes is not None and stream is not None:
+                    await stream.send(audio_bytes)
+                    continue
+
+                text_input = None
+                transcript = None
+                if audio_bytes is None:
+                    try:
+                        payload = json.loads(message.get("text") or "")
+                    except ValueError:
+                        payload = None
+                    if not isinstance(payload, dict):
+                        await out.send_json({"type": "error", "detail": "Expected JSON text frame"})
+                        continue
+                    if payload.get("tts_mode") in STREAM_TTS_MODES:
+                        tts_mode = payload["tts_mode"]
+
+                    if payload.get("type") == "interrupt":
+                        if await _cancel_turn(turn):
+                            await out.send_json({"type": "interrupted"})
+                        turn = None
+                        continue
+                    if payload.get("type") == "audio_start":
+                        # The student started speaking over the reply
+                        await _cancel_turn(turn)
+                        turn = None
+                        if stream is not None:
+                            forward_partials.cancel()
+                            await stream.aclose()
+                        stream = await _open_stt_stream(payload.get("language"))
+                        if stream is None:
+                            await out.send_json({"type": "error", "detail": "Streaming STT unavailable"})
+                        else:
+                            forward_partials = asyncio.create_task(_forward_partials(out, stream))
+                        continue
+                    if payload.get("type") == "audio_end":
+                        if stream is None:
+                            await out.send_json({"type": "error", "detail": "No audio stream open"})
+                            continue
+                        forward_partials.cancel()
+                        try:
+                            transcript = await stream.finish()
+                        except Exception as e:
+                            # finish() may fall back to REST STT — a failed turn must not drop the connection
+                            logger.error(f"WS_STT_STREAM: finish failed: {e}")
+                            await out.send_json({"type": "error", "detail": "Turn failed"})
+                            continue
+                        finally:
+                            stream = forward_partials = None
+                    else:
+                        text_input = payload.get("text") or ""
+
+                # One turn at a time on the shared DB session: the previous
+                # reply is cancelled and its cleanup awaited before the next
+                await _cancel_turn(turn)
+                has_audio = audio_bytes is not None or transcript is not None
+                turn = asyncio.create_task(_run_ws_turn(
+                    out, db, session, audio_bytes, text_input, transcript,
+                    tts_mode, question_cache, has_audio,
+                ))
+        finally:
+            await _cancel_turn(turn)
+            if stream is not None:
+                forward_partials.cancel()
+                await stream.aclose()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        db.close()
+        logger.info(f"WS_CLOSE: session={session_id}")
+
+
+class _WSSender:
+    """
+    v10.9.0: Serialized sends on the session WebSocket. The turn task, the
+    partial forwarder and the receive loop all write to one socket, and an
+    audio_chunk header must stay next to its binary frame.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self._lock = asyncio.Lock()
+
+    async def send_json(self, data: dict) -> None:
+        async with self._lock:
+            await self.websocket.send_json(data)
+
+    async def send_audio(self, header: dict, audio: bytes) -> None:
+        async with self._lock:
+            await self.websocket.send_json(header)
+            await self.websocket.send_bytes(audio)
+
+
+async def _cancel_turn(turn: Optional[asyncio.Task]) -> bool:
+    """Cancel a WebSocket turn and wait for its cleanup. True if it was still running."""
+    if turn is None:
+        return False
+    running = not turn.done()
+    turn.cancel()
+    await asyncio.gather(turn, return_exceptions=True)
+    return running
+
+
+async def _open_stt_stream(language: Optional[str]):
+    """v10.9.0: Start a streamed utterance; None if streaming STT is off or unreachable."""
+    provider = get_streaming_stt()
+    if provider is None:
+        return None
+    try:
+        return await provider.open(language)
+    except Exception as e:
+        logger.warning(f"WS_STT_STREAM: open failed: {e}")
+        return None
+
+
+async def _forward_partials(out: _WSSender, stream) -> None:
+    while True:
+        text = await stream.partials.get()
+        await out.send_json({"type": "partial", "content": text})
+
+
+async def _run_ws_turn(out: _WSSender, db: DBSession, session: Session,
+                       audio_bytes: Optional[bytes], text_input: Optional[str],
+                       transcript: Optional[STTResult], tts_mode: str,
+                       question_cache: dict, has_audio: bool) -> None:
+    """One turn on the session WebSocket: events out, audio as binary frames."""
+    turn = _drive_turn(_with_filler(
+        _prepare_stream_turn(
+            db, session, audio_bytes, text_input, tts_mode,
+            persist_db=db, question_cache=question_cache, transcript=transcript,
+        ),
+        fillers.filler_event(get_tts_language(session), tts_mode, has_audio),
+        tts_mode, has_audio,
+    ))
+    try:
+        async for event in turn:
+            if event["type"] == "audio_chunk":
+                audio = event.pop("audio")
+                event.pop("cache_path", None)
+                await out.send_audio({**event, "bytes": len(audio)}, audio)
+            else:
+                await out.send_json(event)
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        # A failed turn must not drop the connection
+        logger.error(f"WS_TURN_ERROR: {e}")
+        await run_in_threadpool(lambda: db.rollback())
+        await out.send_json({"type": "error", "detail": "Turn failed"})
+    finally:
+        await turn.aclose()
 
 
 # ─── Session End ─────────────────────────────────────────────────────────────
@@ -1987,9 +2869,9 @@ def end_session(
     tts = get_tts()
     try:
         tts_result = tts.synthesize(summary, get_tts_language(session))
-        audio_b64 = base64.b64encode(tts_result.audio_bytes).decode()
+        audio_b64, audio_url = _audio_ref(tts_result.audio_bytes, tts_result.cache_path)
     except Exception:
-        audio_b64 = ""
+        audio_b64, audio_url = "", None
 
     session.state = "SESSION_COMPLETE"
     session.ended_at = datetime.now(timezone.utc)
@@ -1999,6 +2881,7 @@ def end_session(
     return SessionEndResponse(
         summary_text=summary,
         summary_audio_b64=audio_b64,
+        summary_audio_url=audio_url,
         questions_attempted=session.questions_attempted,
         questions_correct=session.questions_correct,
     )
@@ -2006,7 +2889,7 @@ def end_session(
 
 # ─── Helpers ─────────────────────────────────────────────────────────────────
 
-def _quick_response(
+async def _quick_response(
     db: DBSession, session: Session, text: str,
     student_text: str = "", stt_latency: int = 0,
 ) -> MessageResponse:
@@ -2016,10 +2899,10 @@ def _quick_response(
 
     tts = get_tts()
     try:
-        tts_result = tts.synthesize(prepare_for_tts(text, session), get_tts_language(session))
-        audio_b64 = base64.b64encode(tts_result.audio_bytes).decode()
+        tts_result = await tts.synthesize_async(prepare_for_tts(text, session), get_tts_language(session))
+        audio_b64, audio_url = await _audio_ref_async(tts_result.audio_bytes, tts_result.cache_path)
     except Exception:
-        audio_b64 = ""
+        audio_b64, audio_url = "", None
 
     # Fix 1: Update conversation_history before commit
     if session.conversation_history is None:
@@ -2054,6 +2937,7 @@ def _quick_response(
     return MessageResponse(
         didi_text=text,
         didi_audio_b64=audio_b64,
+        didi_audio_url=audio_url,
         state=session.state,
     )
 
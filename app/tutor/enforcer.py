@@ -242,6 +242,13 @@ def _check_specificity(
     return has_reference, text
 
 
+# Teaching indicators for Rule 4
+TEACHING_WORDS = [
+    "matlab", "iska matlab", "for example", "jaise ki",
+    "yaad rakhiye", "note karo", "formula", "rule",
+]
+
+
 def _check_no_teach_and_question(text: str) -> tuple[bool, str]:
     """Rule 4: Never teach AND ask a question in the same response."""
     sentences = re.split(r'[.!?।]+', text)
@@ -256,12 +263,7 @@ def _check_no_teach_and_question(text: str) -> tuple[bool, str]:
     for s in sentences:
         if '?' in s or '?' in text:  # Check original for question marks
             has_question = True
-        # Teaching indicators
-        teaching_words = [
-            "matlab", "iska matlab", "for example", "jaise ki",
-            "yaad rakhiye", "note karo", "formula", "rule",
-        ]
-        for tw in teaching_words:
+        for tw in TEACHING_WORDS:
             if tw in s.lower():
                 has_teaching = True
 
@@ -358,6 +360,143 @@ def light_enforce(
     return cleaned
 
 
+# ─── Incremental Enforcement for Sentence Streaming ──────────────────────────
+
+class StreamingEnforcer:
+    """
+    v10.9.0: Stateful enforcer for sentence-streamed LLM output.
+
+    Feed sentences one at a time with feed(); each sentence is released as
+    soon as it is known to be safe. Word and sentence budgets
+    (MAX_RESPONSE_WORDS / MAX_TEACHING_WORDS) accumulate across sentences;
+    once spent, `exhausted` is set so the caller can stop the LLM stream
+    instead of paying for tokens that enforce() would cut anyway.
+
+    Per-sentence rules: false praise, length budget (charged after the praise
+    strip), language, TTS safety.
+    Question sentences are held until finish() — Rule 4 (no teach+question)
+    can only be decided once the whole reply is known. Everything after a
+    held sentence is held too, so speech order is preserved.
+    Whole-reply rules (specificity, repetition) are reported by finish().
+    """
+
+    def __init__(
+        self,
+        state: str,
+        verdict: Optional[str] = None,
+        student_answer: Optional[str] = None,
+        language: str = "hi-IN",
+        previous_response: Optional[str] = None,
+        is_teaching: bool = False,
+    ):
+        from app.config import MAX_RESPONSE_WORDS, MAX_RESPONSE_SENTENCES, MAX_TEACHING_WORDS, MAX_TEACHING_SENTENCES
+        self.state = state
+        self.verdict = verdict
+        self.student_answer = student_answer
+        self.language = language
+        self.previous_response = previous_response
+        self.max_words = MAX_TEACHING_WORDS if is_teaching else MAX_RESPONSE_WORDS
+        self.max_sentences = MAX_TEACHING_SENTENCES if is_teaching else MAX_RESPONSE_SENTENCES
+
+        self.words = 0
+        self.sentences = 0
+        self.exhausted = False
+        self.released: list[str] = []
+        self._held: list[str] = []
+        self._has_teaching = False
+        self._has_question = False
+        self.violations: list[str] = []
+
+    def _flag(self, violation: str) -> None:
+        if violation not in self.violations:
+            self.violations.append(violation)
+
+    def feed(self, sentence: str) -> list[str]:
+        """Enforce one sentence. Returns sentences that are safe to emit now."""
+        if self.exhausted:
+            return []
+
+        # Rule 2: No false praise — before the budget, so a sentence stripped
+        # to nothing costs nothing
+        passed, sentence = _check_no_false_praise(sentence, self.verdict)
+        if not passed:
+            self._flag("FALSE_PRAISE")
+        if not sentence or not sentence.strip():
+            return []
+
+        # Rule 1: Length — accumulated budget
+        s_words = sentence.split()
+        s_count = max(1, len([p for p in re.split(r'[.!?।]+', sentence) if p.strip()]))
+        if self.words + len(s_words) > self.max_words:
+            self._flag("LENGTH")
+            self.exhausted = True
+            if self.words > 0:
+                return []
+            # Nothing spoken yet — hard cut at word limit (same as _check_length)
+            sentence = ' '.join(s_words[:self.max_words])
+            s_words = sentence.split()
+        self.words += len(s_words)
+        self.sentences += s_count
+        if self.sentences >= self.max_sentences:
+            if self.sentences > self.max_sentences:
+                self._flag("LENGTH")
+            self.exhausted = True
+
+        # Rule 5: Language match
+        passed, _ = _check_language_match(sentence, self.language)
+        if not passed:
+            self._flag("WRONG_LANGUAGE")
+
+        # Rule 6: TTS safety
+        passed, _ = _check_tts_safety(sentence)
+        if not passed:
+            self._flag("TTS_UNSAFE")
+
+        # Rule 4: No teach+question — hold questions until the reply is complete
+        if any(tw in sentence.lower() for tw in TEACHING_WORDS):
+            self._has_teaching = True
+        if '?' in sentence:
+            self._has_question = True
+            self._held.append(sentence)
+            return []
+        if self._held:
+            self._held.append(sentence)
+            return []
+
+        self.released.append(sentence)
+        return [sentence]
+
+    def finish(self) -> tuple[list[str], EnforceResult]:
+        """
+        End of stream. Returns (remaining sentences to emit, result for the
+        whole reply). Held questions are dropped if the reply also taught.
+        """
+        remaining = self._held
+        if self._has_teaching and self._has_question:
+            self._flag("TEACH_AND_QUESTION")
+            remaining = [s for s in remaining if '?' not in s]
+        self._held = []
+        self.released.extend(remaining)
+
+        text = ' '.join(self.released)
+
+        # Rule 3: Specificity
+        passed, _ = _check_specificity(text, self.student_answer, self.state)
+        if not passed:
+            self._flag("NO_SPECIFICITY")
+
+        # Rule 7: No repetition
+        passed, _ = _check_no_repetition(text, self.previous_response, self.state)
+        if not passed:
+            self._flag("REPETITION")
+
+        return remaining, EnforceResult(
+            passed=len(self.violations) == 0,
+            text=text,
+            violations=list(self.violations),
+        )
+
+
 # ─── Main Enforcement Function ───────────────────────────────────────────────
 
 def enforce(
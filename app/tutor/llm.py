@@ -7,14 +7,15 @@ import time
 import re
 import logging
 import asyncio
-from typing import Protocol, Optional, AsyncGenerator
+from typing import Protocol, Optional, AsyncGenerator, Awaitable, Callable, TypeVar
 from dataclasses import dataclass
 
 from openai import OpenAI, AsyncOpenAI
 
+from app import metrics
 from app.config import (
     OPENAI_API_KEY, LLM_MODEL, LLM_MAX_TOKENS, LLM_TEMPERATURE,
-    LLM_PROVIDER,
+    LLM_PROVIDER, LLM_HEDGE, LLM_HEDGE_AFTER_MS,
 )
 
 logger = logging.getLogger(__name__)
@@ -30,6 +31,67 @@ class LLMResult:
 
 class LLMProvider(Protocol):
     def generate(self, messages: list[dict], **kwargs) -> LLMResult: ...
+    async def generate_async(self, messages: list[dict], **kwargs) -> LLMResult: ...
+
+
+# ─── Hedged Requests (v10.9.0) ───────────────────────────────────────────────
+
+T = TypeVar("T")
+
+
+async def hedged(
+    call: Callable[[], Awaitable[T]],
+    name: str,
+    discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    after_s: Optional[float] = None,
+) -> T:
+    """
+    Await call(); if it has not returned within after_s (default
+    LLM_HEDGE_AFTER_MS), start an identical second call. The first successful
+    result wins and the other call is cancelled; discard() releases a losing
+    result that arrived anyway (e.g. closes its stream).
+
+    Pass-through unless LLM_HEDGE is on. Counts hedge.<name>.calls / .fired /
+    .won so spend can be traded against tail latency.
+    """
+    if not LLM_HEDGE:
+        return await call()
+
+    metrics.incr(f"hedge.{name}.calls")
+    after_s = LLM_HEDGE_AFTER_MS / 1000 if after_s is None else after_s
+    primary = asyncio.create_task(call())
+    tasks = [primary]
+    winner = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=after_s)
+        if not done:
+            tasks.append(asyncio.create_task(call()))
+            metrics.incr(f"hedge.{name}.fired")
+            logger.info(f"LLM_HEDGE [{name}]: no response after {int(after_s * 1000)}ms, hedge fired")
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [t for t in tasks if t in done and t.exception() is None]
+            if succeeded:
+                winner = succeeded[0]
+                if winner is not primary:
+                    metrics.incr(f"hedge.{name}.won")
+                    logger.info(f"LLM_HEDGE [{name}]: hedge won")
+                return winner.result()
+        return primary.result()  # every attempt failed — raise the original error
+    finally:
+        for task in tasks:
+            if task is not winner and not task.done():
+                task.cancel()
+        for task in tasks:
+            if task is winner or not task.done() or task.cancelled() or task.exception():
+                continue
+            if discard is not None:
+                try:
+                    await discard(task.result())
+                except Exception as e:
+                    logger.warning(f"LLM_HEDGE [{name}]: discarding loser failed: {e}")
 
 
 # ─── OpenAI GPT-4o ───────────────────────────────────────────────────────────
@@ -69,6 +131,36 @@ class OpenAIGPT4o:
             logger.error(f"LLM error after {elapsed}ms: {e}")
             raise
 
+    async def generate_async(
+        self,
+        messages: list[dict],
+        max_tokens: int = LLM_MAX_TOKENS,
+        temperature: float = LLM_TEMPERATURE,
+    ) -> LLMResult:
+        """v10.9.0: Async generation for async routes (never blocks the event loop)."""
+        start = time.perf_counter()
+        try:
+            response = await self._async_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            elapsed = int((time.perf_counter() - start) * 1000)
+            content = response.choices[0].message.content
+            text = (content or "").strip()
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens,
+            }
+            logger.info(f"LLM response (async): {elapsed}ms, {usage['total_tokens']} tokens")
+            return LLMResult(text=text, latency_ms=elapsed, model=LLM_MODEL, usage=usage)
+        except Exception as e:
+            elapsed = int((time.perf_counter() - start) * 1000)
+            logger.error(f"LLM error after {elapsed}ms: {e}")
+            raise
+
     async def generate_streaming(
         self,
         messages: list[dict],
@@ -80,17 +172,30 @@ class OpenAIGPT4o:
         Used for sentence-level TTS to reduce perceived latency.
         """
         buffer = ""
+        stream = None
 
-        try:
-            stream = await self._async_client.chat.completions.create(
+        async def _open():
+            # v10.9.0: A request "responds" when its first chunk arrives
+            s = await self._async_client.chat.completions.create(
                 model=LLM_MODEL,
                 messages=messages,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 stream=True,
             )
+            try:
+                return s, await anext(s, None)
+            except BaseException:
+                await s.close()
+                raise
+
+        async def _close(opened):
+            await opened[0].close()
 
-            async for chunk in stream:
+        try:
+            stream, chunk = await hedged(_open, "stream", discard=_close)
+
+            while chunk is not None:
                 delta = chunk.choices[0].delta.content or ""
                 buffer += delta
 
@@ -106,6 +211,8 @@ class OpenAIGPT4o:
                     else:
                         break
 
+                chunk = await anext(stream, None)
+
             # Yield remaining buffer
             if buffer.strip():
                 yield buffer.strip()
@@ -114,6 +221,11 @@ class OpenAIGPT4o:
             logger.error(f"LLM streaming error: {e}")
             if buffer.strip():
                 yield buffer.strip()
+        finally:
+            # v10.9.0: Consumer may stop early (enforcer budget) — close the
+            # HTTP stream so OpenAI stops generating tokens we won't use.
+            if stream is not None:
+                await stream.close()
 
     def _find_sentence_boundary(self, text: str) -> Optional[int]:
         """Find the end of the first complete sentence."""
@@ -135,10 +247,72 @@ class OpenAIGPT4o:
         return None
 
 
+# ─── Mock LLM (for testing and benchmarks) ───────────────────────────────────
+
+class MockLLM:
+    """
+    Mock LLM that returns a canned Didi reply. For local testing only.
+    v10.9.0: first_token_s / per_sentence_s simulate OpenAI streaming latency
+    so time-to-first-audio can be benchmarked without API keys.
+    """
+
+    _REPLY = (
+        "Dekhiye, 5 ka square matlab 5 ko 5 se multiply karna. "
+        "5 times 5 equals 25. "
+        "Isliye 5 ka square 25 hai. "
+        "Ab aap batao, 6 ka square kitna hoga?"
+    )
+
+    def __init__(
+        self,
+        reply: Optional[str] = None,
+        first_token_s: float = 0.0,
+        per_sentence_s: float = 0.0,
+    ):
+        self.reply = reply or self._REPLY
+        self.first_token_s = first_token_s
+        self.per_sentence_s = per_sentence_s
+
+    def _sentences(self) -> list[str]:
+        return [s for s in re.split(r'(?<=[.!?।])\s+', self.reply.strip()) if s]
+
+    def _delay(self) -> float:
+        return self.first_token_s + self.per_sentence_s * len(self._sentences())
+
+    def _result(self, delay: float) -> LLMResult:
+        logger.info(f"LLM [mock]: {len(self.reply)} chars")
+        return LLMResult(
+            text=self.reply, latency_ms=int(delay * 1000), model="mock",
+            usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        )
+
+    def generate(self, messages: list[dict], **kwargs) -> LLMResult:
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self._result(delay)
+
+    async def generate_async(self, messages: list[dict], **kwargs) -> LLMResult:
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._result(delay)
+
+    async def generate_streaming(self, messages: list[dict], **kwargs) -> AsyncGenerator[str, None]:
+        """Mock streaming — yields one sentence at a time."""
+        if self.first_token_s:
+            await asyncio.sleep(self.first_token_s)
+        for sentence in self._sentences():
+            if self.per_sentence_s:
+                await asyncio.sleep(self.per_sentence_s)
+            yield sentence
+
+
 # ─── Provider Factory ────────────────────────────────────────────────────────
 
 _providers = {
     "openai_gpt4o": OpenAIGPT4o,
+    "mock": MockLLM,
 }
 
 _instance: Optional[OpenAIGPT4o] = None
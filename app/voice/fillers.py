@@ -0,0 +1,110 @@
+"""
+IDNA EdTech v10.9.0 — Thinking Fillers
+
+While STT, the classifier, the evaluator and the LLM run, the student hears
+nothing. When a /message-stream turn is predicted to be slow, a short
+acknowledgement ("Hmm, dekhte hain...") goes out as audio chunk 0 and the
+real reply follows as later chunks.
+
+Clips are synthesized once at startup and served from memory, so the hot
+path makes no upstream calls. The prediction is an EWMA of the observed
+time to first real audio, per (tts_mode, audio or text input).
+"""
+
+import logging
+from typing import Optional
+
+from app.config import THINKING_FILLER_MS
+
+logger = logging.getLogger(__name__)
+
+# Per TTS language (see get_tts_language). Short, neutral, safe after any input.
+THINKING_FILLERS = {
+    "hi-IN": [
+        "Hmm, dekhte hain...",
+        "Achha, ek second...",
+        "Theek hai, sochte hain...",
+    ],
+    "en-IN": [
+        "Hmm, let me see...",
+        "Okay, one second...",
+        "Alright, let me think...",
+    ],
+    "te-IN": [
+        "సరే, చూద్దాం...",
+        "ఒక్క నిమిషం...",
+        "హ్మ్, ఆలోచిద్దాం...",
+    ],
+}
+
+# Until turns have been observed: ms from request to first real audio (text input)
+_PRIOR_FIRST_AUDIO_MS = {"full": 3500, "sentence": 2000, "stream": 2500}
+_PRIOR_STT_MS = 800
+_EWMA_ALPHA = 0.2
+
+_clips: dict[str, list[dict]] = {}
+_next_clip: dict[str, int] = {}
+_first_audio_ms: dict[tuple[str, bool], float] = {}
+
+
+def predicted_first_audio_ms(tts_mode: str, has_audio: bool) -> int:
+    """Expected ms from request to the first real audio chunk."""
+    observed = _first_audio_ms.get((tts_mode, has_audio))
+    if observed is not None:
+        return int(observed)
+    prior = _PRIOR_FIRST_AUDIO_MS.get(tts_mode, _PRIOR_FIRST_AUDIO_MS["full"])
+    return prior + (_PRIOR_STT_MS if has_audio else 0)
+
+
+def observe_first_audio(tts_mode: str, has_audio: bool, elapsed_ms: int) -> None:
+    """Feed one turn's measured time to first real audio into the prediction."""
+    key = (tts_mode, has_audio)
+    previous = _first_audio_ms.get(key)
+    if previous is None:
+        _first_audio_ms[key] = float(elapsed_ms)
+    else:
+        _first_audio_ms[key] = previous + _EWMA_ALPHA * (elapsed_ms - previous)
+
+
+def filler_event(language: str, tts_mode: str, has_audio: bool) -> Optional[dict]:
+    """
+    Audio chunk 0 for a turn predicted slower than THINKING_FILLER_MS, or None.
+    Rotates through the language's pool so consecutive turns don't repeat.
+    """
+    if THINKING_FILLER_MS <= 0:
+        return None
+    clips = _clips.get(language)
+    if not clips:
+        return None
+    predicted = predicted_first_audio_ms(tts_mode, has_audio)
+    if predicted < THINKING_FILLER_MS:
+        return None
+
+    i = _next_clip.get(language, 0)
+    _next_clip[language] = (i + 1) % len(clips)
+    clip = clips[i]
+    logger.info(f"THINKING_FILLER: '{clip['text']}' (predicted first audio {predicted}ms)")
+    return {
+        'type': 'audio_chunk', 'index': 0, 'audio': clip['audio'],
+        'cache_path': clip['cache_path'], 'is_last': False, 'filler': True,
+    }
+
+
+async def warm_fillers(tts, languages: Optional[list] = None) -> int:
+    """Synthesize every filler clip into memory. Returns the number loaded."""
+    loaded = 0
+    for language in languages or list(THINKING_FILLERS):
+        clips = []
+        for text in THINKING_FILLERS.get(language, []):
+            try:
+                result = await tts.synthesize_async(text, language)
+            except Exception as e:
+                logger.warning(f"THINKING_FILLER: could not synthesize '{text}' ({language}): {e}")
+                continue
+            if result.audio_bytes:
+                clips.append({'text': text, 'audio': result.audio_bytes, 'cache_path': result.cache_path})
+        if clips:
+            _clips[language] = clips
+            loaded += len(clips)
+    logger.info(f"THINKING_FILLER: {loaded} clips ready")
+    return loaded
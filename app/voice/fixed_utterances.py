@@ -0,0 +1,117 @@
+"""
+IDNA EdTech v10.9.0 — Fixed Utterances
+
+Everything Didi says that does not come from the LLM: the STRINGS templates,
+the enforcer's safe/varied fallbacks, the chapter intros, meta-question
+answers, quick nudges, thinking fillers and per-student session greetings.
+
+fixed_utterances() expands them into the exact (language, text) pairs the
+routes send to TTS, so the precache job can synthesize them ahead of time:
+
+    python -m app.voice.tts_precache --source fixed
+
+TTS language follows get_tts_language(): english → en-IN, telugu → te-IN,
+hindi/hinglish → the session's own language, which can be any supported one.
+Some paths run prepare_for_tts() first and some do not, so both spellings
+are included where they differ.
+"""
+
+import re
+from itertools import product
+from types import SimpleNamespace
+from typing import Iterable, List, Optional, Tuple
+
+from app.config import SUPPORTED_LANGUAGES
+
+LANGUAGE_PREFS = ("english", "hindi", "hinglish", "telugu")
+
+_PLACEHOLDER = re.compile(r"{(\w+)}")
+
+
+def _tts_languages(pref: Optional[str], languages: List[str]) -> List[str]:
+    """TTS language codes a line spoken under language_pref can reach."""
+    if pref == "english":
+        return [lang for lang in languages if lang == "en-IN"]
+    if pref in ("telugu", "te-IN"):
+        return [lang for lang in languages if lang == "te-IN"]
+    return list(languages)
+
+
+def _expand(template: str, fills: dict) -> List[str]:
+    """Every rendering of template over fills; none if a placeholder can't be filled."""
+    names = sorted(set(_PLACEHOLDER.findall(template)))
+    if not names:
+        return [template]
+    if any(not fills.get(name) for name in names):
+        return []
+    return [template.format(**dict(zip(names, values)))
+            for values in product(*(fills[name] for name in names))]
+
+
+def _lines(names: Iterable[str]) -> List[Tuple[Optional[str], str]]:
+    """(language_pref or None for any, text) for every fixed line."""
+    from app.tutor.strings import STRINGS
+    from app.tutor.enforcer import SAFE_FALLBACKS, SAFE_FALLBACKS_EN, VARIED_FALLBACKS, VARIED_FALLBACKS_EN
+    from app.tutor.instruction_builder import CHAPTER_NAMES
+    from app.tutor.preprocessing import build_meta_response
+    from app.content.ch1_square_and_cube import CHAPTER_INTRO
+    from app.routers.student import QUICK_NUDGES, greeting_for
+
+    names = sorted(set(names))
+    fills = {"name": names, "chapter_name": sorted(set(CHAPTER_NAMES.values()))}
+    lines = []
+
+    for templates in STRINGS.values():
+        for pref, template in templates.items():
+            lines.extend((pref, text) for text in _expand(template, fills))
+
+    # get_safe_fallback: English tables for english, the Hinglish ones otherwise
+    for pref in LANGUAGE_PREFS:
+        english = pref == "english"
+        lines.extend((pref, text) for text in (SAFE_FALLBACKS_EN if english else SAFE_FALLBACKS).values())
+        for options in (VARIED_FALLBACKS_EN if english else VARIED_FALLBACKS).values():
+            lines.extend((pref, text) for text in options)
+        lines.append((pref, "One moment, let me think." if english else "Ek minute rukiye, main soch rahi hoon."))
+
+    for lang_key, turns in CHAPTER_INTRO.items():
+        lines.extend((lang_key, text) for text in turns.values())
+
+    for pref in LANGUAGE_PREFS:
+        for chapter_name in fills["chapter_name"]:
+            for meta_type in ("chapter", "subject", "progress"):
+                lines.append((pref, build_meta_response(meta_type, "", chapter_name, "math", "", pref)))
+
+    lines.extend((None, text) for text in QUICK_NUDGES.values())
+
+    # Greetings per name; the session's language_pref is the greeting language
+    for pref in LANGUAGE_PREFS:
+        for name in names:
+            lines.append((pref, greeting_for(name, pref)))
+            lines.append((pref, greeting_for(name, pref, chapter_done=True)))
+
+    return lines
+
+
+def fixed_utterances(
+    languages: Optional[List[str]] = None,
+    student_names: Iterable[str] = (),
+) -> List[Tuple[str, str]]:
+    """All (tts_language, text) pairs Didi can say without the LLM, deduplicated and sorted."""
+    from app.routers.student import prepare_for_tts
+    from app.voice.fillers import THINKING_FILLERS
+
+    languages = list(languages or SUPPORTED_LANGUAGES)
+    pairs = set()
+    for pref, text in _lines(student_names):
+        if not text or not text.strip():
+            continue
+        for session_pref in ([pref] if pref else LANGUAGE_PREFS):
+            spoken = {text, prepare_for_tts(text, SimpleNamespace(language_pref=session_pref))}
+            for lang in _tts_languages(session_pref, languages):
+                pairs.update((lang, variant) for variant in spoken)
+
+    for lang, clips in THINKING_FILLERS.items():
+        if lang in languages:
+            pairs.update((lang, text) for text in clips)
+
+    return sorted(pairs)
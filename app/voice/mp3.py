@@ -0,0 +1,93 @@
+"""
+IDNA EdTech v10.9.0 — MP3 Frame Stitching
+
+Joins per-sentence TTS clips into one playable MP3. Each clip is reduced to
+its bare audio frames: the ID3v2 tag at the front, ID3v1/APE tags at the end
+and the Xing/Info/VBRI header frame are dropped (that header describes one
+clip's frame count and would make players cut the joined clip short).
+MPEG audio is a plain sequence of self-contained frames, so the frames of
+clips with the same sample rate and channel layout can simply be concatenated.
+"""
+
+from typing import List, Optional, Tuple
+
+# kbps by bitrate index, (MPEG-1, MPEG-2/2.5) for Layer III
+_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Hz by sample rate index, keyed by the header's version bits
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),   # MPEG-1
+    2: (22050, 24000, 16000),   # MPEG-2
+    0: (11025, 12000, 8000),    # MPEG-2.5
+}
+
+
+def _frame(data: bytes, pos: int) -> Optional[Tuple[int, tuple]]:
+    """(frame length, (version, sample rate, mono)) for a Layer III header at pos."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 3
+    layer = (data[pos + 1] >> 1) & 3
+    bitrate_index = data[pos + 2] >> 4
+    rate_index = (data[pos + 2] >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (data[pos + 2] >> 1) & 1
+    mono = data[pos + 3] >> 6 == 3
+    length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+    return length, (version, sample_rate, mono)
+
+
+def _id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_info_frame(data: bytes, pos: int, fmt: tuple) -> bool:
+    """Xing/Info (after the side info) or VBRI (fixed offset) header frame."""
+    version, _, mono = fmt
+    side_info = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+    tag = data[pos + 4 + side_info:pos + 8 + side_info]
+    return tag in (b"Xing", b"Info") or data[pos + 36:pos + 40] == b"VBRI"
+
+
+def audio_frames(data: bytes) -> Optional[Tuple[bytes, tuple]]:
+    """
+    The clip's audio frames without tags or the VBR header frame, and its
+    (version, sample rate, mono) format. None if data is not Layer III MP3.
+    A trailing partial frame or tag is dropped.
+    """
+    pos = _id3v2_size(data)
+    first = _frame(data, pos)
+    if first is None:
+        return None
+    fmt = first[1]
+    if _is_info_frame(data, pos, fmt):
+        pos += first[0]
+    start = pos
+    while True:
+        frame = _frame(data, pos)
+        if frame is None or frame[1] != fmt or pos + frame[0] > len(data):
+            break
+        pos += frame[0]
+    if pos == start:
+        return None
+    return data[start:pos], fmt
+
+
+def stitch(clips: List[bytes]) -> Optional[bytes]:
+    """One MP3 from clips in order, or None if any clip is not MP3 or the formats differ."""
+    if len(clips) == 1:
+        return clips[0]
+    parts = [audio_frames(clip) for clip in clips]
+    if any(part is None for part in parts) or len({fmt for _, fmt in parts}) != 1:
+        return None
+    return b"".join(frames for frames, _ in parts)
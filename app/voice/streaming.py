@@ -8,7 +8,7 @@ yields audio chunks for sequential playback. Target: first audio at ~3.5s.
 import asyncio
 import re
 import logging
-from typing import AsyncGenerator, Tuple, Callable, Awaitable
+from typing import AsyncGenerator, AsyncIterator, Tuple, Callable, Awaitable
 
 logger = logging.getLogger("idna.streaming")
 
@@ -93,3 +93,50 @@ async def stream_pipeline(
             logger.error(f"TTS failed for sentence: {e}")
             # Skip failed sentence, continue with next
             continue
+
+
+async def pipeline_tts(
+    sentences: AsyncIterator[str],
+    tts_func: Callable[[str], Awaitable[bytes]],
+) -> AsyncGenerator[Tuple[int, str, bytes], None]:
+    """
+    v10.9.0: Pipelined sentence TTS.
+
+    Fires TTS for each sentence the moment it arrives — while the LLM is
+    still streaming later sentences — and yields (index, sentence, audio)
+    strictly in sentence order. Time-to-first-audio becomes
+    first-sentence LLM time + first-sentence TTS time.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _produce():
+        try:
+            async for sentence in sentences:
+                queue.put_nowait((sentence, asyncio.ensure_future(tts_func(sentence))))
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.ensure_future(_produce())
+    index = 0
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            sentence, task = item
+            try:
+                audio = await task
+            except Exception as e:
+                logger.error(f"TTS failed for sentence {index}: {e}")
+                audio = b""
+            yield index, sentence, audio
+            index += 1
+        # Surface LLM errors from the producer
+        await producer
+    finally:
+        # Consumer stopped early (budget hit, client gone) — drop pending work
+        producer.cancel()
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                item[1].cancel()
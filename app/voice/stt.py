@@ -3,20 +3,43 @@ IDNA EdTech v7.3 — STT Abstraction Layer
 Swap providers by changing config.STT_PROVIDER.
 Default: Sarvam Saarika v2.5 (handles Hindi-English code-mixing natively).
 Fallback: Groq Whisper (set STT_PROVIDER=groq_whisper).
+
+v10.9.0: Providers hold pooled, HTTP/2-capable clients for their lifetime;
+handshake and latency histograms are on /health/detail under "stt".
 """
 
+import asyncio
+import base64
+import dataclasses
+import functools
+import hashlib
+import inspect
 import io
+import json
+import shutil
+import subprocess
+import sys
+import threading
 import time
 import logging
+import wave
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional, Protocol
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional, Protocol, Tuple
 
 import httpx
 
+from app import metrics
 from app.config import (
     STT_PROVIDER, STT_CONFIDENCE_THRESHOLD, STT_DEFAULT_LANGUAGE,
+    STT_HTTP2, STT_MAX_CONNECTIONS, STT_KEEPALIVE_S,
+    STT_CONDITION_AUDIO, STT_VAD_THRESHOLD_DB, STT_MIN_SPEECH_MS, STT_VAD_PAD_MS, STT_RESAMPLE_16K,
     GROQ_API_KEY, GROQ_WHISPER_MODEL, GROQ_STT_URL,
-    SARVAM_API_KEY, SARVAM_STT_URL,
+    SARVAM_API_KEY, SARVAM_STT_URL, SARVAM_STT_STREAM_URL, STT_STREAM_PROVIDER, STT_STREAM_FINAL_MS,
+    STT_RACE, STT_RACE_SECONDARY, STT_RACE_AFTER_MS, STT_RESULT_CACHE_TTL_S, STT_RESULT_CACHE_SIZE,
 )
 
 logger = logging.getLogger(__name__)
@@ -47,186 +70,849 @@ class STTResult:
 
 class STTProvider(Protocol):
     def transcribe(self, audio: bytes, language: str = "hi") -> STTResult: ...
+    async def transcribe_async(self, audio: bytes, language: str = "hi") -> STTResult: ...
 
 
-# ─── Groq Whisper ────────────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def _http2() -> bool:
+    """HTTP/2 if configured and the h2 package is installed (httpx[http2])."""
+    if not STT_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("STT: h2 not installed, using HTTP/1.1 keep-alive")
+        return False
 
-class GroqWhisperSTT:
-    """Groq-hosted Whisper large-v3-turbo. Fast, good for MVP."""
 
+def _client_options() -> dict:
+    return {
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+        "limits": httpx.Limits(
+            max_connections=STT_MAX_CONNECTIONS,
+            max_keepalive_connections=STT_MAX_CONNECTIONS,
+            keepalive_expiry=STT_KEEPALIVE_S,
+        ),
+        "http2": _http2(),
+    }
+
+
+class _Handshake:
+    """
+    httpcore trace hook for one request: did it open a connection, and how
+    long did TCP connect + TLS take? A request that saw no connect event
+    went out on a pooled connection.
+    """
+
+    def __init__(self):
+        self.started: Optional[float] = None
+        self.ms: Optional[float] = None
+
+    def event(self, name: str) -> None:
+        if name == "connection.connect_tcp.started":
+            self.started = time.perf_counter()
+        elif name in ("connection.connect_tcp.complete", "connection.start_tls.complete") and self.started:
+            self.ms = (time.perf_counter() - self.started) * 1000
+
+    def sync_trace(self, name: str, info: dict) -> None:
+        self.event(name)
+
+    async def async_trace(self, name: str, info: dict) -> None:
+        self.event(name)
+
+
+# ─── Audio conditioning ──────────────────────────────────────────────────────
+# v10.9.0: Before upload, the recording is decoded to 16 kHz mono PCM and run
+# through an energy VAD. A clip with no speech becomes "[silence]" without a
+# network call; otherwise leading/trailing silence is cut and (STT_RESAMPLE_16K)
+# the clip goes up as 16 kHz mono Opus. Decoding uses ffmpeg; without it, or
+# for audio ffmpeg can't read, the recording is uploaded as it came.
+
+SILENCE_TEXT = "[silence]"
+_RATE = 16000
+_FRAME = _RATE // 50  # 20ms
+_WEBM, _OGG, _WAV = b"\x1a\x45\xdf\xa3", b"OggS", b"RIFF"
+
+
+@lru_cache(maxsize=1)
+def _ffmpeg() -> Optional[str]:
+    path = shutil.which("ffmpeg")
+    if not path:
+        logger.warning("STT: ffmpeg not found, audio is uploaded without conditioning")
+    return path
+
+
+def _run_ffmpeg(args: list, data: bytes) -> Optional[bytes]:
+    ffmpeg = _ffmpeg()
+    if not ffmpeg:
+        return None
+    try:
+        proc = subprocess.run([ffmpeg, "-hide_banner", "-loglevel", "error", *args],
+                              input=data, capture_output=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"STT: ffmpeg failed: {e}")
+        return None
+    if proc.returncode != 0 or not proc.stdout:
+        logger.debug(f"STT: ffmpeg exit {proc.returncode}: {proc.stderr[-200:]!r}")
+        return None
+    return proc.stdout
+
+
+def decode_pcm(audio: bytes) -> Optional[bytes]:
+    """Recording → 16 kHz mono s16le PCM, or None if it can't be decoded."""
+    if audio[:4] == _WAV:
+        try:
+            with wave.open(io.BytesIO(audio)) as w:
+                if (w.getframerate(), w.getnchannels(), w.getsampwidth()) == (_RATE, 1, 2):
+                    return w.readframes(w.getnframes())
+        except (wave.Error, EOFError):
+            pass
+    return _run_ffmpeg(["-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(_RATE), "pipe:1"], audio)
+
+
+def voiced_span(pcm: bytes, threshold_db: float = STT_VAD_THRESHOLD_DB,
+                min_speech_ms: int = STT_MIN_SPEECH_MS) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) in samples from the first to the last 20ms frame whose RMS is
+    above threshold_db (dBFS), or None when fewer than min_speech_ms of frames
+    are — the clip is silence or background noise.
+    """
+    samples = array("h")
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    limit = (32768 * 10 ** (threshold_db / 20)) ** 2 * _FRAME
+    voiced = [i for i in range(0, len(samples) - _FRAME + 1, _FRAME)
+              if sum(s * s for s in samples[i:i + _FRAME]) >= limit]
+    if len(voiced) * 20 < min_speech_ms:
+        return None
+    return voiced[0], voiced[-1] + _FRAME
+
+
+def _wav(pcm: bytes) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(_RATE)
+        w.writeframes(pcm)
+    return out.getvalue()
+
+
+def condition_audio(audio: bytes) -> Optional[bytes]:
+    """
+    The bytes to upload for a recording, or None when it holds no speech.
+    Counters under "stt.conditioning.": silent, trimmed_ms, bytes_in,
+    bytes_out, skipped (not decodable / no ffmpeg).
+    """
+    if not STT_CONDITION_AUDIO:
+        return audio
+    pcm = decode_pcm(audio)
+    if pcm is None:
+        metrics.incr("stt.conditioning.skipped")
+        return audio
+    span = voiced_span(pcm)
+    if span is None:
+        metrics.incr("stt.conditioning.silent")
+        return None
+
+    pad = STT_VAD_PAD_MS * _RATE // 1000
+    start, end = max(0, span[0] - pad), min(len(pcm) // 2, span[1] + pad)
+    trimmed_ms = (len(pcm) // 2 - (end - start)) * 1000 // _RATE
+    if STT_RESAMPLE_16K:
+        pcm = pcm[start * 2:end * 2]
+        out = _run_ffmpeg(["-f", "s16le", "-ar", str(_RATE), "-ac", "1", "-i", "pipe:0",
+                           "-c:a", "libopus", "-b:a", "24k", "-f", "webm", "pipe:1"], pcm) or _wav(pcm)
+    elif trimmed_ms >= 100 and audio[:4] != _WAV:
+        # Same rate and channels as recorded, just without the silence
+        out = _run_ffmpeg(["-i", "pipe:0", "-ss", f"{start / _RATE:.3f}", "-t", f"{(end - start) / _RATE:.3f}",
+                           "-c:a", "libopus", "-b:a", "32k", "-f", "webm", "pipe:1"], audio) or audio
+    else:
+        out = audio
+    metrics.incr("stt.conditioning.trimmed_ms", trimmed_ms)
+    metrics.incr("stt.conditioning.bytes_in", len(audio))
+    metrics.incr("stt.conditioning.bytes_out", len(out))
+    return out
+
+
+def _upload(audio: bytes) -> tuple:
+    """Multipart file tuple, named for the container the bytes are in."""
+    if audio[:4] == _WAV:
+        return ("audio.wav", io.BytesIO(audio), "audio/wav")
+    if audio[:4] == _OGG:
+        return ("audio.ogg", io.BytesIO(audio), "audio/ogg")
+    return ("audio.webm", io.BytesIO(audio), "audio/webm")
+
+
+def _silence(language: str, elapsed: int) -> STTResult:
+    return STTResult(text=SILENCE_TEXT, confidence=1.0, language_detected=language, latency_ms=elapsed)
+
+
+# ─── Result cache ────────────────────────────────────────────────────────────
+# v10.9.0: A client that retries an upload after a network stutter sends the
+# same bytes again. Transcripts are kept for STT_RESULT_CACHE_TTL_S under a
+# hash of audio + provider + language, so the retry is not paid for twice;
+# a duplicate that arrives while the first is still being transcribed waits
+# for it. Counters: stt.cache.hits / misses / coalesced.
+
+class STTResultCache:
+    """LRU of STTResults bounded by count, each kept for ttl_s seconds."""
+
+    def __init__(self, ttl_s: float, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()   # key → (expires at, result)
+        self._inflight: dict = {}                     # key → (loop, future)
+
+    @staticmethod
+    def key(audio: bytes, provider: str, language: str) -> str:
+        return hashlib.sha256(f"{provider}|{language}|".encode() + hashlib.sha256(audio).digest()).hexdigest()
+
+    def get(self, key: str) -> Optional[STTResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr("stt.cache.hits")
+        return dataclasses.replace(entry[1], latency_ms=0)
+
+    def put(self, key: str, result: STTResult) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_s, result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_transcribe(self, key: str, transcribe: Callable[[], Awaitable[STTResult]]) -> STTResult:
+        loop = asyncio.get_running_loop()
+        while True:
+            hit = self.get(key)
+            if hit is not None:
+                return hit
+            running = self._inflight.get(key)
+            if running is None or running[0] is not loop:
+                break
+            metrics.incr("stt.cache.coalesced")
+            await asyncio.wait([running[1]])
+            if not running[1].cancelled():
+                return dataclasses.replace(running[1].result(), latency_ms=0)
+            # The first attempt failed or was cancelled — this one tries itself
+
+        metrics.incr("stt.cache.misses")
+        future = loop.create_future()
+        self._inflight[key] = (loop, future)
+        try:
+            result = await transcribe()
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._inflight.get(key, (None, None))[1] is future:
+                del self._inflight[key]
+        self.put(key, result)
+        future.set_result(result)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._inflight.clear()
+
+
+_results = STTResultCache(STT_RESULT_CACHE_TTL_S, STT_RESULT_CACHE_SIZE)
+
+
+def _cached_result(method):
+    """Serve byte-identical uploads to one provider from the result cache."""
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def transcribe_async(self, audio: bytes, language: str = None) -> STTResult:
+            if not STT_RESULT_CACHE_TTL_S:
+                return await method(self, audio, language)
+            key = _results.key(audio, self._name, language or STT_DEFAULT_LANGUAGE)
+            return await _results.get_or_transcribe(key, lambda: method(self, audio, language))
+        return transcribe_async
+
+    @functools.wraps(method)
+    def transcribe(self, audio: bytes, language: str = None) -> STTResult:
+        if not STT_RESULT_CACHE_TTL_S:
+            return method(self, audio, language)
+        key = _results.key(audio, self._name, language or STT_DEFAULT_LANGUAGE)
+        result = _results.get(key)
+        if result is None:
+            metrics.incr("stt.cache.misses")
+            result = method(self, audio, language)
+            _results.put(key, result)
+        return result
+    return transcribe
+
+
+class _RestSTT(ABC):
+    """
+    v10.9.0: Shared sync/async request path for the REST STT providers.
+    Subclasses build the request (_request) and parse the reply (_result);
+    transcribe_async never blocks the event loop.
+
+    Each provider keeps long-lived clients (HTTP/2 when available, pooled
+    keep-alive connections), like SarvamBulbulTTS, so an utterance does not
+    pay a TCP + TLS handshake. Counters under "stt.<name>.": connects,
+    reused, errors, and the handshake / latency histograms.
+    """
+
+    _name = "stt"
+
+    def __init__(self):
+        self._sync_client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _client_sync(self) -> httpx.Client:
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(**_client_options())
+        return self._sync_client
+
+    def _client_async(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or loop is not self._loop:
+            self._async_client = httpx.AsyncClient(**_client_options())
+            self._loop = loop
+        return self._async_client
+
+    @abstractmethod
+    def _request(self, audio: bytes, language: str) -> dict:
+        """The upload: url plus httpx request kwargs (files, data, headers)."""
+
+    @abstractmethod
+    def _result(self, data: dict, elapsed: int, language: str) -> STTResult:
+        """Parse the provider's JSON reply."""
+
+    def _check(self, response: httpx.Response) -> dict:
+        if response.status_code != 200:
+            logger.error(f"STT [{self._name}] HTTP {response.status_code}: {response.text}")
+        response.raise_for_status()
+        return response.json()
+
+    def _record(self, handshake: _Handshake, elapsed: int, ok: bool) -> None:
+        prefix = f"stt.{self._name}"
+        if handshake.ms is not None:
+            metrics.incr(f"{prefix}.connects")
+            metrics.observe(f"{prefix}.handshake", handshake.ms)
+        elif handshake.started is None:
+            metrics.incr(f"{prefix}.reused")
+        if ok:
+            metrics.observe(f"{prefix}.latency", elapsed)
+        else:
+            metrics.incr(f"{prefix}.errors")
+
+    @_cached_result
     def transcribe(self, audio: bytes, language: str = None) -> STTResult:
         # Use config default if no language specified
         if language is None:
             language = STT_DEFAULT_LANGUAGE
         start = time.perf_counter()
+        audio = condition_audio(audio)
+        if audio is None:
+            return _silence(language, int((time.perf_counter() - start) * 1000))
+        return self._post(audio, language, start)
+
+    def _post(self, audio: bytes, language: str, start: float) -> STTResult:
+        """Upload already-conditioned audio."""
+        handshake = _Handshake()
         try:
-            # Groq Whisper uses OpenAI-compatible API
-            # Force Hindi to avoid garbage transcriptions for Indian students
-            files = {
-                "file": ("audio.webm", io.BytesIO(audio), "audio/webm"),
-                "model": (None, GROQ_WHISPER_MODEL),
-                "response_format": (None, "verbose_json"),
-                "language": (None, language or "hi"),  # Always force language
-            }
-            headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
-
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(GROQ_STT_URL, files=files, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-
+            response = self._client_sync().post(**self._request(audio, language),
+                                              extensions={"trace": handshake.sync_trace})
+            data = self._check(response)
+            elapsed = int((time.perf_counter() - start) * 1000)
+            self._record(handshake, elapsed, ok=True)
+            return self._result(data, elapsed, language)
+        except Exception as e:
             elapsed = int((time.perf_counter() - start) * 1000)
-            text = data.get("text", "").strip()
-
-            # Whisper verbose_json includes segments with avg_logprob
-            segments = data.get("segments", [])
-            if segments:
-                avg_prob = sum(
-                    s.get("avg_logprob", -1.0) for s in segments
-                ) / len(segments)
-                # Convert log probability to 0-1 confidence
-                import math
-                confidence = math.exp(avg_prob)
-            else:
-                confidence = 0.5  # Default if no segments
-
-            detected_lang = data.get("language", language)
-
-            # Garble detection: non-Hindi/English chars or too short
-            garbled = _is_garbled(text)
-            if garbled:
-                confidence = 0.0
-                logger.warning(f"STT [groq]: garbled transcription detected: '{text[:50]}'")
-
-            logger.info(
-                f"STT [groq]: {elapsed}ms, conf={confidence:.2f}, "
-                f"lang={detected_lang}, garbled={garbled}, text='{text[:50]}'"
-            )
-
-            return STTResult(
-                text=text,
-                confidence=confidence,
-                language_detected=detected_lang,
-                latency_ms=elapsed,
-                garbled=garbled,
-            )
+            self._record(handshake, elapsed, ok=False)
+            logger.error(f"STT [{self._name}] error after {elapsed}ms: {e}")
+            raise
 
+    @_cached_result
+    async def transcribe_async(self, audio: bytes, language: str = None) -> STTResult:
+        """Async version of transcribe for async routes."""
+        if language is None:
+            language = STT_DEFAULT_LANGUAGE
+        start = time.perf_counter()
+        audio = await asyncio.to_thread(condition_audio, audio)
+        if audio is None:
+            return _silence(language, int((time.perf_counter() - start) * 1000))
+        return await self._post_async(audio, language, start)
+
+    async def _post_async(self, audio: bytes, language: str, start: float) -> STTResult:
+        handshake = _Handshake()
+        try:
+            response = await self._client_async().post(**self._request(audio, language),
+                                                       extensions={"trace": handshake.async_trace})
+            data = self._check(response)
+            elapsed = int((time.perf_counter() - start) * 1000)
+            self._record(handshake, elapsed, ok=True)
+            return self._result(data, elapsed, language)
         except Exception as e:
             elapsed = int((time.perf_counter() - start) * 1000)
-            logger.error(f"STT [groq] error after {elapsed}ms: {e}")
+            self._record(handshake, elapsed, ok=False)
+            logger.error(f"STT [{self._name}] error after {elapsed}ms: {e}")
             raise
 
+    async def aclose(self) -> None:
+        """Close pooled connections (app shutdown); the next call reconnects."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+        if self._async_client is not None and self._loop is asyncio.get_running_loop():
+            await self._async_client.aclose()
+        self._sync_client = self._async_client = None
+
+
+# ─── Groq Whisper ────────────────────────────────────────────────────────────
+
+class GroqWhisperSTT(_RestSTT):
+    """Groq-hosted Whisper large-v3-turbo. Fast, good for MVP."""
+
+    _name = "groq"
+
+    def _request(self, audio: bytes, language: str) -> dict:
+        # Groq Whisper uses OpenAI-compatible API
+        # Force Hindi to avoid garbage transcriptions for Indian students
+        files = {
+            "file": _upload(audio),
+            "model": (None, GROQ_WHISPER_MODEL),
+            "response_format": (None, "verbose_json"),
+            # Always force language; Whisper takes ISO 639-1 ("hi"), not "hi-IN" / "unknown"
+            "language": (None, "hi" if language in (None, "", "unknown") else language.split("-")[0]),
+        }
+        headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
+        return {"url": GROQ_STT_URL, "files": files, "headers": headers}
+
+    def _result(self, data: dict, elapsed: int, language: str) -> STTResult:
+        text = data.get("text", "").strip()
+
+        # Whisper verbose_json includes segments with avg_logprob
+        segments = data.get("segments", [])
+        if segments:
+            avg_prob = sum(
+                s.get("avg_logprob", -1.0) for s in segments
+            ) / len(segments)
+            # Convert log probability to 0-1 confidence
+            import math
+            confidence = math.exp(avg_prob)
+        else:
+            confidence = 0.5  # Default if no segments
+
+        detected_lang = data.get("language", language)
+
+        # Garble detection: non-Hindi/English chars or too short
+        garbled = _is_garbled(text)
+        if garbled:
+            confidence = 0.0
+            logger.warning(f"STT [groq]: garbled transcription detected: '{text[:50]}'")
+
+        logger.info(
+            f"STT [groq]: {elapsed}ms, conf={confidence:.2f}, "
+            f"lang={detected_lang}, garbled={garbled}, text='{text[:50]}'"
+        )
+
+        return STTResult(
+            text=text,
+            confidence=confidence,
+            language_detected=detected_lang,
+            latency_ms=elapsed,
+            garbled=garbled,
+        )
+
 
 # ─── Sarvam Saarika (Phase 2) ────────────────────────────────────────────────
 
-class SarvamSaarikaSTT:
+class SarvamSaarikaSTT(_RestSTT):
     """
     Sarvam Saarika v2.5 — 11 Indian languages, code-mixed speech support.
     NATIVE Hindi-English code-mixing. No phonetic mapping needed.
     """
 
-    def transcribe(self, audio: bytes, language: str = None) -> STTResult:
-        # Use config default if no language specified
-        if language is None:
-            language = STT_DEFAULT_LANGUAGE
-        start = time.perf_counter()
-        try:
-            # Sarvam REST API for STT
-            # Handles code-mixed Hindi-English natively
-            files = {
-                "file": ("audio.webm", io.BytesIO(audio), "audio/webm"),
-            }
-            data = {
-                "model": "saarika:v2.5",
-                "language_code": language,
-                "with_timestamps": "false",
-            }
-            headers = {"api-subscription-key": SARVAM_API_KEY}
-
-            logger.info(f"STT [saarika]: sending {len(audio)} bytes to Sarvam")
-
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(
-                    SARVAM_STT_URL, files=files, data=data, headers=headers
-                )
-                if response.status_code != 200:
-                    logger.error(f"STT [saarika] HTTP {response.status_code}: {response.text}")
-                response.raise_for_status()
-                result = response.json()
+    _name = "saarika"
 
-            elapsed = int((time.perf_counter() - start) * 1000)
-            text = result.get("transcript", "").strip()
-            detected = result.get("language_code", language)
+    def _request(self, audio: bytes, language: str) -> dict:
+        # Sarvam REST API for STT
+        # Handles code-mixed Hindi-English natively
+        files = {
+            "file": _upload(audio),
+        }
+        data = {
+            "model": "saarika:v2.5",
+            "language_code": language,
+            "with_timestamps": "false",
+        }
+        headers = {"api-subscription-key": SARVAM_API_KEY}
 
-            garbled = _is_garbled(text)
-            confidence = 0.0 if garbled else 0.8
+        logger.info(f"STT [saarika]: sending {len(audio)} bytes to Sarvam")
+        return {"url": SARVAM_STT_URL, "files": files, "data": data, "headers": headers}
 
-            logger.info(f"STT [saarika]: {elapsed}ms, lang={detected}, garbled={garbled}, text='{text[:80]}'")
+    def _result(self, data: dict, elapsed: int, language: str) -> STTResult:
+        text = data.get("transcript", "").strip()
+        detected = data.get("language_code", language)
 
-            return STTResult(
-                text=text,
-                confidence=confidence,
-                language_detected=detected,
-                latency_ms=elapsed,
-                garbled=garbled,
-            )
+        garbled = _is_garbled(text)
+        confidence = 0.0 if garbled else 0.8
 
-        except Exception as e:
-            elapsed = int((time.perf_counter() - start) * 1000)
-            logger.error(f"STT [saarika] error after {elapsed}ms: {e}")
-            raise
+        logger.info(f"STT [saarika]: {elapsed}ms, lang={detected}, garbled={garbled}, text='{text[:80]}'")
+
+        return STTResult(
+            text=text,
+            confidence=confidence,
+            language_detected=detected,
+            latency_ms=elapsed,
+            garbled=garbled,
+        )
 
 
 # ─── Sarvam Saaras v3 (Phase 2 alternative — 22 languages) ───────────────────
 
-class SarvamSaarasSTT:
+class SarvamSaarasSTT(_RestSTT):
     """Sarvam Saaras v3 — 22 Indian languages, beats GPT-4o on benchmarks."""
 
+    _name = "saaras"
+
+    def _request(self, audio: bytes, language: str) -> dict:
+        files = {
+            "file": _upload(audio),
+        }
+        data = {
+            "model": "saaras:v3",
+            "language_code": language,
+            "mode": "transcribe",
+            "with_timestamps": "false",
+        }
+        headers = {"api-subscription-key": SARVAM_API_KEY}
+        return {"url": SARVAM_STT_URL, "files": files, "data": data, "headers": headers}
+
+    def _result(self, data: dict, elapsed: int, language: str) -> STTResult:
+        text = data.get("transcript", "").strip()
+        detected = data.get("language_code", language)
+
+        garbled = _is_garbled(text)
+        confidence = 0.0 if garbled else 0.8
+
+        logger.info(f"STT [saaras]: {elapsed}ms, lang={detected}, garbled={garbled}, text='{text[:50]}'")
+
+        return STTResult(
+            text=text,
+            confidence=confidence,
+            language_detected=detected,
+            garbled=garbled,
+            latency_ms=elapsed,
+        )
+
+
+# ─── Hedged race (v10.9.0) ───────────────────────────────────────────────────
+
+class RacingSTT:
+    """
+    v10.9.0: Two REST providers raced for one utterance (STT_RACE). The
+    primary starts at once; the secondary after after_ms (0 = in parallel),
+    or straight away if the primary fails or comes back garbled first. The
+    first non-garbled transcript wins and the other request is cancelled.
+
+    Counters under "stt.race.": calls, fired, won.<provider>, plus
+    <provider>.latency histograms of every attempt that finished — win rate
+    and latency per provider to tune STT_RACE_AFTER_MS against.
+    """
+
+    def __init__(self, primary: "_RestSTT", secondary: "_RestSTT", after_ms: int = STT_RACE_AFTER_MS):
+        self.primary = primary
+        self.secondary = secondary
+        self.after_ms = after_ms
+        self._name = f"{primary._name}+{secondary._name}"
+
+    @_cached_result
     def transcribe(self, audio: bytes, language: str = None) -> STTResult:
-        # Use config default if no language specified
+        """Sync path: the secondary only as a fallback, never in parallel."""
         if language is None:
             language = STT_DEFAULT_LANGUAGE
         start = time.perf_counter()
+        audio = condition_audio(audio)
+        if audio is None:
+            return _silence(language, int((time.perf_counter() - start) * 1000))
+        try:
+            result = self.primary._post(audio, language, time.perf_counter())
+            if not result.garbled:
+                return self._elapsed(result, start)
+        except Exception:
+            result = None
         try:
-            files = {
-                "file": ("audio.webm", io.BytesIO(audio), "audio/webm"),
-            }
-            data = {
-                "model": "saaras:v3",
-                "language_code": language,
-                "mode": "transcribe",
-                "with_timestamps": "false",
-            }
-            headers = {"api-subscription-key": SARVAM_API_KEY}
-
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(
-                    SARVAM_STT_URL, files=files, data=data, headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
+            fallback = self.secondary._post(audio, language, time.perf_counter())
+        except Exception:
+            if result is None:
+                raise
+            fallback = None
+        if fallback is not None and (result is None or not fallback.garbled):
+            result = fallback
+        return self._elapsed(result, start)
+
+    @_cached_result
+    async def transcribe_async(self, audio: bytes, language: str = None) -> STTResult:
+        if language is None:
+            language = STT_DEFAULT_LANGUAGE
+        start = time.perf_counter()
+        audio = await asyncio.to_thread(condition_audio, audio)
+        if audio is None:
+            return _silence(language, int((time.perf_counter() - start) * 1000))
+
+        metrics.incr("stt.race.calls")
+        providers = {}
+
+        def launch(provider: "_RestSTT") -> None:
+            async def attempt() -> STTResult:
+                # The attempt's own clock: the provider's latency metric must not
+                # include conditioning or the hedge delay
+                began = time.perf_counter()
+                result = await provider._post_async(audio, language, began)
+                metrics.observe(f"stt.race.{provider._name}.latency", (time.perf_counter() - began) * 1000)
+                return result
+            providers[asyncio.create_task(attempt())] = provider
+
+        launch(self.primary)
+        primary = next(iter(providers))
+        winner = None
+        try:
+            done = set()
+            if self.after_ms > 0:
+                done, _ = await asyncio.wait([primary], timeout=self.after_ms / 1000)
+            if not (done and _good(primary)):
+                # Primary slow, failed or garbled — bring in the secondary
+                launch(self.secondary)
+                metrics.incr("stt.race.fired")
+            pending = {task for task in providers if not task.done()}
+            while True:
+                for task in providers:  # launch order: the primary wins a tie
+                    if _good(task):
+                        winner = task
+                        name = providers[task]._name
+                        metrics.incr(f"stt.race.won.{name}")
+                        logger.info(f"STT race: {name} won in {task.result().latency_ms}ms")
+                        return self._elapsed(task.result(), start)
+                if not pending:
+                    break
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # No clean transcript: a garbled one beats an error (the student is asked to repeat)
+            for task in providers:
+                if task.exception() is None:
+                    winner = task
+                    return self._elapsed(task.result(), start)
+            return primary.result()
+        finally:
+            for task in providers:
+                if task is not winner and not task.done():
+                    task.cancel()
+
+    @staticmethod
+    def _elapsed(result: STTResult, start: float) -> STTResult:
+        """The caller sees the whole call's latency, hedge delay included."""
+        return dataclasses.replace(result, latency_ms=int((time.perf_counter() - start) * 1000))
+
+    async def aclose(self) -> None:
+        await self.primary.aclose()
+        await self.secondary.aclose()
+
+
+def _good(task: asyncio.Task) -> bool:
+    return task.done() and not task.cancelled() and task.exception() is None and not task.result().garbled
+
+
+# ─── Streaming STT ───────────────────────────────────────────────────────────
+# v10.9.0: Audio frames (16 kHz mono s16le PCM) go to the provider while the
+# student is still speaking and partial transcripts come back as they are
+# recognised. At end of speech finish() waits at most STT_STREAM_FINAL_MS for
+# the provider's final transcript, else takes the last partial — STT adds
+# almost nothing once the student stops talking.
+
+class STTStream(ABC):
+    """
+    One streamed utterance. Providers implement _send, _flush and _close and
+    report text through _partial / _finalize. New partials are queued on
+    `partials` for the caller to forward.
+    """
 
-            elapsed = int((time.perf_counter() - start) * 1000)
-            text = result.get("transcript", "").strip()
-            detected = result.get("language_code", language)
+    def __init__(self, provider: str, language: str):
+        self.provider = provider
+        self.language = language
+        self.text = ""
+        self.partials: asyncio.Queue = asyncio.Queue()
+        self.audio = bytearray()   # kept for the REST fallback
+        self.failed = False
+        self._final: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def send(self, frame: bytes) -> None:
+        self.audio += frame
+        if not self.failed:
+            try:
+                await self._send(frame)
+            except Exception as e:
+                self._fail(e)
+
+    def _partial(self, text: str) -> None:
+        text = text.strip()
+        if text and text != self.text:
+            self.text = text
+            self.partials.put_nowait(text)
+
+    def _finalize(self, text: Optional[str] = None) -> None:
+        if not self._final.done():
+            self._final.set_result(self.text if text is None else text.strip())
+
+    def _fail(self, error: Exception) -> None:
+        logger.warning(f"STT [{self.provider} stream] failed: {error}")
+        metrics.incr(f"stt.stream.{self.provider}.errors")
+        self.failed = True
+        self._finalize()
+
+    async def finish(self, timeout_ms: int = None) -> STTResult:
+        """End of speech: the final transcript, or the last partial if the final is late."""
+        timeout_ms = STT_STREAM_FINAL_MS if timeout_ms is None else timeout_ms
+        start = time.perf_counter()
+        try:
+            if not self.failed:
+                try:
+                    await self._flush()
+                except Exception as e:
+                    self._fail(e)
+            try:
+                text = await asyncio.wait_for(asyncio.shield(self._final), timeout_ms / 1000)
+            except asyncio.TimeoutError:
+                metrics.incr(f"stt.stream.{self.provider}.partial_used")
+                text = self.text
+        finally:
+            await self.aclose()
+
+        if self.failed and not text and self.audio:
+            # Provider dropped out mid-utterance — the REST provider gets the whole clip
+            metrics.incr(f"stt.stream.{self.provider}.rest_fallback")
+            return await get_stt().transcribe_async(_wav(bytes(self.audio)), self.language)
+
+        elapsed = int((time.perf_counter() - start) * 1000)
+        metrics.observe(f"stt.stream.{self.provider}.after_speech", elapsed)
+        if not text:
+            return _silence(self.language, elapsed)
+        garbled = _is_garbled(text)
+        logger.info(f"STT [{self.provider} stream]: {elapsed}ms after speech, garbled={garbled}, text='{text[:80]}'")
+        return STTResult(text=text, confidence=0.0 if garbled else 0.8,
+                         language_detected=self.language, latency_ms=elapsed, garbled=garbled)
+
+    async def aclose(self) -> None:
+        self._finalize()
+        try:
+            await self._close()
+        except Exception:
+            pass
 
-            garbled = _is_garbled(text)
-            confidence = 0.0 if garbled else 0.8
+    @abstractmethod
+    async def _send(self, frame: bytes) -> None:
+        """Forward one PCM frame to the provider."""
 
-            logger.info(f"STT [saaras]: {elapsed}ms, lang={detected}, garbled={garbled}, text='{text[:50]}'")
+    @abstractmethod
+    async def _flush(self) -> None:
+        """Ask the provider for its final transcript."""
 
-            return STTResult(
-                text=text,
-                confidence=confidence,
-                language_detected=detected,
-                garbled=garbled,
-                latency_ms=elapsed,
-            )
+    async def _close(self) -> None:
+        pass
 
-        except Exception as e:
-            elapsed = int((time.perf_counter() - start) * 1000)
-            logger.error(f"STT [saaras] error after {elapsed}ms: {e}")
+
+class _SarvamStream(STTStream):
+
+    def __init__(self, ws, language: str):
+        super().__init__("saarika", language)
+        self._ws = ws
+        self._segments: list = []
+        self._flushed = False
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        try:
+            async for message in self._ws:
+                data = json.loads(message)
+                if data.get("type") != "data":
+                    continue  # speech start/end events
+                transcript = (data.get("data") or {}).get("transcript", "").strip()
+                if transcript:
+                    self._segments.append(transcript)
+                    self._partial(" ".join(self._segments))
+                if self._flushed:
+                    self._finalize()
+            self._finalize()
+        except asyncio.CancelledError:
             raise
+        except Exception as e:
+            self._fail(e)
+
+    async def _send(self, frame: bytes) -> None:
+        # The API decodes each message as audio/wav: headerless PCM gets a WAV header
+        await self._ws.send(json.dumps({"audio": {
+            "data": base64.b64encode(_wav(frame)).decode(), "encoding": "audio/wav", "sample_rate": _RATE,
+        }}))
+
+    async def _flush(self) -> None:
+        self._flushed = True
+        await self._ws.send(json.dumps({"type": "flush"}))
+
+    async def _close(self) -> None:
+        self._reader.cancel()
+        await self._ws.close()
+
+
+class SarvamStreamingSTT:
+    """Sarvam Saarika over its streaming WebSocket API."""
+
+    async def open(self, language: str = None) -> STTStream:
+        import websockets
+
+        language = language or "hi-IN"
+        if language == "unknown":
+            language = "hi-IN"  # the streaming API needs a language
+        start = time.perf_counter()
+        ws = await websockets.connect(
+            f"{SARVAM_STT_STREAM_URL}?language-code={language}&model=saarika:v2.5",
+            additional_headers={"api-subscription-key": SARVAM_API_KEY}, close_timeout=2,
+        )
+        metrics.observe("stt.stream.saarika.handshake", (time.perf_counter() - start) * 1000)
+        return _SarvamStream(ws, language)
+
+
+class _MockStream(STTStream):
+
+    def __init__(self, language: str, final_delay: Optional[float]):
+        super().__init__("mock", language)
+        self._final_delay = final_delay
+        self._words: list = []
+
+    async def _send(self, frame: bytes) -> None:
+        self._words.append(frame.decode("utf-8", "ignore").strip())
+        self._partial(" ".join(w for w in self._words if w))
+
+    async def _flush(self) -> None:
+        if self._final_delay is not None:
+            asyncio.get_running_loop().call_later(self._final_delay, self._finalize)
+
+
+class MockStreamingSTT:
+    """
+    Local stand-in for tests and development: each frame carries UTF-8 text
+    instead of audio, and the partial is everything heard so far. The final
+    comes final_delay seconds after end of speech (None: never).
+    """
+
+    def __init__(self, final_delay: Optional[float] = 0.0):
+        self.final_delay = final_delay
+
+    async def open(self, language: str = None) -> STTStream:
+        return _MockStream(language or "hi-IN", self.final_delay)
 
 
 # ─── Factory ─────────────────────────────────────────────────────────────────
@@ -247,9 +933,40 @@ def get_stt() -> STTProvider:
         if not cls:
             raise ValueError(f"Unknown STT provider: {STT_PROVIDER}")
         _instance = cls()
+        # v10.9.0: Hedged race against a second provider
+        if STT_RACE and STT_RACE_SECONDARY != STT_PROVIDER:
+            secondary = _providers.get(STT_RACE_SECONDARY)
+            if not secondary:
+                raise ValueError(f"Unknown STT provider: {STT_RACE_SECONDARY}")
+            _instance = RacingSTT(_instance, secondary())
     return _instance
 
 
+_streaming_providers = {
+    "sarvam": SarvamStreamingSTT,
+    "mock": MockStreamingSTT,
+}
+
+_stream_instance = None
+
+
+def get_streaming_stt():
+    """v10.9.0: The streaming STT provider, or None when STT_STREAM_PROVIDER is off."""
+    global _stream_instance
+    if _stream_instance is None and STT_STREAM_PROVIDER != "off":
+        cls = _streaming_providers.get(STT_STREAM_PROVIDER)
+        if not cls:
+            raise ValueError(f"Unknown streaming STT provider: {STT_STREAM_PROVIDER}")
+        _stream_instance = cls()
+    return _stream_instance
+
+
+async def close_stt() -> None:
+    """v10.9.0: Close the provider's pooled connections, if one was created."""
+    if _instance is not None and hasattr(_instance, "aclose"):
+        await _instance.aclose()
+
+
 def is_low_confidence(result: STTResult) -> bool:
     """Check if STT result is below confidence threshold."""
     return result.confidence < STT_CONFIDENCE_THRESHOLD
@@ -6,26 +6,36 @@ Supports both sync and async for streaming TTS.
 
 import time
 import logging
-import hashlib
 import base64
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, Protocol
+from typing import Awaitable, Callable, List, Optional, Protocol, TypeVar
 
 import json as json_mod
 
 import httpx
 
+from app import metrics
+from app.circuit import CLOSED, get_breaker
 from app.config import (
     SARVAM_API_KEY, SARVAM_TTS_URL, TTS_MODEL,
     TTS_SPEAKER, TTS_PACE, TTS_TEMPERATURE, TTS_SAMPLE_RATE,
-    AUDIO_CACHE_DIR,
 )
-from app.config import SARVAM_TTS_STREAM_URL
+from app.config import SARVAM_TTS_STREAM_URL, TTS_SENTENCE_CACHE, TTS_WS_POOL_SIZE, TTS_WS_IDLE_TIMEOUT
+from app.config import TTS_TURN_BUDGET_MS
+from app.voice.mp3 import stitch
+from app.voice.streaming import SENTENCE_SPLIT
+from app.voice.ws_pool import WSPool, WSPoolUnavailable
+from app.voice.tts_cache import cache_key as tts_cache_key, get_tts_cache, is_precached, mark_precached
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 @dataclass
 class TTSResult:
@@ -37,6 +47,7 @@ class TTSResult:
 
 class TTSProvider(Protocol):
     def synthesize(self, text: str, language: str, speaker: str) -> TTSResult: ...
+    async def synthesize_async(self, text: str, language: str, speaker: str) -> TTSResult: ...
 
 
 # ─── Mock TTS (for testing when API unavailable) ─────────────────────────────
@@ -53,6 +64,14 @@ class MockTTS:
         b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
     ) * 20  # Repeat to get enough bytes for base64 > 1000 chars
 
+    def __init__(self, latency_s: float = 0.0, per_char_s: float = 0.0):
+        # v10.9.0: Simulated Sarvam latency (fixed + per character) for benchmarks
+        self.latency_s = latency_s
+        self.per_char_s = per_char_s
+
+    def _delay(self, text: str) -> float:
+        return self.latency_s + self.per_char_s * len(text)
+
     def synthesize(
         self,
         text: str,
@@ -60,9 +79,12 @@ class MockTTS:
         speaker: str = "mock",
     ) -> TTSResult:
         logger.info(f"TTS [mock]: '{text[:50]}...'")
+        delay = self._delay(text)
+        if delay:
+            time.sleep(delay)
         return TTSResult(
             audio_bytes=self._SILENT_MP3,
-            latency_ms=1,
+            latency_ms=max(1, int(delay * 1000)),
             cached=False,
             cache_path=None,
         )
@@ -74,7 +96,15 @@ class MockTTS:
         speaker: str = "mock",
     ) -> TTSResult:
         """Async version for streaming endpoint compatibility."""
-        return self.synthesize(text, language, speaker)
+        delay = self._delay(text)
+        if delay:
+            await asyncio.sleep(delay)
+        return TTSResult(
+            audio_bytes=self._SILENT_MP3,
+            latency_ms=max(1, int(delay * 1000)),
+            cached=False,
+            cache_path=None,
+        )
 
     async def synthesize_streaming(
         self,
@@ -82,8 +112,201 @@ class MockTTS:
         language: str = "hi-IN",
         speaker: str = "mock",
     ):
-        """Mock streaming — yields single chunk."""
-        yield self._SILENT_MP3
+        """
+        Mock streaming — yields the clip in 4 chunks. First chunk after the
+        fixed latency, the per-character cost spread over the rest (like a
+        real streaming synthesizer).
+        """
+        step = len(self._SILENT_MP3) // 4
+        for i in range(4):
+            delay = self.latency_s if i == 0 else self.per_char_s * len(text) / 3
+            if delay:
+                await asyncio.sleep(delay)
+            yield self._SILENT_MP3[i * step:(i + 1) * step if i < 3 else None]
+
+
+# ─── Single-flight (v10.9.0) ─────────────────────────────────────────────────
+# A class reading the same question out at once would otherwise send N
+# identical requests to Sarvam. Concurrent callers for one cache key share a
+# single synthesis; only that one call writes the cache file.
+
+class _SingleFlight:
+    """Thread-safe single-flight for the sync path."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, dict] = {}
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def wait(self, key: str, timeout: float) -> bool:
+        """Block until the call for key (if any) finishes; False on timeout."""
+        with self._lock:
+            call = self._calls.get(key)
+        return call is None or call["done"].wait(timeout)
+
+    async def wait_async(self, key: str, timeout: float, poll: float = 0.05) -> bool:
+        """wait() for async callers: polls instead of holding a worker thread."""
+        with self._lock:
+            call = self._calls.get(key)
+        deadline = time.monotonic() + timeout
+        while call is not None and not call["done"].is_set():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll)
+        return True
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            metrics.incr("tts_cache.coalesced")
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+class _AsyncSingleFlight:
+    """
+    Single-flight for coroutines. The shared synthesis runs as its own task;
+    a caller that is cancelled stops waiting, and the upstream request is
+    aborted only when no caller is left (see turn cancellation in student.py).
+    """
+
+    def __init__(self):
+        self._calls: dict[str, dict] = {}
+
+    def in_flight(self, key: str) -> bool:
+        call = self._calls.get(key)
+        return call is not None and not call["task"].done()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None or call["task"].done():
+            call = self._calls[key] = {"task": asyncio.create_task(fn()), "waiters": 0}
+
+            def _forget(_task, call=call):
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+            call["task"].add_done_callback(_forget)
+        else:
+            metrics.incr("tts_cache.coalesced")
+        call["waiters"] += 1
+        try:
+            return await asyncio.shield(call["task"])
+        finally:
+            call["waiters"] -= 1
+            if call["waiters"] == 0 and not call["task"].done():
+                call["task"].cancel()
+
+
+# ─── Turn coverage (v10.9.0) ─────────────────────────────────────────────────
+# How many turns were spoken entirely from precached audio (no live synthesis).
+# Routes call begin_turn(); the provider notes each clip into the current
+# context's ledger, which tasks started during the turn inherit.
+
+class TurnAudio:
+    """
+    TTS clips one turn used, and how many were served from precached audio.
+    Also the turn's Sarvam time budget: attempts and retries all draw on it.
+    """
+
+    def __init__(self, budget_ms: int = TTS_TURN_BUDGET_MS):
+        self.clips = 0
+        self.precached = 0
+        self._finished = False
+        self.budget_ms = budget_ms
+        self._deadline: Optional[float] = None
+
+    def remaining(self) -> float:
+        """Seconds of budget left; the clock starts at the turn's first Sarvam request."""
+        if not self.budget_ms:
+            return float("inf")
+        if self._deadline is None:
+            self._deadline = time.monotonic() + self.budget_ms / 1000
+        return self._deadline - time.monotonic()
+
+    def note(self, key: str, cached: bool) -> None:
+        self.clips += 1
+        if cached and is_precached(key):
+            self.precached += 1
+
+    def finish(self) -> None:
+        """Count the turn once. Turns without provider audio (text-only, mock) are skipped."""
+        if self._finished or not self.clips:
+            return
+        self._finished = True
+        metrics.incr("tts_turns.total")
+        if self.precached == self.clips:
+            metrics.incr("tts_turns.precached")
+        logger.info(f"TTS_COVERAGE: {self.precached}/{self.clips} clips precached")
+
+
+_turn_audio: ContextVar[Optional[TurnAudio]] = ContextVar("tts_turn_audio", default=None)
+
+
+def begin_turn(budget_ms: int = TTS_TURN_BUDGET_MS) -> TurnAudio:
+    """Start a ledger for the current turn; call finish() on it when the turn ends."""
+    ledger = TurnAudio(budget_ms)
+    _turn_audio.set(ledger)
+    return ledger
+
+
+def _note_clip(key: str, cached: bool) -> None:
+    ledger = _turn_audio.get()
+    if ledger is not None:
+        ledger.note(key, cached)
+
+
+def _attempt_timeout() -> float:
+    """Timeout for the next Sarvam request: 10s, capped by what is left of the turn's budget."""
+    ledger = _turn_audio.get()
+    if ledger is None:
+        return 10.0
+    return min(10.0, ledger.remaining())
+
+
+def _provider_fault(error: Exception) -> bool:
+    """Counts against the breaker — a 4xx other than 429 is our request, not Sarvam's health."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return True
+
+
+# ─── Sentence cache (v10.9.0) ────────────────────────────────────────────────
+# Didi's replies are formulaic (praise openers, "Chaliye agla sawaal", question
+# read-outs), so a new reply is mostly sentences already spoken before. Text
+# is cached sentence by sentence; only missing sentences go to Sarvam, in
+# parallel, and the clips are joined frame by frame (app/voice/mp3.py).
+
+# Shared by every sync sentence render — a pool per call would start up to 8
+# threads per reply. Sentence calls never split further, so they can't queue
+# behind each other here.
+_sentence_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tts-sentence")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences as the TTS cache keys them — the same boundaries as LLM streaming."""
+    if not TTS_SENTENCE_CACHE:
+        return [text]
+    return [part.strip() for part in SENTENCE_SPLIT.split(text.strip()) if part.strip()]
 
 
 # ─── Sarvam Bulbul v3 ────────────────────────────────────────────────────────
@@ -98,6 +321,13 @@ class SarvamBulbulTTS:
     def __init__(self):
         self._sync_client = httpx.Client(timeout=10.0)
         self._async_client = httpx.AsyncClient(timeout=10.0)
+        self._flights = _SingleFlight()
+        self._async_flights = _AsyncSingleFlight()
+        self._breaker = get_breaker("sarvam_tts")
+        self._ws_pool = WSPool(
+            f"{SARVAM_TTS_STREAM_URL}?api_subscription_key={SARVAM_API_KEY}",
+            size=TTS_WS_POOL_SIZE, idle_timeout=TTS_WS_IDLE_TIMEOUT,
+        )
 
     def synthesize(
         self,
@@ -111,17 +341,112 @@ class SarvamBulbulTTS:
             return TTSResult(audio_bytes=b'', latency_ms=0, cached=False, cache_path=None)
 
         # Check cache first
+        cache = get_tts_cache()
         cache_key = self._cache_key(text, language, speaker)
-        cache_path = AUDIO_CACHE_DIR / f"{cache_key}.mp3"
+        cache_path = cache.path(cache_key)
 
-        if cache_path.exists():
-            audio = cache_path.read_bytes()
+        audio = cache.get(cache_key)
+        if audio is not None:
             logger.info(f"TTS [cache hit]: {cache_path.name}")
+            _note_clip(cache_key, cached=True)
             return TTSResult(
                 audio_bytes=audio, latency_ms=0,
                 cached=True, cache_path=str(cache_path),
             )
 
+        # v10.9.0: The sentence path runs as this clip's flight too, so a caller
+        # can see (rendering) and wait for a clip that is still being built
+        sentences = split_sentences(text)
+        if len(sentences) > 1:
+            return self._flights.do(
+                cache_key, lambda: self._render_sentences(text, sentences, language, speaker, cache_key))
+
+        result = self._flights.do(cache_key, lambda: self._fetch(text, language, speaker, cache_key))
+        if result.audio_bytes:
+            _note_clip(cache_key, cached=False)
+        return result
+
+    def rendering(self, text: str, language: str = "hi-IN", speaker: str = TTS_SPEAKER) -> Optional[str]:
+        """v10.9.0: Cache key of this clip while a synthesis of it is running, else None."""
+        cache_key = self._cache_key(text, language, speaker)
+        return cache_key if self._flights.in_flight(cache_key) else None
+
+    def wait_rendered(self, cache_key: str, timeout: float) -> bool:
+        """v10.9.0: Wait for a running synthesis of cache_key; False if it is still going."""
+        return self._flights.wait(cache_key, timeout)
+
+    async def wait_rendered_async(self, cache_key: str, timeout: float) -> bool:
+        """wait_rendered() without tying up a threadpool worker."""
+        return await self._flights.wait_async(cache_key, timeout)
+
+    def _render_sentences(
+        self, text: str, sentences: List[str], language: str, speaker: str, cache_key: str,
+    ) -> TTSResult:
+        """Sentence path, or one request for the whole text when the clips can't be joined."""
+        result = self._synthesize_sentences(text, sentences, language, speaker, cache_key)
+        if result is None:
+            result = self._fetch(text, language, speaker, cache_key)
+            if result.audio_bytes:
+                _note_clip(cache_key, cached=False)
+        return result
+
+    def _synthesize_sentences(
+        self, text: str, sentences: List[str], language: str, speaker: str, cache_key: str,
+    ) -> Optional[TTSResult]:
+        """Each sentence from the cache or its own Sarvam call (threads in parallel), then joined."""
+        start = time.perf_counter()
+        futures = [_sentence_pool.submit(copy_context().run, self.synthesize, sentence, language, speaker)
+                   for sentence in sentences]
+        parts = [future.result() for future in futures]
+        return self._join(text, sentences, parts, language, speaker, cache_key, start)
+
+    def _join(
+        self, text: str, sentences: List[str], parts: List[TTSResult],
+        language: str, speaker: str, cache_key: str, start: float,
+    ) -> Optional[TTSResult]:
+        """
+        Stitch sentence clips into the utterance's clip and cache it. None when
+        a sentence failed or the clips can't be joined — the caller synthesizes
+        the whole text instead.
+        """
+        elapsed = int((time.perf_counter() - start) * 1000)
+        missing = sum(not part.audio_bytes for part in parts)
+        if missing:
+            metrics.incr("tts_cache.sentence_failures")
+            logger.warning(f"TTS [sentences] {missing}/{len(parts)} sentences failed, synthesizing whole text")
+            return None
+        audio = stitch([part.audio_bytes for part in parts])
+        if audio is None:
+            metrics.incr("tts_cache.stitch_failures")
+            logger.warning(f"TTS [sentences] clips not joinable, synthesizing whole text")
+            return None
+
+        hits = sum(part.cached for part in parts)
+        metrics.incr("tts_cache.sentence_hits", hits)
+        metrics.incr("tts_cache.sentence_misses", len(parts) - hits)
+        logger.info(f"TTS [sentences]: {hits}/{len(parts)} cached, {elapsed}ms, {len(audio)} bytes")
+
+        # Not persisted: the sentence clips are, and this is rebuilt from them
+        cache = get_tts_cache()
+        cache_path = cache.put(cache_key, audio, text, language, persist=False)
+        if all(is_precached(self._cache_key(sentence, language, speaker)) for sentence in sentences):
+            mark_precached([cache_key])
+        return TTSResult(
+            audio_bytes=audio, latency_ms=elapsed,
+            cached=hits == len(parts), cache_path=str(cache_path),
+        )
+
+    def _retry_delay(self, attempt: int) -> Optional[float]:
+        """Backoff before the next attempt (1s, 2s), or None once the circuit opened or the budget can't cover it."""
+        delay = 1.0 * (attempt + 1)
+        if self._breaker.state != CLOSED or delay >= _attempt_timeout():
+            return None
+        return delay
+
+    def _fetch(self, text: str, language: str, speaker: str, cache_key: str) -> TTSResult:
+        """One Sarvam REST synthesis with retries; stores the clip in the cache."""
+        cache = get_tts_cache()
+        cache_path = cache.path(cache_key)
         start = time.perf_counter()
 
         # Truncate to prevent TTS failures (max ~2000 chars)
@@ -145,21 +470,29 @@ class SarvamBulbulTTS:
             "Content-Type": "application/json",
         }
 
+        # v10.9.0: Sarvam is failing or crawling — text-only now, not after 30s of retries
+        if not self._breaker.allow():
+            logger.warning("TTS [sarvam] circuit open, skipping synthesis")
+            return TTSResult(audio_bytes=b'', latency_ms=0, cached=False, cache_path=None)
+
         # Retry logic for temporary API failures (500 errors)
         max_retries = 3
         last_error = None
 
         for attempt in range(max_retries):
+            # v10.9.0: Attempts share the turn's TTS budget instead of 10s each
+            timeout = _attempt_timeout()
+            if timeout <= 0:
+                last_error = TimeoutError("turn TTS budget spent")
+                metrics.incr("tts_turns.over_budget")
+                break
+            attempt_start = time.perf_counter()
             try:
-                response = self._sync_client.post(SARVAM_TTS_URL, json=payload, headers=headers, timeout=10.0)
+                response = self._sync_client.post(SARVAM_TTS_URL, json=payload, headers=headers, timeout=timeout)
                 if response.status_code == 500:
-                    # Server error - retry with backoff
+                    # Server error - retried below with backoff
                     logger.warning(f"TTS [sarvam] HTTP 500 on attempt {attempt + 1}/{max_retries}")
-                    if attempt < max_retries - 1:
-                        import time as time_mod
-                        time_mod.sleep(1.0 * (attempt + 1))  # 1s, 2s backoff
-                        continue
-                if response.status_code != 200:
+                elif response.status_code != 200:
                     logger.error(f"TTS [sarvam] HTTP {response.status_code}: {response.text}")
                 response.raise_for_status()
                 data = response.json()
@@ -172,9 +505,10 @@ class SarvamBulbulTTS:
                     raise ValueError("Empty audio response from Sarvam")
 
                 audio_bytes = base64.b64decode(audio_b64)
+                self._breaker.record_success((time.perf_counter() - attempt_start) * 1000)
 
                 # Cache for reuse
-                cache_path.write_bytes(audio_bytes)
+                cache.put(cache_key, audio_bytes, text, language)
 
                 logger.info(
                     f"TTS [sarvam]: {elapsed}ms, {len(audio_bytes)} bytes, "
@@ -188,10 +522,14 @@ class SarvamBulbulTTS:
 
             except Exception as e:
                 last_error = e
-                if attempt < max_retries - 1:
+                if _provider_fault(e):
+                    self._breaker.record_failure()
+                else:
+                    self._breaker.record_neutral()
+                delay = self._retry_delay(attempt) if attempt < max_retries - 1 else None
+                if delay is not None:
                     logger.warning(f"TTS [sarvam] attempt {attempt + 1} failed: {e}")
-                    import time as time_mod
-                    time_mod.sleep(1.0 * (attempt + 1))
+                    time.sleep(delay)
                     continue
                 break
 
@@ -204,9 +542,8 @@ class SarvamBulbulTTS:
         return TTSResult(audio_bytes=b'', latency_ms=elapsed, cached=False, cache_path=None)
 
     def _cache_key(self, text: str, language: str, speaker: str) -> str:
-        """Generate deterministic cache key from text+language+speaker."""
-        raw = f"{text}|{language}|{speaker}|{TTS_PACE}"
-        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+        """Canonical cache key (v10.9.0: shared with the precache job)."""
+        return tts_cache_key(text, language, speaker)
 
     async def synthesize_async(
         self,
@@ -220,18 +557,75 @@ class SarvamBulbulTTS:
             logger.warning("TTS [async] called with empty text, returning empty audio")
             return TTSResult(audio_bytes=b'', latency_ms=0, cached=False, cache_path=None)
 
-        # Check cache first
+        # Check cache first (v10.9.0: memory tier, else disk read off the event loop)
+        cache = get_tts_cache()
         cache_key = self._cache_key(text, language, speaker)
-        cache_path = AUDIO_CACHE_DIR / f"{cache_key}.mp3"
+        cache_path = cache.path(cache_key)
 
-        if cache_path.exists():
-            audio = cache_path.read_bytes()
+        audio = await cache.get_async(cache_key)
+        if audio is not None:
             logger.info(f"TTS [async cache hit]: {cache_path.name}")
+            _note_clip(cache_key, cached=True)
             return TTSResult(
                 audio_bytes=audio, latency_ms=0,
                 cached=True, cache_path=str(cache_path),
             )
 
+        sentences = split_sentences(text)
+        if len(sentences) > 1:
+            return await self._async_flights.do(
+                cache_key, lambda: self._render_sentences_async(text, sentences, language, speaker, cache_key))
+
+        result = await self._async_flights.do(
+            cache_key, lambda: self._fetch_async(text, language, speaker, cache_key))
+        if result.audio_bytes:
+            _note_clip(cache_key, cached=result.cached)
+        return result
+
+    async def _synthesize_sentences_async(
+        self, text: str, sentences: List[str], language: str, speaker: str, cache_key: str,
+    ) -> Optional[TTSResult]:
+        """Async _synthesize_sentences — the missing sentences are fetched concurrently."""
+        start = time.perf_counter()
+        parts = await asyncio.gather(*(
+            self.synthesize_async(sentence, language, speaker) for sentence in sentences
+        ))
+        return await asyncio.to_thread(
+            self._join, text, sentences, list(parts), language, speaker, cache_key, start)
+
+    async def _render_sentences_async(
+        self, text: str, sentences: List[str], language: str, speaker: str, cache_key: str,
+    ) -> TTSResult:
+        """Async _render_sentences."""
+        result = await self._synthesize_sentences_async(text, sentences, language, speaker, cache_key)
+        if result is None:
+            result = await self._fetch_async(text, language, speaker, cache_key)
+            if result.audio_bytes:
+                _note_clip(cache_key, cached=False)
+        return result
+
+    async def _prefetch(self, text: str, language: str, speaker: str) -> TTSResult:
+        """
+        Get a clip into the cache without noting it in the turn ledger. The
+        cache check runs inside the flight, so the clip counts as in flight
+        from the moment this task starts.
+        """
+        cache = get_tts_cache()
+        cache_key = self._cache_key(text, language, speaker)
+
+        async def fill() -> TTSResult:
+            audio = await cache.get_async(cache_key)
+            if audio is not None:
+                return TTSResult(audio_bytes=audio, latency_ms=0,
+                                 cached=True, cache_path=str(cache.path(cache_key)))
+            return await self._fetch_async(text, language, speaker, cache_key)
+
+        return await self._async_flights.do(cache_key, fill)
+
+    async def _fetch_async(self, text: str, language: str, speaker: str, cache_key: str) -> TTSResult:
+        """Async _fetch."""
+        cache = get_tts_cache()
+        cache_path = cache.path(cache_key)
         start = time.perf_counter()
 
         if len(text) > 2000:
@@ -254,21 +648,27 @@ class SarvamBulbulTTS:
             "Content-Type": "application/json",
         }
 
+        if not self._breaker.allow():
+            logger.warning("TTS [async] circuit open, skipping synthesis")
+            return TTSResult(audio_bytes=b'', latency_ms=0, cached=False, cache_path=None)
+
         # Retry logic for temporary API failures (500 errors)
-        import asyncio
         max_retries = 3
         last_error = None
 
         for attempt in range(max_retries):
+            timeout = _attempt_timeout()
+            if timeout <= 0:
+                last_error = TimeoutError("turn TTS budget spent")
+                metrics.incr("tts_turns.over_budget")
+                break
+            attempt_start = time.perf_counter()
             try:
-                response = await self._async_client.post(SARVAM_TTS_URL, json=payload, headers=headers, timeout=10.0)
+                response = await self._async_client.post(SARVAM_TTS_URL, json=payload, headers=headers, timeout=timeout)
                 if response.status_code == 500:
-                    # Server error - retry with backoff
+                    # Server error - retried below with backoff
                     logger.warning(f"TTS [async] HTTP 500 on attempt {attempt + 1}/{max_retries}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1.0 * (attempt + 1))  # 1s, 2s backoff
-                        continue
-                if response.status_code != 200:
+                elif response.status_code != 200:
                     logger.error(f"TTS [async] HTTP {response.status_code}: {response.text}")
                 response.raise_for_status()
                 data = response.json()
@@ -280,7 +680,8 @@ class SarvamBulbulTTS:
                     raise ValueError("Empty audio response from Sarvam")
 
                 audio_bytes = base64.b64decode(audio_b64)
-                cache_path.write_bytes(audio_bytes)
+                self._breaker.record_success((time.perf_counter() - attempt_start) * 1000)
+                await cache.put_async(cache_key, audio_bytes, text, language)
 
                 logger.info(f"TTS [async]: {elapsed}ms, {len(audio_bytes)} bytes")
 
@@ -291,9 +692,14 @@ class SarvamBulbulTTS:
 
             except Exception as e:
                 last_error = e
-                if attempt < max_retries - 1:
+                if _provider_fault(e):
+                    self._breaker.record_failure()
+                else:
+                    self._breaker.record_neutral()
+                delay = self._retry_delay(attempt) if attempt < max_retries - 1 else None
+                if delay is not None:
                     logger.warning(f"TTS [async] attempt {attempt + 1} failed: {e}")
-                    await asyncio.sleep(1.0 * (attempt + 1))
+                    await asyncio.sleep(delay)
                     continue
                 break
 
@@ -304,6 +710,13 @@ class SarvamBulbulTTS:
         logger.warning("TTS [async] returning empty audio as fallback")
         return TTSResult(audio_bytes=b'', latency_ms=elapsed, cached=False, cache_path=None)
 
+    async def warm_stream(self) -> int:
+        """v10.9.0: Open the pooled stream connections before the first turn."""
+        return await self._ws_pool.warm()
+
+    async def close_stream(self) -> None:
+        await self._ws_pool.close()
+
     async def synthesize_streaming(
         self,
         text: str,
@@ -313,30 +726,69 @@ class SarvamBulbulTTS:
         """
         v10.3.1: WebSocket streaming TTS — yields audio chunks as they're generated.
         Falls back to REST API if WebSocket fails.
-        Yields: bytes chunks of audio data (WAV/PCM from Sarvam stream API).
+        Yields: bytes chunks of MP3 audio data as the stream API produces them.
         """
         if not text or not text.strip():
             return
 
         # Check cache first — if cached, yield entire file at once
+        cache = get_tts_cache()
         cache_key = self._cache_key(text, language, speaker)
-        cache_path = AUDIO_CACHE_DIR / f"{cache_key}.mp3"
-        if cache_path.exists():
-            audio = cache_path.read_bytes()
-            logger.info(f"TTS [stream cache hit]: {cache_path.name}")
+        audio = await cache.get_async(cache_key)
+        if audio is not None:
+            logger.info(f"TTS [stream cache hit]: {cache_key}.mp3")
+            _note_clip(cache_key, cached=True)
             yield audio
             return
 
+        # v10.9.0: Sentence by sentence — the first streams while the rest are
+        # fetched in the background, so each one is cached or in flight when its turn comes
+        sentences = split_sentences(text)
+        if len(sentences) > 1:
+            prefetch = [asyncio.create_task(self._prefetch(sentence, language, speaker))
+                        for sentence in sentences[1:]]
+            clips = []
+            try:
+                for sentence in sentences:
+                    clip = bytearray()
+                    async for chunk in self.synthesize_streaming(sentence, language, speaker):
+                        clip.extend(chunk)
+                        yield chunk
+                    clips.append(bytes(clip))
+            finally:
+                for task in prefetch:
+                    task.cancel()
+            audio = stitch(clips) if all(clips) else None
+            if audio is not None:
+                await cache.put_async(cache_key, audio, text, language, persist=False)
+            return
+
+        # v10.9.0: The same clip is already being synthesized — share it
+        if self._async_flights.in_flight(cache_key):
+            result = await self.synthesize_async(text, language, speaker)
+            if result.audio_bytes:
+                yield result.audio_bytes
+            return
+
         if len(text) > 2000:
             text = text[:1997] + "..."
 
+        # v10.9.0: Fail fast before borrowing a connection (or paying a handshake)
+        if not self._breaker.allow():
+            logger.warning("TTS [ws] circuit open, skipping synthesis")
+            return
+
         start = time.perf_counter()
         all_chunks = bytearray()
 
         try:
-            import websockets
-            ws_url = f"{SARVAM_TTS_STREAM_URL}?api_subscription_key={SARVAM_API_KEY}"
-            async with websockets.connect(ws_url, close_timeout=5) as ws:
+            from websockets.exceptions import ConnectionClosedOK
+
+            # v10.9.0: Borrow a warm connection — no handshake on the turn's critical path
+            ws = await self._ws_pool.acquire()
+            reusable = False
+            first_chunk_ms = None
+            try:
                 payload = {
                     "text": text,
                     "target_language_code": language,
@@ -345,12 +797,26 @@ class SarvamBulbulTTS:
                     "pace": TTS_PACE,
                     "temperature": TTS_TEMPERATURE,
                     "enable_preprocessing": True,
+                    # v10.9.0: MP3 like the REST path — chunks are forwarded to the
+                    # browser for progressive playback and cached as .mp3
+                    "output_audio_codec": "mp3",
                 }
                 await ws.send(json_mod.dumps(payload))
                 logger.info(f"TTS [ws] sent {len(text)} chars to stream API")
 
                 chunk_count = 0
-                async for message in ws:
+                while True:
+                    # v10.9.0: Every read is bounded by the turn's TTS budget
+                    timeout = _attempt_timeout()
+                    if timeout <= 0:
+                        metrics.incr("tts_turns.over_budget")
+                        raise TimeoutError("turn TTS budget spent")
+                    try:
+                        message = await asyncio.wait_for(ws.recv(), timeout)
+                    except ConnectionClosedOK:
+                        break
+                    if first_chunk_ms is None:
+                        first_chunk_ms = (time.perf_counter() - start) * 1000
                     if isinstance(message, bytes):
                         # Raw audio bytes
                         all_chunks.extend(message)
@@ -360,26 +826,39 @@ class SarvamBulbulTTS:
                         # JSON message — may contain base64 audio or status
                         try:
                             data = json_mod.loads(message)
+                            # Audio may be top-level or wrapped as {"type": "audio", "data": {...}}
+                            if isinstance(data.get("data"), dict) and "audio" in data["data"]:
+                                data = data["data"]
                             if "audio" in data:
                                 audio_bytes = base64.b64decode(data["audio"])
                                 all_chunks.extend(audio_bytes)
                                 chunk_count += 1
                                 yield audio_bytes
                             elif data.get("status") == "end":
+                                # Utterance complete and the socket is idle again
+                                reusable = True
                                 break
                         except (json_mod.JSONDecodeError, KeyError):
                             pass
+            finally:
+                await self._ws_pool.release(ws, reusable)
 
-                elapsed = int((time.perf_counter() - start) * 1000)
-                logger.info(f"TTS [ws]: {elapsed}ms, {chunk_count} chunks, {len(all_chunks)} bytes")
+            elapsed = int((time.perf_counter() - start) * 1000)
+            logger.info(f"TTS [ws]: {elapsed}ms, {chunk_count} chunks, {len(all_chunks)} bytes")
 
-                # Cache the complete audio for future use
-                if all_chunks:
-                    cache_path.write_bytes(bytes(all_chunks))
+            # Cache the complete audio for future use
+            if all_chunks:
+                self._breaker.record_success(first_chunk_ms or 0)
+                _note_clip(cache_key, cached=False)
+                await cache.put_async(cache_key, bytes(all_chunks), text, language)
 
         except Exception as e:
             elapsed = int((time.perf_counter() - start) * 1000)
             logger.warning(f"TTS [ws] failed after {elapsed}ms: {e}, falling back to REST")
+            if isinstance(e, WSPoolUnavailable) or not _provider_fault(e):
+                self._breaker.record_neutral()
+            else:
+                self._breaker.record_failure()
 
             # Fallback to REST API
             result = await self.synthesize_async(text, language, speaker)
@@ -394,15 +873,18 @@ def pregenerate_greeting(
     language: str = "hi-IN",
 ) -> TTSResult:
     """
-    Pre-generate and cache a greeting for a student.
-    Called at registration time or first session.
+    Pre-generate and cache a student's /session/start greeting.
+    v10.9.0: Run in the background at login (auth.login_student) with the
+    student's preferred_language — the exact text and voice start_session
+    uses, so the session opens on a cache hit.
     """
-    greeting_text = (
-        f"Namaste {student_name}! Main Didi hoon, aapki tutor. "
-        f"Aaj kya padhna hai?"
-    )
+    from app.routers.student import greeting_for, greeting_language
+
+    greeting_text = greeting_for(student_name, greeting_language(language))
     tts = get_tts()
-    return tts.synthesize(greeting_text, language)
+    result = tts.synthesize(greeting_text, language)
+    logger.info(f"TTS [greeting pre-render] {student_name}: cached={result.cached}, {result.latency_ms}ms")
+    return result
 
 
 def pregenerate_parent_greeting(
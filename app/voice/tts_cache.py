@@ -0,0 +1,375 @@
+"""
+IDNA EdTech v10.9.0 — Bounded Two-Tier TTS Cache
+
+Hot clips live in an in-process LRU bounded by bytes; behind it, MP3 files in
+AUDIO_CACHE_DIR with a max total size and LRU eviction, so the container disk
+cannot fill up. Disk writes are atomic (temp file + os.replace) — a reader
+never sees a partial MP3.
+
+Behind both sits the TTSCache table (DBStore), which survives container
+restarts: reads fall through to it, writes go through to it. Every TTS path —
+synthesize, synthesize_async, synthesize_streaming and the precache job —
+uses the one key from cache_key().
+
+Counters (app.metrics, "tts_cache." prefix): memory_hits, disk_hits, db_hits,
+misses, memory_evictions, disk_evictions, db_errors; coalesced is
+bumped by the single-flight layer in tts.py.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app import metrics
+from app.config import (
+    AUDIO_CACHE_DIR, TTS_CACHE_MEMORY_MB, TTS_CACHE_DISK_MB,
+    TTS_SPEAKER, TTS_PACE, TTS_MODEL, TTS_SAMPLE_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".mp3"
+
+
+def cache_key(
+    text: str,
+    language: str = "hi-IN",
+    speaker: str = TTS_SPEAKER,
+    pace: float = TTS_PACE,
+    model: str = TTS_MODEL,
+    sample_rate: int = TTS_SAMPLE_RATE,
+) -> str:
+    """Canonical key for a synthesized clip: everything that changes the audio."""
+    raw = f"{text}|{language}|{speaker}|{pace}|{model}|{sample_rate}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class DeferredWrites:
+    """Persistent-tier rows collected for one bulk write (see deferred_writes)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: dict[str, dict] = {}
+
+    def add(self, key: str, audio: bytes, text: str, language: str) -> None:
+        with self._lock:
+            self._rows[key] = {
+                "cache_key": key, "audio_bytes": audio,
+                "text_hash": hashlib.sha256(text.encode()).hexdigest()[:32], "lang": language,
+            }
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def drain(self) -> list[dict]:
+        with self._lock:
+            rows = list(self._rows.values())
+            self._rows.clear()
+            return rows
+
+
+_deferred: ContextVar[Optional[DeferredWrites]] = ContextVar("tts_cache_deferred", default=None)
+
+
+@contextmanager
+def deferred_writes() -> Iterator[DeferredWrites]:
+    """
+    Within this context (and tasks/threads started from it), puts collect their
+    persistent-tier rows instead of writing one at a time. The caller drains
+    and bulk-inserts them — used by the precache job.
+    """
+    pending = DeferredWrites()
+    token = _deferred.set(pending)
+    try:
+        yield pending
+    finally:
+        _deferred.reset(token)
+
+
+class DBStore:
+    """The TTSCache table as the persistent tier. Errors are logged, never raised."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        from app.database import SessionLocal
+        from app.models import TTSCache
+
+        try:
+            with SessionLocal() as db:
+                row = db.get(TTSCache, key)
+                return row.audio_bytes if row else None
+        except Exception as e:
+            metrics.incr("tts_cache.db_errors")
+            logger.warning(f"TTS cache DB read failed: {e}")
+            return None
+
+    def put(self, key: str, audio: bytes, text: str = "", language: str = "") -> None:
+        from app.database import SessionLocal
+        from app.models import TTSCache
+
+        try:
+            with SessionLocal() as db:
+                db.merge(TTSCache(
+                    cache_key=key, audio_bytes=audio,
+                    text_hash=hashlib.sha256(text.encode()).hexdigest()[:32],
+                    lang=language,
+                ))
+                db.commit()
+        except Exception as e:
+            metrics.incr("tts_cache.db_errors")
+            logger.warning(f"TTS cache DB write failed: {e}")
+
+
+class AudioCache:
+    """Memory LRU (bytes-bounded) over a size-bounded disk LRU over an optional store."""
+
+    def __init__(self, directory: Path, memory_bytes: int, disk_bytes: int,
+                 store: Optional[DBStore] = None):
+        self.directory = Path(directory)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.store = store
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_used = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key → file size, oldest first
+        self._disk_used = 0
+        self._load_disk_index()
+
+    def _load_disk_index(self) -> None:
+        """Index existing files, least recently modified first; drop stale temp files."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+                continue
+            if entry.is_file() and entry.name.endswith(_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(_SUFFIX)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+        evicted = self._evict_disk()
+        logger.info(f"TTS cache: {len(self._disk)} files, {self._disk_used // 1024}KB on disk"
+                    + (f", {len(evicted)} evicted" if evicted else ""))
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    # ── Reads ──
+
+    def _from_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+            # A memory hit is a use of the file too, or the hottest clips
+            # would age out of the disk tier (and memory with it) first
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            return audio
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached audio for key, or None. Lower-tier hits are promoted upward."""
+        audio = self._from_memory(key)
+        if audio is not None:
+            metrics.incr("tts_cache.memory_hits")
+            return audio
+        return self._read_through(key)
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        """get() without blocking the event loop on disk or DB reads."""
+        audio = self._from_memory(key)
+        if audio is not None:
+            metrics.incr("tts_cache.memory_hits")
+            return audio
+        return await asyncio.to_thread(self._read_through, key)
+
+    def _read_through(self, key: str) -> Optional[bytes]:
+        audio = self._after_disk_read(key, self._read_disk(key))
+        if audio is not None:
+            metrics.incr("tts_cache.disk_hits")
+            return audio
+        audio = self.store.get(key) if self.store else None
+        if audio is None:
+            metrics.incr("tts_cache.misses")
+            return None
+        metrics.incr("tts_cache.db_hits")
+        self._write(key, audio)
+        return audio
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _after_disk_read(self, key: str, audio: Optional[bytes]) -> Optional[bytes]:
+        if audio is None:
+            with self._lock:
+                if key in self._disk:  # removed behind our back
+                    self._disk_used -= self._disk.pop(key)
+            return None
+        with self._lock:
+            if key not in self._disk:  # written by another process
+                self._disk[key] = len(audio)
+                self._disk_used += len(audio)
+            self._remember(key, audio)
+        return audio
+
+    def held(self, keys) -> set[str]:
+        """Which of keys are in memory or on disk — no reads, no store lookups."""
+        with self._lock:
+            return {key for key in keys if key in self._disk or key in self._memory}
+
+    def on_disk(self) -> list[str]:
+        """Keys on disk, most recently used first."""
+        with self._lock:
+            return list(reversed(self._disk))
+
+    def disk_free(self) -> int:
+        with self._lock:
+            return max(0, self.disk_bytes - self._disk_used)
+
+    def touch(self, key: str) -> bool:
+        """Mark key recently used (e.g. served by URL). False if not on disk."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+                return True
+        return self.path(key).exists()
+
+    # ── Writes ──
+
+    def put(self, key: str, audio: bytes, text: str = "", language: str = "",
+            persist: bool = True) -> Path:
+        """
+        Store audio in memory and on disk (the file appears atomically), and in
+        the persistent store unless persist is False.
+        """
+        path = self._write(key, audio)
+        if persist and self.store:
+            pending = _deferred.get()
+            if pending is not None:
+                pending.add(key, audio, text, language)
+            else:
+                self.store.put(key, audio, text, language)
+        return path
+
+    async def put_async(self, key: str, audio: bytes, text: str = "", language: str = "",
+                        persist: bool = True) -> Path:
+        return await asyncio.to_thread(self.put, key, audio, text, language, persist)
+
+    def load(self, key: str, audio: bytes) -> Path:
+        """Store on disk only — bulk imports (tts_snapshot) must not churn the hot set."""
+        return self._write(key, audio, remember=False)
+
+    def _write(self, key: str, audio: bytes, remember: bool = True) -> Path:
+        path = self.path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._disk_used += len(audio) - self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            evicted = self._evict_disk()
+            if remember:
+                self._remember(key, audio)
+        if evicted:
+            logger.info(f"TTS cache: evicted {len(evicted)} files from disk")
+        return path
+
+    # ── Eviction (callers hold the lock) ──
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.memory_bytes // 4:
+            return  # one clip must not flush the hot set
+        self._memory_used += len(audio) - len(self._memory.pop(key, b""))
+        self._memory[key] = audio
+        while self._memory_used > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_used -= len(old)
+            metrics.incr("tts_cache.memory_evictions")
+
+    def _evict_disk(self) -> list[str]:
+        evicted = []
+        while self._disk_used > self.disk_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            try:
+                os.unlink(self.path(key))
+            except FileNotFoundError:
+                pass
+            self._memory_used -= len(self._memory.pop(key, b""))
+            metrics.incr("tts_cache.disk_evictions")
+            evicted.append(key)
+        return evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_clips": len(self._memory),
+                "memory_kb": self._memory_used // 1024,
+                "disk_files": len(self._disk),
+                "disk_kb": self._disk_used // 1024,
+            }
+
+
+# ── Precached keys ──
+# Keys the precache jobs have stored (content bank, fixed utterances). Lets
+# tts.py tell "served from precached audio" apart from an ordinary cache hit.
+
+_precached: set[str] = set()
+
+
+def mark_precached(keys) -> None:
+    _precached.update(keys)
+
+
+def is_precached(key: str) -> bool:
+    return key in _precached
+
+
+_instance: Optional[AudioCache] = None
+_instance_lock = threading.Lock()
+
+
+def get_tts_cache() -> AudioCache:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = AudioCache(
+                    AUDIO_CACHE_DIR,
+                    memory_bytes=TTS_CACHE_MEMORY_MB * 1024 * 1024,
+                    disk_bytes=TTS_CACHE_DISK_MB * 1024 * 1024,
+                    store=DBStore(),
+                )
+    return _instance
@@ -4,22 +4,36 @@ IDNA EdTech v7.5.2 — TTS Pre-Cache (PostgreSQL)
 Pre-generates and caches TTS audio for all Content Bank text.
 Stores in PostgreSQL instead of ephemeral filesystem.
 Survives Railway container restarts.
+
+v10.9.0: Keys and writes go through app.voice.tts_cache, the same cache
+synthesize() reads, so precached clips are actually served at request time.
+The job runs concurrently under a token-bucket rate limit and can be run
+by hand:
+
+    python -m app.voice.tts_precache --languages hi-IN en-IN --rate 2
+
+Run it as a release step (--source all) to ship with every fixed utterance
+already synthesized; /health/detail then reports how many turns were
+served entirely from precached audio.
 """
 
 import hashlib
 import asyncio
 import logging
-from typing import Optional, Callable, Awaitable, Dict, Any
+import time
+from typing import Optional, Callable, Awaitable, Dict, Any, List, Set, Tuple
 
 from sqlalchemy.orm import Session as DBSession
 
+from app.config import TTS_PRECACHE_RATE, TTS_PRECACHE_BURST, TTS_PRECACHE_CONCURRENCY
+from app.voice.tts_cache import cache_key, deferred_writes, get_tts_cache, mark_precached
+
 logger = logging.getLogger("idna.tts_precache")
 
 
 def get_cache_key(text: str, lang: str = "hi-IN") -> str:
-    """Generate cache key from text + language."""
-    content = f"{lang}:{text}"
-    return hashlib.md5(content.encode()).hexdigest()
+    """Canonical TTS cache key for text in lang with the configured voice."""
+    return cache_key(text, lang)
 
 
 def get_text_hash(text: str) -> str:
@@ -39,27 +53,26 @@ def get_cached_audio_db(db: DBSession, text: str, lang: str = "hi-IN") -> Option
 
 
 def save_to_cache_db(db: DBSession, text: str, audio_bytes: bytes, lang: str = "hi-IN") -> None:
-    """Save TTS audio to database cache."""
+    """Save TTS audio to the shared cache (memory, disk and database)."""
+    key = get_cache_key(text, lang)
+    get_tts_cache().put(key, audio_bytes, text, lang)
+    logger.debug(f"Cached TTS: {key} ({len(audio_bytes)} bytes)")
+
+
+def purge_legacy_keys(db: DBSession) -> int:
+    """
+    v10.9.0: Delete rows stored under the old md5(lang:text) key. Nothing can
+    look them up any more. Returns the number of rows removed.
+    """
     from app.models import TTSCache
+    from sqlalchemy import func
 
-    key = get_cache_key(text, lang)
-    text_hash = get_text_hash(text)
-
-    # Upsert: update if exists, insert if not
-    existing = db.query(TTSCache).filter(TTSCache.cache_key == key).first()
-    if existing:
-        existing.audio_bytes = audio_bytes
-        existing.text_hash = text_hash
-    else:
-        entry = TTSCache(
-            cache_key=key,
-            audio_bytes=audio_bytes,
-            text_hash=text_hash,
-            lang=lang,
-        )
-        db.add(entry)
+    removed = db.query(TTSCache).filter(func.length(TTSCache.cache_key) == 32).delete(
+        synchronize_session=False)
     db.commit()
-    logger.debug(f"Cached TTS to DB: {key} ({len(audio_bytes)} bytes)")
+    if removed:
+        logger.info(f"TTS cache: purged {removed} rows with legacy keys")
+    return removed
 
 
 def get_cache_stats_db(db: DBSession) -> Dict[str, Any]:
@@ -77,121 +90,218 @@ def get_cache_stats_db(db: DBSession) -> Dict[str, Any]:
     }
 
 
-async def precache_content_bank(
-    content_bank,
-    tts_func: Callable[[str, str], Awaitable[bytes]],
-    db: DBSession,
-    languages: list = None,
-) -> Dict[str, int]:
-    """
-    Pre-generate TTS audio for all content bank text.
-    Stores in PostgreSQL for persistence across container restarts.
-
-    v7.5.2: Rate-limited to 2s between calls, skips if already cached.
-    """
-    from app.models import TTSCache
-
+def collect_content_bank_texts(content_bank, languages: list = None) -> List[Tuple[str, str]]:
+    """All (lang, text) pairs the content bank speaks, deduplicated, in a stable order."""
     if languages is None:
         languages = ["hi-IN"]
 
-    stats = {"total": 0, "cached": 0, "generated": 0, "failed": 0}
-
     # Get all concepts
     all_concepts = []
     for chapter_key in content_bank._chapters.keys():
         all_concepts.extend(content_bank.get_chapter_concepts(chapter_key))
 
-    # Collect all texts to cache
-    texts_to_cache = []
+    texts = []
     for concept in all_concepts:
-        # Definition TTS
-        if concept.get("definition_tts"):
-            for lang in languages:
-                texts_to_cache.append((lang, concept["definition_tts"]))
-
-        # Teaching methodology
         methodology = concept.get("teaching_methodology", {})
-        if methodology.get("hook"):
-            for lang in languages:
-                texts_to_cache.append((lang, methodology["hook"]))
-        if methodology.get("analogy"):
-            for lang in languages:
-                texts_to_cache.append((lang, methodology["analogy"]))
-
-        # Examples
-        for ex in concept.get("examples", []):
-            if ex.get("solution_tts"):
-                for lang in languages:
-                    texts_to_cache.append((lang, ex["solution_tts"]))
-
-        # Misconceptions
-        for mc in concept.get("misconceptions", []):
-            if mc.get("correction_tts"):
-                for lang in languages:
-                    texts_to_cache.append((lang, mc["correction_tts"]))
-
-        # Questions, hints, solutions
+        texts.extend([
+            concept.get("definition_tts"),
+            methodology.get("hook"),
+            methodology.get("analogy"),
+        ])
+        texts.extend(ex.get("solution_tts") for ex in concept.get("examples", []))
+        texts.extend(mc.get("correction_tts") for mc in concept.get("misconceptions", []))
         for q in concept.get("questions", []):
-            if q.get("question_tts"):
-                for lang in languages:
-                    texts_to_cache.append((lang, q["question_tts"]))
+            texts.append(q.get("question_tts"))
+            texts.extend(hint for hint in q.get("hints", []) if isinstance(hint, str))
+            texts.append(q.get("full_solution_tts"))
 
-            for hint in q.get("hints", []):
-                if isinstance(hint, str):
-                    for lang in languages:
-                        texts_to_cache.append((lang, hint))
+    # Remove empty texts and duplicates
+    unique = {(lang, text) for text in texts if text and text.strip() for lang in languages}
+    return sorted(unique)
 
-            if q.get("full_solution_tts"):
-                for lang in languages:
-                    texts_to_cache.append((lang, q["full_solution_tts"]))
 
-    # Remove empty texts and duplicates
-    texts_to_cache = [(lang, text) for lang, text in texts_to_cache if text and text.strip()]
-    unique_texts = list(set(texts_to_cache))
-    stats["total"] = len(unique_texts)
+def collect_fixed_texts(db: DBSession, languages: list = None) -> List[Tuple[str, str]]:
+    """v10.9.0: Every fixed utterance (see fixed_utterances), with greetings for every student."""
+    from app.models import Student
+    from app.voice.fixed_utterances import fixed_utterances
 
-    # Check how many are already cached
-    for lang, text in unique_texts:
-        key = get_cache_key(text, lang)
-        if db.query(TTSCache).filter(TTSCache.cache_key == key).first():
-            stats["cached"] += 1
+    names = [name for (name,) in db.query(Student.name).distinct().all() if name]
+    return fixed_utterances(languages, names)
 
-    to_generate = stats["total"] - stats["cached"]
 
-    if to_generate == 0:
-        logger.info(f"TTS precache: all {stats['total']} entries cached, skipping")
-        return stats
+def languages_in_use(db: DBSession) -> List[str]:
+    """v10.9.0: TTS languages sessions can currently reach: students' own plus en-IN/te-IN."""
+    from app.config import SUPPORTED_LANGUAGES
+    from app.models import Student
+
+    used = {lang for (lang,) in db.query(Student.preferred_language).distinct().all()}
+    return sorted((used | {"en-IN", "te-IN"}) & set(SUPPORTED_LANGUAGES))
+
 
-    logger.info(f"TTS precache: {stats['cached']} cached, {to_generate} to generate")
+def cached_keys(db: DBSession, keys: List[str], chunk: int = 500) -> Set[str]:
+    """v10.9.0: Which of keys are already in the TTSCache table — one query per chunk of keys."""
+    from app.models import TTSCache
+
+    found = set()
+    for i in range(0, len(keys), chunk):
+        rows = db.query(TTSCache.cache_key).filter(TTSCache.cache_key.in_(keys[i:i + chunk])).all()
+        found.update(key for (key,) in rows)
+    return found
+
+
+def bulk_save(db: DBSession, rows: List[Dict[str, Any]]) -> int:
+    """
+    v10.9.0: Insert TTSCache rows in one statement, skipping keys already
+    stored. Returns the number of rows inserted.
+    """
+    from app.models import TTSCache
+    from sqlalchemy import insert
+    from sqlalchemy.exc import IntegrityError
+
+    existing = cached_keys(db, [row["cache_key"] for row in rows])
+    rows = [row for row in rows if row["cache_key"] not in existing]
+    if not rows:
+        return 0
+    try:
+        db.execute(insert(TTSCache), rows)
+        db.commit()
+    except IntegrityError:
+        # A request wrote one of these keys meanwhile — fall back to upserts
+        db.rollback()
+        for row in rows:
+            db.merge(TTSCache(**row))
+        db.commit()
+    return len(rows)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` acquisitions per second on average, up to `burst` at once."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return  # unlimited
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def precache_texts(
+    texts: List[Tuple[str, str]],
+    tts_func: Callable[[str, str], Awaitable[bytes]],
+    db: DBSession,
+    rate: float = TTS_PRECACHE_RATE,
+    burst: int = TTS_PRECACHE_BURST,
+    concurrency: int = TTS_PRECACHE_CONCURRENCY,
+    batch_size: int = 20,
+    on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    v10.9.0: Synthesize every (lang, text) not yet in the TTSCache table.
 
-    # Generate missing audio with rate limiting
-    for lang, text in unique_texts:
-        key = get_cache_key(text, lang)
+    Existing keys are found with one bulk query. Up to `concurrency` calls run
+    at once, started no faster than the token bucket allows. Results go to the
+    shared TTS cache and reach the database in bulk inserts every `batch_size`
+    clips, so a job that is stopped (deploy, crash, Ctrl-C) keeps what it
+    finished and the next run resumes from there.
+    """
+    stats = {"total": len(texts), "cached": 0, "generated": 0, "failed": 0}
+    jobs = [(cache_key(text, lang), lang, text) for lang, text in texts]
+
+    existing = cached_keys(db, [key for key, _, _ in jobs])
+    # Clips a snapshot import (tts_snapshot) put on disk count too — a cold
+    # deploy with an empty table must not re-synthesize them
+    existing |= get_tts_cache().held([key for key, _, _ in jobs if key not in existing])
+    mark_precached(existing)
+    todo = [job for job in jobs if job[0] not in existing]
+    stats["cached"] = stats["total"] - len(todo)
+
+    if not todo:
+        logger.info(f"TTS precache: all {stats['total']} entries cached, skipping")
+        return stats
 
-        # Skip if already cached
-        if db.query(TTSCache).filter(TTSCache.cache_key == key).first():
-            continue
+    logger.info(
+        f"TTS precache: {stats['cached']} cached, {len(todo)} to generate "
+        f"({rate}/s, burst {burst}, {concurrency} parallel)"
+    )
+
+    cache = get_tts_cache()
+    bucket = TokenBucket(rate, burst)
+    flush_lock = asyncio.Lock()
+    queue = iter(todo)
+    report_every = max(1, len(todo) // 20)
+
+    with deferred_writes() as pending:
+
+        async def flush() -> None:
+            async with flush_lock:
+                rows = pending.drain()
+                if rows:
+                    await asyncio.to_thread(bulk_save, db, rows)
+
+        async def worker() -> None:
+            for key, lang, text in queue:  # shared iterator: each job taken once
+                await bucket.acquire()
+                try:
+                    audio = await tts_func(text, lang)
+                except Exception as e:
+                    logger.error(f"TTS precache failed for '{text[:40]}...': {e}")
+                    audio = None
+                if not audio:
+                    stats["failed"] += 1
+                else:
+                    if key not in pending:  # tts_func did not write through the cache
+                        await cache.put_async(key, audio, text, lang)
+                    mark_precached([key])
+                    stats["generated"] += 1
+
+                done = stats["generated"] + stats["failed"]
+                if done % report_every == 0 or done == len(todo):
+                    logger.info(f"TTS precache: {done}/{len(todo)} done ({stats['failed']} failed)")
+                if on_progress:
+                    on_progress(dict(stats))
+                if len(pending) >= batch_size:
+                    await flush()
 
         try:
-            audio = await tts_func(text, lang)
-            if audio:
-                save_to_cache_db(db, text, audio, lang)
-                stats["generated"] += 1
-            else:
-                stats["failed"] += 1
-
-            # v7.5.2: Rate limit 2s to avoid overwhelming Sarvam
-            await asyncio.sleep(2.0)
-        except Exception as e:
-            logger.error(f"TTS precache failed for '{text[:40]}...': {e}")
-            stats["failed"] += 1
-            # Continue even on failure
-            await asyncio.sleep(2.0)
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        finally:
+            await flush()
 
     logger.info(f"TTS precache complete: {stats}")
     return stats
 
 
+async def precache_content_bank(
+    content_bank,
+    tts_func: Callable[[str, str], Awaitable[bytes]],
+    db: DBSession,
+    languages: list = None,
+    **options,
+) -> Dict[str, int]:
+    """
+    Pre-generate TTS audio for all content bank text.
+    Stores in PostgreSQL for persistence across container restarts.
+
+    v7.5.2: Rate-limited, skips if already cached.
+    v10.9.0: Concurrent and resumable — see precache_texts for options.
+    """
+    texts = collect_content_bank_texts(content_bank, languages)
+    return await precache_texts(texts, tts_func, db, **options)
+
+
 # Legacy functions for backward compatibility (filesystem-based)
 # These are no longer used but kept to avoid import errors
 
@@ -208,3 +318,61 @@ def get_cached_audio(text: str, lang: str = "hi-IN") -> Optional[bytes]:
 def save_to_cache(text: str, audio_bytes: bytes, lang: str = "hi-IN") -> None:
     """Legacy: Filesystem cache (deprecated, use save_to_cache_db)."""
     pass
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────────────
+
+def main(argv: list = None) -> Dict[str, int]:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precache TTS audio for content-bank text and fixed utterances.")
+    parser.add_argument("--source", choices=["content-bank", "fixed", "all"], default="all")
+    parser.add_argument("--languages", nargs="+",
+                        help="default: hi-IN for the content bank, every supported language for fixed utterances")
+    parser.add_argument("--rate", type=float, default=TTS_PRECACHE_RATE, help="requests/second, 0 = unlimited")
+    parser.add_argument("--burst", type=int, default=TTS_PRECACHE_BURST)
+    parser.add_argument("--concurrency", type=int, default=TTS_PRECACHE_CONCURRENCY)
+    parser.add_argument("--dry-run", action="store_true", help="only report how much is missing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    from content_bank.loader import get_content_bank
+    from app.database import SessionLocal, init_db
+    from app.voice.tts import get_tts, MockTTS
+
+    init_db()
+    db = SessionLocal()
+    try:
+        texts = []
+        if args.source in ("fixed", "all"):
+            texts += collect_fixed_texts(db, args.languages)
+        if args.source in ("content-bank", "all"):
+            texts += collect_content_bank_texts(get_content_bank(), args.languages or ["hi-IN"])
+        texts = sorted(set(texts))
+
+        if args.dry_run:
+            keys = [cache_key(text, lang) for lang, text in texts]
+            cached = len(cached_keys(db, keys))
+            stats = {"total": len(texts), "cached": cached, "missing": len(texts) - cached}
+            print(stats)
+            return stats
+
+        tts = get_tts()
+        if isinstance(tts, MockTTS):
+            raise SystemExit("Refusing to precache mock audio: set TTS_PROVIDER to a real provider")
+
+        async def tts_func(text: str, lang: str) -> bytes:
+            return (await tts.synthesize_async(text, lang)).audio_bytes
+
+        stats = asyncio.run(precache_texts(
+            texts, tts_func, db, rate=args.rate, burst=args.burst, concurrency=args.concurrency,
+        ))
+        print(stats)
+        return stats
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+IDNA EdTech v10.9.0 — Portable TTS Cache Snapshots
+
+A warm instance exports its synthesized clips into one file; a new container
+imports it into the disk tier at startup (TTS_SNAPSHOT_PATH), so a cold
+deploy starts warm without re-synthesizing anything or pulling blobs out of
+the TTSCache table row by row.
+
+File layout (little-endian):
+
+    header   b"IDNATTS\\x01", u64 index offset, u64 index length
+    blobs    MP3 bytes, content-addressed: a clip shared by several keys
+             (same audio, different text) is stored once
+    index    JSON — voice settings, entries (key, blob, size, language,
+             speaker) newest first, and blob digest → [offset, size]
+
+Reads go through mmap, so importing a snapshot costs one page-cache pass over
+the file and never holds it all in memory.
+
+    python -m app.voice.tts_snapshot export /data/tts.snap
+    python -m app.voice.tts_snapshot info /data/tts.snap
+    python -m app.voice.tts_snapshot import /data/tts.snap
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.config import TTS_SPEAKER, TTS_PACE, TTS_MODEL, TTS_SAMPLE_RATE
+from app.voice.tts_cache import AudioCache, get_tts_cache
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IDNATTS\x01"
+_HEADER = struct.Struct("<8sQQ")
+
+
+class SnapshotError(ValueError):
+    """Not a snapshot file, or a damaged one."""
+
+
+def voice_settings() -> dict:
+    """Everything besides text and language that went into the cache keys."""
+    return {"speaker": TTS_SPEAKER, "pace": TTS_PACE, "model": TTS_MODEL, "sample_rate": TTS_SAMPLE_RATE}
+
+
+# ── Export ──
+
+def _db_clips(batch: int = 200) -> Iterator[Tuple[str, bytes, str]]:
+    """(key, audio, language) from the TTSCache table, newest first, streamed in batches."""
+    from sqlalchemy import func, select
+    from app.database import SessionLocal
+    from app.models import TTSCache
+
+    query = (select(TTSCache.cache_key, TTSCache.audio_bytes, TTSCache.lang)
+             .where(func.length(TTSCache.cache_key) == 64)   # legacy md5 keys can't be looked up
+             .order_by(TTSCache.created_at.desc())
+             .execution_options(yield_per=batch))
+    with SessionLocal() as db:
+        for key, audio, language in db.execute(query):
+            yield key, audio, language
+
+
+def _disk_clips(cache: AudioCache) -> Iterator[Tuple[str, bytes, str]]:
+    """Clips only on disk (stitched sentences are never persisted), most recent first."""
+    for key in cache.on_disk():
+        try:
+            yield key, cache.path(key).read_bytes(), ""
+        except OSError:
+            continue  # evicted since the listing
+
+
+def export_snapshot(path, cache: Optional[AudioCache] = None, include_db: bool = True) -> Dict[str, int]:
+    """Write every cached clip to a snapshot at path (atomically). Returns counts."""
+    cache = cache or get_tts_cache()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    speaker = TTS_SPEAKER
+    entries, blobs, seen = [], {}, set()
+    stats = {"clips": 0, "blobs": 0, "bytes": 0}
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, 0, 0))
+            sources = [_disk_clips(cache)]
+            if include_db:
+                sources.insert(0, _db_clips())
+            for source in sources:
+                for key, audio, language in source:
+                    if key in seen or not audio:
+                        continue
+                    seen.add(key)
+                    digest = hashlib.sha256(audio).hexdigest()
+                    if digest not in blobs:
+                        blobs[digest] = [f.tell(), len(audio)]
+                        f.write(audio)
+                        stats["bytes"] += len(audio)
+                    entries.append({"key": key, "blob": digest, "size": len(audio),
+                                    "language": language, "speaker": speaker})
+
+            index = json.dumps({"settings": voice_settings(), "entries": entries, "blobs": blobs}).encode()
+            offset = f.tell()
+            f.write(index)
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, offset, len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+    stats.update(clips=len(entries), blobs=len(blobs))
+    logger.info(f"TTS snapshot: exported {stats['clips']} clips ({stats['blobs']} blobs, "
+                f"{stats['bytes'] // 1024}KB) to {path}")
+    return stats
+
+
+# ── Import ──
+
+class Snapshot:
+    """Memory-mapped reader: the index is parsed up front, blobs are sliced on demand."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError(f"{self.path}: empty file")
+        try:
+            self._load_index()
+        except Exception:
+            self.close()
+            raise
+
+    def _load_index(self) -> None:
+        if len(self._map) < _HEADER.size:
+            raise SnapshotError(f"{self.path}: truncated header")
+        magic, offset, length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path}: not a TTS snapshot")
+        if offset < _HEADER.size or offset + length > len(self._map):
+            raise SnapshotError(f"{self.path}: index outside the file")
+        try:
+            index = json.loads(self._map[offset:offset + length])
+        except ValueError as e:
+            raise SnapshotError(f"{self.path}: unreadable index ({e})")
+        self.settings: dict = index["settings"]
+        self.entries: list = index["entries"]
+        self.blobs: Dict[str, list] = index["blobs"]
+
+    def read(self, entry: dict) -> bytes:
+        offset, size = self.blobs[entry["blob"]]
+        return self._map[offset:offset + size]
+
+    def verify(self) -> int:
+        """Check every blob against its digest; returns how many are damaged."""
+        return sum(1 for digest, (offset, size) in self.blobs.items()
+                   if hashlib.sha256(self._map[offset:offset + size]).hexdigest() != digest)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def import_snapshot(path, cache: Optional[AudioCache] = None) -> Dict[str, int]:
+    """
+    Load a snapshot into the disk tier of the cache. Clips already on disk are
+    skipped; when the snapshot is bigger than the disk budget, the newest clips
+    are kept. A snapshot made with other voice settings is ignored — its keys
+    would never be looked up. A damaged blob is logged and skipped; the rest
+    of the snapshot is still imported.
+    """
+    cache = cache or get_tts_cache()
+    stats = {"clips": 0, "imported": 0, "present": 0, "over_budget": 0, "damaged": 0}
+    if not Path(path).is_file():
+        logger.warning(f"TTS snapshot: {path} not found, starting cold")
+        return stats
+
+    with Snapshot(path) as snapshot:
+        stats["clips"] = len(snapshot.entries)
+        if snapshot.settings != voice_settings():
+            logger.warning(f"TTS snapshot: {path} was made for {snapshot.settings}, "
+                           f"not {voice_settings()} — skipped")
+            return stats
+
+        held = cache.held(entry["key"] for entry in snapshot.entries)
+        room = cache.disk_free()
+        chosen = []
+        for entry in snapshot.entries:  # newest first
+            if entry["key"] in held:
+                stats["present"] += 1
+            elif entry["size"] > room:
+                stats["over_budget"] += 1
+            else:
+                room -= entry["size"]
+                chosen.append(entry)
+
+        # Oldest first, so the disk LRU ends up in the order the snapshot had
+        for entry in reversed(chosen):
+            audio = snapshot.read(entry)
+            if hashlib.sha256(audio).hexdigest() != entry["blob"]:
+                logger.warning(f"TTS snapshot: {path}: blob for {entry['key']} is damaged, skipped")
+                stats["damaged"] += 1
+                continue
+            cache.load(entry["key"], audio)
+            stats["imported"] += 1
+
+    logger.info(f"TTS snapshot: {stats['imported']} clips imported from {path} "
+                f"({stats['present']} already cached, {stats['over_budget']} over the disk budget, "
+                f"{stats['damaged']} damaged)")
+    return stats
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────────────
+
+def main(argv: list = None) -> Dict[str, int]:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or import a portable TTS cache snapshot.")
+    parser.add_argument("command", choices=["export", "import", "info"])
+    parser.add_argument("path")
+    parser.add_argument("--no-db", action="store_true", help="export: only the disk tier, skip the TTSCache table")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    if args.command == "info":
+        with Snapshot(args.path) as snapshot:
+            stats = {"clips": len(snapshot.entries), "blobs": len(snapshot.blobs),
+                     "bytes": sum(size for _, size in snapshot.blobs.values()),
+                     "damaged": snapshot.verify()}
+            print({**stats, "settings": snapshot.settings})
+            return stats
+
+    if args.command == "export":
+        if not args.no_db:
+            from app.database import init_db
+            init_db()
+        stats = export_snapshot(args.path, include_db=not args.no_db)
+    else:
+        stats = import_snapshot(args.path)
+    print(stats)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
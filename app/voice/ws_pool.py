@@ -0,0 +1,164 @@
+"""
+IDNA EdTech v10.9.0 — Warm WebSocket Pool for Streaming TTS
+
+Opening a WebSocket to Sarvam costs DNS + TCP + TLS + the WS upgrade on every
+utterance. The pool keeps a few connections open between turns:
+
+    ws = await pool.acquire()          # idle connection, or a new one
+    ...send one utterance, read to the end marker...
+    await pool.release(ws, reusable=True)
+
+- Health check: an idle connection must still be open, and one idle for more
+  than ping_after seconds must answer a ping, before it is handed out.
+- Idle timeout: connections unused for idle_timeout seconds are closed
+  instead of being reused (Sarvam closes idle sockets on its side too).
+- Reconnect backoff: after a failed connect, acquire() raises
+  WSPoolUnavailable straight away until the backoff expires (0.5s doubling to
+  30s), so streaming falls back to REST without waiting on a dead endpoint.
+
+Connections belong to the event loop that opened them; a pool used from a new
+loop (tests, worker restarts) starts over.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WSPoolUnavailable(ConnectionError):
+    """Connecting is backing off after a failure — use the fallback path now."""
+
+
+class WSPool:
+    """A bounded set of idle WebSocket connections to one URL."""
+
+    def __init__(
+        self,
+        url: str,
+        size: int = 2,
+        idle_timeout: float = 60.0,
+        ping_after: float = 5.0,
+        ping_timeout: float = 2.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        connect: Optional[Callable[..., Any]] = None,
+    ):
+        self.url = url
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.ping_timeout = ping_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._connect = connect
+        self._idle: List[Tuple[Any, float]] = []   # (connection, released at), oldest first
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _check_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Connections of a finished loop can't be used or closed from this one
+            self._loop = loop
+            self._idle.clear()
+
+    async def acquire(self) -> Any:
+        """A healthy idle connection, else a newly opened one."""
+        self._check_loop()
+        while self._idle:
+            ws, released_at = self._idle.pop()
+            idle = time.monotonic() - released_at
+            if idle > self.idle_timeout:
+                metrics.incr("tts_ws.idle_closed")
+                await self._close(ws)
+                continue
+            if await self._healthy(ws, idle):
+                metrics.incr("tts_ws.reused")
+                return ws
+            metrics.incr("tts_ws.health_failures")
+            await self._close(ws)
+        return await self._open()
+
+    async def release(self, ws: Any, reusable: bool) -> None:
+        """Return a connection after use; closed unless reusable and there is room."""
+        self._check_loop()
+        if reusable and _is_open(ws) and len(self._idle) < self.size:
+            self._idle.append((ws, time.monotonic()))
+        else:
+            await self._close(ws)
+
+    async def warm(self, count: Optional[int] = None) -> int:
+        """Open connections ahead of the first turn; returns how many are idle."""
+        self._check_loop()
+        opened = []
+        try:
+            for _ in range(max(0, (self.size if count is None else count) - len(self._idle))):
+                opened.append(await self._open())
+        except Exception as e:
+            logger.warning(f"TTS [ws pool] warm-up stopped: {e}")
+        for ws in opened:
+            await self.release(ws, reusable=True)
+        return len(self._idle)
+
+    async def close(self) -> None:
+        self._check_loop()
+        idle, self._idle = self._idle, []
+        for ws, _ in idle:
+            await self._close(ws)
+
+    def stats(self) -> dict:
+        return {"idle": len(self._idle), "backing_off": time.monotonic() < self._retry_at}
+
+    async def _open(self) -> Any:
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise WSPoolUnavailable(f"reconnect backoff, {self._retry_at - now:.1f}s left")
+        connect = self._connect
+        if connect is None:
+            import websockets
+            connect = websockets.connect
+        start = time.perf_counter()
+        try:
+            ws = await connect(self.url, close_timeout=5)
+        except Exception:
+            self._failures += 1
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+            self._retry_at = time.monotonic() + delay
+            metrics.incr("tts_ws.connect_failures")
+            logger.warning(f"TTS [ws pool] connect failed ({self._failures}x), retry in {delay:.1f}s")
+            raise
+        self._failures = 0
+        self._retry_at = 0.0
+        metrics.incr("tts_ws.connects")
+        logger.info(f"TTS [ws pool] connected in {int((time.perf_counter() - start) * 1000)}ms")
+        return ws
+
+    async def _healthy(self, ws: Any, idle: float) -> bool:
+        if not _is_open(ws):
+            return False
+        if idle <= self.ping_after:
+            return True
+        try:
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, self.ping_timeout)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    async def _close(ws: Any) -> None:
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+
+def _is_open(ws: Any) -> bool:
+    from websockets.protocol import State
+    return getattr(ws, "state", None) is State.OPEN
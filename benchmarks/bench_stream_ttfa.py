@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+IDNA EdTech — Time-to-first-audio benchmark for /session/message-stream
+=======================================================================
+Runs the real FastAPI app under uvicorn with the mock LLM and mock TTS
+providers (simulated latencies, no API keys needed) and measures, per
+STREAM_TTS_MODE, how long the client waits for the first audio_chunk.
+
+Usage:
+    python benchmarks/bench_stream_ttfa.py
+    python benchmarks/bench_stream_ttfa.py --turns 5 --llm-first-ms 600 --tts-ms 400
+
+Only fast-path classifier inputs are used, so no OpenAI call is made.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+_TMP = tempfile.mkdtemp(prefix="idna_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/bench.db")
+os.environ.setdefault("AUDIO_CACHE_DIR", f"{_TMP}/audio")
+os.environ["LLM_PROVIDER"] = "mock"
+os.environ["TTS_PROVIDER"] = "mock"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+import uvicorn
+
+# Fast-path inputs: GREETING ack, then TEACHING acks (no LLM classifier call)
+TURN_INPUTS = ["haan ready", "samajh gaya", "haan", "ok", "theek hai"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int) -> uvicorn.Server:
+    from app.main import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 20
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+    return server
+
+
+def _install_mocks(args) -> None:
+    from app.tutor import llm
+    from app.voice import tts
+    llm._instance = llm.MockLLM(
+        first_token_s=args.llm_first_ms / 1000,
+        per_sentence_s=args.llm_sentence_ms / 1000,
+    )
+    tts._instance = tts.MockTTS(
+        latency_s=args.tts_ms / 1000,
+        per_char_s=args.tts_char_ms / 1000,
+    )
+
+
+def _run_mode(base: str, mode: str, turns: int) -> dict:
+    ttfa, total = [], []
+    with httpx.Client(base_url=base, timeout=60.0) as client:
+        token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+
+        for i in range(turns):
+            body = {"session_id": session_id, "text": TURN_INPUTS[i % len(TURN_INPUTS)], "tts_mode": mode}
+            t0 = time.perf_counter()
+            first = None
+            with client.stream("POST", "/api/student/session/message-stream", headers=headers, json=body) as resp:
+                for line in resp.iter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[6:])
+                    # Thinking fillers are precached clips, not the reply
+                    if event["type"] == "audio_chunk" and not event.get("filler") and first is None:
+                        first = time.perf_counter() - t0
+            total.append(time.perf_counter() - t0)
+            if first is not None:
+                ttfa.append(first)
+    return {"ttfa": ttfa, "total": total}
+
+
+def _fmt(values: list) -> str:
+    if not values:
+        return "     n/a"
+    return f"{statistics.median(values) * 1000:7.0f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--llm-first-ms", type=float, default=500, help="mock LLM time to first sentence")
+    parser.add_argument("--llm-sentence-ms", type=float, default=300, help="mock LLM time per sentence")
+    parser.add_argument("--tts-ms", type=float, default=350, help="mock TTS fixed latency per call")
+    parser.add_argument("--tts-char-ms", type=float, default=3, help="mock TTS latency per character")
+    parser.add_argument("--modes", default="full,sentence,stream")
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = _start_server(port)
+    _install_mocks(args)
+    base = f"http://127.0.0.1:{port}"
+
+    print(f"mock LLM: first={args.llm_first_ms:.0f}ms +{args.llm_sentence_ms:.0f}ms/sentence | "
+          f"mock TTS: {args.tts_ms:.0f}ms +{args.tts_char_ms:.1f}ms/char | {args.turns} turns")
+    print(f"{'mode':<10} {'first audio (p50)':>18} {'turn total (p50)':>18}")
+    try:
+        for mode in args.modes.split(","):
+            result = _run_mode(base, mode, args.turns)
+            print(f"{mode:<10} {_fmt(result['ttfa']):>18} {_fmt(result['total']):>18}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Shared fixtures."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def closed_circuits():
+    """v10.9.0: Provider circuit breakers are process-wide; a test that fails Sarvam
+    on purpose must not leave the circuit open for the next one."""
+    from app import circuit
+
+    for breaker in circuit._breakers.values():
+        breaker.reset()
+    yield
+    for breaker in circuit._breakers.values():
+        breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def fresh_stt_results():
+    """v10.9.0: The STT result cache is process-wide; tests reuse the same audio bytes
+    with different fake transcripts."""
+    from app.voice import stt
+
+    stt._results.clear()
+    yield
+    stt._results.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_idempotency_store():
+    """v10.9.0: Idempotency keys are process-wide and tests reuse them."""
+    from app.idempotency import get_store
+
+    get_store().clear()
+    yield
+    get_store().clear()
+
+
+@pytest.fixture
+def isolated_app(tmp_path, monkeypatch):
+    """v10.9.0: Point the database and the audio cache at tmp_path, so booting the
+    app in a test never touches the repo's idna.db or the shared /tmp cache."""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import StaticPool
+
+    from app import config, database
+    from app import models  # noqa: F401 — every table registered before init_db()
+    from app.routers import audio
+    from app.voice import tts_cache
+
+    url = f"sqlite:///{tmp_path / 'idna.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", database._set_sqlite_pragma)
+    audio_dir = tmp_path / "audio"
+    audio_dir.mkdir()
+    default_engine = database.engine
+
+    monkeypatch.setenv("DATABASE_URL", url)
+    monkeypatch.setenv("AUDIO_CACHE_DIR", str(audio_dir))
+    monkeypatch.setattr(config, "DATABASE_URL", url)
+    monkeypatch.setattr(database, "DATABASE_URL", url)
+    monkeypatch.setattr(database, "engine", engine)
+    for module in (config, audio, tts_cache):
+        monkeypatch.setattr(module, "AUDIO_CACHE_DIR", audio_dir)
+    monkeypatch.setattr(tts_cache, "_instance", None)
+    # SessionLocal is imported by name all over the app: rebind it in place
+    database.SessionLocal.configure(bind=engine)
+    yield tmp_path
+    database.SessionLocal.configure(bind=default_engine)
+    engine.dispose()
@@ -0,0 +1,190 @@
+"""
+Tests for v10.9.0 async provider variants: async routes must never call the
+blocking transcribe/generate/synthesize on the event loop, and the classifier
+overlaps preprocessing.
+"""
+
+import asyncio
+import inspect
+import time
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _response(payload: dict) -> httpx.Response:
+    return httpx.Response(200, json=payload, request=httpx.Request("POST", "https://stt.test"))
+
+
+class TestAsyncSTT:
+
+    @pytest.mark.parametrize("cls_name,payload,expected", [
+        ("SarvamSaarikaSTT", {"transcript": "haan samajh gaya", "language_code": "hi-IN"}, "haan samajh gaya"),
+        ("SarvamSaarasSTT", {"transcript": "paanch ka square", "language_code": "hi-IN"}, "paanch ka square"),
+        ("GroqWhisperSTT", {"text": "twenty five", "language": "en"}, "twenty five"),
+    ])
+    def test_async_matches_sync(self, cls_name, payload, expected):
+        from app.voice import stt
+
+        provider = getattr(stt, cls_name)()
+
+        async def fake_async_post(self, url, **kwargs):
+            return _response(payload)
+
+        with patch.object(httpx.AsyncClient, "post", fake_async_post), \
+                patch.object(httpx.Client, "post", lambda self, url, **kw: _response(payload)):
+            async_result = asyncio.run(provider.transcribe_async(b"\x00" * 2000))
+            sync_result = provider.transcribe(b"\x00" * 2000)
+
+        assert async_result.text == sync_result.text == expected
+        assert async_result.garbled is False
+        assert async_result.confidence == sync_result.confidence
+
+    def test_async_error_propagates(self):
+        from app.voice.stt import SarvamSaarikaSTT
+
+        async def failing_post(self, url, **kwargs):
+            return httpx.Response(500, text="boom", request=httpx.Request("POST", url))
+
+        with patch.object(httpx.AsyncClient, "post", failing_post):
+            with pytest.raises(httpx.HTTPStatusError):
+                asyncio.run(SarvamSaarikaSTT().transcribe_async(b"\x00" * 2000))
+
+
+class TestAsyncLLM:
+
+    def test_mock_generate_async_does_not_block(self):
+        from app.tutor.llm import MockLLM
+
+        llm = MockLLM(reply="Ek. Do.", first_token_s=0.05)
+
+        async def run():
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*(llm.generate_async([]) for _ in range(4)))
+            return time.perf_counter() - t0, results
+
+        elapsed, results = asyncio.run(run())
+        assert all(r.text == "Ek. Do." for r in results)
+        assert elapsed < 0.15  # concurrent, not 4 x 0.05s
+
+
+class TestAsyncRoutes:
+
+    def test_async_routes_use_async_variants(self):
+        from app.routers import student
+
+        for fn in (student.process_message, student._prepare_stream_turn, student._quick_response):
+            assert inspect.iscoroutinefunction(fn)
+            source = inspect.getsource(fn)
+            for blocking in ("stt.transcribe(", "llm.generate(", "tts.synthesize(", "audio.file.read("):
+                assert blocking not in source, f"{fn.__name__} calls blocking {blocking}"
+
+
+class TestClassifierOverlap:
+    """The classifier starts after STT and overlaps preprocessing."""
+
+    @pytest.fixture
+    def client(self, isolated_app):
+        from app.main import app
+        from app.tutor import llm
+        from app.voice import tts
+
+        saved = (llm._instance, tts._instance)
+        llm._instance = llm.MockLLM(reply="Chalo aage badhte hain.")
+        tts._instance = tts.MockTTS()
+        try:
+            with TestClient(app) as c:
+                yield c
+        finally:
+            llm._instance, tts._instance = saved
+
+    def _turn(self, client, text):
+        token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+        resp = client.post(
+            "/api/student/session/message-stream", headers=headers,
+            json={"session_id": session_id, "text": text},
+        )
+        return [json.loads(l[6:]) for l in resp.text.splitlines() if l.startswith("data: ")]
+
+    def test_classifier_overlaps_preprocessing(self, client):
+        from app.routers import student
+
+        real_preprocess = student.preprocess_student_message
+
+        def slow_preprocess(**kwargs):
+            time.sleep(0.3)
+            return real_preprocess(**kwargs)
+
+        async def slow_classify(text, **kwargs):
+            await asyncio.sleep(0.3)
+            return {"category": "ACK", "extras": {}}
+
+        with patch.object(student, "preprocess_student_message", slow_preprocess), \
+                patch.object(student, "classify", slow_classify):
+            events = self._turn(client, "haan ready")
+
+        debug = next(e for e in events if e["type"] == "debug")
+        assert debug["classifier"] == "ACK"
+        assert debug["classifier_ms"] < 200  # waited for the remainder only
+
+    def test_bypass_cancels_classifier(self, client):
+        from app.routers import student
+
+        seen = {"started": False, "cancelled": False}
+
+        async def hanging_classify(text, **kwargs):
+            seen["started"] = True
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                seen["cancelled"] = True
+                raise
+            return {"category": "ACK", "extras": {}}
+
+        with patch.object(student, "classify", hanging_classify):
+            t0 = time.perf_counter()
+            events = self._turn(client, "kaunsa chapter hai")
+            elapsed = time.perf_counter() - t0
+            for _ in range(50):
+                if seen["cancelled"]:
+                    break
+                time.sleep(0.01)
+
+        assert any(e["type"] == "done" for e in events)
+        assert elapsed < 5
+        assert seen["started"] and seen["cancelled"]
+
+    def test_failed_preprocessing_cancels_classifier(self, client):
+        from app.routers import student
+
+        seen = {"cancelled": False}
+
+        def broken_preprocess(**kwargs):
+            raise RuntimeError("question bank unavailable")
+
+        async def hanging_classify(text, **kwargs):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                seen["cancelled"] = True
+                raise
+
+        with patch.object(student, "preprocess_student_message", broken_preprocess), \
+                patch.object(student, "classify", hanging_classify):
+            with pytest.raises(Exception):  # surfaces from the stream task group
+                self._turn(client, "haan ready")
+            for _ in range(50):
+                if seen["cancelled"]:
+                    break
+                time.sleep(0.01)
+
+        assert seen["cancelled"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
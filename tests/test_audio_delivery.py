@@ -0,0 +1,135 @@
+"""
+Tests for v10.9.0 audio by reference: signed /api/audio/{cache_key} URLs
+served from the TTS cache directory.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(isolated_app, monkeypatch):
+    from app.main import app
+    from app.routers import student
+    from app.tutor import llm
+    from app.voice import tts
+
+    monkeypatch.setattr(student, "AUDIO_DELIVERY", "url")
+    saved = (llm._instance, tts._instance)
+    llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.")
+    tts._instance = tts.MockTTS()
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        llm._instance, tts._instance = saved
+
+
+class TestPublishAudio:
+
+    @pytest.fixture(autouse=True)
+    def audio_dir(self, isolated_app):
+        return isolated_app / "audio"
+
+    def test_same_audio_same_url_within_window(self):
+        from app.routers.audio import publish_audio
+        a = publish_audio(b"\xff\xfb" * 600)
+        b = publish_audio(b"\xff\xfb" * 600)
+        assert a == b
+        assert a.startswith("/api/audio/") and "exp=" in a and "sig=" in a
+
+    def test_reuses_tts_cache_file(self, audio_dir):
+        from app.routers.audio import publish_audio
+        path = audio_dir / "0123456789abcdef.mp3"
+        path.write_bytes(b"cached-mp3")
+        url = publish_audio(b"cached-mp3", str(path))
+        assert url.startswith("/api/audio/0123456789abcdef?")
+
+    def test_empty_audio_has_no_url(self):
+        from app.routers.audio import publish_audio
+        assert publish_audio(b"") is None
+
+    def test_async_publish_matches_sync(self):
+        import asyncio
+        from app.routers.audio import publish_audio, publish_audio_async
+        data = b"\xff\xfb" * 300
+        assert asyncio.run(publish_audio_async(data)) == publish_audio(data)
+
+
+class TestAudioEndpoint:
+
+    def _url(self, data=b"ID3" + bytes(range(256)) * 8):
+        from app.routers.audio import publish_audio
+        return publish_audio(data), data
+
+    def test_serves_with_cache_headers(self, client):
+        url, data = self._url()
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert resp.content == data
+        assert resp.headers["content-type"] == "audio/mpeg"
+        assert resp.headers["etag"].strip('"') in url
+        assert "max-age=" in resp.headers["cache-control"]
+
+    def test_etag_revalidation(self, client):
+        url, _ = self._url()
+        etag = client.get(url).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    def test_range_request(self, client):
+        url, data = self._url()
+        resp = client.get(url, headers={"Range": "bytes=10-19"})
+        assert resp.status_code == 206
+        assert resp.content == data[10:20]
+
+    def test_bad_signature_rejected(self, client):
+        url, _ = self._url()
+        assert client.get(url[:-4] + "0000").status_code == 403
+
+    def test_expired_link_rejected(self, client):
+        from app.routers import audio
+        url, data = self._url()
+        key = url.split("/")[-1].split("?")[0]
+        expired = audio.audio_url(key, now=0)
+        assert client.get(expired).status_code == 410
+
+    def test_evicted_after_touch_is_404(self, client, monkeypatch):
+        from app.voice.tts_cache import get_tts_cache
+        url, _ = self._url()
+        cache = get_tts_cache()
+        touch = cache.touch
+
+        def evicting_touch(key):
+            hit = touch(key)
+            cache.path(key).unlink()  # the disk tier evicts it right after
+            return hit
+
+        monkeypatch.setattr(cache, "touch", evicting_touch)
+        assert client.get(url).status_code == 404
+
+    def test_invalid_key_rejected(self, client):
+        assert client.get("/api/audio/..%2Fetc?exp=1&sig=x").status_code == 404
+
+
+class TestResponsesCarryUrl:
+
+    def test_session_start_and_stream(self, client):
+        token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        start = client.post("/api/student/session/start", headers=headers).json()
+        assert start["greeting_audio_url"] and not start["greeting_audio_b64"]
+        assert client.get(start["greeting_audio_url"]).status_code == 200
+
+        resp = client.post(
+            "/api/student/session/message-stream", headers=headers,
+            json={"session_id": start["session_id"], "text": "haan ready"},
+        )
+        events = [json.loads(l[6:]) for l in resp.text.splitlines() if l.startswith("data: ")]
+        chunks = [e for e in events if e["type"] == "audio_chunk"]
+        assert chunks and all("url" in c and "audio" not in c for c in chunks)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
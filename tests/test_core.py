@@ -455,6 +455,87 @@ class TestEnforcer:
         assert "REPETITION" in r.violations
 
 
+class TestStreamingEnforcer:
+    """v10.9.0: Incremental enforcer for sentence-streamed replies."""
+
+    def _make(self, **kwargs):
+        from app.tutor.enforcer import StreamingEnforcer
+        kwargs.setdefault("state", "HINT_1")
+        return StreamingEnforcer(**kwargs)
+
+    def test_releases_safe_sentence_immediately(self):
+        e = self._make()
+        assert e.feed("Pehle denominator dekho.") == ["Pehle denominator dekho."]
+        assert not e.exhausted
+
+    def test_sentence_budget_exhausts_stream(self):
+        from app.config import MAX_RESPONSE_SENTENCES
+        e = self._make()
+        for i in range(MAX_RESPONSE_SENTENCES):
+            e.feed(f"Sentence number {i}.")
+        assert e.exhausted
+        assert e.feed("One more sentence.") == []
+
+    def test_word_budget_drops_overflow_sentence(self):
+        from app.config import MAX_RESPONSE_WORDS
+        e = self._make(state="TEACHING")
+        assert e.feed("Short start.") == ["Short start."]
+        assert e.feed(" ".join(["word"] * MAX_RESPONSE_WORDS) + ".") == []
+        assert e.exhausted
+        _, result = e.finish()
+        assert "LENGTH" in result.violations
+        assert result.text == "Short start."
+
+    def test_first_sentence_hard_cut_at_word_limit(self):
+        from app.config import MAX_RESPONSE_WORDS
+        e = self._make()
+        out = e.feed(" ".join(["word"] * (MAX_RESPONSE_WORDS + 10)))
+        assert len(out[0].split()) == MAX_RESPONSE_WORDS
+        assert e.exhausted
+
+    def test_teaching_budget_is_larger(self):
+        e = self._make(state="TEACHING", is_teaching=True)
+        for i in range(3):
+            assert e.feed(f"Square ka matlab number into number hai {i}.")
+        assert not e.exhausted
+
+    def test_false_praise_stripped_per_sentence(self):
+        e = self._make(verdict="INCORRECT")
+        out = e.feed("Shabash! Ek baar phir try karo.")
+        assert "shabash" not in " ".join(out).lower()
+
+    def test_stripped_praise_costs_no_budget(self):
+        from app.config import MAX_RESPONSE_SENTENCES
+        e = self._make(verdict="INCORRECT")
+        for _ in range(MAX_RESPONSE_SENTENCES):
+            assert e.feed("Bahut badhiya!") == []
+        assert not e.exhausted and e.sentences == 0
+        assert e.feed("Ek baar phir try karo.") == ["Ek baar phir try karo."]
+
+    def test_question_held_and_dropped_when_teaching(self):
+        e = self._make(is_teaching=True)
+        assert e.feed("Kya aap samjhe?") == []
+        assert e.feed("Iska matlab hai number into number.") == []  # held to keep order
+        remaining, result = e.finish()
+        assert remaining == ["Iska matlab hai number into number."]
+        assert "TEACH_AND_QUESTION" in result.violations
+
+    def test_question_released_at_finish_without_teaching(self):
+        e = self._make()
+        assert e.feed("Socho zara.") == ["Socho zara."]
+        assert e.feed("Pehla step kya hoga?") == []
+        remaining, result = e.finish()
+        assert remaining == ["Pehla step kya hoga?"]
+        assert result.text == "Socho zara. Pehla step kya hoga?"
+
+    def test_repetition_flagged_at_finish(self):
+        prev = "Chalo agle question pe chalte hain."
+        e = self._make(state="NEXT_QUESTION", previous_response=prev)
+        e.feed(prev)
+        _, result = e.finish()
+        assert "REPETITION" in result.violations
+
+
 # ─── Clean for TTS Tests ─────────────────────────────────────────────────────
 
 class TestCleanForTTS:
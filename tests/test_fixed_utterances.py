@@ -0,0 +1,157 @@
+"""
+Tests for v10.9.0 fixed-utterance precaching: enumeration of everything Didi
+says without the LLM, and the per-turn precache coverage counters.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+
+@pytest.fixture(scope="module")
+def utterances():
+    from app.voice.fixed_utterances import fixed_utterances
+    return set(fixed_utterances(["hi-IN", "en-IN", "te-IN", "ta-IN"], ["Priya"]))
+
+
+class TestEnumeration:
+
+    def test_static_strings_and_nudges(self, utterances):
+        from app.routers.student import QUICK_NUDGES
+
+        assert ("hi-IN", "Haan, sun rahi hoon! Batao.") in utterances
+        assert ("te-IN", "Vintunna! Cheppu.") in utterances
+        # Nudges are Hinglish whatever the preference, so every language can speak them
+        assert all(("ta-IN", nudge) in utterances for nudge in QUICK_NUDGES.values())
+
+    def test_fallbacks_follow_language_pref(self, utterances):
+        assert ("en-IN", "Hello! What would you like to study today?") in utterances
+        assert ("hi-IN", "Hello! What would you like to study today?") not in utterances
+        assert ("hi-IN", "Chalo, ek Indian example se samjhte hain.") in utterances
+
+    def test_per_name_greetings(self, utterances):
+        from app.routers.student import greeting_for
+
+        assert ("hi-IN", greeting_for("Priya", "hinglish")) in utterances
+        assert ("en-IN", greeting_for("Priya", "english", chapter_done=True)) in utterances
+
+    def test_chapter_intro_with_tts_spelling(self, utterances):
+        from types import SimpleNamespace
+        from app.content.ch1_square_and_cube import CHAPTER_INTRO
+        from app.routers.student import prepare_for_tts
+
+        intro = CHAPTER_INTRO["english"]["turn_0"]
+        spoken = prepare_for_tts(intro, SimpleNamespace(language_pref="english"))
+        assert spoken != intro
+        assert ("en-IN", intro) in utterances and ("en-IN", spoken) in utterances
+
+    def test_unfillable_templates_skipped(self, utterances):
+        assert not any("{" in text for _, text in utterances)
+
+    def test_only_requested_languages(self, utterances):
+        assert {lang for lang, _ in utterances} == {"hi-IN", "en-IN", "te-IN", "ta-IN"}
+
+
+class TestCoverage:
+
+    @pytest.fixture(autouse=True)
+    def isolated(self, tmp_path, monkeypatch):
+        from app import metrics
+        from app.voice import tts_cache
+        from app.voice.tts_cache import AudioCache
+
+        monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 100_000, 100_000))
+        monkeypatch.setattr(tts_cache, "_precached", set())
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    def _turn(self, *texts):
+        from app.voice.tts import SarvamBulbulTTS, begin_turn
+
+        async def post(self, url, **kwargs):
+            return httpx.Response(200, json={"audios": ["bXAz"]}, request=httpx.Request("POST", url))
+
+        async def run():
+            ledger = begin_turn()
+            engine = SarvamBulbulTTS()
+            await asyncio.gather(*(engine.synthesize_async(t, "hi-IN") for t in texts))
+            ledger.finish()
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            asyncio.run(run())
+
+    def _precache(self, text):
+        from app.voice.tts_cache import cache_key, get_tts_cache, mark_precached
+
+        key = cache_key(text, "hi-IN")
+        get_tts_cache().put(key, b"precached")
+        mark_precached([key])
+
+    def test_turn_fully_precached(self):
+        from app import metrics
+
+        self._precache("Haan, sun rahi hoon! Batao.")
+        self._turn("Haan, sun rahi hoon! Batao.")
+        assert metrics.snapshot("tts_turns.") == {"total": 1, "precached": 1}
+
+    def test_live_clip_spoils_the_turn(self):
+        from app import metrics
+
+        self._precache("Haan, sun rahi hoon! Batao.")
+        self._turn("Haan, sun rahi hoon! Batao.", "Aaj hum cubes padhenge.")
+        assert metrics.snapshot("tts_turns.") == {"total": 1}
+
+    def test_ordinary_cache_hit_is_not_precached(self):
+        from app import metrics
+        from app.voice.tts_cache import cache_key, get_tts_cache
+
+        get_tts_cache().put(cache_key("Kal milte hain.", "hi-IN"), b"from an earlier turn")
+        self._turn("Kal milte hain.")
+        assert metrics.get("tts_turns.precached") == 0
+
+    def test_precache_job_marks_keys(self, monkeypatch):
+        from app.voice import tts_precache
+        from app.voice.tts_cache import cache_key, is_precached
+
+        monkeypatch.setattr(tts_precache, "cached_keys", lambda db, keys: set(keys[:1]))
+        monkeypatch.setattr(tts_precache, "bulk_save", lambda db, rows: len(rows))
+
+        async def tts_func(text, lang):
+            return b"mp3"
+
+        texts = [("hi-IN", "Pehli line."), ("hi-IN", "Doosri line.")]
+        asyncio.run(tts_precache.precache_texts(texts, tts_func, None, rate=0))
+        assert all(is_precached(cache_key(text, lang)) for lang, text in texts)
+
+    def test_health_detail_reports_fraction(self, isolated_app):
+        from fastapi.testclient import TestClient
+        from app import metrics
+        from app.main import app
+
+        metrics.incr("tts_turns.total", 4)
+        metrics.incr("tts_turns.precached", 3)
+        with TestClient(app) as client:
+            coverage = client.get("/health/detail").json()["tts_coverage"]
+        assert coverage == {"turns": 4, "fully_precached": 3, "fraction": 0.75}
+
+
+class TestCli:
+
+    def test_refuses_mock_provider(self, isolated_app):
+        from app.voice import tts
+        from app.voice.tts_precache import main
+
+        saved = tts._instance
+        tts._instance = tts.MockTTS()
+        try:
+            with pytest.raises(SystemExit):
+                main(["--source", "fixed", "--languages", "hi-IN"])
+        finally:
+            tts._instance = saved
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
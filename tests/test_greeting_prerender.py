@@ -0,0 +1,144 @@
+"""
+Tests for v10.9.0 greeting pre-render: login synthesizes the student's session
+greeting in the background, so /session/start is a cache hit — or, if the
+render is still running, returns the text at once and the audio URL waits.
+"""
+
+import base64
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def sarvam(isolated_app, monkeypatch):
+    """App started on the mock provider, then switched to Sarvam with a fake HTTP layer."""
+    from app.main import app
+    from app.routers import student
+    from app.tutor import llm
+    from app.voice import tts
+
+    monkeypatch.setattr(student, "AUDIO_DELIVERY", "url")  # pending greetings are served by URL
+    monkeypatch.setattr(tts, "TTS_SENTENCE_CACHE", False)
+    calls, gate = [], threading.Event()
+    gate.set()
+
+    def post(url, **kwargs):
+        calls.append(kwargs["json"]["text"])
+        gate.wait(5)
+        return httpx.Response(200, json={"audios": [base64.b64encode(b"greeting-mp3").decode()]},
+                              request=httpx.Request("POST", url))
+
+    saved = (llm._instance, tts._instance)
+    llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.")
+    tts._instance = tts.MockTTS()
+    try:
+        with TestClient(app) as client:
+            engine = tts._instance = tts.SarvamBulbulTTS()
+            # Only the provider's client — TestClient is an httpx.Client too
+            with patch.object(engine._sync_client, "post", post):
+                yield client, calls, gate
+    finally:
+        llm._instance, tts._instance = saved
+
+
+def _greeting():
+    from app.database import SessionLocal
+    from app.models import Student
+    from app.routers.student import greeting_for, greeting_language
+
+    db = SessionLocal()
+    try:
+        student = db.query(Student).filter(Student.pin == "1234").first()
+        text = greeting_for(student.name, greeting_language(student.preferred_language))
+        return text, student.preferred_language, student.id, student.name
+    finally:
+        db.close()
+
+
+def _login(client):
+    token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestLoginPrerender:
+
+    def test_login_caches_the_exact_greeting(self, sarvam):
+        from app.voice.tts_cache import cache_key, get_tts_cache
+
+        client, calls, _ = sarvam
+        headers = _login(client)
+        text, language, _, _ = _greeting()
+        assert calls == [text]
+        assert get_tts_cache().get(cache_key(text, language)) == b"greeting-mp3"
+
+        start = client.post("/api/student/session/start", headers=headers).json()
+        assert start["greeting_text"] == text and not start["greeting_audio_pending"]
+        assert client.get(start["greeting_audio_url"]).content == b"greeting-mp3"
+        assert len(calls) == 1  # the session itself was a cache hit
+
+    def test_start_returns_text_while_render_runs(self, sarvam):
+        from app import metrics
+        from app.routers.auth import create_token
+        from app.voice.tts import pregenerate_greeting
+
+        client, calls, gate = sarvam
+        text, language, student_id, name = _greeting()
+        headers = {"Authorization": f"Bearer {create_token(student_id, 'student')}"}
+
+        gate.clear()
+        render = threading.Thread(target=pregenerate_greeting, args=(name, language))
+        render.start()
+        while not calls:
+            time.sleep(0.01)
+
+        started = time.perf_counter()
+        start = client.post("/api/student/session/start", headers=headers).json()
+        assert time.perf_counter() - started < 1.0
+        assert start["greeting_text"] == text
+        assert start["greeting_audio_pending"] and not start["greeting_audio_b64"]
+        assert metrics.get("greeting.audio_pending") >= 1
+
+        threading.Timer(0.2, gate.set).start()
+        audio = client.get(start["greeting_audio_url"])  # waits for the render
+        render.join()
+        assert audio.status_code == 200 and audio.content == b"greeting-mp3"
+        assert calls == [text]
+
+    def test_unknown_clip_is_still_404(self, sarvam):
+        from app.routers.audio import audio_url
+
+        client, _, _ = sarvam
+        started = time.perf_counter()
+        assert client.get(audio_url("ab" * 32)).status_code == 404
+        assert time.perf_counter() - started < 1.0
+
+
+class TestRenderWait:
+
+    def test_async_wait_polls_without_a_thread(self):
+        import asyncio
+        from app.voice.tts import _SingleFlight
+
+        flights, gate = _SingleFlight(), threading.Event()
+        render = threading.Thread(target=flights.do, args=("k", lambda: gate.wait(5)))
+        render.start()
+        while not flights.in_flight("k"):
+            time.sleep(0.01)
+
+        async def run():
+            assert not await flights.wait_async("k", 0.05)
+            threading.Timer(0.05, gate.set).start()
+            return await flights.wait_async("k", 2)
+
+        assert asyncio.run(run())
+        render.join()
+        assert asyncio.run(flights.wait_async("never started", 0))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,191 @@
+"""
+Tests for v10.9.0 hedged LLM requests: a slow first token fires a second
+identical request, the first to respond wins, the loser is cancelled.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def hedging_on(monkeypatch):
+    from app import metrics
+    from app.tutor import llm
+
+    monkeypatch.setattr(llm, "LLM_HEDGE", True)
+    monkeypatch.setattr(llm, "LLM_HEDGE_AFTER_MS", 50)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _attempts(*plan):
+    """call() factory: attempt i sleeps plan[i][0] then returns / raises plan[i][1]."""
+    state = {"n": 0, "cancelled": []}
+
+    async def call():
+        i = state["n"]
+        state["n"] += 1
+        delay, outcome = plan[i]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            state["cancelled"].append(i)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return call, state
+
+
+class TestHedged:
+
+    def _run(self, call, **kw):
+        from app.tutor.llm import hedged
+        return asyncio.run(hedged(call, "test", **kw))
+
+    def test_disabled_is_single_call(self, monkeypatch):
+        from app import metrics
+        from app.tutor import llm
+
+        monkeypatch.setattr(llm, "LLM_HEDGE", False)
+        call, state = _attempts((0.1, "slow"))
+        assert self._run(call) == "slow"
+        assert state["n"] == 1
+        assert metrics.snapshot("hedge.") == {}
+
+    def test_fast_primary_no_hedge(self):
+        from app import metrics
+
+        call, state = _attempts((0, "fast"))
+        assert self._run(call) == "fast"
+        assert state["n"] == 1
+        assert metrics.snapshot("hedge.") == {"test.calls": 1}
+
+    def test_slow_primary_hedge_wins(self):
+        from app import metrics
+
+        call, state = _attempts((5, "slow"), (0, "hedge"))
+        assert self._run(call) == "hedge"
+        assert state["cancelled"] == [0]
+        assert metrics.get("hedge.test.fired") == 1
+        assert metrics.get("hedge.test.won") == 1
+
+    def test_primary_still_wins_after_hedge_fired(self):
+        from app import metrics
+
+        call, state = _attempts((0.08, "primary"), (5, "hedge"))
+        assert self._run(call) == "primary"
+        assert state["cancelled"] == [1]
+        assert metrics.get("hedge.test.fired") == 1
+        assert metrics.get("hedge.test.won") == 0
+
+    def test_failed_primary_falls_back_to_hedge(self):
+        call, _ = _attempts((0.08, RuntimeError("boom")), (0.1, "hedge"))
+        assert self._run(call) == "hedge"
+
+    def test_all_attempts_fail(self):
+        call, _ = _attempts((0.08, RuntimeError("first")), (0, RuntimeError("second")))
+        with pytest.raises(RuntimeError, match="first"):
+            self._run(call)
+
+    def test_early_failure_is_not_hedged(self):
+        call, state = _attempts((0, RuntimeError("boom")))
+        with pytest.raises(RuntimeError):
+            self._run(call)
+        assert state["n"] == 1
+
+    def test_late_loser_is_discarded(self):
+        discarded = []
+
+        async def discard(result):
+            discarded.append(result)
+
+        calls = []
+
+        async def call():
+            # The hedge releases the primary, so both are done when hedged() wakes
+            calls.append(1)
+            if len(calls) == 1:
+                await gate.wait()
+                return "primary"
+            gate.set()
+            return "hedge"
+
+        async def run():
+            from app.tutor.llm import hedged
+            return await hedged(call, "test", discard=discard, after_s=0)
+
+        gate = asyncio.Event()
+        assert asyncio.run(run()) == "primary"
+        assert discarded == ["hedge"]
+
+
+class _FakeStream:
+
+    def __init__(self, text: str, first_delay: float):
+        self.chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=w + " "))])
+                       for w in text.split()]
+        self.first_delay = first_delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.first_delay:
+            await asyncio.sleep(self.first_delay)
+            self.first_delay = 0
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestHedgedProviders:
+
+    def test_generate_streaming_uses_fastest_stream(self):
+        from app import metrics
+        from app.tutor.llm import OpenAIGPT4o
+
+        streams = [_FakeStream("Slow reply.", 5), _FakeStream("Pehla step. Doosra step.", 0)]
+        pending = iter(streams)
+
+        async def create(**kwargs):
+            return next(pending)
+
+        llm = OpenAIGPT4o.__new__(OpenAIGPT4o)
+        llm._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        async def run():
+            return [s async for s in llm.generate_streaming([])]
+
+        assert asyncio.run(run()) == ["Pehla step.", "Doosra step."]
+        assert all(s.closed for s in streams)
+        assert metrics.get("hedge.stream.won") == 1
+
+    def test_eval_call_is_hedged(self, monkeypatch):
+        from app import metrics
+        from app.routers import student
+
+        delays = [5, 0]
+
+        async def create(**kwargs):
+            await asyncio.sleep(delays.pop(0))
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="CORRECT"))])
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(student, "get_openai_client", lambda: client)
+
+        assert asyncio.run(student.llm_call_for_eval([])) == "CORRECT"
+        assert metrics.get("hedge.eval.fired") == 1
+        assert metrics.get("hedge.eval.won") == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
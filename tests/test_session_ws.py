@@ -0,0 +1,160 @@
+"""
+Tests for v10.9.0 WebSocket tutoring session (/api/student/session/ws).
+Runs the real app with the mock LLM/TTS providers — no API keys needed.
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+
+@pytest.fixture
+def client(isolated_app):
+    from app.main import app
+    from app.tutor import llm
+    from app.voice import tts
+
+    saved = (llm._instance, tts._instance)
+    llm._instance = llm.MockLLM(reply="Chalo square samjhte hain. Square matlab number ko usi se multiply karna.")
+    tts._instance = tts.MockTTS()
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        llm._instance, tts._instance = saved
+
+
+def _start(client):
+    token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+    return token, session_id
+
+
+def _turn(ws):
+    """Read one turn's events; audio_chunk headers are paired with their binary frame."""
+    events, audio = [], []
+    while True:
+        event = ws.receive_json()
+        events.append(event)
+        if event["type"] == "audio_chunk":
+            data = ws.receive_bytes()
+            assert len(data) == event["bytes"]
+            audio.append(data)
+        if event["type"] in ("done", "error"):
+            return events, audio
+
+
+class TestSessionWebSocket:
+
+    def test_rejects_bad_token(self, client):
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect("/api/student/session/ws?token=bad&session_id=x") as ws:
+                ws.receive_json()
+        assert exc.value.code == 4401
+
+    def test_rejects_unknown_session(self, client):
+        token, _ = _start(client)
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect(f"/api/student/session/ws?token={token}&session_id=nope") as ws:
+                ws.receive_json()
+        assert exc.value.code == 4404
+
+    def test_multiple_turns_on_one_connection(self, client):
+        token, session_id = _start(client)
+        with client.websocket_connect(f"/api/student/session/ws?token={token}&session_id={session_id}") as ws:
+            ready = ws.receive_json()
+            assert ready["type"] == "ready" and ready["state"] == "GREETING"
+
+            for text in ("haan ready", "samajh gaya"):
+                ws.send_json({"text": text, "tts_mode": "sentence"})
+                events, audio = _turn(ws)
+                types = [e["type"] for e in events]
+                assert "text" in types and types[-1] == "done"
+                assert audio and all(audio)  # raw bytes, not base64 strings
+                assert next(e for e in events if e["type"] == "transcript")["content"] == text
+
+    def test_state_persisted_between_turns(self, client):
+        from app.database import SessionLocal
+        from app.models import Session, SessionTurn
+
+        token, session_id = _start(client)
+        with client.websocket_connect(f"/api/student/session/ws?token={token}&session_id={session_id}") as ws:
+            ws.receive_json()
+            ws.send_json({"text": "haan ready"})
+            events, _ = _turn(ws)
+            final_state = events[-1]["state"]
+
+        db = SessionLocal()
+        try:
+            session = db.query(Session).filter(Session.id == session_id).first()
+            assert session.state == final_state
+            turns = db.query(SessionTurn).filter(SessionTurn.session_id == session_id).all()
+            assert any(t.speaker == "student" and t.transcript == "haan ready" for t in turns)
+        finally:
+            db.close()
+
+    def test_bad_text_frame_keeps_connection(self, client):
+        token, session_id = _start(client)
+        with client.websocket_connect(f"/api/student/session/ws?token={token}&session_id={session_id}") as ws:
+            ws.receive_json()
+            for frame in ("not json", "[]", '"hi"', "1"):
+                ws.send_text(frame)
+                assert ws.receive_json() == {"type": "error", "detail": "Expected JSON text frame"}
+            ws.send_json({"text": "haan ready"})
+            events, _ = _turn(ws)
+            assert events[-1]["type"] == "done"
+
+    def test_ended_session_is_refused(self, client):
+        token, session_id = _start(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        client.post("/api/student/session/end", headers=headers, data={"session_id": session_id})
+        with client.websocket_connect(f"/api/student/session/ws?token={token}&session_id={session_id}") as ws:
+            assert ws.receive_json() == {"type": "error", "detail": "Session already ended"}
+            with pytest.raises(WebSocketDisconnect) as exc:
+                ws.receive_json()
+        assert exc.value.code == 4400
+
+    def test_interrupt_stops_the_reply(self, client):
+        from app.tutor import llm
+
+        llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.", first_token_s=5)
+        token, session_id = _start(client)
+        with client.websocket_connect(f"/api/student/session/ws?token={token}&session_id={session_id}") as ws:
+            ws.receive_json()
+            ws.send_json({"text": "haan ready"})
+            ws.send_json({"type": "interrupt"})
+            events = []
+            while not events or events[-1]["type"] != "interrupted":
+                events.append(ws.receive_json())
+            assert "done" not in [e["type"] for e in events]
+
+            llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.")
+            ws.send_json({"type": "interrupt"})  # nothing running: no reply
+            ws.send_json({"text": "samajh gaya"})
+            events, _ = _turn(ws)
+            assert events[-1]["type"] == "done"
+            assert next(e for e in events if e["type"] == "transcript")["content"] == "samajh gaya"
+
+    def test_new_utterance_barges_in(self, client):
+        from app.tutor import llm
+
+        llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.", first_token_s=5)
+        token, session_id = _start(client)
+        with client.websocket_connect(f"/api/student/session/ws?token={token}&session_id={session_id}") as ws:
+            ws.receive_json()
+            ws.send_json({"text": "haan ready"})
+            time.sleep(0.2)  # first reply waiting on the LLM
+            started = time.perf_counter()
+            llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.")
+            ws.send_json({"text": "ruko ek second"})
+            events, _ = _turn(ws)
+            assert time.perf_counter() - started < 2
+        transcripts = [e["content"] for e in events if e["type"] == "transcript"]
+        assert transcripts == ["ruko ek second"] and events[-1]["type"] == "done"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,213 @@
+"""
+Tests for v10.9.0 streaming pipeline: sentence-pipelined TTS for
+/session/message-stream, mock LLM/TTS providers.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+class TestPipelineTTS:
+    """pipeline_tts: concurrent per-sentence TTS, ordered output."""
+
+    def test_yields_in_sentence_order(self):
+        """Later sentences finishing TTS first must not be emitted first."""
+        from app.voice.streaming import pipeline_tts
+
+        async def sentences():
+            for s in ["one.", "two two two.", "three."]:
+                yield s
+
+        async def tts(text):
+            # First sentence is slowest
+            await asyncio.sleep(0.05 if text == "one." else 0.0)
+            return text.encode()
+
+        out = asyncio.run(_collect(pipeline_tts(sentences(), tts)))
+        assert [i for i, _, _ in out] == [0, 1, 2]
+        assert [a for _, _, a in out] == [b"one.", b"two two two.", b"three."]
+
+    def test_tts_overlaps_llm_stream(self):
+        """First audio must arrive before the LLM finishes streaming."""
+        from app.voice.streaming import pipeline_tts
+
+        async def sentences():
+            for s in ["a.", "b.", "c.", "d."]:
+                await asyncio.sleep(0.05)
+                yield s
+
+        async def tts(text):
+            await asyncio.sleep(0.05)
+            return b"x"
+
+        async def run():
+            t0 = time.perf_counter()
+            agen = pipeline_tts(sentences(), tts)
+            await agen.__anext__()
+            first = time.perf_counter() - t0
+            rest = [item async for item in agen]
+            return first, time.perf_counter() - t0, len(rest)
+
+        first, total, rest = asyncio.run(run())
+        assert rest == 3
+        assert first < 0.15  # 1 sentence + 1 TTS, not 4 sentences + TTS
+        assert total < 0.4  # TTS of sentence k overlaps LLM of sentence k+1
+
+    def test_failed_sentence_yields_empty_audio(self):
+        """A TTS error on one sentence must not kill the whole turn."""
+        from app.voice.streaming import pipeline_tts
+
+        async def sentences():
+            for s in ["ok.", "boom.", "ok again."]:
+                yield s
+
+        async def tts(text):
+            if text == "boom.":
+                raise RuntimeError("sarvam 500")
+            return b"audio"
+
+        out = asyncio.run(_collect(pipeline_tts(sentences(), tts)))
+        assert [a for _, _, a in out] == [b"audio", b"", b"audio"]
+
+    def test_early_close_cancels_pending_tts(self):
+        """Closing the pipeline early cancels TTS work that is still queued."""
+        from app.voice.streaming import pipeline_tts
+
+        started, finished = [], []
+
+        async def sentences():
+            for s in ["a.", "b.", "c."]:
+                yield s
+
+        async def tts(text):
+            started.append(text)
+            await asyncio.sleep(0.0 if text == "a." else 0.2)
+            finished.append(text)
+            return b"x"
+
+        async def run():
+            agen = pipeline_tts(sentences(), tts)
+            await agen.__anext__()
+            await agen.aclose()
+            await asyncio.sleep(0.3)
+
+        asyncio.run(run())
+        assert finished == ["a."]
+
+
+class TestMockProviders:
+    """Mock LLM/TTS used by the TTFA benchmark."""
+
+    def test_mock_llm_streams_sentences(self):
+        from app.tutor.llm import MockLLM
+
+        llm = MockLLM(reply="Pehla. Doosra? Teesra!")
+        out = asyncio.run(_collect(llm.generate_streaming([])))
+        assert out == ["Pehla.", "Doosra?", "Teesra!"]
+        assert llm.generate([]).text == "Pehla. Doosra? Teesra!"
+
+    def test_mock_tts_simulated_latency(self):
+        from app.voice.tts import MockTTS
+
+        tts = MockTTS(latency_s=0.02)
+        t0 = time.perf_counter()
+        result = asyncio.run(tts.synthesize_async("namaste"))
+        assert time.perf_counter() - t0 >= 0.02
+        assert result.audio_bytes
+
+    def test_mock_tts_streams_chunks(self):
+        from app.voice.tts import MockTTS
+
+        tts = MockTTS()
+        chunks = asyncio.run(_collect(tts.synthesize_streaming("namaste")))
+        assert len(chunks) == 4
+        assert b"".join(chunks) == MockTTS._SILENT_MP3
+
+
+class TestStreamTTSMode:
+    """STREAM_TTS_MODE wiring in the streaming endpoint."""
+
+    def test_sentence_mode_streams_ordered_chunks(self, isolated_app):
+        import json
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.tutor import llm
+        from app.voice import tts
+
+        saved = (llm._instance, tts._instance)
+        llm._instance = llm.MockLLM(reply="Chalo square samjhte hain. Square matlab number ko usi se multiply karna.")
+        tts._instance = tts.MockTTS(latency_s=0.02)
+        try:
+            with TestClient(app) as client:
+                token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+                headers = {"Authorization": f"Bearer {token}"}
+                session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+                resp = client.post(
+                    "/api/student/session/message-stream", headers=headers,
+                    json={"session_id": session_id, "text": "haan ready", "tts_mode": "sentence"},
+                )
+        finally:
+            llm._instance, tts._instance = saved
+
+        events = [json.loads(l[6:]) for l in resp.text.splitlines() if l.startswith("data: ")]
+        types = [e["type"] for e in events]
+        chunks = [e for e in events if e["type"] == "audio_chunk"]
+        assert [c["index"] for c in chunks] == list(range(len(chunks)))
+        spoken = [c for c in chunks if not c.get("filler")]
+        assert len(spoken) >= 2
+        assert [c["is_last"] for c in spoken] == [False] * (len(spoken) - 1) + [True]
+        # The reply text is known once the LLM is done: it doesn't wait for the last clip
+        assert types.index("text") < events.index(spoken[-1])
+        assert types[-1] == "done"
+
+    def test_mode_config_is_known(self):
+        from app.config import STREAM_TTS_MODE, STREAM_TTS_MODES
+        assert STREAM_TTS_MODE in STREAM_TTS_MODES
+
+
+class TestStreamMode:
+    """v10.9.0: tts_mode=stream forwards provider chunks over SSE."""
+
+    def test_stream_chunks_inline_and_ordered(self, isolated_app):
+        import base64
+        import json
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.tutor import llm
+        from app.voice import tts
+
+        saved = (llm._instance, tts._instance)
+        llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.")
+        tts._instance = tts.MockTTS()
+        try:
+            with TestClient(app) as client:
+                token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+                headers = {"Authorization": f"Bearer {token}"}
+                session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+                resp = client.post(
+                    "/api/student/session/message-stream", headers=headers,
+                    json={"session_id": session_id, "text": "haan ready", "tts_mode": "stream"},
+                )
+        finally:
+            llm._instance, tts._instance = saved
+
+        events = [json.loads(l[6:]) for l in resp.text.splitlines() if l.startswith("data: ")]
+        chunks = [e for e in events if e["type"] == "audio_chunk"]
+        assert [c["index"] for c in chunks] == list(range(len(chunks)))
+        chunks = [c for c in chunks if not c.get("filler")]  # thinking filler is a normal clip
+        assert len(chunks) == 5  # four provider chunks, then the empty terminator
+        assert all(c["stream"] and "url" not in c for c in chunks)
+        assert [c["is_last"] for c in chunks] == [False] * 4 + [True] and chunks[-1]["audio"] == ""
+        audio = b"".join(base64.b64decode(c["audio"]) for c in chunks)
+        assert audio == tts.MockTTS._SILENT_MP3
+        assert events[-1]["type"] == "done"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
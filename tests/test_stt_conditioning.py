@@ -0,0 +1,149 @@
+"""
+Tests for v10.9.0 STT audio conditioning: energy VAD, silence rejection
+without a network call, and trimming before upload. Inputs are 16 kHz mono
+WAV, which is decoded without ffmpeg.
+"""
+
+import asyncio
+import io
+import math
+import shutil
+import struct
+import wave
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+RATE = 16000
+
+
+def _pcm(*parts):
+    """parts: (seconds, amplitude) — a 220 Hz tone, amplitude 0 for silence."""
+    samples = []
+    for seconds, amplitude in parts:
+        samples += [int(amplitude * math.sin(2 * math.pi * 220 * i / RATE)) for i in range(int(seconds * RATE))]
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+def _wav(*parts):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(_pcm(*parts))
+    return out.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def no_ffmpeg(monkeypatch):
+    from app import metrics
+    from app.voice import stt
+
+    monkeypatch.setattr(stt, "_ffmpeg", lambda: None)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _capture(uploads):
+    async def post(self, url, **kwargs):
+        uploads.append(kwargs["files"]["file"])
+        return httpx.Response(200, json={"transcript": "paanch ka square", "language_code": "hi-IN"},
+                              request=httpx.Request("POST", url))
+
+    return post
+
+
+class TestVoicedSpan:
+
+    def test_finds_speech_between_silences(self):
+        from app.voice.stt import voiced_span
+
+        start, end = voiced_span(_pcm((0.5, 0), (0.5, 8000), (0.5, 0)))
+        assert abs(start - 8000) <= 320 and abs(end - 16000) <= 320
+
+    def test_background_hum_is_silence(self):
+        from app.voice.stt import voiced_span
+
+        assert voiced_span(_pcm((1.0, 60))) is None
+
+    def test_a_click_is_not_speech(self):
+        from app.voice.stt import voiced_span
+
+        assert voiced_span(_pcm((0.5, 0), (0.04, 8000), (0.5, 0))) is None
+
+
+class TestConditionedUpload:
+
+    def test_silent_clip_never_uploads(self):
+        from app import metrics
+        from app.tutor.input_classifier import classify
+        from app.voice.stt import SarvamSaarikaSTT
+
+        uploads = []
+        with patch.object(httpx.AsyncClient, "post", _capture(uploads)):
+            result = asyncio.run(SarvamSaarikaSTT().transcribe_async(_wav((2.0, 30))))
+        assert uploads == []
+        assert result.text == "[silence]" and not result.garbled and result.confidence == 1.0
+        assert asyncio.run(classify(result.text))["category"] == "SILENCE"
+        assert metrics.get("stt.conditioning.silent") == 1
+
+    def test_speech_is_trimmed_to_16k_mono(self):
+        from app import metrics
+        from app.voice.stt import GroqWhisperSTT
+
+        original = _wav((1.0, 0), (0.6, 8000), (1.5, 0))
+        uploads = []
+        with patch.object(httpx.AsyncClient, "post", _capture(uploads)):
+            asyncio.run(GroqWhisperSTT().transcribe_async(original))
+        name, body, content_type = uploads[0]
+        with wave.open(io.BytesIO(body.getvalue())) as w:
+            seconds = w.getnframes() / w.getframerate()
+            assert (w.getframerate(), w.getnchannels()) == (RATE, 1)
+        assert name == "audio.wav" and content_type == "audio/wav"
+        assert 0.6 <= seconds <= 1.05  # speech plus 200ms padding each side
+        assert metrics.get("stt.conditioning.bytes_out") < metrics.get("stt.conditioning.bytes_in")
+        assert metrics.get("stt.conditioning.trimmed_ms") >= 2000
+
+    def test_undecodable_audio_goes_up_unchanged(self):
+        from app import metrics
+        from app.voice.stt import SarvamSaarikaSTT
+
+        blob = b"\x1a\x45\xdf\xa3" + b"\x00" * 2000  # webm, and no ffmpeg here
+        uploads = []
+        with patch.object(httpx.Client, "post", lambda self, url, **kw: _sync(uploads, kw)):
+            assert SarvamSaarikaSTT().transcribe(blob).text == "paanch ka square"
+        assert uploads[0][0] == "audio.webm" and uploads[0][1].getvalue() == blob
+        assert metrics.get("stt.conditioning.skipped") == 1
+
+    def test_conditioning_can_be_turned_off(self, monkeypatch):
+        from app.voice import stt
+
+        monkeypatch.setattr(stt, "STT_CONDITION_AUDIO", False)
+        silent = _wav((1.0, 0))
+        assert stt.condition_audio(silent) is silent
+
+
+def _sync(uploads, kwargs):
+    uploads.append(kwargs["files"]["file"])
+    return httpx.Response(200, json={"transcript": "paanch ka square", "language_code": "hi-IN"},
+                          request=httpx.Request("POST", "https://stt.test"))
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+class TestFFmpeg:
+
+    def test_opus_upload_is_smaller(self, monkeypatch):
+        from app.voice import stt
+
+        monkeypatch.setattr(stt, "_ffmpeg", lambda: shutil.which("ffmpeg"))
+        original = _wav((0.5, 0), (1.0, 8000), (0.5, 0))
+        out = stt.condition_audio(original)
+        assert out[:4] == b"\x1a\x45\xdf\xa3" and len(out) < len(original) // 4
+        assert stt.voiced_span(stt.decode_pcm(out)) is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
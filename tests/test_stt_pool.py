@@ -0,0 +1,147 @@
+"""
+Tests for the v10.9.0 pooled STT clients, against a local keep-alive HTTP
+server: utterances reuse one connection, handshakes and latency are counted.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"transcript": "haan samajh gaya", "language_code": "hi-IN"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    from app import metrics
+    from app.voice import stt
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.connections = 0
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    monkeypatch.setattr(stt, "SARVAM_STT_URL", f"http://127.0.0.1:{httpd.server_address[1]}/speech-to-text")
+    monkeypatch.setattr(stt, "STT_RESULT_CACHE_TTL_S", 0)  # every call must reach the server
+    metrics.reset()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    metrics.reset()
+
+
+class TestPooledClients:
+
+    def test_async_utterances_share_a_connection(self, server):
+        from app import metrics
+        from app.voice.stt import SarvamSaarikaSTT
+
+        async def run():
+            provider = SarvamSaarikaSTT()
+            results = [await provider.transcribe_async(b"\x00" * 2000) for _ in range(3)]
+            await provider.aclose()
+            return results
+
+        results = asyncio.run(run())
+        assert [r.text for r in results] == ["haan samajh gaya"] * 3
+        assert server.connections == 1
+        assert metrics.get("stt.saarika.connects") == 1 and metrics.get("stt.saarika.reused") == 2
+        assert metrics.get("stt.saarika.handshake.count") == 1
+        assert metrics.get("stt.saarika.latency.count") == 3
+
+    def test_sync_client_is_kept_too(self, server):
+        from app import metrics
+        from app.voice.stt import SarvamSaarikaSTT
+
+        provider = SarvamSaarikaSTT()
+        for _ in range(2):
+            assert provider.transcribe(b"\x00" * 2000).text == "haan samajh gaya"
+        assert server.connections == 1 and metrics.get("stt.saarika.reused") == 1
+
+    def test_new_event_loop_gets_a_new_client(self, server):
+        from app.voice.stt import SarvamSaarikaSTT
+
+        provider = SarvamSaarikaSTT()
+        for _ in range(2):
+            asyncio.run(provider.transcribe_async(b"\x00" * 2000))
+        assert server.connections == 2
+
+    def test_reconnects_after_close(self, server):
+        from app.voice import stt
+
+        async def run():
+            provider = stt.SarvamSaarikaSTT()
+            await provider.transcribe_async(b"\x00" * 2000)
+            await provider.aclose()
+            return await provider.transcribe_async(b"\x00" * 2000)
+
+        assert asyncio.run(run()).text == "haan samajh gaya"
+        assert server.connections == 2
+
+    def test_errors_are_counted(self, server, monkeypatch):
+        from app import metrics
+        from app.voice import stt
+
+        monkeypatch.setattr(stt, "SARVAM_STT_URL", f"http://127.0.0.1:{server.server_address[1]}/missing")
+        monkeypatch.setattr(_Handler, "do_POST", lambda self: (self.rfile.read(int(self.headers["Content-Length"])),
+                                                                self.send_error(404)))
+        with pytest.raises(Exception):
+            asyncio.run(stt.SarvamSaarikaSTT().transcribe_async(b"\x00" * 2000))
+        assert metrics.get("stt.saarika.errors") == 1
+        assert metrics.get("stt.saarika.latency.count") == 0
+
+
+class TestClientOptions:
+
+    def test_http2_only_when_enabled_and_available(self, monkeypatch):
+        from app.voice import stt
+
+        stt._http2.cache_clear()
+        monkeypatch.setattr(stt, "STT_HTTP2", False)
+        try:
+            assert stt._client_options()["http2"] is False
+        finally:
+            stt._http2.cache_clear()
+
+    def test_limits_follow_config(self):
+        from app.config import STT_KEEPALIVE_S, STT_MAX_CONNECTIONS
+        from app.voice.stt import _client_options
+
+        limits = _client_options()["limits"]
+        assert limits.max_connections == STT_MAX_CONNECTIONS
+        assert limits.keepalive_expiry == STT_KEEPALIVE_S
+
+
+class TestHistogram:
+
+    def test_observe_buckets(self):
+        from app import metrics
+
+        metrics.reset()
+        for ms in (80, 400, 400, 9000):
+            metrics.observe("t.latency", ms)
+        assert metrics.snapshot("t.latency.") == {"count": 4, "total_ms": 9880,
+                                                  "le_100": 1, "le_500": 2, "le_inf": 1}
+        metrics.reset()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,136 @@
+"""
+Tests for the v10.9.0 hedged STT race: the secondary provider is brought in
+when the primary is slow, failing or garbled; the first clean transcript
+wins and the other request is cancelled.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+AUDIO = b"\x00" * 2000
+
+
+@pytest.fixture(autouse=True)
+def isolated():
+    from app import metrics
+
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _upstream(calls, cancelled, sarvam=(0.0, "paanch ka square"), groq=(0.0, "five squared")):
+    """Fake AsyncClient.post: (delay, transcript | exception) per provider."""
+    from app.config import GROQ_STT_URL
+
+    async def post(self, url, **kwargs):
+        name = "groq" if url == GROQ_STT_URL else "saarika"
+        calls.append(name)
+        delay, outcome = groq if name == "groq" else sarvam
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        payload = {"text": outcome} if name == "groq" else {"transcript": outcome, "language_code": "hi-IN"}
+        return httpx.Response(200, json=payload, request=httpx.Request("POST", url))
+
+    return post
+
+
+def _race(after_ms, **upstream):
+    from app.voice.stt import GroqWhisperSTT, RacingSTT, SarvamSaarikaSTT
+
+    calls, cancelled = [], []
+
+    async def run():
+        racer = RacingSTT(SarvamSaarikaSTT(), GroqWhisperSTT(), after_ms=after_ms)
+        start = time.perf_counter()
+        result = await racer.transcribe_async(AUDIO)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)  # let the loser's cancellation land
+        return result, elapsed
+
+    with patch.object(httpx.AsyncClient, "post", _upstream(calls, cancelled, **upstream)):
+        result, elapsed = asyncio.run(run())
+    return result, elapsed, calls, cancelled
+
+
+class TestRace:
+
+    def test_fast_primary_needs_no_hedge(self):
+        from app import metrics
+
+        result, _, calls, _ = _race(200)
+        assert result.text == "paanch ka square" and calls == ["saarika"]
+        assert metrics.get("stt.race.won.saarika") == 1 and metrics.get("stt.race.fired") == 0
+        assert metrics.get("stt.race.saarika.latency.count") == 1
+
+    def test_slow_primary_loses_and_is_cancelled(self):
+        from app import metrics
+
+        result, elapsed, calls, cancelled = _race(50, sarvam=(1.0, "paanch ka square"))
+        assert result.text == "five squared" and elapsed < 0.5
+        assert calls == ["saarika", "groq"] and cancelled == ["saarika"]
+        assert metrics.get("stt.race.won.groq") == 1 and metrics.get("stt.race.fired") == 1
+
+    def test_secondary_latency_excludes_the_hedge_delay(self):
+        from app import metrics
+
+        result, _, _, _ = _race(150, sarvam=(1.0, "paanch ka square"))
+        assert result.text == "five squared" and result.latency_ms >= 150  # the caller's view
+        assert metrics.get("stt.groq.latency.count") == 1
+        assert metrics.get("stt.groq.latency.total_ms") < 100  # the provider's own time
+
+    def test_garbled_primary_fires_at_once(self):
+        result, elapsed, calls, _ = _race(1000, sarvam=(0.0, "àèì"))
+        assert result.text == "five squared" and elapsed < 0.5
+        assert calls == ["saarika", "groq"]
+
+    def test_failed_primary_falls_to_secondary(self):
+        result, _, _, _ = _race(1000, sarvam=(0.0, httpx.ConnectError("down")))
+        assert result.text == "five squared"
+
+    def test_parallel_mode_primary_still_wins_when_first(self):
+        result, _, calls, cancelled = _race(0, groq=(0.5, "five squared"))
+        assert result.text == "paanch ka square"
+        assert sorted(calls) == ["groq", "saarika"] and cancelled == ["groq"]
+
+    def test_both_garbled_returns_garbled(self):
+        result, _, _, _ = _race(0, sarvam=(0.0, "àè"), groq=(0.01, "ü"))
+        assert result.garbled
+
+    def test_both_failing_raises(self):
+        with pytest.raises(httpx.ConnectError):
+            _race(0, sarvam=(0.0, httpx.ConnectError("down")), groq=(0.0, httpx.ConnectError("down")))
+
+
+class TestWiring:
+
+    def test_get_stt_builds_the_race(self, monkeypatch):
+        from app.voice import stt
+
+        monkeypatch.setattr(stt, "_instance", None)
+        monkeypatch.setattr(stt, "STT_RACE", True)
+        monkeypatch.setattr(stt, "STT_PROVIDER", "sarvam_saarika")
+        monkeypatch.setattr(stt, "STT_RACE_SECONDARY", "groq_whisper")
+        racer = stt.get_stt()
+        assert isinstance(racer, stt.RacingSTT)
+        assert isinstance(racer.secondary, stt.GroqWhisperSTT)
+
+    def test_whisper_gets_an_iso_language(self):
+        from app.voice.stt import GroqWhisperSTT
+
+        for given, sent in (("unknown", "hi"), ("hi-IN", "hi"), ("en-IN", "en")):
+            files = GroqWhisperSTT()._request(AUDIO, given)["files"]
+            assert files["language"] == (None, sent)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
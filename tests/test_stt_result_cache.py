@@ -0,0 +1,311 @@
+"""
+Tests for the v10.9.0 STT result cache (byte-identical uploads within the TTL
+reuse the transcript) and idempotent message turns (a retry with the same
+Idempotency-Key replays the first response instead of running a new turn).
+"""
+
+import asyncio
+import base64
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+AUDIO = b"\x00" * 2000
+
+
+@pytest.fixture(autouse=True)
+def isolated():
+    from app import metrics
+
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _upstream(calls, delay=0.0):
+    """Fake AsyncClient.post counting uploads."""
+
+    async def post(self, url, **kwargs):
+        calls.append(kwargs["data"]["language_code"])
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"transcript": "paanch ka square", "language_code": "hi-IN"},
+                              request=httpx.Request("POST", url))
+
+    return post
+
+
+class TestResultCache:
+
+    def test_identical_upload_is_served_from_cache(self):
+        from app import metrics
+        from app.voice.stt import SarvamSaarikaSTT
+
+        calls = []
+
+        async def run():
+            provider = SarvamSaarikaSTT()
+            return [await provider.transcribe_async(AUDIO, "hi-IN") for _ in range(2)]
+
+        with patch.object(httpx.AsyncClient, "post", _upstream(calls)):
+            first, second = asyncio.run(run())
+        assert len(calls) == 1
+        assert second.text == first.text and second.latency_ms == 0
+        assert metrics.get("stt.cache.hits") == 1 and metrics.get("stt.cache.misses") == 1
+
+    def test_language_and_provider_are_part_of_the_key(self):
+        from app.voice.stt import STTResultCache
+
+        cache = STTResultCache(60, 8)
+        keys = {cache.key(AUDIO, "saarika", "hi-IN"), cache.key(AUDIO, "saarika", "en-IN"),
+                cache.key(AUDIO, "groq", "hi-IN"), cache.key(AUDIO + b"\x01", "saarika", "hi-IN")}
+        assert len(keys) == 4
+
+    def test_expired_and_evicted_entries_miss(self, monkeypatch):
+        from app.voice import stt
+
+        cache = stt.STTResultCache(60, 2)
+        result = stt.STTResult("haan", 0.9, "hi-IN", 300)
+        for key in ("a", "b", "c"):
+            cache.put(key, result)
+        assert cache.get("a") is None and cache.get("c").text == "haan"
+
+        now = stt.time.monotonic()
+        monkeypatch.setattr(stt.time, "monotonic", lambda: now + 61)
+        assert cache.get("c") is None
+
+    def test_concurrent_duplicates_share_one_upload(self):
+        from app import metrics
+        from app.voice.stt import SarvamSaarikaSTT
+
+        calls = []
+
+        async def run():
+            provider = SarvamSaarikaSTT()
+            return await asyncio.gather(*(provider.transcribe_async(AUDIO, "hi-IN") for _ in range(3)))
+
+        with patch.object(httpx.AsyncClient, "post", _upstream(calls, delay=0.05)):
+            results = asyncio.run(run())
+        assert len(calls) == 1 and {r.text for r in results} == {"paanch ka square"}
+        assert metrics.get("stt.cache.coalesced") == 2
+
+    def test_zero_ttl_turns_the_cache_off(self, monkeypatch):
+        from app.voice import stt
+
+        monkeypatch.setattr(stt, "STT_RESULT_CACHE_TTL_S", 0)
+        calls = []
+        with patch.object(httpx.AsyncClient, "post", _upstream(calls)):
+            for _ in range(2):
+                asyncio.run(stt.SarvamSaarikaSTT().transcribe_async(AUDIO, "hi-IN"))
+        assert len(calls) == 2
+
+
+class TestIdempotencyStore:
+
+    def test_waiter_gets_the_owners_response(self):
+        from app.idempotency import IdempotencyStore
+
+        store = IdempotencyStore(60, 8)
+        runs = []
+
+        async def produce():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return {"n": len(runs)}
+
+        async def run():
+            return await asyncio.gather(store.run("k", produce), store.run("k", produce))
+
+        assert asyncio.run(run()) == [{"n": 1}, {"n": 1}] and len(runs) == 1
+
+    def test_failed_owner_stores_nothing(self):
+        from app.idempotency import IdempotencyStore
+
+        store = IdempotencyStore(60, 8)
+
+        async def fail():
+            raise RuntimeError("LLM down")
+
+        async def ok():
+            return "second try"
+
+        async def run():
+            with pytest.raises(RuntimeError):
+                await store.run("k", fail)
+            return await store.run("k", ok)
+
+        assert asyncio.run(run()) == "second try"
+
+    def test_owner_that_never_finishes_is_taken_over(self):
+        from app import metrics
+        from app.idempotency import IdempotencyStore
+
+        store = IdempotencyStore(60, 8, wait_s=0.05)
+
+        async def run():
+            assert await store.claim("k") is None  # owner gone, never settles
+            return await asyncio.wait_for(store.claim("k"), 1)
+
+        assert asyncio.run(run()) is None
+        assert metrics.get("idempotency.stale") == 1
+
+    def test_reused_key_with_another_request_is_rejected(self):
+        from app.idempotency import IdempotencyKeyReused, IdempotencyStore, fingerprint
+
+        store = IdempotencyStore(60, 8)
+        first, other = fingerprint("s1", "haan", None), fingerprint("s1", "nahi", None)
+
+        async def run():
+            assert await store.claim("k", first) is None
+            with pytest.raises(IdempotencyKeyReused):
+                await store.claim("k", other)  # while running
+            store.complete("k", "answer")
+            with pytest.raises(IdempotencyKeyReused):
+                await store.claim("k", other)  # once stored
+            return await store.claim("k", first)
+
+        assert asyncio.run(run()) == "answer"
+
+
+@pytest.fixture
+def client(isolated_app):
+    from app.main import app
+    from app.tutor import llm
+    from app.voice import tts
+
+    saved = (llm._instance, tts._instance)
+    llm._instance = llm.MockLLM(reply="Bilkul sahi. Chalo aage badhte hain.")
+    tts._instance = tts.MockTTS()
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        llm._instance, tts._instance = saved
+
+
+def _start(client):
+    token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+    return headers, session_id
+
+
+def _turns(session_id):
+    from app.database import SessionLocal
+    from app.models import SessionTurn
+
+    db = SessionLocal()
+    try:
+        return db.query(SessionTurn).filter(SessionTurn.session_id == session_id).count()
+    finally:
+        db.close()
+
+
+def _events(response):
+    return [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: ")]
+
+
+class TestIdempotentTurns:
+
+    def test_retried_message_is_replayed(self, client):
+        headers, session_id = _start(client)
+        retry = {**headers, "Idempotency-Key": "turn-1"}
+        first = client.post("/api/student/session/message", headers=retry,
+                            data={"session_id": session_id, "text": "haan ready"})
+        turns = _turns(session_id)
+        second = client.post("/api/student/session/message", headers=retry,
+                             data={"session_id": session_id, "text": "haan ready"})
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert _turns(session_id) == turns
+
+    def test_without_a_key_each_request_is_a_turn(self, client):
+        headers, session_id = _start(client)
+        for _ in range(2):
+            client.post("/api/student/session/message", headers=headers,
+                        data={"session_id": session_id, "text": "haan ready"})
+        turns = _turns(session_id)
+        client.post("/api/student/session/message", headers=headers,
+                    data={"session_id": session_id, "text": "haan ready"})
+        assert _turns(session_id) > turns
+
+    def test_retried_stream_is_replayed(self, client):
+        from app import metrics
+
+        headers, session_id = _start(client)
+        retry = {**headers, "Idempotency-Key": "turn-2"}
+        body = {"session_id": session_id, "text": "haan ready"}
+        first = client.post("/api/student/session/message-stream", headers=retry, json=body)
+        turns = _turns(session_id)
+        second = client.post("/api/student/session/message-stream", headers=retry, json=body)
+        original, replayed = _events(first), _events(second)
+        assert replayed[-1]["type"] == "done" and len(replayed) == len(original)
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert _turns(session_id) == turns
+        assert metrics.get("idempotency.replayed") == 1
+        # Stored clips are kept by URL, not as base64 in process memory
+        assert any(e["type"] == "audio_chunk" and e.get("audio") for e in original)
+        for sent, again in zip(original, replayed):
+            if sent["type"] == "audio_chunk" and sent.get("audio"):
+                assert "audio" not in again and client.get(again["url"]).content == base64.b64decode(sent["audio"])
+            else:
+                assert again == sent
+
+    def test_oversized_stream_is_not_stored(self, client, monkeypatch):
+        from app import metrics
+        from app.routers import student
+
+        monkeypatch.setattr(student, "IDEMPOTENCY_MAX_ENTRY_KB", 1)
+        headers, session_id = _start(client)
+        retry = {**headers, "Idempotency-Key": "turn-5"}
+        body = {"session_id": session_id, "text": "haan ready", "tts_mode": "stream"}
+        client.post("/api/student/session/message-stream", headers=retry, json=body)
+        turns = _turns(session_id)
+        second = client.post("/api/student/session/message-stream", headers=retry, json=body)
+        assert _events(second)[-1]["type"] == "done" and "Idempotent-Replayed" not in second.headers
+        assert _turns(session_id) > turns
+        assert metrics.get("idempotency.too_large") == 2
+
+    def test_failed_turn_is_not_stored(self, client):
+        headers = _start(client)[0]
+        retry = {**headers, "Idempotency-Key": "turn-3"}
+        body = {"session_id": "missing", "text": "haan"}
+        for _ in range(2):
+            assert client.post("/api/student/session/message-stream", headers=retry, json=body).status_code == 404
+
+    def test_reused_key_with_another_body_is_rejected(self, client):
+        headers, session_id = _start(client)
+        retry = {**headers, "Idempotency-Key": "turn-4"}
+        first = client.post("/api/student/session/message", headers=retry,
+                            data={"session_id": session_id, "text": "haan ready"})
+        turns = _turns(session_id)
+        second = client.post("/api/student/session/message", headers=retry,
+                             data={"session_id": session_id, "text": "pachchees"})
+        assert first.status_code == 200 and second.status_code == 422
+        assert _turns(session_id) == turns
+
+    def test_client_gone_before_the_body_releases_the_key(self):
+        from fastapi.responses import StreamingResponse
+        from app.idempotency import get_store
+        from app.routers.student import _recording
+
+        async def lines():
+            yield 'data: {"type": "done"}\n\n'
+
+        async def run():
+            store = get_store()
+            assert await store.claim("k") is None
+            response = _recording(StreamingResponse(lines()), "k")
+            await response.body_iterator.aclose()  # never started: its finally does not run
+            await response.background()
+            return await asyncio.wait_for(store.claim("k"), 1)
+
+        assert asyncio.run(run()) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
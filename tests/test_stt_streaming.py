@@ -0,0 +1,266 @@
+"""
+Tests for v10.9.0 streaming STT: partial transcripts while the student speaks,
+end of speech resolved from the final (or last partial) without a REST call,
+and the streamed utterance protocol on /api/student/session/ws.
+"""
+
+import asyncio
+import base64
+import io
+import json
+import time
+import wave
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from websockets.asyncio.server import serve
+
+
+@pytest.fixture(autouse=True)
+def isolated():
+    from app import metrics
+
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+async def _speak(stream, *words):
+    for word in words:
+        await stream.send(word.encode())
+    return [stream.partials.get_nowait() for _ in range(stream.partials.qsize())]
+
+
+class TestStream:
+
+    def test_partials_then_final(self):
+        from app.voice.stt import MockStreamingSTT
+
+        async def run():
+            stream = await MockStreamingSTT().open("hi-IN")
+            partials = await _speak(stream, "paanch", "ka", "square")
+            return partials, await stream.finish()
+
+        partials, result = asyncio.run(run())
+        assert partials == ["paanch", "paanch ka", "paanch ka square"]
+        assert result.text == "paanch ka square" and not result.garbled
+        assert result.latency_ms < 50
+
+    def test_late_final_uses_last_partial(self):
+        from app import metrics
+        from app.voice.stt import MockStreamingSTT
+
+        async def run():
+            stream = await MockStreamingSTT(final_delay=None).open()
+            await _speak(stream, "pachchees")
+            start = time.perf_counter()
+            result = await stream.finish(timeout_ms=50)
+            return result, time.perf_counter() - start
+
+        result, elapsed = asyncio.run(run())
+        assert result.text == "pachchees" and elapsed < 0.2
+        assert metrics.get("stt.stream.mock.partial_used") == 1
+
+    def test_nothing_heard_is_silence(self):
+        from app.voice.stt import MockStreamingSTT
+
+        async def run():
+            stream = await MockStreamingSTT().open()
+            return await stream.finish()
+
+        assert asyncio.run(run()).text == "[silence]"
+
+    def test_dropped_provider_falls_back_to_rest(self, monkeypatch):
+        from app import metrics
+        from app.voice import stt
+
+        class Broken(stt._MockStream):
+            async def _send(self, frame):
+                raise ConnectionError("stream closed")
+
+        uploads = []
+
+        class Rest:
+            async def transcribe_async(self, audio, language=None):
+                uploads.append(audio)
+                return stt.STTResult("chhattees", 0.8, language, 400)
+
+        monkeypatch.setattr(stt, "_instance", Rest())
+
+        async def run():
+            stream = Broken("hi-IN", final_delay=0.0)
+            await stream.send(b"\x00\x01" * 800)
+            return await stream.finish()
+
+        assert asyncio.run(run()).text == "chhattees"
+        assert uploads[0][:4] == b"RIFF"
+        assert metrics.get("stt.stream.mock.rest_fallback") == 1
+
+
+class StubSarvamSTT:
+    """Sarvam streaming STT stub: a transcript per audio message, then one more after flush."""
+
+    def __init__(self):
+        self.audio = []
+
+    async def handler(self, ws):
+        async for message in ws:
+            data = json.loads(message)
+            if "audio" in data:
+                self.audio.append(data["audio"]["data"])
+                await ws.send(json.dumps({"type": "data", "data": {"transcript": f"shabd{len(self.audio)}"}}))
+            elif data.get("type") == "flush":
+                await ws.send(json.dumps({"type": "events", "data": {"signal_type": "END_SPEECH"}}))
+                await ws.send(json.dumps({"type": "data", "data": {"transcript": "ant"}}))
+
+
+class TestSarvamStream:
+
+    def test_segments_and_flush(self, monkeypatch):
+        from app.voice import stt
+
+        stub = StubSarvamSTT()
+
+        async def run():
+            async with serve(stub.handler, "127.0.0.1", 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                monkeypatch.setattr(stt, "SARVAM_STT_STREAM_URL", f"ws://127.0.0.1:{port}")
+                stream = await stt.SarvamStreamingSTT().open("hi-IN")
+                for frame in (b"\x00\x00" * 160, b"\x01\x00" * 160):
+                    await stream.send(frame)
+                await asyncio.sleep(0.05)
+                partial = stream.text
+                return partial, await stream.finish(timeout_ms=1000)
+
+        partial, result = asyncio.run(run())
+        assert partial == "shabd1 shabd2"
+        assert result.text == "shabd1 shabd2 ant"
+        assert len(stub.audio) == 2
+        with wave.open(io.BytesIO(base64.b64decode(stub.audio[1]))) as clip:  # "audio/wav" as labelled
+            assert (clip.getnchannels(), clip.getframerate()) == (1, 16000)
+            assert clip.readframes(160) == b"\x01\x00" * 160
+
+    def test_providers_must_implement_the_hooks(self):
+        from app.voice import stt
+
+        class Partial(stt.STTStream):
+            async def _flush(self):
+                pass
+
+        with pytest.raises(TypeError):
+            Partial("x", "hi-IN")
+        with pytest.raises(TypeError):
+            stt._RestSTT()
+
+
+@pytest.fixture
+def client(isolated_app, monkeypatch):
+    from app.main import app
+    from app.tutor import llm
+    from app.voice import stt, tts
+
+    async def no_rest(self, url, **kwargs):
+        raise AssertionError("streamed utterances must not be re-transcribed")
+
+    saved = (llm._instance, tts._instance)
+    llm._instance = llm.MockLLM(reply="Bilkul sahi. Chalo aage badhte hain.")
+    tts._instance = tts.MockTTS()
+    monkeypatch.setattr(stt, "_stream_instance", stt.MockStreamingSTT())
+    try:
+        with TestClient(app) as c, patch.object(httpx.AsyncClient, "post", no_rest):
+            yield c
+    finally:
+        llm._instance, tts._instance = saved
+
+
+def _connect(client):
+    token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+    ws = client.websocket_connect(f"/api/student/session/ws?token={token}&session_id={session_id}")
+    return ws
+
+
+def _turn(ws):
+    events = []
+    while True:
+        event = ws.receive_json()
+        events.append(event)
+        if event["type"] == "audio_chunk":
+            ws.receive_bytes()
+        if event["type"] in ("done", "error"):
+            return events
+
+
+class TestSessionStreaming:
+
+    def test_partials_then_turn_on_final_text(self, client):
+        with _connect(client) as ws:
+            ws.receive_json()
+            ws.send_json({"type": "audio_start", "language": "hi-IN"})
+            ws.send_bytes(b"haan")
+            assert ws.receive_json() == {"type": "partial", "content": "haan"}
+            ws.send_bytes(b"ready")
+            assert ws.receive_json() == {"type": "partial", "content": "haan ready"}
+            ws.send_json({"type": "audio_end"})
+            events = _turn(ws)
+        assert next(e for e in events if e["type"] == "transcript")["content"] == "haan ready"
+        assert events[-1]["type"] == "done"
+
+    def test_blob_and_text_turns_still_work(self, client):
+        with _connect(client) as ws:
+            ws.receive_json()
+            ws.send_json({"type": "audio_start"})
+            ws.send_bytes(b"samajh gaya")
+            ws.receive_json()
+            ws.send_json({"type": "audio_end"})
+            _turn(ws)
+            ws.send_json({"text": "aur batao"})
+            assert _turn(ws)[-1]["type"] == "done"
+
+    def test_audio_end_without_start(self, client):
+        with _connect(client) as ws:
+            ws.receive_json()
+            ws.send_json({"type": "audio_end"})
+            assert ws.receive_json()["type"] == "error"
+
+    def test_failed_finish_keeps_connection(self, client, monkeypatch):
+        from app.voice import stt
+
+        class Failing(stt._MockStream):
+            async def finish(self, timeout_ms=None):
+                await self.aclose()
+                raise httpx.ConnectError("REST fallback down")
+
+        class Provider:
+            async def open(self, language=None):
+                return Failing(language or "hi-IN", 0.0)
+
+        monkeypatch.setattr(stt, "_stream_instance", Provider())
+        with _connect(client) as ws:
+            ws.receive_json()
+            ws.send_json({"type": "audio_start"})
+            ws.send_bytes(b"haan")
+            ws.receive_json()
+            ws.send_json({"type": "audio_end"})
+            assert ws.receive_json() == {"type": "error", "detail": "Turn failed"}
+            ws.send_json({"text": "haan ready"})
+            assert _turn(ws)[-1]["type"] == "done"
+
+    def test_streaming_off_reports_unavailable(self, client, monkeypatch):
+        from app.voice import stt
+
+        monkeypatch.setattr(stt, "_stream_instance", None)
+        monkeypatch.setattr(stt, "STT_STREAM_PROVIDER", "off")
+        with _connect(client) as ws:
+            ws.receive_json()
+            ws.send_json({"type": "audio_start"})
+            assert ws.receive_json() == {"type": "error", "detail": "Streaming STT unavailable"}
+            ws.send_json({"text": "haan ready"})
+            assert _turn(ws)[-1]["type"] == "done"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,214 @@
+"""
+Tests for v10.9.0 thinking fillers: a precached clip goes out as audio chunk 0
+of /message-stream when the turn is predicted to be slow.
+"""
+
+import asyncio
+import gc
+import json
+import warnings
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def fillers(monkeypatch):
+    from app.voice import fillers
+
+    monkeypatch.setattr(fillers, "_clips", {})
+    monkeypatch.setattr(fillers, "_next_clip", {})
+    monkeypatch.setattr(fillers, "_first_audio_ms", {})
+    monkeypatch.setattr(fillers, "THINKING_FILLER_MS", 1500)
+    return fillers
+
+
+def _load(fillers, language="hi-IN"):
+    fillers._clips[language] = [
+        {"text": text, "audio": text.encode(), "cache_path": None}
+        for text in fillers.THINKING_FILLERS[language]
+    ]
+
+
+class TestPrediction:
+
+    def test_prior_adds_stt_for_audio(self, fillers):
+        assert fillers.predicted_first_audio_ms("sentence", has_audio=True) > \
+            fillers.predicted_first_audio_ms("sentence", has_audio=False)
+
+    def test_observations_replace_prior(self, fillers):
+        fillers.observe_first_audio("full", False, 1000)
+        assert fillers.predicted_first_audio_ms("full", False) == 1000
+        fillers.observe_first_audio("full", False, 2000)
+        assert fillers.predicted_first_audio_ms("full", False) == 1200  # EWMA, alpha 0.2
+
+
+class TestFillerEvent:
+
+    def test_slow_turn_gets_filler(self, fillers):
+        _load(fillers)
+        event = fillers.filler_event("hi-IN", "full", has_audio=True)
+        assert event["type"] == "audio_chunk" and event["index"] == 0 and event["filler"]
+        assert event["audio"] == b"Hmm, dekhte hain..."
+
+    def test_fast_turn_gets_none(self, fillers):
+        _load(fillers)
+        fillers.observe_first_audio("sentence", False, 600)
+        assert fillers.filler_event("hi-IN", "sentence", has_audio=False) is None
+
+    def test_disabled_or_not_warmed(self, fillers, monkeypatch):
+        assert fillers.filler_event("hi-IN", "full", True) is None  # no clips yet
+        _load(fillers)
+        monkeypatch.setattr(fillers, "THINKING_FILLER_MS", 0)
+        assert fillers.filler_event("hi-IN", "full", True) is None
+
+    def test_unknown_language_gets_none(self, fillers):
+        _load(fillers)
+        assert fillers.filler_event("ta-IN", "full", True) is None
+
+    def test_rotates_through_pool(self, fillers):
+        _load(fillers)
+        texts = [fillers.filler_event("hi-IN", "full", True)["audio"] for _ in range(4)]
+        assert len(set(texts[:3])) == 3 and texts[3] == texts[0]
+
+    def test_warm_loads_every_language(self, fillers):
+        from app.voice.tts import MockTTS
+
+        loaded = asyncio.run(fillers.warm_fillers(MockTTS()))
+        assert loaded == sum(len(v) for v in fillers.THINKING_FILLERS.values())
+        assert set(fillers._clips) == set(fillers.THINKING_FILLERS)
+
+
+class TestWithFiller:
+
+    def test_indexes_shift_and_timing_observed(self, fillers):
+        from app.routers.student import _with_filler
+
+        async def prepare():
+            async def events():
+                yield {"type": "audio_chunk", "index": 0, "audio": b"real"}
+                yield {"type": "done"}
+            return events()
+
+        async def run():
+            filler = {"type": "audio_chunk", "index": 0, "audio": b"filler", "filler": True}
+            return [e async for e in _with_filler(prepare(), filler, "full", False)]
+
+        events = asyncio.run(run())
+        assert [e.get("index") for e in events] == [0, 1, None]
+        assert ("full", False) in fillers._first_audio_ms
+
+    def test_leaving_during_filler_closes_prepare(self, fillers):
+        from app.routers.student import _with_filler
+
+        started = []
+
+        async def prepare():
+            started.append(True)
+
+        async def run():
+            turn = _with_filler(prepare(), {"type": "audio_chunk", "index": 0}, "full", False)
+            await turn.__anext__()
+            await turn.aclose()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            asyncio.run(run())
+            gc.collect()
+        assert started == []
+        assert not [w for w in caught if "never awaited" in str(w.message)]
+
+
+    def test_client_gone_before_body_closes_the_db(self, fillers):
+        from app.routers.student import _closing_db, _with_filler
+
+        class DB:
+            closed = 0
+
+            def close(self):
+                DB.closed += 1
+
+        async def prepare():
+            raise AssertionError("never started")
+
+        async def run():
+            turn = prepare()
+            events, close = _closing_db(_with_filler(turn, None, "full", False), DB(), turn)
+            await events.aclose()  # never iterated: its finally does not run
+            await close()          # the response's background task
+            await close()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            asyncio.run(run())
+            gc.collect()
+        assert DB.closed == 1
+        assert not [w for w in caught if "never awaited" in str(w.message)]
+
+
+class TestStartupTasks:
+
+    def test_kept_logged_and_cancelled(self, caplog):
+        from fastapi import FastAPI
+        from app.main import _start_background, _stop_background
+
+        async def boom():
+            raise RuntimeError("no clips")
+
+        async def run():
+            app = FastAPI()
+            slow = _start_background(app, asyncio.sleep(5), "slow")
+            _start_background(app, boom(), "boom")
+            await asyncio.sleep(0.01)
+            assert app.state.background_tasks == {slow}
+            await _stop_background(app)
+            return slow
+
+        assert asyncio.run(run()).cancelled()
+        assert "Background task boom failed" in caplog.text
+
+
+class TestMessageStream:
+
+    @pytest.fixture
+    def client(self, isolated_app, fillers):
+        from app.main import app
+        from app.tutor import llm
+        from app.voice import tts
+
+        saved = (llm._instance, tts._instance)
+        llm._instance = llm.MockLLM(reply="Chalo square samjhte hain.")
+        tts._instance = tts.MockTTS()
+        try:
+            with TestClient(app) as c:
+                yield c
+        finally:
+            llm._instance, tts._instance = saved
+
+    def _events(self, client, **body):
+        token = client.post("/api/auth/student", json={"pin": "1234"}).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        session_id = client.post("/api/student/session/start", headers=headers).json()["session_id"]
+        resp = client.post(
+            "/api/student/session/message-stream", headers=headers,
+            json={"session_id": session_id, "text": "haan ready", **body},
+        )
+        return [json.loads(l[6:]) for l in resp.text.splitlines() if l.startswith("data: ")]
+
+    def test_filler_is_chunk_zero(self, client, fillers):
+        _load(fillers)
+        events = self._events(client, tts_mode="sentence")
+        assert events[0]["type"] == "audio_chunk" and events[0]["filler"] and events[0]["index"] == 0
+        chunks = [e for e in events if e["type"] == "audio_chunk"]
+        assert len(chunks) > 1 and [c["index"] for c in chunks] == list(range(len(chunks)))
+        assert events[-1]["type"] == "done"
+
+    def test_no_filler_when_predicted_fast(self, client, fillers):
+        _load(fillers)
+        fillers.observe_first_audio("sentence", False, 200)
+        events = self._events(client, tts_mode="sentence")
+        assert not any(e.get("filler") for e in events)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,258 @@
+"""
+Tests for the v10.9.0 two-tier TTS cache: bytes-bounded memory LRU in front of
+a size-capped disk LRU with atomic writes, backed by the TTSCache table.
+"""
+
+import asyncio
+import os
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    from app import metrics
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _cache(tmp_path, memory=1000, disk=1000):
+    from app.voice.tts_cache import AudioCache
+    return AudioCache(tmp_path, memory_bytes=memory, disk_bytes=disk)
+
+
+class TestAudioCache:
+
+    def test_miss_then_memory_hit(self, tmp_path):
+        from app import metrics
+
+        cache = _cache(tmp_path)
+        assert cache.get("aa") is None
+        cache.put("aa", b"x" * 100)
+        assert cache.get("aa") == b"x" * 100
+        assert metrics.snapshot("tts_cache.") == {"memory_hits": 1, "misses": 1}
+
+    def test_disk_hit_after_restart_is_promoted(self, tmp_path):
+        from app import metrics
+
+        _cache(tmp_path).put("aa", b"x" * 100)
+        cache = _cache(tmp_path)
+        assert cache.stats()["disk_files"] == 1 and cache.stats()["memory_clips"] == 0
+        assert cache.get("aa") == b"x" * 100
+        assert cache.get("aa") == b"x" * 100
+        assert metrics.get("tts_cache.disk_hits") == 1
+        assert metrics.get("tts_cache.memory_hits") == 1
+
+    def test_memory_evicts_least_recent_by_bytes(self, tmp_path):
+        cache = _cache(tmp_path, memory=1000, disk=10_000)
+        for key in ("aa", "bb", "cc", "dd"):
+            cache.put(key, b"x" * 250)
+        cache.get("aa")  # now most recent
+        cache.put("ee", b"x" * 250)
+        assert cache.stats()["memory_clips"] == 4
+        assert "bb" not in cache._memory and "aa" in cache._memory
+
+    def test_large_clip_skips_memory(self, tmp_path):
+        cache = _cache(tmp_path, memory=1000, disk=10_000)
+        cache.put("aa", b"x" * 500)
+        assert cache.stats()["memory_clips"] == 0
+        assert cache.get("aa") == b"x" * 500  # still served from disk
+
+    def test_disk_cap_deletes_oldest_files(self, tmp_path):
+        from app import metrics
+
+        cache = _cache(tmp_path, disk=1000)
+        for key in ("aa", "bb", "cc"):
+            cache.put(key, b"x" * 400)
+        assert not (tmp_path / "aa.mp3").exists()
+        assert (tmp_path / "bb.mp3").exists() and (tmp_path / "cc.mp3").exists()
+        assert cache.get("aa") is None
+        assert cache.stats()["disk_kb"] == 800 // 1024
+        assert metrics.get("tts_cache.disk_evictions") == 1
+
+    def test_recent_use_protects_from_disk_eviction(self, tmp_path):
+        cache = _cache(tmp_path, disk=1000)
+        cache.put("aa", b"x" * 400)
+        cache.put("bb", b"x" * 400)
+        assert cache.touch("aa")
+        cache.put("cc", b"x" * 400)
+        assert (tmp_path / "aa.mp3").exists() and not (tmp_path / "bb.mp3").exists()
+
+    def test_memory_hits_protect_from_disk_eviction(self, tmp_path):
+        cache = _cache(tmp_path, memory=2000, disk=1000)
+        cache.put("hot", b"x" * 400)
+        cache.put("bb", b"x" * 400)
+        for _ in range(50):
+            assert cache.get("hot") == b"x" * 400  # served from memory only
+        cache.put("cc", b"x" * 400)
+        assert (tmp_path / "hot.mp3").exists() and not (tmp_path / "bb.mp3").exists()
+        assert cache.held(["hot"]) == {"hot"} and cache.get("hot") == b"x" * 400
+
+    def test_index_rebuilt_oldest_first_and_trimmed(self, tmp_path):
+        for i, key in enumerate(("aa", "bb", "cc")):
+            path = tmp_path / f"{key}.mp3"
+            path.write_bytes(b"x" * 400)
+            os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        (tmp_path / ".dd.123.tmp").write_bytes(b"partial")
+
+        cache = _cache(tmp_path, disk=1000)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["bb.mp3", "cc.mp3"]
+        assert cache.stats()["disk_files"] == 2
+
+    def test_put_is_atomic(self, tmp_path):
+        cache = _cache(tmp_path)
+        with patch("os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                cache.put("aa", b"x" * 100)
+        assert list(tmp_path.iterdir()) == []
+        assert cache.get("aa") is None
+
+    def test_async_get_reads_disk_off_loop(self, tmp_path):
+        _cache(tmp_path).put("aa", b"x" * 100)
+        cache = _cache(tmp_path)
+
+        async def run():
+            return await cache.get_async("aa"), await cache.get_async("zz")
+
+        with patch("asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            assert asyncio.run(run()) == (b"x" * 100, None)
+        assert to_thread.call_count == 2
+
+
+class _DictStore:
+
+    def __init__(self):
+        self.rows = {}
+
+    def get(self, key):
+        return self.rows.get(key)
+
+    def put(self, key, audio, text="", language=""):
+        self.rows[key] = audio
+
+
+class TestCanonicalKey:
+
+    def test_every_voice_setting_changes_key(self):
+        from app.voice.tts_cache import cache_key
+
+        base = cache_key("Namaste", "hi-IN", "simran", 0.85, "bulbul:v3", 22050)
+        assert base == cache_key("Namaste", "hi-IN", "simran", 0.85, "bulbul:v3", 22050)
+        assert len({
+            base,
+            cache_key("Namaste", "en-IN", "simran", 0.85, "bulbul:v3", 22050),
+            cache_key("Namaste", "hi-IN", "anand", 0.85, "bulbul:v3", 22050),
+            cache_key("Namaste", "hi-IN", "simran", 1.0, "bulbul:v3", 22050),
+            cache_key("Namaste", "hi-IN", "simran", 0.85, "bulbul:v2", 22050),
+            cache_key("Namaste", "hi-IN", "simran", 0.85, "bulbul:v3", 16000),
+        }) == 6
+
+    def test_provider_and_precache_agree(self):
+        from app.voice.tts import SarvamBulbulTTS
+        from app.voice.tts_precache import get_cache_key
+        from app.config import TTS_SPEAKER
+
+        engine = SarvamBulbulTTS.__new__(SarvamBulbulTTS)
+        assert engine._cache_key("Namaste", "hi-IN", TTS_SPEAKER) == get_cache_key("Namaste", "hi-IN")
+
+
+class TestPersistentTier:
+
+    def test_read_through_restores_disk_and_memory(self, tmp_path):
+        from app import metrics
+        from app.voice.tts_cache import AudioCache
+
+        store = _DictStore()
+        store.rows["aa"] = b"x" * 100
+        cache = AudioCache(tmp_path, 1000, 1000, store=store)
+        assert cache.get("aa") == b"x" * 100
+        assert (tmp_path / "aa.mp3").read_bytes() == b"x" * 100
+        assert cache.get("aa") == b"x" * 100
+        assert metrics.get("tts_cache.db_hits") == 1 and metrics.get("tts_cache.memory_hits") == 1
+
+    def test_write_through_unless_not_persisted(self, tmp_path):
+        from app.voice.tts_cache import AudioCache
+
+        store = _DictStore()
+        cache = AudioCache(tmp_path, 1000, 1000, store=store)
+        cache.put("aa", b"tts")
+        cache.put("bb", b"published", persist=False)
+        assert store.rows == {"aa": b"tts"}
+
+    def test_db_store_round_trip(self, isolated_app):
+        from app.database import init_db
+        from app.voice.tts_cache import DBStore, cache_key
+
+        init_db()
+        key = cache_key("DB store round trip", "hi-IN")
+        DBStore().put(key, b"mp3", "DB store round trip", "hi-IN")
+        DBStore().put(key, b"mp3-v2", "DB store round trip", "hi-IN")
+        assert DBStore().get(key) == b"mp3-v2"
+        assert DBStore().get(cache_key("never stored", "hi-IN")) is None
+
+    def test_precached_clip_served_without_api_call(self, tmp_path, monkeypatch):
+        from app.voice import tts, tts_cache
+        from app.voice.tts_cache import AudioCache
+        from app.voice.tts_precache import save_to_cache_db
+
+        store = _DictStore()
+        monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 1000, 1000, store=store))
+        save_to_cache_db(None, "Chalo shuru karte hain.", b"precached", "hi-IN")
+
+        # A fresh container: empty memory and disk, same database
+        monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path / "new", 1000, 1000, store=store))
+
+        async def post(self, url, **kwargs):
+            raise AssertionError("should be served from the cache")
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            result = asyncio.run(tts.SarvamBulbulTTS().synthesize_async("Chalo shuru karte hain.", "hi-IN"))
+        assert result.cached and result.audio_bytes == b"precached"
+
+
+class TestSarvamUsesCache:
+
+    def test_second_call_is_cache_hit(self, tmp_path, monkeypatch):
+        import base64
+        from app.voice import tts, tts_cache
+        from app.voice.tts_cache import AudioCache
+
+        monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 10_000, 10_000))
+        calls = []
+
+        async def post(self, url, **kwargs):
+            calls.append(url)
+            return httpx.Response(200, json={"audios": [base64.b64encode(b"mp3-bytes").decode()]},
+                                  request=httpx.Request("POST", url))
+
+        async def run():
+            engine = tts.SarvamBulbulTTS()
+            first = await engine.synthesize_async("Cache test sentence.", "hi-IN")
+            second = await engine.synthesize_async("Cache test sentence.", "hi-IN")
+            return first, second
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            first, second = asyncio.run(run())
+        assert len(calls) == 1
+        assert not first.cached and second.cached
+        assert second.audio_bytes == b"mp3-bytes"
+        assert os.path.dirname(second.cache_path) == str(tmp_path)
+
+
+class TestHealthDetail:
+
+    def test_exposes_cache_stats(self, isolated_app):
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        with TestClient(app) as client:
+            data = client.get("/health/detail").json()
+        assert {"memory_clips", "memory_kb", "disk_files", "disk_kb"} <= set(data["tts_cache"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,266 @@
+"""
+Tests for v10.9.0 TTS failure handling: the per-provider circuit breaker and
+the per-turn Sarvam time budget. A degraded Sarvam must cost a turn at most
+its budget, and nothing at all once the circuit is open.
+"""
+
+import asyncio
+import base64
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    from app import metrics
+    from app.voice import tts_cache
+    from app.voice.tts_cache import AudioCache
+
+    monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 100_000, 100_000))
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _breaker(**kwargs):
+    from app.circuit import CircuitBreaker
+
+    settings = dict(failures=3, slow_ms=1000, slow_calls=2, reset_after=0.05)
+    settings.update(kwargs)
+    return CircuitBreaker("test", **settings)
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_consecutive_failures(self):
+        from app import metrics
+
+        breaker = _breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success(10)  # streak broken
+        for _ in range(3):
+            assert breaker.allow()
+            breaker.record_failure()
+        assert breaker.state == "open" and not breaker.allow()
+        assert metrics.get("circuit.test.opened") == 1
+        assert metrics.get("circuit.test.rejected") == 1
+
+    def test_sustained_latency_opens(self):
+        breaker = _breaker()
+        breaker.record_success(1500)
+        breaker.record_success(200)
+        breaker.record_success(1500)
+        assert breaker.state == "closed"
+        breaker.record_success(1500)
+        assert breaker.state == "open"
+
+    def test_half_open_lets_one_probe_through(self):
+        breaker = _breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # probe in flight
+        breaker.record_success(10)
+        assert breaker.state == "closed" and breaker.allow()
+
+    def test_failed_or_slow_probe_reopens(self):
+        for record in (lambda b: b.record_failure(), lambda b: b.record_success(1500)):
+            breaker = _breaker()
+            for _ in range(3):
+                breaker.record_failure()
+            time.sleep(0.06)
+            assert breaker.allow()
+            record(breaker)
+            assert breaker.state == "open" and not breaker.allow()
+
+    def test_lost_probe_is_replaced(self):
+        breaker = _breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()  # this probe's caller is cancelled and never reports
+        time.sleep(0.06)
+        assert breaker.allow()
+
+    def test_neutral_probe_frees_the_slot(self):
+        breaker = _breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_neutral()  # e.g. a 400 for our own request
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+
+    def test_shared_per_provider(self):
+        from app.circuit import get_breaker
+
+        assert get_breaker("sarvam_tts") is get_breaker("sarvam_tts")
+        assert get_breaker("sarvam_tts") is not get_breaker("other")
+
+
+def _post(calls, status=500, delay=0.0):
+    async def post(self, url, **kwargs):
+        calls.append(kwargs["timeout"])
+        await asyncio.sleep(delay)
+        if status == 200:
+            return httpx.Response(200, json={"audios": [base64.b64encode(b"mp3").decode()]},
+                                  request=httpx.Request("POST", url))
+        return httpx.Response(status, text="down", request=httpx.Request("POST", url))
+
+    return post
+
+
+class TestSarvamBreaker:
+
+    def test_open_circuit_fast_fails_to_text_only(self, monkeypatch):
+        from app.circuit import get_breaker
+        from app.voice.tts import SarvamBulbulTTS
+
+        breaker = get_breaker("sarvam_tts")
+        monkeypatch.setattr(breaker, "failure_threshold", 2)
+        monkeypatch.setattr(asyncio, "sleep", _no_sleep)
+        calls = []
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            first = await engine.synthesize_async("Pehli baar.", "hi-IN")
+            start = time.perf_counter()
+            second = await engine.synthesize_async("Doosri baar.", "hi-IN")
+            return first, second, time.perf_counter() - start
+
+        with patch.object(httpx.AsyncClient, "post", _post(calls)):
+            first, second, elapsed = asyncio.run(run())
+        assert len(calls) == 2  # opened on the second failure: no third attempt
+        assert first.audio_bytes == b"" and second.audio_bytes == b""
+        assert elapsed < 0.05
+        assert breaker.state == "open"
+
+    def test_client_errors_do_not_open(self, monkeypatch):
+        from app.circuit import get_breaker
+        from app.voice.tts import SarvamBulbulTTS
+
+        monkeypatch.setattr(get_breaker("sarvam_tts"), "failure_threshold", 2)
+        monkeypatch.setattr(asyncio, "sleep", _no_sleep)
+        calls = []
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            for text in ("Ek.", "Do."):
+                await engine.synthesize_async(text, "hi-IN")
+
+        with patch.object(httpx.AsyncClient, "post", _post(calls, status=400)):
+            asyncio.run(run())
+        assert len(calls) == 6
+        assert get_breaker("sarvam_tts").state == "closed"
+
+    def test_client_error_probe_lets_the_next_call_probe(self, monkeypatch):
+        from app.circuit import get_breaker
+        from app.voice.tts import SarvamBulbulTTS
+
+        breaker = get_breaker("sarvam_tts")
+        monkeypatch.setattr(breaker, "reset_after", 0.05)
+        monkeypatch.setattr(asyncio, "sleep", _no_sleep)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        time.sleep(0.06)
+        calls = []
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            with patch.object(httpx.AsyncClient, "post", _post(calls, status=400)):
+                await engine.synthesize_async("Ek.", "hi-IN")
+            with patch.object(httpx.AsyncClient, "post", _post(calls, status=200)):
+                return await engine.synthesize_async("Do.", "hi-IN")
+
+        assert asyncio.run(run()).audio_bytes == b"mp3"
+        assert breaker.state == "closed"
+
+    def test_sync_path_shares_the_breaker(self, monkeypatch):
+        from app.circuit import get_breaker
+        from app.voice.tts import SarvamBulbulTTS
+
+        for _ in range(get_breaker("sarvam_tts").failure_threshold):
+            get_breaker("sarvam_tts").record_failure()
+
+        def post(self, url, **kwargs):
+            raise AssertionError("circuit is open")
+
+        with patch.object(httpx.Client, "post", post):
+            assert SarvamBulbulTTS().synthesize("Namaste!", "hi-IN").audio_bytes == b""
+
+
+async def _no_sleep(delay, result=None):
+    return result
+
+
+class TestTurnBudget:
+
+    def test_attempts_share_the_turn_budget(self):
+        from app.voice.tts import SarvamBulbulTTS, begin_turn
+
+        calls = []
+
+        async def hanging(self, url, **kwargs):
+            calls.append(kwargs["timeout"])
+            await asyncio.sleep(kwargs["timeout"])
+            raise httpx.ReadTimeout("slow", request=httpx.Request("POST", url))
+
+        async def run():
+            begin_turn(budget_ms=300)
+            start = time.perf_counter()
+            result = await SarvamBulbulTTS().synthesize_async("Bahut dheere.", "hi-IN")
+            return result, time.perf_counter() - start
+
+        with patch.object(httpx.AsyncClient, "post", hanging):
+            result, elapsed = asyncio.run(run())
+        assert result.audio_bytes == b""
+        assert elapsed < 0.5  # not 10s per attempt plus 1s + 2s backoff
+        assert len(calls) == 1 and calls[0] <= 0.3
+
+    def test_budget_spent_skips_request(self):
+        from app import metrics
+        from app.voice.tts import SarvamBulbulTTS, begin_turn
+
+        calls = []
+
+        async def run():
+            ledger = begin_turn(budget_ms=50)
+            ledger.remaining()  # clock started by an earlier clip this turn
+            await asyncio.sleep(0.06)
+            return await SarvamBulbulTTS().synthesize_async("Der ho gayi.", "hi-IN")
+
+        with patch.object(httpx.AsyncClient, "post", _post(calls, status=200)):
+            assert asyncio.run(run()).audio_bytes == b""
+        assert calls == [] and metrics.get("tts_turns.over_budget") == 1
+
+    def test_outside_a_turn_attempts_keep_10s(self):
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+        with patch.object(httpx.AsyncClient, "post", _post(calls, status=200)):
+            asyncio.run(SarvamBulbulTTS().synthesize_async("Precache line.", "hi-IN"))
+        assert calls == [10.0]
+
+
+class TestHealthDetail:
+
+    def test_reports_circuit_state(self, isolated_app):
+        from fastapi.testclient import TestClient
+        from app.circuit import get_breaker
+        from app.main import app
+
+        get_breaker("sarvam_tts")
+        with TestClient(app) as client:
+            circuits = client.get("/health/detail").json()["circuits"]
+        assert circuits["state"]["sarvam_tts"] == "closed"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
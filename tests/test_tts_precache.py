@@ -0,0 +1,179 @@
+"""
+Tests for the v10.9.0 precache job: token-bucket rate limit, bounded
+concurrency, bulk key lookup and inserts, resume after interruption.
+"""
+
+import asyncio
+import time
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def db(isolated_app, tmp_path, monkeypatch):
+    from app.database import SessionLocal, init_db
+    from app.voice import tts_cache
+    from app.voice.tts_cache import AudioCache, DBStore
+
+    init_db()
+    monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 100_000, 100_000, store=DBStore()))
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def _texts(n):
+    run = uuid.uuid4().hex[:8]
+    return [("hi-IN", f"Precache test {run} line {i}.") for i in range(n)]
+
+
+def _stored(db, texts):
+    from app.voice.tts_precache import cached_keys, get_cache_key
+    return cached_keys(db, [get_cache_key(text, lang) for lang, text in texts])
+
+
+class TestTokenBucket:
+
+    def test_burst_then_rate(self):
+        from app.voice.tts_precache import TokenBucket
+
+        async def run():
+            bucket = TokenBucket(rate=20, burst=3)
+            start = time.monotonic()
+            stamps = []
+            for _ in range(6):
+                await bucket.acquire()
+                stamps.append(time.monotonic() - start)
+            return stamps
+
+        stamps = asyncio.run(run())
+        assert stamps[2] < 0.03          # burst goes out at once
+        assert stamps[5] >= 0.13         # then ~50ms per token
+
+    def test_zero_rate_is_unlimited(self):
+        from app.voice.tts_precache import TokenBucket
+
+        async def run():
+            bucket = TokenBucket(rate=0)
+            for _ in range(100):
+                await bucket.acquire()
+
+        asyncio.run(asyncio.wait_for(run(), 1))
+
+
+class TestPrecacheTexts:
+
+    def test_concurrent_and_bulk_stored(self, db):
+        from app.voice.tts_precache import precache_texts
+
+        texts = _texts(12)
+        active = {"now": 0, "peak": 0}
+        progress = []
+
+        async def tts_func(text, lang):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+            return text.encode()
+
+        stats = asyncio.run(precache_texts(
+            texts, tts_func, db, rate=0, concurrency=4, batch_size=5, on_progress=progress.append,
+        ))
+        assert stats == {"total": 12, "cached": 0, "generated": 12, "failed": 0}
+        assert active["peak"] == 4
+        assert len(_stored(db, texts)) == 12
+        assert progress[-1]["generated"] == 12
+
+    def test_second_run_skips_everything(self, db):
+        from app.voice.tts_precache import precache_texts
+
+        texts = _texts(3)
+        calls = []
+
+        async def tts_func(text, lang):
+            calls.append(text)
+            return b"mp3"
+
+        asyncio.run(precache_texts(texts, tts_func, db, rate=0))
+        stats = asyncio.run(precache_texts(texts, tts_func, db, rate=0))
+        assert stats["cached"] == 3 and stats["generated"] == 0
+        assert len(calls) == 3
+
+    def test_interrupted_job_resumes(self, db):
+        from app.voice.tts_precache import precache_texts
+
+        texts = _texts(6)
+        calls = []
+
+        async def dying(text, lang):
+            calls.append(text)
+            if len(calls) > 3:
+                raise asyncio.CancelledError  # e.g. the container is stopping
+            return b"mp3"
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(precache_texts(texts, dying, db, rate=0, concurrency=1, batch_size=100))
+        assert len(_stored(db, texts)) == 3  # finished clips flushed on the way out
+
+        calls.clear()
+
+        async def healthy(text, lang):
+            calls.append(text)
+            return b"mp3"
+
+        stats = asyncio.run(precache_texts(texts, healthy, db, rate=0))
+        assert stats["cached"] == 3 and stats["generated"] == 3
+        assert len(calls) == 3
+
+    def test_failures_counted_not_stored(self, db):
+        from app.voice.tts_precache import precache_texts
+
+        texts = _texts(3)
+
+        async def tts_func(text, lang):
+            if text.endswith("1."):
+                raise RuntimeError("Sarvam 429")
+            return b"" if text.endswith("2.") else b"mp3"
+
+        stats = asyncio.run(precache_texts(texts, tts_func, db, rate=0))
+        assert stats["generated"] == 1 and stats["failed"] == 2
+        assert len(_stored(db, texts)) == 1
+
+    def test_write_through_provider_rows_are_deferred(self, db):
+        from app.voice.tts_cache import get_tts_cache
+        from app.voice.tts_precache import get_cache_key, precache_texts
+
+        texts = _texts(4)
+
+        async def tts_func(text, lang):
+            # Like SarvamBulbulTTS.synthesize_async: writes through the cache itself
+            await get_tts_cache().put_async(get_cache_key(text, lang), b"mp3", text, lang)
+            return b"mp3"
+
+        stats = asyncio.run(precache_texts(texts, tts_func, db, rate=0, batch_size=2))
+        assert stats["generated"] == 4
+        assert len(_stored(db, texts)) == 4
+
+
+class TestContentBank:
+
+    def test_collects_unique_sorted_texts(self):
+        from content_bank.loader import get_content_bank
+        from app.voice.tts_precache import collect_content_bank_texts
+
+        texts = collect_content_bank_texts(get_content_bank(), ["hi-IN", "en-IN"])
+        assert texts and texts == sorted(set(texts))
+        assert {lang for lang, _ in texts} == {"hi-IN", "en-IN"}
+
+    def test_cli_dry_run(self, db, capsys):
+        from app.voice.tts_precache import main
+
+        stats = main(["--dry-run"])
+        assert stats["total"] == stats["cached"] + stats["missing"] > 0
+        assert "missing" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,251 @@
+"""
+Tests for the v10.9.0 sentence-level TTS cache: per-sentence lookups, only the
+missing sentences synthesized (in parallel), MP3 frames stitched into one clip.
+"""
+
+import asyncio
+import base64
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo: 417-byte frames
+_HEADER = b"\xff\xfb\x90\x64"
+_INFO = _HEADER + b"\x00" * 32 + b"Info" + b"\x00" * 377
+_ID3 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"\x00" * 5
+
+
+def _frame(fill: bytes) -> bytes:
+    return _HEADER + fill * 413
+
+
+def _clip(fill: bytes, frames: int = 2) -> bytes:
+    """An encoder-style clip: ID3 tag, Info header frame, audio frames, ID3v1 tag."""
+    return _ID3 + _INFO + _frame(fill) * frames + b"TAG" + b"\x00" * 125
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    from app import metrics
+    from app.voice import tts_cache
+    from app.voice.tts_cache import AudioCache
+
+    monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 100_000, 100_000))
+    monkeypatch.setattr(tts_cache, "_precached", set())
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _sarvam(calls, fills, delay=0.0):
+    """Fake Sarvam REST: records the text and returns a clip per sentence fill."""
+
+    async def post(self, url, **kwargs):
+        text = kwargs["json"]["text"]
+        calls.append(text)
+        await asyncio.sleep(delay)
+        audio = _clip(fills[text]) if text in fills else b"not an mp3"
+        return httpx.Response(200, json={"audios": [base64.b64encode(audio).decode()]},
+                              request=httpx.Request("POST", url))
+
+    return post
+
+
+def _put(text, audio):
+    from app.voice.tts_cache import cache_key, get_tts_cache
+    get_tts_cache().put(cache_key(text, "hi-IN"), audio)
+
+
+class TestFrames:
+
+    def test_tags_and_info_frame_stripped(self):
+        from app.voice.mp3 import audio_frames
+
+        frames, fmt = audio_frames(_clip(b"a"))
+        assert frames == _frame(b"a") * 2
+        assert fmt == (3, 44100, False)
+
+    def test_stitch_joins_frames_in_order(self):
+        from app.voice.mp3 import stitch
+
+        assert stitch([_clip(b"a"), _clip(b"b", frames=1)]) == _frame(b"a") * 2 + _frame(b"b")
+        assert stitch([b"only one"]) == b"only one"
+
+    def test_unjoinable_clips(self):
+        from app.voice.mp3 import stitch
+
+        mpeg2 = b"\xff\xf3\x90\x64" + b"b" * 413  # MPEG-2: 22.05 kHz
+        assert stitch([_clip(b"a"), b"RIFF....WAVE"]) is None
+        assert stitch([_clip(b"a"), mpeg2]) is None
+
+    def test_truncated_last_frame_dropped(self):
+        from app.voice.mp3 import audio_frames
+
+        frames, _ = audio_frames(_frame(b"a") + _frame(b"b")[:100])
+        assert frames == _frame(b"a")
+
+
+class TestSplit:
+
+    def test_sentence_boundaries(self):
+        from app.voice.tts import split_sentences
+
+        assert split_sentences("Bahut badhiya! Chaliye agla sawaal.  2.5 ka square kya hai?") == [
+            "Bahut badhiya!", "Chaliye agla sawaal.", "2.5 ka square kya hai?"]
+        assert split_sentences("Ek hi line।") == ["Ek hi line।"]
+
+    def test_disabled_keeps_whole_text(self, monkeypatch):
+        from app.voice import tts
+
+        monkeypatch.setattr(tts, "TTS_SENTENCE_CACHE", False)
+        assert tts.split_sentences("Pehla. Doosra.") == ["Pehla. Doosra."]
+
+
+class TestSarvamSentences:
+
+    def test_only_missing_sentence_synthesized(self):
+        from app import metrics
+        from app.voice.tts import SarvamBulbulTTS
+
+        _put("Bahut badhiya!", _clip(b"a"))
+        calls = []
+        post = _sarvam(calls, {"Chaliye agla sawaal.": b"b"})
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            first = await engine.synthesize_async("Bahut badhiya! Chaliye agla sawaal.", "hi-IN")
+            second = await engine.synthesize_async("Bahut badhiya! Chaliye agla sawaal.", "hi-IN")
+            return first, second
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            first, second = asyncio.run(run())
+        assert calls == ["Chaliye agla sawaal."]
+        assert first.audio_bytes == _frame(b"a") * 2 + _frame(b"b") * 2
+        assert not first.cached and second.cached and second.audio_bytes == first.audio_bytes
+        assert metrics.get("tts_cache.sentence_hits") == 1
+        assert metrics.get("tts_cache.sentence_misses") == 1
+
+    def test_missing_sentences_in_parallel(self):
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+        post = _sarvam(calls, {"Ek.": b"a", "Do.": b"b", "Teen.": b"c"}, delay=0.1)
+
+        start = time.perf_counter()
+        with patch.object(httpx.AsyncClient, "post", post):
+            result = asyncio.run(SarvamBulbulTTS().synthesize_async("Ek. Do. Teen.", "hi-IN"))
+        assert time.perf_counter() - start < 0.25
+        assert sorted(calls) == ["Do.", "Ek.", "Teen."]
+        assert result.audio_bytes == b"".join(_frame(fill) * 2 for fill in (b"a", b"b", b"c"))
+
+    def test_unjoinable_falls_back_to_whole_text(self):
+        from app import metrics
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+        post = _sarvam(calls, {"Ek.": b"a"})
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            result = asyncio.run(SarvamBulbulTTS().synthesize_async("Ek. Do.", "hi-IN"))
+        assert sorted(calls) == ["Do.", "Ek.", "Ek. Do."]
+        assert result.audio_bytes == b"not an mp3"
+        assert metrics.get("tts_cache.stitch_failures") == 1
+
+    def test_failed_sentence_falls_back_to_whole_text(self, monkeypatch):
+        from app import metrics
+        from app.voice.tts import SarvamBulbulTTS
+
+        monkeypatch.setattr(SarvamBulbulTTS, "_retry_delay", lambda self, attempt: None)
+        calls = []
+
+        async def post(self, url, **kwargs):
+            text = kwargs["json"]["text"]
+            calls.append(text)
+            if text == "Do.":
+                return httpx.Response(400, json={"error": "bad text"}, request=httpx.Request("POST", url))
+            return httpx.Response(200, json={"audios": [base64.b64encode(_clip(b"w")).decode()]},
+                                  request=httpx.Request("POST", url))
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            result = asyncio.run(SarvamBulbulTTS().synthesize_async("Ek. Do.", "hi-IN"))
+        assert sorted(calls) == ["Do.", "Ek.", "Ek. Do."]
+        assert result.audio_bytes == _clip(b"w")
+        assert metrics.get("tts_cache.sentence_failures") == 1
+
+    def test_sync_failed_sentence_falls_back_to_whole_text(self, monkeypatch):
+        from app.voice.tts import SarvamBulbulTTS
+
+        monkeypatch.setattr(SarvamBulbulTTS, "_retry_delay", lambda self, attempt: None)
+        def post(self, url, **kwargs):
+            text = kwargs["json"]["text"]
+            if text == "Do.":
+                return httpx.Response(400, json={"error": "bad text"}, request=httpx.Request("POST", url))
+            return httpx.Response(200, json={"audios": [base64.b64encode(_clip(b"w")).decode()]},
+                                  request=httpx.Request("POST", url))
+
+        with patch.object(httpx.Client, "post", post):
+            assert SarvamBulbulTTS().synthesize("Ek. Do.", "hi-IN").audio_bytes == _clip(b"w")
+
+    def test_sync_path(self):
+        from app.voice.tts import SarvamBulbulTTS
+
+        _put("Namaste Priya!", _clip(b"a"))
+        calls = []
+
+        def post(self, url, **kwargs):
+            calls.append(kwargs["json"]["text"])
+            return httpx.Response(200, json={"audios": [base64.b64encode(_clip(b"b")).decode()]},
+                                  request=httpx.Request("POST", url))
+
+        with patch.object(httpx.Client, "post", post):
+            result = SarvamBulbulTTS().synthesize("Namaste Priya! Aaj kya padhna hai?", "hi-IN")
+        assert calls == ["Aaj kya padhna hai?"]
+        assert result.audio_bytes == _frame(b"a") * 2 + _frame(b"b") * 2
+
+    def test_precached_sentences_make_a_precached_turn(self):
+        from app import metrics
+        from app.voice.tts import SarvamBulbulTTS, begin_turn
+        from app.voice.tts_cache import cache_key, mark_precached
+
+        for text, fill in (("Shabash!", b"a"), ("Agla sawaal.", b"b")):
+            _put(text, _clip(fill))
+            mark_precached([cache_key(text, "hi-IN")])
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            for _ in range(2):  # stitched, then the stitched clip itself
+                ledger = begin_turn()
+                await engine.synthesize_async("Shabash! Agla sawaal.", "hi-IN")
+                ledger.finish()
+
+        asyncio.run(run())
+        assert metrics.snapshot("tts_turns.") == {"total": 2, "precached": 2}
+
+
+class TestStreaming:
+
+    def test_sentences_streamed_in_order_and_stitched(self):
+        from app.voice.tts import SarvamBulbulTTS
+        from app.voice.tts_cache import cache_key, get_tts_cache
+
+        _put("Pehla.", _clip(b"a"))
+        calls = []
+        post = _sarvam(calls, {"Doosra.": b"b", "Teesra.": b"c"}, delay=0.02)
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            return [c async for c in engine.synthesize_streaming("Pehla. Doosra. Teesra.", "hi-IN")]
+
+        with patch.object(httpx.AsyncClient, "post", post), \
+                patch("websockets.connect", side_effect=OSError("no stream")):
+            chunks = asyncio.run(run())
+        assert chunks == [_clip(b"a"), _clip(b"b"), _clip(b"c")]
+        assert sorted(calls) == ["Doosra.", "Teesra."]  # prefetched once, not again by the stream
+        stitched = get_tts_cache().get(cache_key("Pehla. Doosra. Teesra.", "hi-IN"))
+        assert stitched == b"".join(_frame(fill) * 2 for fill in (b"a", b"b", b"c"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,149 @@
+"""
+Tests for v10.9.0 single-flight TTS: concurrent requests for the same clip
+share one Sarvam call.
+"""
+
+import asyncio
+import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    from app import metrics
+    from app.voice import tts_cache
+    from app.voice.tts_cache import AudioCache
+
+    monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 100_000, 100_000))
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _ok(url, text=b"mp3"):
+    return httpx.Response(200, json={"audios": [base64.b64encode(text).decode()]},
+                          request=httpx.Request("POST", url))
+
+
+class TestAsyncCoalescing:
+
+    def test_identical_requests_share_one_call(self):
+        from app import metrics
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+
+        async def post(self, url, **kwargs):
+            calls.append(kwargs["json"]["text"])
+            await asyncio.sleep(0.05)
+            return _ok(url)
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            return await asyncio.gather(*[
+                engine.synthesize_async(text, "hi-IN")
+                for text in ["Square kya hai?"] * 5 + ["Cube kya hai?"]
+            ])
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            results = asyncio.run(run())
+        assert sorted(calls) == ["Cube kya hai?", "Square kya hai?"]
+        assert all(r.audio_bytes == b"mp3" for r in results)
+        assert metrics.get("tts_cache.coalesced") == 4
+
+    def test_cancelled_waiter_does_not_abort_others(self):
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+
+        async def post(self, url, **kwargs):
+            calls.append(url)
+            await asyncio.sleep(0.05)
+            return _ok(url)
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            leaving = asyncio.create_task(engine.synthesize_async("Shared clip.", "hi-IN"))
+            staying = asyncio.create_task(engine.synthesize_async("Shared clip.", "hi-IN"))
+            await asyncio.sleep(0.01)
+            leaving.cancel()
+            return await staying
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            assert asyncio.run(run()).audio_bytes == b"mp3"
+        assert len(calls) == 1
+
+    def test_stream_joins_in_flight_synthesis(self):
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+
+        async def post(self, url, **kwargs):
+            calls.append(url)
+            await asyncio.sleep(0.05)
+            return _ok(url)
+
+        async def run():
+            engine = SarvamBulbulTTS()
+            rest = asyncio.create_task(engine.synthesize_async("Shared clip.", "hi-IN"))
+            await asyncio.sleep(0.01)
+            chunks = [c async for c in engine.synthesize_streaming("Shared clip.", "hi-IN")]
+            await rest
+            return chunks
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            assert asyncio.run(run()) == [b"mp3"]
+        assert len(calls) == 1
+
+
+class TestSyncCoalescing:
+
+    def test_threads_share_one_call(self):
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+
+        def post(self, url, **kwargs):
+            calls.append(url)
+            time.sleep(0.1)
+            return _ok(url)
+
+        engine = SarvamBulbulTTS()
+        with patch.object(httpx.Client, "post", post), ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda _: engine.synthesize("Sabko ek saath.", "hi-IN"), range(4)))
+        assert len(calls) == 1
+        assert all(r.audio_bytes == b"mp3" for r in results)
+
+    def test_error_reaches_every_waiter(self):
+        from app.voice.tts import _SingleFlight
+
+        flights = _SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise RuntimeError("upstream down")
+
+        def follower():
+            started.wait()
+            return flights.do("k", lambda: "not called")
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flights.do, "k", failing)
+            other = pool.submit(follower)
+            with pytest.raises(RuntimeError):
+                leader.result()
+            with pytest.raises(RuntimeError):
+                other.result()
+        assert flights.do("k", lambda: "fresh") == "fresh"  # failures are not remembered
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,174 @@
+"""
+Tests for v10.9.0 TTS cache snapshots: export from a warm cache, import into a
+cold one, and the precache job treating imported clips as already cached.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+
+
+def _cache(path, disk_bytes=100_000):
+    from app.voice.tts_cache import AudioCache
+    return AudioCache(path, 100_000, disk_bytes)
+
+
+def _fill(cache, clips):
+    from app.voice.tts_cache import cache_key
+
+    keys = []
+    for text, audio in clips:
+        key = cache_key(text, "hi-IN")
+        cache.put(key, audio, text, "hi-IN", persist=False)
+        keys.append(key)
+    return keys
+
+
+@pytest.fixture
+def warm(tmp_path):
+    cache = _cache(tmp_path / "warm")
+    keys = _fill(cache, [("Namaste!", b"mp3-namaste"), ("Shabash!", b"mp3-shabash"),
+                         ("Bahut badhiya!", b"mp3-shabash")])  # same audio as Shabash
+    return cache, keys
+
+
+class TestRoundTrip:
+
+    def test_cold_cache_gets_every_clip(self, warm, tmp_path):
+        from app.voice.tts_snapshot import export_snapshot, import_snapshot
+
+        cache, keys = warm
+        snap = tmp_path / "tts.snap"
+        assert export_snapshot(snap, cache, include_db=False) == {"clips": 3, "blobs": 2, "bytes": 22}
+
+        cold = _cache(tmp_path / "cold")
+        stats = import_snapshot(snap, cold)
+        assert stats["imported"] == 3
+        assert [cold.get(key) for key in keys] == [b"mp3-namaste", b"mp3-shabash", b"mp3-shabash"]
+
+    def test_import_goes_to_disk_not_memory(self, warm, tmp_path):
+        from app.voice.tts_snapshot import export_snapshot, import_snapshot
+
+        cache, keys = warm
+        export_snapshot(tmp_path / "tts.snap", cache, include_db=False)
+        cold = _cache(tmp_path / "cold")
+        import_snapshot(tmp_path / "tts.snap", cold)
+        assert cold.stats()["memory_clips"] == 0 and cold.stats()["disk_files"] == 3
+        # the order of use survives: the most recent clip is the last evicted
+        assert cold.on_disk()[0] == keys[-1]
+
+    def test_database_rows_are_exported(self, isolated_app, tmp_path):
+        from app.database import init_db
+        from app.voice.tts_cache import DBStore, cache_key
+        from app.voice.tts_snapshot import Snapshot, export_snapshot
+
+        init_db()
+        text = f"Snapshot row {uuid.uuid4().hex[:8]}"
+        DBStore().put(cache_key(text, "en-IN"), b"mp3-row", text, "en-IN")
+        export_snapshot(tmp_path / "tts.snap", _cache(tmp_path / "empty"))
+        with Snapshot(tmp_path / "tts.snap") as snapshot:
+            entry = next(e for e in snapshot.entries if e["key"] == cache_key(text, "en-IN"))
+            assert entry["language"] == "en-IN" and snapshot.read(entry) == b"mp3-row"
+
+
+class TestImportRules:
+
+    def test_clips_on_disk_are_kept(self, warm, tmp_path):
+        from app.voice.tts_snapshot import export_snapshot, import_snapshot
+
+        cache, keys = warm
+        export_snapshot(tmp_path / "tts.snap", cache, include_db=False)
+        cold = _cache(tmp_path / "cold")
+        cold.put(keys[0], b"newer-render", persist=False)
+        stats = import_snapshot(tmp_path / "tts.snap", cold)
+        assert stats["present"] == 1 and stats["imported"] == 2
+        assert cold.get(keys[0]) == b"newer-render"
+
+    def test_disk_budget_keeps_newest(self, warm, tmp_path):
+        from app.voice.tts_snapshot import export_snapshot, import_snapshot
+
+        cache, keys = warm
+        export_snapshot(tmp_path / "tts.snap", cache, include_db=False)
+        cold = _cache(tmp_path / "cold", disk_bytes=24)
+        stats = import_snapshot(tmp_path / "tts.snap", cold)
+        assert stats["imported"] == 2 and stats["over_budget"] == 1
+        assert set(cold.on_disk()) == set(keys[1:])
+
+    def test_other_voice_is_skipped(self, warm, tmp_path, monkeypatch):
+        from app.voice import tts_snapshot
+
+        cache, _ = warm
+        tts_snapshot.export_snapshot(tmp_path / "tts.snap", cache, include_db=False)
+        monkeypatch.setattr(tts_snapshot, "TTS_SPEAKER", "someone-else")
+        cold = _cache(tmp_path / "cold")
+        assert tts_snapshot.import_snapshot(tmp_path / "tts.snap", cold)["imported"] == 0
+        assert cold.stats()["disk_files"] == 0
+
+    def test_missing_file_starts_cold(self, tmp_path):
+        from app.voice.tts_snapshot import import_snapshot
+
+        assert import_snapshot(tmp_path / "absent.snap", _cache(tmp_path))["imported"] == 0
+
+    def test_not_a_snapshot(self, tmp_path):
+        from app.voice.tts_snapshot import Snapshot, SnapshotError
+
+        (tmp_path / "bad.snap").write_bytes(b"ID3" + b"\0" * 64)
+        with pytest.raises(SnapshotError):
+            Snapshot(tmp_path / "bad.snap")
+
+    def test_damaged_blob_is_detected(self, warm, tmp_path):
+        from app.voice.tts_snapshot import MAGIC, Snapshot, export_snapshot
+
+        cache, _ = warm
+        snap = tmp_path / "tts.snap"
+        export_snapshot(snap, cache, include_db=False)
+        data = bytearray(snap.read_bytes())
+        data[data.index(b"mp3-namaste")] ^= 0xFF
+        snap.write_bytes(bytes(data))
+        with Snapshot(snap) as snapshot:
+            assert snapshot.verify() == 1
+        assert data.startswith(MAGIC)
+
+    def test_damaged_blob_is_skipped_on_import(self, warm, tmp_path):
+        from app.voice.tts_snapshot import export_snapshot, import_snapshot
+
+        cache, keys = warm
+        snap = tmp_path / "tts.snap"
+        export_snapshot(snap, cache, include_db=False)
+        data = bytearray(snap.read_bytes())
+        data[data.index(b"mp3-namaste")] ^= 0xFF
+        snap.write_bytes(bytes(data))
+
+        cold = _cache(tmp_path / "cold")
+        stats = import_snapshot(snap, cold)
+        assert stats["damaged"] == 1 and stats["imported"] == 2
+        assert cold.get(keys[0]) is None
+        assert cold.get(keys[1]) == cold.get(keys[2]) == b"mp3-shabash"
+
+
+class TestPrecacheAfterImport:
+
+    def test_imported_clips_are_not_resynthesized(self, isolated_app, warm, tmp_path, monkeypatch):
+        from app.database import SessionLocal, init_db
+        from app.voice import tts_cache
+        from app.voice.tts_precache import precache_texts
+        from app.voice.tts_snapshot import export_snapshot, import_snapshot
+
+        cache, _ = warm
+        export_snapshot(tmp_path / "tts.snap", cache, include_db=False)
+        cold = _cache(tmp_path / "cold")
+        import_snapshot(tmp_path / "tts.snap", cold)
+        monkeypatch.setattr(tts_cache, "_instance", cold)
+
+        async def tts_func(text, lang):
+            raise AssertionError(f"re-synthesized {text!r}")
+
+        init_db()
+        with SessionLocal() as db:
+            stats = asyncio.run(precache_texts([("hi-IN", "Namaste!"), ("hi-IN", "Shabash!")], tts_func, db))
+        assert stats["cached"] == 2 and stats["generated"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,261 @@
+"""
+Tests for the v10.9.0 streaming-TTS WebSocket pool, against a local stub of the
+Sarvam stream API: reuse, health checks, idle timeout, reconnect backoff.
+"""
+
+import asyncio
+import base64
+import json
+import socket
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from websockets.asyncio.server import serve
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    from app import metrics
+    from app.voice import tts_cache
+    from app.voice.tts_cache import AudioCache
+
+    monkeypatch.setattr(tts_cache, "_instance", AudioCache(tmp_path, 100_000, 100_000))
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class StubSarvam:
+    """Answers each utterance with two audio messages and an end marker."""
+
+    def __init__(self, end_marker=True):
+        self.end_marker = end_marker
+        self.connections = 0
+        self.texts = []
+
+    async def handler(self, ws):
+        self.connections += 1
+        async for message in ws:
+            text = json.loads(message)["text"]
+            self.texts.append(text)
+            for part in (b"mp3-", text.encode()):
+                await ws.send(json.dumps({"type": "audio", "data": {"audio": base64.b64encode(part).decode()}}))
+            if not self.end_marker:
+                return  # old behaviour: one utterance per connection
+            await ws.send(json.dumps({"status": "end"}))
+
+
+def _run(stub, body):
+    """Run body(url, server) against the stub on a free local port."""
+
+    async def main():
+        async with serve(stub.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            return await body(f"ws://127.0.0.1:{port}", server)
+
+    return asyncio.run(main())
+
+
+def _engine(pool):
+    from app.voice.tts import SarvamBulbulTTS
+
+    engine = SarvamBulbulTTS()
+    engine._ws_pool = pool
+    return engine
+
+
+async def _speak(engine, text):
+    return b"".join([chunk async for chunk in engine.synthesize_streaming(text, "hi-IN")])
+
+
+class TestStreamingReuse:
+
+    def test_turns_share_one_connection(self):
+        from app import metrics
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam()
+
+        async def body(url, server):
+            engine = _engine(WSPool(url))
+            return [await _speak(engine, text) for text in ("Pehla sawaal", "Doosra sawaal", "Teesra sawaal")]
+
+        audio = _run(stub, body)
+        assert audio == [b"mp3-Pehla sawaal", b"mp3-Doosra sawaal", b"mp3-Teesra sawaal"]
+        assert stub.connections == 1
+        assert metrics.get("tts_ws.connects") == 1 and metrics.get("tts_ws.reused") == 2
+
+    def test_server_without_end_marker_still_works(self):
+        from app import metrics
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam(end_marker=False)
+
+        async def body(url, server):
+            engine = _engine(WSPool(url))
+            return [await _speak(engine, text) for text in ("Ek", "Do")]
+
+        assert _run(stub, body) == [b"mp3-Ek", b"mp3-Do"]
+        assert stub.connections == 2 and metrics.get("tts_ws.reused") == 0
+
+    def test_warm_pool_skips_handshake_on_first_turn(self):
+        from app import metrics
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam()
+
+        async def body(url, server):
+            engine = _engine(WSPool(url, size=2))
+            assert await engine.warm_stream() == 2
+            await _speak(engine, "Pehla turn")
+
+        _run(stub, body)
+        assert stub.connections == 2
+        assert metrics.get("tts_ws.reused") == 1
+
+    def test_abandoned_stream_is_not_reused(self):
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam()
+
+        async def body(url, server):
+            engine = _engine(WSPool(url))
+            stream = engine.synthesize_streaming("Beech mein chhoda", "hi-IN")
+            await stream.__anext__()
+            await stream.aclose()  # client went away mid-utterance
+            return await _speak(engine, "Naya turn")
+
+        assert _run(stub, body) == b"mp3-Naya turn"
+        assert stub.connections == 2
+
+
+class TestPoolHealth:
+
+    def test_connection_closed_by_server_is_replaced(self):
+        from app import metrics
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam()
+
+        async def body(url, server):
+            pool = WSPool(url)
+            await pool.release(await pool.acquire(), reusable=True)
+            for ws in list(server.connections):
+                await ws.close()
+            await asyncio.sleep(0.05)
+            ws = await pool.acquire()
+            await pool.release(ws, reusable=True)
+
+        _run(stub, body)
+        assert stub.connections == 2
+        assert metrics.get("tts_ws.health_failures") == 1
+
+    def test_long_idle_connection_is_pinged(self):
+        from app import metrics
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam()
+
+        async def body(url, server):
+            pool = WSPool(url, ping_after=0.0)
+            await pool.release(await pool.acquire(), reusable=True)
+            with patch.object(type(pool), "_close") as close:
+                ws = await pool.acquire()
+            assert not close.called
+            await pool.close()
+            return ws
+
+        _run(stub, body)
+        assert metrics.get("tts_ws.reused") == 1 and stub.connections == 1
+
+    def test_idle_timeout_closes_connection(self):
+        from app import metrics
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam()
+
+        async def body(url, server):
+            pool = WSPool(url, idle_timeout=0.05)
+            await pool.release(await pool.acquire(), reusable=True)
+            await asyncio.sleep(0.1)
+            await pool.release(await pool.acquire(), reusable=True)
+            await pool.close()
+
+        _run(stub, body)
+        assert stub.connections == 2
+        assert metrics.get("tts_ws.idle_closed") == 1
+
+    def test_pool_keeps_at_most_size_idle(self):
+        from app.voice.ws_pool import WSPool
+
+        stub = StubSarvam()
+
+        async def body(url, server):
+            pool = WSPool(url, size=1)
+            first, second = await pool.acquire(), await pool.acquire()
+            await pool.release(first, reusable=True)
+            await pool.release(second, reusable=True)
+            stats = pool.stats()
+            await pool.close()
+            return stats
+
+        assert _run(stub, body)["idle"] == 1
+
+
+def _closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"ws://127.0.0.1:{s.getsockname()[1]}"
+
+
+class TestBackoff:
+
+    def test_fails_fast_during_backoff_then_retries(self):
+        from app import metrics
+        from app.voice.ws_pool import WSPool, WSPoolUnavailable
+
+        async def run():
+            pool = WSPool(_closed_port_url(), backoff_base=0.1)
+            with pytest.raises(OSError):
+                await pool.acquire()
+            start = time.perf_counter()
+            with pytest.raises(WSPoolUnavailable):
+                await pool.acquire()
+            assert time.perf_counter() - start < 0.01
+            await asyncio.sleep(0.12)
+            with pytest.raises(OSError):
+                await pool.acquire()  # tried again, and the next backoff doubles
+            assert 0.15 < pool._retry_at - time.monotonic() <= 0.2
+
+        asyncio.run(run())
+        assert metrics.get("tts_ws.connect_failures") == 2
+
+    def test_streaming_falls_back_to_rest(self):
+        from app.voice.ws_pool import WSPool
+
+        async def post(self, url, **kwargs):
+            return httpx.Response(200, json={"audios": [base64.b64encode(b"rest").decode()]},
+                                  request=httpx.Request("POST", url))
+
+        async def run():
+            engine = _engine(WSPool(_closed_port_url()))
+            return [await _speak(engine, text) for text in ("Ek", "Do")]
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            assert asyncio.run(run()) == [b"rest", b"rest"]
+
+    def test_open_circuit_skips_the_pool(self):
+        class NoPool:
+            async def acquire(self):
+                raise AssertionError("an open circuit must not borrow a connection")
+
+        engine = _engine(NoPool())
+        for _ in range(engine._breaker.failure_threshold):
+            engine._breaker.record_failure()
+        assert asyncio.run(_speak(engine, "Ek")) == b""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,222 @@
+"""
+Tests for v10.9.0 turn cancellation: a client that goes away stops the LLM
+stream and in-flight TTS requests, and the savings are counted.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    from app import metrics
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class _Request:
+    """Stands in for starlette's Request: disconnects after `after` polls."""
+
+    def __init__(self, after: int):
+        self.after = after
+        self.polls = 0
+
+    async def is_disconnected(self) -> bool:
+        self.polls += 1
+        return self.polls > self.after
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestDriveTurn:
+
+    def test_relays_events_in_order(self):
+        from app import metrics
+        from app.routers.student import _drive_turn
+
+        async def events():
+            for i in range(3):
+                await asyncio.sleep(0)
+                yield {"type": "text", "content": str(i)}
+
+        async def run():
+            return [e["content"] async for e in _drive_turn(events())]
+
+        assert asyncio.run(run()) == ["0", "1", "2"]
+        assert metrics.get("cancel.turns") == 0
+
+    def test_turn_errors_surface(self):
+        from app.routers.student import _drive_turn
+
+        async def events():
+            yield {"type": "text", "content": "x"}
+            raise ValueError("turn failed")
+
+        async def run():
+            return [e async for e in _drive_turn(events())]
+
+        with pytest.raises(ValueError):
+            asyncio.run(run())
+
+    def test_disconnect_closes_llm_stream(self, monkeypatch):
+        from app import metrics
+        from app.routers import student
+        from app.tutor.llm import MockLLM
+
+        monkeypatch.setattr(student, "_DISCONNECT_POLL_S", 0.01)
+        seen = {"persisted": False}
+
+        async def events():
+            try:
+                yield {"type": "text", "content": "first"}
+                llm = MockLLM(first_token_s=5)
+                async for sentence in student._counted(llm.generate_streaming([]), "cancel.llm_streams"):
+                    yield {"type": "text", "content": sentence}
+            finally:
+                seen["persisted"] = True
+
+        async def run():
+            got = [e async for e in student._sse_events(events(), _Request(after=1))]
+            await _settle()
+            return got
+
+        got = asyncio.run(asyncio.wait_for(run(), 2))
+        assert len(got) == 1 and '"first"' in got[0]
+        assert seen["persisted"]
+        assert metrics.get("cancel.turns") == 1
+        assert metrics.get("cancel.llm_streams") == 1
+
+    def test_consumer_stopping_cancels_pending_tts(self):
+        from app import metrics
+        from app.routers import student
+        from app.voice.streaming import pipeline_tts
+
+        async def sentences():
+            for s in ("Ek.", "Do.", "Teen."):
+                yield s
+
+        async def synth(text):
+            with student._counts_cancel("cancel.tts_requests"):
+                await asyncio.sleep(0 if text == "Ek." else 5)
+            return b"mp3"
+
+        async def events():
+            async for index, _, audio in pipeline_tts(sentences(), synth):
+                yield {"type": "audio_chunk", "index": index, "audio": audio}
+
+        async def run():
+            turn = student._drive_turn(events())
+            first = await turn.__anext__()
+            await turn.aclose()  # e.g. the WebSocket send failed
+            await _settle()
+            return first
+
+        assert asyncio.run(asyncio.wait_for(run(), 2))["index"] == 0
+        assert metrics.get("cancel.turns") == 1
+        assert metrics.get("cancel.tts_requests") == 2
+
+
+    def test_close_waits_for_turn_cleanup(self):
+        from app.routers.student import _drive_turn
+
+        seen = {"persisted": False}
+
+        async def events():
+            try:
+                yield {"type": "text", "content": "first"}
+                await asyncio.sleep(5)
+            finally:
+                await asyncio.sleep(0.05)  # e.g. writing the turn to the DB
+                seen["persisted"] = True
+
+        async def run():
+            turn = _drive_turn(events())
+            await turn.__anext__()
+            await turn.aclose()
+            return seen["persisted"]  # the caller may close the DB session now
+
+        assert asyncio.run(asyncio.wait_for(run(), 2))
+
+
+class TestProviderAbort:
+
+    def test_openai_stream_closed_on_cancel(self):
+        from app.tutor.llm import OpenAIGPT4o
+
+        closed = []
+
+        class HangingStream:
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                await asyncio.sleep(5)
+
+            async def close(self):
+                closed.append(True)
+
+        async def create(**kwargs):
+            return HangingStream()
+
+        llm = OpenAIGPT4o.__new__(OpenAIGPT4o)
+        llm._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        async def run():
+            task = asyncio.create_task(llm.generate_streaming([]).__anext__())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        assert closed == [True]
+
+    def test_sarvam_request_aborted_not_retried(self, isolated_app):
+        from app.voice.tts import SarvamBulbulTTS
+
+        calls = []
+
+        async def hanging_post(self, url, **kwargs):
+            calls.append(url)
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                calls.append("aborted")
+                raise
+
+        async def run():
+            tts = SarvamBulbulTTS()
+            task = asyncio.create_task(tts.synthesize_async("Cancel test sentence unique 8c1", "hi-IN"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with patch.object(httpx.AsyncClient, "post", hanging_post):
+            asyncio.run(run())
+        assert calls[-1] == "aborted" and len(calls) == 2
+
+
+class TestHealthDetail:
+
+    def test_exposes_cancel_counters(self, isolated_app):
+        from fastapi.testclient import TestClient
+        from app import metrics
+        from app.main import app
+
+        metrics.incr("cancel.turns", 2)
+        with TestClient(app) as client:
+            data = client.get("/health/detail").json()
+        assert data["cancelled"]["turns"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -14,6 +14,17 @@ import pytest
 from app.tutor.instruction_builder import _sys
 
 
+@pytest.fixture
+def question_bank(isolated_app):
+    """v10.9.0: A seeded question bank in a throwaway database."""
+    from app.database import SessionLocal, init_db
+    from app.main import _seed_questions
+
+    init_db()
+    with SessionLocal() as db:
+        _seed_questions(db)
+
+
 class TestV10PersonaContent:
     """Tests for v10.1 persona — question-first practice partner."""
 
@@ -315,8 +326,8 @@ class TestV1052GreetingFlow:
         """v10.5.2: TTS should use full enforced text, not first-sentence-only parallel result.
         Verified by checking that the parallel TTS code was removed from stream_response."""
         import inspect
-        from app.routers.student import process_message_stream
-        source = inspect.getsource(process_message_stream)
+        from app.routers.student import _prepare_stream_turn
+        source = inspect.getsource(_prepare_stream_turn)
         assert "TTS_FULL" in source, "stream_response should log TTS_FULL"
         assert "TTS_PARALLEL_HIT" not in source, "parallel first-sentence TTS should be removed"
 
@@ -665,7 +676,7 @@ class TestV1055CriticalFixes:
         user_msg = msgs[-1]["content"]
         assert "Chapter 6" in user_msg
 
-    def test_level_filtering_strict(self):
+    def test_level_filtering_strict(self, question_bank):
         """pick_next_question with level should query for that level.
         When all questions at that level are asked, it re-queries without exclusions."""
         from app.tutor.memory import pick_next_question
@@ -697,8 +708,8 @@ class TestV1055CriticalFixes:
     def test_tts_uses_full_text(self):
         """Streaming endpoint uses final_tts_text (full response), not first sentence."""
         import inspect
-        from app.routers.student import process_message_stream
-        source = inspect.getsource(process_message_stream)
+        from app.routers.student import _prepare_stream_turn
+        source = inspect.getsource(_prepare_stream_turn)
         assert "TTS_FULL" in source
         assert "final_tts_text" in source
 
@@ -713,7 +724,7 @@ class TestV1060CriticalFixes:
         sig = inspect.signature(pick_next_question)
         assert "current_question_id" in sig.parameters
 
-    def test_question_picker_real_db_exclusion(self):
+    def test_question_picker_real_db_exclusion(self, question_bank):
         """pick_next_question returns different question when current is excluded."""
         from app.database import SessionLocal
         from app.tutor.memory import pick_next_question
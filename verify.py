@@ -315,6 +315,15 @@ def _get_auth_token():
         return json.loads(resp.read()).get("token")
 
 
+def _audio_chars(data, field):
+    """Base64 length of a response's audio, fetching it when sent by URL (AUDIO_DELIVERY=url)."""
+    url = data.get(f"{field}_url")
+    if url:
+        with urllib.request.urlopen(f"http://localhost:8000{url}", timeout=10) as resp:
+            return (len(resp.read()) + 2) // 3 * 4
+    return len(data.get(f"{field}_b64", ""))
+
+
 def check_tts_endpoint():
     """Start session and verify greeting has audio."""
     try:
@@ -326,13 +335,13 @@ def check_tts_endpoint():
         )
         with urllib.request.urlopen(req, timeout=30) as resp:
             data = json.loads(resp.read())
-            audio = data.get("greeting_audio_b64", "")
-            if len(audio) > 1000:
-                return True, f"Greeting TTS returned {len(audio)} chars of audio"
-            elif len(audio) == 0:
+            audio_len = _audio_chars(data, "greeting_audio")
+            if audio_len > 1000:
+                return True, f"Greeting TTS returned {audio_len} chars of audio"
+            elif audio_len == 0:
                 return False, "TTS returned no audio -- check TTS_PROVIDER in .env"
             else:
-                return False, f"TTS returned only {len(audio)} chars -- likely error"
+                return False, f"TTS returned only {audio_len} chars -- likely error"
     except urllib.error.URLError:
         return False, "Server not running on localhost:8000 -- start it first"
     except Exception as e:
@@ -369,9 +378,9 @@ def check_tts_second_call():
             )
             with urllib.request.urlopen(msg_req, timeout=30) as resp:
                 data = json.loads(resp.read())
-                audio = data.get("didi_audio_b64", "")
-                if len(audio) < 1000:
-                    return False, f"Call {i}: Only {len(audio)} chars -- TTS failing on consecutive calls"
+                audio_len = _audio_chars(data, "didi_audio")
+                if audio_len < 1000:
+                    return False, f"Call {i}: Only {audio_len} chars -- TTS failing on consecutive calls"
 
         return True, "Both TTS calls returned audio -- no single-use bug"
     except urllib.error.URLError: